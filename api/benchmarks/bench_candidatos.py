@@ -0,0 +1,131 @@
+"""
+Green Jobs Brasil - Two-Stage Ranking Benchmark
+Seeds a SQLite database (vagas and profissionais with the ODS masks and the
+skill index), then compares the exhaustive ranking (every active row scored
+with calcular_match) with the two-stage ranking for several candidate
+budgets: latency per request and recall@k against the exhaustive top k.
+Use it to pick MATCH_CANDIDATE_BUDGET.
+
+Usage:
+    python api/benchmarks/bench_candidatos.py --profissionais 100000 --vagas 20000
+    python api/benchmarks/bench_candidatos.py --budgets 50,100,300,1000 --k 50
+"""
+
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from api.benchmarks.bench_matching import create_profissionais, create_vagas  # noqa: E402
+from api.services.habilidades import reconstruir_habilidades  # noqa: E402
+from api.services.match_candidatos import (  # noqa: E402
+    medir_recall, ranquear_exaustivo, ranquear_profissionais, ranquear_vagas,
+)
+
+MIGRATIONS = ROOT_DIR / "db" / "migrations"
+# nivel_experiencia values allowed by the vagas_esg CHECK constraint
+VAGA_NIVEIS = ("junior", "pleno", "senior", "especialista")
+
+PROFISSIONAIS_DDL = """
+CREATE TABLE profissionais_esg (
+    id INTEGER PRIMARY KEY, nome_completo TEXT, anos_experiencia_esg INTEGER, localizacao_cidade TEXT,
+    localizacao_uf TEXT, aceita_remoto BOOLEAN, disponivel_mudanca BOOLEAN, habilidades_esg TEXT,
+    ods_interesse TEXT, ods_experiencia TEXT, nivel_desejado TEXT, pretensao_salarial_min REAL,
+    pretensao_salarial_max REAL, status TEXT DEFAULT 'ativo', criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def seed_database(path: Path, profissionais: int, vagas: int, seed: int) -> None:
+    """Serving schema, migrations 001/003-006 and synthetic rows shaped like bench_matching's."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript((ROOT_DIR / "db" / "schema_sqlite.sql").read_text(encoding="utf-8"))
+    conn.executescript((MIGRATIONS / "001_create_vagas_esg.sql").read_text(encoding="utf-8"))
+    conn.execute(PROFISSIONAIS_DDL)
+    for migration in ("003_add_ods_mask.sql", "004_add_ods_mask_profissionais.sql", "005_create_habilidades.sql",
+                      "006_create_matching_versao.sql"):
+        conn.executescript((MIGRATIONS / migration).read_text(encoding="utf-8"))
+
+    prof_columns = [c for c in create_profissionais(1, rng)[0] if c != 'id']
+    conn.executemany(
+        f"INSERT INTO profissionais_esg ({', '.join(prof_columns)}) VALUES ({', '.join('?' * len(prof_columns))})",
+        [tuple(row[c] for c in prof_columns) for row in create_profissionais(profissionais, rng)]
+    )
+    vagas_rows = create_vagas(vagas, rng)
+    for row in vagas_rows:
+        if row['nivel_experiencia'] not in VAGA_NIVEIS:
+            row['nivel_experiencia'] = rng.choice(VAGA_NIVEIS)
+    vaga_columns = [c for c in vagas_rows[0] if c != 'id']
+    conn.executemany(
+        f"INSERT INTO vagas_esg (cnpj, titulo, {', '.join(vaga_columns)}) "
+        f"VALUES ('00000000000191', 'Vaga', {', '.join('?' * len(vaga_columns))})",
+        [tuple(row[c] for c in vaga_columns) for row in vagas_rows]
+    )
+    conn.commit()
+    reconstruir_habilidades(conn)
+    conn.close()
+
+
+def rows(conn: sqlite3.Connection, query: str) -> list:
+    conn.row_factory = sqlite3.Row
+    result = [dict(row) for row in conn.execute(query)]
+    conn.row_factory = None
+    return result
+
+
+def timed(fn, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profissionais", type=int, default=100_000, help="Active profissionais")
+    parser.add_argument("--vagas", type=int, default=20_000, help="Active vagas")
+    parser.add_argument("--sample", type=int, default=10, help="Vagas and profissionais ranked per budget")
+    parser.add_argument("--budgets", default="50,100,300,1000", help="Candidate budgets to compare")
+    parser.add_argument("--k", type=int, default=50, help="Top k compared with the exhaustive ranking")
+    parser.add_argument("--seed", type=int, default=42, help="Generator seed")
+    args = parser.parse_args()
+    budgets = [int(b) for b in args.budgets.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        start = time.perf_counter()
+        seed_database(path, args.profissionais, args.vagas, args.seed)
+        print(f"seed          : {time.perf_counter() - start:8.1f}s  "
+              f"({args.profissionais:,} profissionais, {args.vagas:,} vagas)")
+
+        conn = sqlite3.connect(path)
+        rng = random.Random(args.seed)
+        sample = {
+            'profissional': rng.sample(rows(conn, "SELECT * FROM vagas_esg WHERE status = 'ativa'"), args.sample),
+            'vaga': rng.sample(rows(conn, "SELECT * FROM profissionais_esg WHERE status = 'ativo'"), args.sample),
+        }
+        two_stage = {'profissional': ranquear_profissionais, 'vaga': ranquear_vagas}
+        ranquear_profissionais(conn, sample['profissional'][0])  # loads the in-memory skill index
+
+        for tipo, registros in sample.items():
+            print(f"\n{tipo} ranking (top {args.k}, min_score 40)")
+            exhaustive = [timed(ranquear_exaustivo, conn, tipo, r, 40.0, args.k) for r in registros]
+            print(f"  exhaustive   : {statistics.mean(exhaustive) * 1000:9.1f} ms/request")
+            for budget in budgets:
+                latency = [timed(two_stage[tipo], conn, r, 40.0, args.k, budget) for r in registros]
+                recall = [medir_recall(conn, tipo, r, budget, args.k) for r in registros]
+                print(f"  budget {budget:6d}: {statistics.mean(latency) * 1000:9.1f} ms/request  "
+                      f"recall@{args.k} mean {statistics.mean(recall):.3f} min {min(recall):.3f}")
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Green Jobs Brasil - Materialized match_scores Benchmark
+Seeds the same database as bench_candidatos, applies migration 007 and
+measures the three costs of the materialized top-K table: the initial fill
+(draining the queue the migration leaves behind), the incremental refresh
+after a vaga or profissional edit (including the counterparts it pushes
+back into the queue), and the read latency compared with the two-stage and
+exhaustive rankings.
+
+Usage:
+    python api/benchmarks/bench_match_scores.py --profissionais 20000 --vagas 4000
+    python api/benchmarks/bench_match_scores.py --top-k 100 --edits 20 --k 50
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from api.benchmarks.bench_candidatos import MIGRATIONS, rows, seed_database, timed  # noqa: E402
+from api.services.match_candidatos import ranquear_exaustivo, ranquear_profissionais, ranquear_vagas  # noqa: E402
+from api.services.match_scores import ler_ranking, processar_pendentes  # noqa: E402
+
+SKILLS = ["ISO 14001", "GRI", "SASB", "LCA", "Energia Solar", "Compliance", "TCFD", "Carbono"]
+
+
+def drain(conn: sqlite3.Connection, top_k: int) -> int:
+    """Process the whole queue; returns how many entities were refreshed."""
+    total = 0
+    while True:
+        processed = processar_pendentes(conn, lote=500, top_k=top_k)
+        if not processed:
+            return total
+        total += processed
+
+
+def edit(conn: sqlite3.Connection, tipo: str, entity_id: int, rng: random.Random, top_k: int) -> tuple:
+    """Change the skills of one row and refresh; returns (seconds, entities refreshed)."""
+    table, column = (("vagas_esg", "habilidades_requeridas") if tipo == 'vaga'
+                     else ("profissionais_esg", "habilidades_esg"))
+    conn.execute(f"UPDATE {table} SET {column} = ? WHERE id = ?",
+                 (json.dumps(rng.sample(SKILLS, rng.randint(1, 4))), entity_id))
+    conn.commit()
+    start = time.perf_counter()
+    refreshed = drain(conn, top_k)
+    return time.perf_counter() - start, refreshed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profissionais", type=int, default=20_000, help="Active profissionais")
+    parser.add_argument("--vagas", type=int, default=4_000, help="Active vagas")
+    parser.add_argument("--top-k", type=int, default=100, help="Pairs kept per vaga/profissional")
+    parser.add_argument("--edits", type=int, default=20, help="Vagas and profissionais edited")
+    parser.add_argument("--sample", type=int, default=20, help="Vagas and profissionais ranked")
+    parser.add_argument("--k", type=int, default=50, help="Top k read per request")
+    parser.add_argument("--seed", type=int, default=42, help="Generator seed")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        start = time.perf_counter()
+        seed_database(path, args.profissionais, args.vagas, args.seed)
+        print(f"seed          : {time.perf_counter() - start:8.1f}s  "
+              f"({args.profissionais:,} profissionais, {args.vagas:,} vagas)")
+
+        conn = sqlite3.connect(path)
+        conn.executescript((MIGRATIONS / "007_create_match_scores.sql").read_text(encoding="utf-8"))
+        start = time.perf_counter()
+        drain(conn, args.top_k)
+        stored = conn.execute("SELECT COUNT(*) FROM match_scores").fetchone()[0]
+        print(f"initial fill  : {time.perf_counter() - start:8.1f}s  "
+              f"({stored:,} pairs, {stored / (args.profissionais * args.vagas):.2%} of the matrix)")
+
+        rng = random.Random(args.seed)
+        vagas = rows(conn, "SELECT * FROM vagas_esg WHERE status = 'ativa'")
+        profissionais = rows(conn, "SELECT * FROM profissionais_esg WHERE status = 'ativo'")
+
+        print("\nincremental refresh (one skills edit, queue drained)")
+        for tipo, pool in (('vaga', vagas), ('profissional', profissionais)):
+            results = [edit(conn, tipo, row['id'], rng, args.top_k) for row in rng.sample(pool, args.edits)]
+            latency = [seconds for seconds, _ in results]
+            refreshed = [count for _, count in results]
+            print(f"  {tipo:12s} : {statistics.mean(latency) * 1000:9.1f} ms/edit  "
+                  f"max {max(latency) * 1000:7.1f} ms  entities refreshed mean {statistics.mean(refreshed):.2f}")
+
+        vagas = rows(conn, "SELECT * FROM vagas_esg WHERE status = 'ativa'")
+        profissionais = rows(conn, "SELECT * FROM profissionais_esg WHERE status = 'ativo'")
+        sample = {'profissional': rng.sample(vagas, args.sample), 'vaga': rng.sample(profissionais, args.sample)}
+        two_stage = {'profissional': ranquear_profissionais, 'vaga': ranquear_vagas}
+        ranquear_profissionais(conn, sample['profissional'][0])  # loads the in-memory skill index
+
+        for tipo, registros in sample.items():
+            print(f"\n{tipo} ranking (top {args.k}, min_score 40)")
+            stored = [timed(ler_ranking, conn, tipo, r['id'], 40.0, args.k, args.top_k) for r in registros]
+            misses = sum(ler_ranking(conn, tipo, r['id'], 40.0, args.k, args.top_k) is None for r in registros)
+            print(f"  match_scores : {statistics.mean(stored) * 1000:9.2f} ms/request  "
+                  f"({misses} fell back to two-stage)")
+            latency = [timed(two_stage[tipo], conn, r, 40.0, args.k) for r in registros]
+            print(f"  two-stage    : {statistics.mean(latency) * 1000:9.2f} ms/request")
+            exhaustive = [timed(ranquear_exaustivo, conn, tipo, r, 40.0, args.k) for r in registros]
+            print(f"  exhaustive   : {statistics.mean(exhaustive) * 1000:9.2f} ms/request")
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Green Jobs Brasil - Matching Benchmark
+Compares MatchCalculator.calcular_match called per pair with the NumPy batch
+engine (one vaga x N profissionais), and checks the scores are identical.
+
+Usage:
+    python api/benchmarks/bench_matching.py --candidates 100000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from api.services.match_batch import ProfissionaisBlock, pontuar_profissionais  # noqa: E402
+from api.services.match_calculator import MatchCalculator  # noqa: E402
+
+SKILLS = ["ISO 14001", "GRI", "SASB", "TCFD", "Carbon Footprint", "LCA", "ESG Reporting", "Energia Solar",
+          "Gestão de Resíduos", "Compliance Ambiental", "Economia Circular", "Due Diligence ESG"]
+NIVEIS = ["estagio", "junior", "pleno", "senior", "especialista", "gerencial"]
+UFS = ["SP", "RJ", "MG", "PR", "RS", "BA", "PE", "SC"]
+CIDADES = ["Capital", "Interior", "Litoral"]
+
+
+def create_profissionais(count: int, rng: random.Random) -> list:
+    """Synthetic rows shaped like profissionais_esg (JSON columns as text)."""
+    rows = []
+    for i in range(count):
+        salary = rng.choice([None, 3000, 5000, 8000, 12000, 18000])
+        experiencia = {str(o): rng.randint(0, 4) for o in rng.sample(range(1, 18), rng.randint(0, 3))}
+        rows.append({
+            'id': i,
+            'ods_interesse': json.dumps(rng.sample(range(1, 18), rng.randint(1, 5))),
+            'ods_experiencia': json.dumps(experiencia),
+            'habilidades_esg': json.dumps(rng.sample(SKILLS, rng.randint(1, 6))),
+            'nivel_desejado': rng.choice(NIVEIS),
+            'anos_experiencia_esg': rng.randint(0, 15),
+            'localizacao_uf': rng.choice(UFS),
+            'localizacao_cidade': rng.choice(CIDADES),
+            'aceita_remoto': rng.randint(0, 1),
+            'disponivel_mudanca': rng.randint(0, 1),
+            'pretensao_salarial_min': salary,
+            'pretensao_salarial_max': salary and salary * 1.5,
+        })
+    return rows
+
+
+def create_vagas(count: int, rng: random.Random) -> list:
+    rows = []
+    for i in range(count):
+        salary = rng.choice([None, 4000, 7000, 10000, 15000])
+        rows.append({
+            'id': i,
+            'ods_tags': json.dumps(rng.sample(range(1, 18), rng.randint(1, 4))),
+            'habilidades_requeridas': json.dumps(rng.sample(SKILLS, rng.randint(1, 5))),
+            'nivel_experiencia': rng.choice(NIVEIS),
+            'localizacao_uf': rng.choice(UFS),
+            'localizacao_cidade': rng.choice(CIDADES),
+            'remoto': rng.randint(0, 1),
+            'salario_min': salary,
+            'salario_max': salary and salary * 1.4,
+        })
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=100_000, help="Profissionais in the block")
+    parser.add_argument("--vagas", type=int, default=5, help="Vagas scored against the block")
+    parser.add_argument("--seed", type=int, default=42, help="Generator seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    profissionais = create_profissionais(args.candidates, rng)
+    vagas = create_vagas(args.vagas, rng)
+    calc = MatchCalculator()
+
+    start = time.perf_counter()
+    bloco = ProfissionaisBlock(profissionais, calc)
+    build_seconds = time.perf_counter() - start
+    print(f"block build   : {build_seconds:8.3f}s  (once per candidate set)")
+
+    batch_seconds = scalar_seconds = 0.0
+    for vaga in vagas:
+        start = time.perf_counter()
+        scores = pontuar_profissionais(vaga, bloco, calc)
+        batch_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        scalar = [calc.calcular_match(vaga, prof)['score_total'] for prof in profissionais]
+        scalar_seconds += time.perf_counter() - start
+
+        mismatches = sum(round(a, 2) != b for a, b in zip(scores['total'].tolist(), scalar))
+        if mismatches:
+            print(f"vaga {vaga['id']}: {mismatches} score mismatches")
+            return 1
+
+    start = time.perf_counter()
+    for vaga in vagas:
+        calc.rankear_candidatos(vaga, bloco, min_score=40.0, limite=50)
+    rank_seconds = time.perf_counter() - start
+
+    per_vaga = len(vagas)
+    print(f"calcular_match: {scalar_seconds / per_vaga:8.3f}s per vaga  ({args.candidates * per_vaga / scalar_seconds:,.0f} pairs/s)")
+    print(f"batch engine  : {batch_seconds / per_vaga:8.3f}s per vaga  ({args.candidates * per_vaga / batch_seconds:,.0f} pairs/s)")
+    print(f"rankear top 50: {rank_seconds / per_vaga:8.3f}s per vaga")
+    print(f"speedup       : {scalar_seconds / batch_seconds:8.1f}x  (scores identical)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
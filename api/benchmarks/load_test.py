@@ -0,0 +1,197 @@
+"""
+Green Jobs Brasil - API Load Test
+Serves the vagas router from a seeded SQLite database in a uvicorn
+subprocess and drives it with concurrent keep-alive clients, reporting
+p50/p95/p99 latency per endpoint. Most requests are cheap lookups; a share
+goes to the aggregate stats endpoint, so a slow query on the event loop
+shows up as tail latency on everything else. Clients pause between requests
+(exponential think time) so the server is measured below saturation.
+
+Usage:
+    python api/benchmarks/load_test.py --clients 100 --requests 20000
+    python api/benchmarks/load_test.py --vagas 200000 --slow-share 0.01 --think-ms 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+API_DIR = BENCH_DIR.parent
+REPO_DIR = API_DIR.parent
+
+FAST_PATH = "/api/vagas/{id}"
+SLOW_PATH = "/api/vagas/stats/resumo"
+
+
+def seed_database(path: Path, vagas: int, seed: int) -> None:
+    """Fresh database with the serving schema, the vagas migrations and ``vagas`` synthetic jobs."""
+    path.unlink(missing_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript((REPO_DIR / "db" / "schema_sqlite.sql").read_text(encoding="utf-8"))
+    for migration in ("001_create_vagas_esg.sql", "003_add_ods_mask.sql"):
+        conn.executescript((REPO_DIR / "db" / "migrations" / migration).read_text(encoding="utf-8"))
+    rng = random.Random(seed)
+    conn.executemany(
+        "INSERT INTO vagas_esg (cnpj, titulo, ods_tags, habilidades_requeridas, nivel_experiencia, "
+        "localizacao_uf, remoto, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (f"{i % 5000:014d}", f"Vaga {i}", json.dumps(rng.sample(range(1, 18), 3)),
+             json.dumps(["ISO 14001", "GRI"]), rng.choice(["junior", "pleno", "senior"]),
+             rng.choice(["MG", "RJ", "SP"]), rng.random() < 0.3, "ativa" if rng.random() < 0.8 else "pausada")
+            for i in range(vagas)
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+
+def create_app():
+    """FastAPI app with the vagas router, as sqlite_api_clean mounts routers (api/ on sys.path)."""
+    sys.path.insert(0, str(API_DIR))
+    from fastapi import FastAPI
+    from routers import vagas
+
+    app = FastAPI()
+    app.include_router(vagas.router)
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_path: Path, port: int) -> subprocess.Popen:
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "load_test:create_app", "--factory",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=BENCH_DIR, env=env
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+async def client(port: int, plan: List[Tuple[float, str]], latencies: Dict[str, List[float]]) -> None:
+    """One keep-alive HTTP/1.1 connection; each request follows its think-time pause."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for pause, path in plan:
+            await asyncio.sleep(pause)
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            await writer.drain()
+            status = (await reader.readline()).split()[1]
+            length = 0
+            while (line := await reader.readline()) != b"\r\n":
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            if status != b"200":
+                raise RuntimeError(f"{path} returned {status.decode()}")
+            endpoint = SLOW_PATH if path == SLOW_PATH else FAST_PATH
+            latencies[endpoint].append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_load(port: int, clients: int, requests: int, slow_share: float, think_ms: float,
+                   vagas: int, seed: int) -> Dict:
+    rng = random.Random(seed)
+    latencies: Dict[str, List[float]] = {FAST_PATH: [], SLOW_PATH: []}
+    per_client = requests // clients
+    plans = [
+        [
+            (rng.expovariate(1000 / think_ms) if think_ms else 0,
+             SLOW_PATH if rng.random() < slow_share else f"/api/vagas/{rng.randint(1, vagas)}")
+            for _ in range(per_client)
+        ]
+        for _ in range(clients)
+    ]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, plan, latencies) for plan in plans))
+    wall = time.perf_counter() - start
+
+    every = latencies[FAST_PATH] + latencies[SLOW_PATH]
+    return {
+        'clients': clients,
+        'think_ms': think_ms,
+        'slow_share': slow_share,
+        'requests': len(every),
+        'wall_seconds': round(wall, 2),
+        'requests_per_second': round(len(every) / wall),
+        'latency_ms': {
+            name: {
+                'count': len(values),
+                'p50': round(percentile(values, 0.50) * 1000, 1),
+                'p95': round(percentile(values, 0.95) * 1000, 1),
+                'p99': round(percentile(values, 0.99) * 1000, 1),
+            }
+            for name, values in [('all', every), *latencies.items()] if values
+        },
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100, help="Concurrent keep-alive clients")
+    parser.add_argument("--requests", type=int, default=20000, help="Total requests")
+    parser.add_argument("--slow-share", type=float, default=0.005, help="Share of requests to the stats endpoint")
+    parser.add_argument("--think-ms", type=float, default=250, help="Mean pause between a client's requests (0 = back to back)")
+    parser.add_argument("--vagas", type=int, default=100000, help="Jobs seeded into the database")
+    parser.add_argument("--data-dir", type=Path, default=Path("data/bench"), help="Where the database and results go")
+    parser.add_argument("--seed", type=int, default=42, help="Generator seed")
+    args = parser.parse_args()
+
+    args.data_dir.mkdir(parents=True, exist_ok=True)
+    db_path = (args.data_dir / "load_test.db").resolve()
+    seed_database(db_path, args.vagas, args.seed)
+
+    port = free_port()
+    server = start_server(db_path, port)
+    try:
+        result = asyncio.run(run_load(port, args.clients, args.requests, args.slow_share, args.think_ms,
+                                     args.vagas, args.seed))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{result['requests']:,} requests from {result['clients']} clients in {result['wall_seconds']}s "
+          f"({result['requests_per_second']:,} req/s)")
+    print(f"{'endpoint':<28}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in result['latency_ms'].items():
+        print(f"{name:<28}{stats['count']:>8}{stats['p50']:>10}{stats['p95']:>10}{stats['p99']:>10}")
+
+    output = args.data_dir / "load_test_results.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,52 +1,361 @@
 #!/usr/bin/env python3
 """
 Módulo de banco de dados para API - PostgreSQL
+Conexões vêm de um pool limitado por processo: get_db() empresta uma conexão
+e conn.close() a devolve ao pool em vez de fechá-la. Rotas async rodam o acesso
+ao banco num executor dedicado (db_thread), sem bloquear o event loop.
+No SQLite, toda conexão recebe o perfil de produção (WAL e pragmas) e leituras
+(get_db(readonly=True)) usam um pool próprio, separado do único escritor.
 """
 
+import asyncio
+import functools
 import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Tuple
+
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from typing import Optional
+
+# Tamanho máximo do pool e espera por uma conexão livre
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Conexões ociosas há mais tempo que isso são testadas (SELECT 1) antes do empréstimo
+POOL_HEALTH_CHECK_SECONDS = float(os.getenv("DB_POOL_HEALTH_CHECK_SECONDS", "30"))
+# Conexões mais antigas que isso são descartadas na devolução
+POOL_RECYCLE_SECONDS = float(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+# Threads do executor de banco; igual ao pool, nenhuma thread fica esperando conexão
+DB_EXECUTOR_THREADS = int(os.getenv("DB_EXECUTOR_THREADS", str(POOL_SIZE)))
+
+# Perfil SQLite: espera por lock, cache de páginas (KiB) e janela de mmap (bytes)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Um escritor por processo: escritas fazem fila no pool em vez de disputar o lock do arquivo
+SQLITE_WRITER_POOL_SIZE = 1
+
+
+class PoolTimeout(Exception):
+    """Nenhuma conexão foi liberada dentro do tempo de espera do pool"""
+
 
 def get_database_url() -> str:
     """Obter URL do banco de dados (PostgreSQL no Render, SQLite local)"""
     return os.getenv("DATABASE_URL", "sqlite:///gjb_dev.db")
 
-def get_db():
-    """Obter conexão com banco de dados PostgreSQL"""
-    database_url = get_database_url()
-    
+
+def is_postgres(database_url: str) -> bool:
+    return database_url.startswith("postgres://") or database_url.startswith("postgresql://")
+
+
+def _apply_sqlite_profile(conn: sqlite3.Connection, readonly: bool = False) -> None:
+    """
+    Perfil de produção do SQLite, aplicado a cada conexão aberta
+
+    WAL deixa leitores e o escritor trabalharem ao mesmo tempo (e fica gravado no
+    arquivo); com WAL, synchronous=NORMAL só sincroniza o disco nos checkpoints.
+    Conexões de leitura recebem query_only e recusam qualquer escrita.
+    """
+    conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+
+
+def _connect(database_url: str, readonly: bool = False):
+    """Abre uma conexão nova (sem pool)"""
     # Se for PostgreSQL (Render)
-    if database_url.startswith("postgres://") or database_url.startswith("postgresql://"):
+    if is_postgres(database_url):
         # Render usa postgres://, mas psycopg2 precisa de postgresql://
         if database_url.startswith("postgres://"):
             database_url = database_url.replace("postgres://", "postgresql://", 1)
-        
-        conn = psycopg2.connect(database_url, cursor_factory=RealDictCursor)
-        return conn
-    
+        return psycopg2.connect(database_url, cursor_factory=RealDictCursor)
+
     # Fallback para SQLite local (desenvolvimento)
-    else:
-        import sqlite3
-        conn = sqlite3.connect("gjb_dev.db")
-        conn.row_factory = sqlite3.Row
-        return conn
+    path = database_url[len("sqlite:///"):] if database_url.startswith("sqlite:///") else "gjb_dev.db"
+    # A conexão passa de thread em thread entre empréstimos, mas nunca é usada por duas ao mesmo tempo
+    conn = sqlite3.connect(path or "gjb_dev.db", check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    conn.row_factory = sqlite3.Row
+    _apply_sqlite_profile(conn, readonly)
+    return conn
+
+
+class PooledConnection:
+    """
+    Conexão emprestada do pool
+
+    Repassa tudo para a conexão real; close() devolve a conexão ao pool.
+    Uma conexão esquecida sem close() volta ao pool quando é coletada.
+    """
+
+    def __init__(self, pool: "ConnectionPool", raw, created_at: float):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_raw", raw)
+        object.__setattr__(self, "_created_at", created_at)
+
+    def __getattr__(self, name):
+        raw = self._raw
+        if raw is None:
+            raise RuntimeError("Conexão já devolvida ao pool")
+        return getattr(raw, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._raw, name, value)
+
+    def close(self) -> None:
+        raw = self._raw
+        if raw is not None:
+            object.__setattr__(self, "_raw", None)
+            self._pool._release(raw, self._created_at)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Pool limitado de conexões para um banco
+
+    No máximo ``max_size`` conexões existem ao mesmo tempo; quem pede com o
+    pool esgotado espera até ``timeout`` segundos e recebe PoolTimeout.
+    """
+
+    def __init__(self, connect: Callable, max_size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT,
+                 health_check_seconds: float = POOL_HEALTH_CHECK_SECONDS,
+                 recycle_seconds: float = POOL_RECYCLE_SECONDS):
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_seconds = health_check_seconds
+        self.recycle_seconds = recycle_seconds
+        self._cond = threading.Condition()
+        # (conexão, criada_em, devolvida_em); a mais recente no fim
+        self._idle: List[tuple] = []
+        self._size = 0
+        self._stats = {
+            "checkouts": 0, "created": 0, "discarded": 0, "health_check_failures": 0,
+            "waits": 0, "wait_seconds": 0.0, "timeouts": 0,
+        }
+
+    def acquire(self) -> PooledConnection:
+        """Empresta uma conexão saudável, criando uma nova se houver vaga no pool"""
+        start = time.monotonic()
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                self._stats["waits"] += 1
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if not self._idle and self._size >= self.max_size:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"Nenhuma conexão livre em {self.timeout:.0f}s (pool de {self.max_size})")
+            self._stats["wait_seconds"] += time.monotonic() - start
+            self._stats["checkouts"] += 1
+            idle = self._idle.pop() if self._idle else None
+            if idle is None:
+                self._size += 1
+
+        if idle is not None:
+            raw, created_at, released_at = idle
+            if time.monotonic() - released_at < self.health_check_seconds or self._healthy(raw):
+                return PooledConnection(self, raw, created_at)
+            self._discard(raw, reserve=True)
+
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["created"] += 1
+        return PooledConnection(self, raw, time.monotonic())
+
+    def _healthy(self, raw) -> bool:
+        try:
+            cursor = raw.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            return False
+
+    def _release(self, raw, created_at: float) -> None:
+        """Devolve uma conexão: desfaz transação pendente e restaura o estado padrão"""
+        now = time.monotonic()
+        if now - created_at >= self.recycle_seconds:
+            self._discard(raw)
+            return
+        try:
+            raw.rollback()
+            if isinstance(raw, sqlite3.Connection):
+                raw.row_factory = sqlite3.Row
+        except Exception:
+            self._discard(raw)
+            return
+        with self._cond:
+            self._idle.append((raw, created_at, now))
+            self._cond.notify()
+
+    def _discard(self, raw, reserve: bool = False) -> None:
+        """Fecha uma conexão; com ``reserve`` a vaga fica com quem vai abrir a substituta"""
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["discarded"] += 1
+            if not reserve:
+                self._size -= 1
+                self._cond.notify()
+
+    def stats(self) -> Dict:
+        """Métricas do pool: tamanho, conexões em uso e contadores acumulados"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+            })
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        return stats
+
+    def close(self) -> None:
+        """Fecha as conexões ociosas (as emprestadas são fechadas ao voltar)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self.recycle_seconds = 0
+        for raw, _, _ in idle:
+            try:
+                raw.close()
+            except Exception:
+                pass
+
+
+_pools: Dict[Tuple[str, bool], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(readonly: bool = False) -> ConnectionPool:
+    """
+    Pool do banco configurado em DATABASE_URL (por URL, modo e processo)
+
+    SQLite: pool de leitura com POOL_SIZE conexões query_only e pool de escrita
+    com uma conexão só. PostgreSQL já isola leitores do escritor (MVCC) e usa um
+    único pool para os dois modos.
+    """
+    database_url = get_database_url()
+    readonly = readonly and not is_postgres(database_url)
+    key = (database_url, readonly)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                max_size = POOL_SIZE if readonly or is_postgres(database_url) else SQLITE_WRITER_POOL_SIZE
+                pool = ConnectionPool(lambda: _connect(database_url, readonly), max_size=max_size)
+                _pools[key] = pool
+    return pool
+
+
+def get_db(readonly: bool = False):
+    """
+    Obter conexão do pool (PostgreSQL ou SQLite); conn.close() devolve ao pool
+
+    Use ``readonly=True`` em quem só lê: no SQLite essas conexões não esperam
+    pelo escritor nem o bloqueiam.
+    """
+    return get_pool(readonly).acquire()
+
+
+def db_connection() -> Iterator[PooledConnection]:
+    """
+    Dependência FastAPI: uma conexão por requisição, devolvida ao fim dela
+
+    Uso: ``conn = Depends(db_connection)``
+    """
+    conn = get_db()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def db_read_connection() -> Iterator[PooledConnection]:
+    """Como db_connection, com uma conexão do pool de leitura"""
+    conn = get_db(readonly=True)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_THREADS, thread_name_prefix="gjb-db")
+
+
+async def run_db(func: Callable, *args, **kwargs):
+    """
+    Executa uma função bloqueante de banco no executor dedicado
+
+    No máximo DB_EXECUTOR_THREADS chamadas rodam ao mesmo tempo; as demais
+    esperam na fila do executor sem ocupar o event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+def db_thread(func: Callable) -> Callable:
+    """
+    Decorador para rotas e dependências FastAPI com acesso bloqueante ao banco
+
+    A função síncrona vira uma corrotina que roda em run_db; o FastAPI continua
+    lendo os parâmetros da assinatura original. ``rota.sync`` chama a versão
+    síncrona (de dentro de outra função já no executor).
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_db(func, *args, **kwargs)
+
+    wrapper.sync = func
+    return wrapper
+
+
+def pool_stats(readonly: bool = False) -> Dict:
+    """Métricas do pool (de escrita ou de leitura) do banco configurado"""
+    return get_pool(readonly).stats()
+
 
 def test_connection():
     """Testar conexão com banco de dados"""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
-        
+
         database_url = get_database_url()
         if database_url.startswith("postgres"):
             cursor.execute("SELECT COUNT(*) as count FROM information_schema.tables WHERE table_schema = 'public'")
         else:
             cursor.execute("SELECT COUNT(*) as count FROM sqlite_master WHERE type='table'")
-        
+
         result = cursor.fetchone()
         count = result['count'] if isinstance(result, dict) else result[0]
         conn.close()
         return True, f"Conexão OK - {count} tabelas encontradas"
     except Exception as e:
-        return False, f"Erro de conexão: {str(e)}"
\ No newline at end of file
+        return False, f"Erro de conexão: {str(e)}"
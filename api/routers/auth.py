@@ -2,7 +2,19 @@
 Router de Autenticação
 Endpoints para registro, login, logout e gerenciamento de usuários
 """
-from api.db import get_db
+import sqlite3
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+
+from api.db import db_thread, get_db
+from api.services.auth import (
+    Token, UserCreate, UserInDB, UserLogin, UserResponse,
+    create_tokens_for_user, decode_token, get_password_hash,
+    validate_password_strength, validate_user_type, verify_password,
+)
 
 router = APIRouter(prefix="/api/auth", tags=["Autenticação"])
 
@@ -15,7 +27,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 def get_user_by_email(email: str) -> Optional[UserInDB]:
     """Busca usuário por email"""
-    conn = get_db()
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -46,7 +58,7 @@ def get_user_by_email(email: str) -> Optional[UserInDB]:
 
 def get_user_by_id(user_id: int) -> Optional[UserInDB]:
     """Busca usuário por ID"""
-    conn = get_db()
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -128,7 +140,8 @@ def log_auth_action(user_id: int, action: str, ip_address: str = None, user_agen
 # DEPENDENCY: GET CURRENT USER
 # ============================================
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
+@db_thread
+def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
     """
     Dependency para obter usuário atual baseado no token JWT
     Usado em rotas protegidas
@@ -172,7 +185,8 @@ async def get_current_active_user(current_user: UserInDB = Depends(get_current_u
 # ============================================
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate):
+@db_thread
+def register(user_data: UserCreate):
     """
     Registra novo usuário no sistema
     
@@ -226,7 +240,8 @@ async def register(user_data: UserCreate):
 
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+@db_thread
+def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """
     Login com email e senha
     
@@ -269,7 +284,8 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 
 
 @router.post("/login-json", response_model=Token)
-async def login_json(credentials: UserLogin):
+@db_thread
+def login_json(credentials: UserLogin):
     """
     Login alternativo com JSON (email/password)
     
@@ -316,7 +332,8 @@ async def get_me(current_user: UserInDB = Depends(get_current_active_user)):
 
 
 @router.post("/logout")
-async def logout(current_user: UserInDB = Depends(get_current_active_user)):
+@db_thread
+def logout(current_user: UserInDB = Depends(get_current_active_user)):
     """
     Logout do usuário
     
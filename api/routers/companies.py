@@ -8,6 +8,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func, text
 from api.db import get_db
+from api.services.parquet_engine import get_parquet_engine
 from api.models import EmpresasVerdes, CnaeGreen, EmpresaCnae
 from api.schemas import (
     EmpresaVerdeResponse, 
@@ -27,6 +28,8 @@ async def listar_empresas(
     porte: Optional[PorteEnum] = Query(None, description="Filter by company size"),
     situacao: Optional[SituacaoEnum] = Query(None, description="Filter by registration status"),
     cnae: Optional[str] = Query(None, description="Filter by CNAE code"),
+    cnae_principal: Optional[str] = Query(None, description="Filter by primary CNAE code only"),
+    score_min: Optional[int] = Query(None, ge=0, le=100, description="Minimum green score"),
     ods: Optional[int] = Query(None, description="Filter by ODS number"),
     q: Optional[str] = Query(None, description="Text search in company name"),
     limit: int = Query(50, ge=1, le=1000, description="Number of results per page"),
@@ -39,6 +42,24 @@ async def listar_empresas(
     Returns paginated list of companies matching the specified criteria.
     """
     try:
+        # Analytical read engine over the ETL Parquet dataset, when enabled
+        engine = get_parquet_engine()
+        if engine is not None:
+            companies, total = engine.listar_empresas(
+                uf=uf, municipio=municipio, porte=porte.value if porte else None,
+                situacao=situacao.value if situacao else None, cnae=cnae,
+                cnae_principal=cnae_principal, ods=ods, q=q, score_min=score_min,
+                limit=limit, offset=offset
+            )
+            return EmpresasListResponse(
+                items=companies,
+                total=total,
+                limit=limit,
+                offset=offset,
+                has_next=offset + limit < total,
+                has_prev=offset > 0
+            )
+
         # Build base query
         query = db.query(EmpresasVerdes)
         
@@ -65,6 +86,12 @@ async def listar_empresas(
             )
             filters.append(cnae_filter)
         
+        if cnae_principal:
+            filters.append(EmpresasVerdes.cnae_principal == cnae_principal)
+        
+        if score_min is not None:
+            filters.append(EmpresasVerdes.score_verde >= score_min)
+        
         if ods:
             filters.append(EmpresasVerdes.ods_tags.any(ods))
         
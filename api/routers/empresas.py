@@ -14,7 +14,7 @@ import sys
 
 # Adicionar path do db.py
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from db import get_db
+from db import db_thread, get_db
 
 router = APIRouter(prefix="/empresas", tags=["Empresas ESG"])
 
@@ -67,9 +67,10 @@ async def login_page(request: Request):
 
 
 @router.post("/api/login", response_model=LoginResponse)
-async def login(credentials: LoginRequest):
+@db_thread
+def login(credentials: LoginRequest):
     """Autenticação de empresa"""
-    conn = get_db()
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
     
     # Hash da senha
@@ -100,13 +101,14 @@ async def login(credentials: LoginRequest):
 
 
 @router.get("/dashboard", response_class=HTMLResponse, name="empresa_dashboard")
-async def dashboard(request: Request, empresa_id: Optional[int] = None):
+@db_thread
+def dashboard(request: Request, empresa_id: Optional[int] = None):
     """Dashboard da empresa"""
     if not empresa_id:
         # Redirecionar para login se não autenticado
         return templates.TemplateResponse("login_empresa.html", {"request": request})
     
-    conn = get_db()
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
     
     # Buscar dados da empresa
@@ -146,9 +148,10 @@ async def dashboard(request: Request, empresa_id: Optional[int] = None):
 
 
 @router.get("/api/info/{empresa_id}", response_model=EmpresaInfo)
-async def get_empresa_info(empresa_id: int):
+@db_thread
+def get_empresa_info(empresa_id: int):
     """Obter informações da empresa"""
-    conn = get_db()
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -172,14 +175,15 @@ async def get_empresa_info(empresa_id: int):
 
 
 @router.get("/api/candidaturas/{empresa_id}", response_model=List[CandidaturaEmpresa])
-async def get_candidaturas(
+@db_thread
+def get_candidaturas(
     empresa_id: int,
     vaga_id: Optional[int] = None,
     status: Optional[str] = None,
     score_min: Optional[float] = None
 ):
     """Listar candidaturas recebidas pela empresa"""
-    conn = get_db()
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
     
     # Buscar CNPJ da empresa
@@ -226,7 +230,8 @@ async def get_candidaturas(
 
 
 @router.put("/api/candidatura/{candidatura_id}/status")
-async def update_candidatura_status(
+@db_thread
+def update_candidatura_status(
     candidatura_id: int,
     novo_status: str,
     observacoes: Optional[str] = None
@@ -265,9 +270,10 @@ async def update_candidatura_status(
 
 
 @router.get("/api/estatisticas/{empresa_id}")
-async def get_estatisticas(empresa_id: int):
+@db_thread
+def get_estatisticas(empresa_id: int):
     """Obter estatísticas da empresa"""
-    conn = get_db()
+    conn = get_db(readonly=True)
     cursor = conn.cursor()
     
     # Buscar CNPJ
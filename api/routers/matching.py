@@ -6,14 +6,16 @@ Conecta vagas com profissionais usando algoritmo de compatibilidade
 from fastapi import APIRouter, HTTPException
 from typing import Optional, List
 from pydantic import BaseModel
-import sqlite3
 import sys
 import os
 
 # Adicionar path para services
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from db import get_db
 from services.unified_matching import unified_matching
 from services.match_calculator import MatchCalculator
+from services.match_candidatos import ranquear_profissionais, ranquear_vagas
+from services.match_scores import ler_ranking, match_scores_worker
 
 # Instanciar o match calculator
 match_calculator = MatchCalculator()
@@ -23,8 +25,17 @@ router = APIRouter(
     tags=["matching"]
 )
 
-# Database connection
-DB_PATH = "gjb_dev.db"
+
+@router.on_event("startup")
+def iniciar_match_scores():
+    """Worker que mantém match_scores em dia (migration 007)"""
+    match_scores_worker.iniciar(get_db)
+
+
+@router.on_event("shutdown")
+def parar_match_scores():
+    match_scores_worker.parar()
+
 
 # ===== SCHEMAS =====
 
@@ -48,7 +59,7 @@ def dict_factory(cursor, row):
 
 def get_vaga(vaga_id: int):
     """Busca vaga no banco"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_db(readonly=True)
     conn.row_factory = dict_factory
     cursor = conn.cursor()
     
@@ -60,7 +71,7 @@ def get_vaga(vaga_id: int):
 
 def get_profissional(profissional_id: int):
     """Busca profissional no banco"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_db(readonly=True)
     conn.row_factory = dict_factory
     cursor = conn.cursor()
     
@@ -72,7 +83,7 @@ def get_profissional(profissional_id: int):
 
 def get_todas_vagas_ativas():
     """Busca todas as vagas ativas"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_db(readonly=True)
     conn.row_factory = dict_factory
     cursor = conn.cursor()
     
@@ -90,7 +101,7 @@ def get_todas_vagas_ativas():
 
 def get_todos_profissionais_ativos():
     """Busca todos os profissionais ativos"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_db(readonly=True)
     conn.row_factory = dict_factory
     cursor = conn.cursor()
     
@@ -147,7 +158,7 @@ def ranquear_candidatos_para_vaga(
     Retorna profissionais que se candidataram a uma vaga, ranqueados por compatibilidade
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_db(readonly=True)
         conn.row_factory = dict_factory
         cursor = conn.cursor()
         
@@ -267,31 +278,19 @@ def ranquear_vagas_para_profissional(
     if not profissional:
         raise HTTPException(status_code=404, detail="Profissional não encontrado ou inativo")
     
-    # Buscar todas as vagas ativas
-    vagas = get_todas_vagas_ativas()
-    
-    # Rankear usando ML
-    results = []
-    for vaga in vagas:
-        try:
-            # Usar sistema unificado de matching (ML + tradicional)
-            score = unified_matching.calculate_compatibility(vaga, profissional)
-            
-            if score >= min_score:
-                results.append({
-                    'vaga': vaga,
-                    'score_compatibilidade': score,
-                    'model_used': 'ML_ensemble'
-                })
-        except Exception as e:
-            print(f"Erro no cálculo para vaga {vaga.get('id')}: {e}")
-            continue
-    
-    # Ordenar por score (maior primeiro)
-    results.sort(key=lambda x: x['score_compatibilidade'], reverse=True)
+    # Top-K de match_scores; fora do que a tabela cobre, candidatos pelos índices e score exato só neles
+    conn = get_db(readonly=True)
+    try:
+        ranking = ler_ranking(conn, 'vaga', profissional_id, min_score, limit, calculadora=match_calculator)
+        if ranking is None:
+            ranking = ranquear_vagas(conn, profissional, min_score, limit, calculadora=match_calculator)
+    finally:
+        conn.close()
     
-    # Limitar resultados
-    results = results[:limit]
+    results = [
+        {'vaga': vaga, 'score_compatibilidade': match['score_total'], 'model_used': 'traditional'}
+        for vaga, match in ranking
+    ]
     
     # Formatar resposta
     resultados = []
@@ -410,34 +409,22 @@ def obter_melhor_candidato(vaga_id: int):
     if not vaga:
         raise HTTPException(status_code=404, detail="Vaga não encontrada")
     
-    profissionais = get_todos_profissionais_ativos()
-    
-    if not profissionais:
-        raise HTTPException(status_code=404, detail="Nenhum profissional ativo encontrado")
-    
-    # Rankear usando ML
-    results = []
-    for prof in profissionais:
-        try:
-            # Usar sistema unificado de matching (ML + tradicional)
-            score = unified_matching.calculate_compatibility(vaga, prof)
-            
-            if score >= 0:  # min_score = 0 para candidatos
-                results.append({
-                    'profissional': prof,
-                    'score_compatibilidade': score,
-                    'model_used': 'ML_ensemble'
-                })
-        except Exception as e:
-            print(f"Erro no cálculo para profissional {prof.get('id')}: {e}")
-            continue
-    
-    # Ordenar por score (maior primeiro)
-    results.sort(key=lambda x: x['score_compatibilidade'], reverse=True)
+    conn = get_db(readonly=True)
+    try:
+        ranking = ler_ranking(conn, 'profissional', vaga_id, min_score=0, limite=1, calculadora=match_calculator)
+        if ranking is None:
+            ranking = ranquear_profissionais(conn, vaga, min_score=0, limite=1, calculadora=match_calculator)
+    finally:
+        conn.close()
     
-    if not results:
+    if not ranking:
         raise HTTPException(status_code=404, detail="Nenhum match calculado")
     
+    results = [
+        {'profissional': prof, 'score_compatibilidade': match['score_total'], 'model_used': 'traditional'}
+        for prof, match in ranking
+    ]
+    
     melhor_result = results[0]
     
     return {
@@ -464,31 +451,22 @@ def obter_melhor_vaga(profissional_id: int):
     if not profissional:
         raise HTTPException(status_code=404, detail="Profissional não encontrado")
     
-    vagas = get_todas_vagas_ativas()
+    conn = get_db(readonly=True)
+    try:
+        ranking = ler_ranking(conn, 'vaga', profissional_id, min_score=0, limite=1, calculadora=match_calculator)
+        if ranking is None:
+            ranking = ranquear_vagas(conn, profissional, min_score=0, limite=1, calculadora=match_calculator)
+    finally:
+        conn.close()
     
-    if not vagas:
-        raise HTTPException(status_code=404, detail="Nenhuma vaga ativa encontrada")
-    
-    # Rankear usando ML
-    results = []
-    for vaga in vagas:
-        try:
-            score = unified_matching.calculate_compatibility(vaga, profissional)
-            results.append({
-                'vaga': vaga,
-                'score_compatibilidade': score,
-                'model_used': 'ML_ensemble'
-            })
-        except Exception as e:
-            print(f"Erro no cálculo para vaga {vaga.get('id')}: {e}")
-            continue
-    
-    # Ordenar por score (maior primeiro)
-    results.sort(key=lambda x: x['score_compatibilidade'], reverse=True)
-    
-    if not results:
+    if not ranking:
         raise HTTPException(status_code=404, detail="Nenhum match calculado")
     
+    results = [
+        {'vaga': vaga, 'score_compatibilidade': match['score_total'], 'model_used': 'traditional'}
+        for vaga, match in ranking
+    ]
+    
     melhor_result = results[0]
     
     return {
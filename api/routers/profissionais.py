@@ -14,7 +14,9 @@ import sys
 
 # Adicionar path do db.py
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from db import get_db
+from db import db_thread, get_db
+from services.habilidades import sincronizar_habilidades
+from services.match_scores import match_scores_worker
 
 router = APIRouter(prefix="/api/profissionais", tags=["Profissionais ESG"])
 
@@ -144,73 +146,77 @@ def calcular_pontuacao_sustentabilidade(profissional_data):
     return min(pontuacao, 100.0)
 
 @router.post("/", response_model=dict)
-async def criar_profissional(profissional: ProfissionalCreate):
+@db_thread
+def criar_profissional(profissional: ProfissionalCreate):
     """Cadastra novo profissional ESG"""
     try:
         conn = get_db()
-        cursor = conn.cursor()
-        
-        # Calcular pontuação de sustentabilidade
-        pontuacao = calcular_pontuacao_sustentabilidade(profissional.dict())
-        
-        # Inserir profissional principal
-        query = """
-        INSERT INTO profissionais_esg (
-            nome, email, telefone, localizacao, cargo_atual, empresa_atual,
-            nivel_experiencia, area_interesse, skills_tecnicas, skills_sustentabilidade,
-            certificacoes, salario_minimo, modalidade_trabalho, disponibilidade_viagem,
-            motivacao_sustentabilidade, experiencia_sustentabilidade, pontuacao_sustentabilidade
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        
-        cursor.execute(query, (
-            profissional.nome,
-            profissional.email,
-            profissional.telefone,
-            profissional.localizacao,
-            profissional.cargo_atual,
-            profissional.empresa_atual,
-            profissional.nivel_experiencia,
-            profissional.area_interesse,
-            json.dumps(profissional.skills_tecnicas, ensure_ascii=False),
-            json.dumps(profissional.skills_sustentabilidade, ensure_ascii=False),
-            json.dumps(profissional.certificacoes, ensure_ascii=False),
-            profissional.salario_minimo,
-            profissional.modalidade_trabalho,
-            profissional.disponibilidade_viagem,
-            profissional.motivacao_sustentabilidade,
-            profissional.experiencia_sustentabilidade,
-            pontuacao
-        ))
-        
-        profissional_id = cursor.lastrowid
-        
-        # Inserir experiências
-        for exp in profissional.experiencias:
-            exp_query = """
-            INSERT INTO experiencias_profissionais (
-                profissional_id, empresa, cargo, data_inicio, data_fim, descricao, area_sustentabilidade
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        try:
+            cursor = conn.cursor()
+        
+            # Calcular pontuação de sustentabilidade
+            pontuacao = calcular_pontuacao_sustentabilidade(profissional.dict())
+        
+            # Inserir profissional principal
+            query = """
+            INSERT INTO profissionais_esg (
+                nome, email, telefone, localizacao, cargo_atual, empresa_atual,
+                nivel_experiencia, area_interesse, skills_tecnicas, skills_sustentabilidade,
+                certificacoes, salario_minimo, modalidade_trabalho, disponibilidade_viagem,
+                motivacao_sustentabilidade, experiencia_sustentabilidade, pontuacao_sustentabilidade
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """
-            cursor.execute(exp_query, (
-                profissional_id, exp.empresa, exp.cargo, exp.data_inicio,
-                exp.data_fim, exp.descricao, exp.area_sustentabilidade
-            ))
         
-        # Inserir formações
-        for form in profissional.formacoes:
-            form_query = """
-            INSERT INTO formacoes_academicas (
-                profissional_id, instituicao, curso, nivel, data_inicio, data_fim, area_sustentabilidade
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """
-            cursor.execute(form_query, (
-                profissional_id, form.instituicao, form.curso, form.nivel,
-                form.data_inicio, form.data_fim, form.area_sustentabilidade
+            cursor.execute(query, (
+                profissional.nome,
+                profissional.email,
+                profissional.telefone,
+                profissional.localizacao,
+                profissional.cargo_atual,
+                profissional.empresa_atual,
+                profissional.nivel_experiencia,
+                profissional.area_interesse,
+                json.dumps(profissional.skills_tecnicas, ensure_ascii=False),
+                json.dumps(profissional.skills_sustentabilidade, ensure_ascii=False),
+                json.dumps(profissional.certificacoes, ensure_ascii=False),
+                profissional.salario_minimo,
+                profissional.modalidade_trabalho,
+                profissional.disponibilidade_viagem,
+                profissional.motivacao_sustentabilidade,
+                profissional.experiencia_sustentabilidade,
+                pontuacao
             ))
         
-        conn.commit()
-        conn.close()
+            profissional_id = cursor.lastrowid
+        
+            # Inserir experiências
+            for exp in profissional.experiencias:
+                exp_query = """
+                INSERT INTO experiencias_profissionais (
+                    profissional_id, empresa, cargo, data_inicio, data_fim, descricao, area_sustentabilidade
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """
+                cursor.execute(exp_query, (
+                    profissional_id, exp.empresa, exp.cargo, exp.data_inicio,
+                    exp.data_fim, exp.descricao, exp.area_sustentabilidade
+                ))
+        
+            # Inserir formações
+            for form in profissional.formacoes:
+                form_query = """
+                INSERT INTO formacoes_academicas (
+                    profissional_id, instituicao, curso, nivel, data_inicio, data_fim, area_sustentabilidade
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """
+                cursor.execute(form_query, (
+                    profissional_id, form.instituicao, form.curso, form.nivel,
+                    form.data_inicio, form.data_fim, form.area_sustentabilidade
+                ))
+        
+            conn.commit()
+        finally:
+            conn.close()
+        match_scores_worker.notificar()
         
         return {
             "success": True,
@@ -225,7 +231,8 @@ async def criar_profissional(profissional: ProfissionalCreate):
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 @router.get("/", response_model=List[ProfissionalResponse])
-async def listar_profissionais(
+@db_thread
+def listar_profissionais(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     nivel_desejado: Optional[str] = Query(None),
@@ -234,7 +241,7 @@ async def listar_profissionais(
 ):
     """Lista profissionais com filtros opcionais"""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         
         query = "SELECT * FROM profissionais_esg WHERE status = 'ativo'"
@@ -271,10 +278,11 @@ async def listar_profissionais(
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 @router.get("/{profissional_id}", response_model=ProfissionalResponse)
-async def obter_profissional(profissional_id: int):
+@db_thread
+def obter_profissional(profissional_id: int):
     """Obtém profissional por ID"""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         
         cursor.execute("SELECT * FROM profissionais_esg WHERE id = ? AND status = 'ativo'", (profissional_id,))
@@ -294,10 +302,11 @@ async def obter_profissional(profissional_id: int):
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 @router.get("/{profissional_id}/experiencias")
-async def obter_experiencias(profissional_id: int):
+@db_thread
+def obter_experiencias(profissional_id: int):
     """Obtém experiências do profissional"""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         
         cursor.execute(
@@ -313,10 +322,11 @@ async def obter_experiencias(profissional_id: int):
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 @router.get("/{profissional_id}/formacoes")
-async def obter_formacoes(profissional_id: int):
+@db_thread
+def obter_formacoes(profissional_id: int):
     """Obtém formações do profissional"""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         
         cursor.execute(
@@ -332,22 +342,26 @@ async def obter_formacoes(profissional_id: int):
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 @router.delete("/{profissional_id}")
-async def excluir_profissional(profissional_id: int):
+@db_thread
+def excluir_profissional(profissional_id: int):
     """Exclui profissional (soft delete)"""
     try:
         conn = get_db()
-        cursor = conn.cursor()
+        try:
+            cursor = conn.cursor()
         
-        cursor.execute(
-            "UPDATE profissionais_esg SET status = 'inativo', atualizado_em = CURRENT_TIMESTAMP WHERE id = ?",
-            (profissional_id,)
-        )
+            cursor.execute(
+                "UPDATE profissionais_esg SET status = 'inativo', atualizado_em = CURRENT_TIMESTAMP WHERE id = ?",
+                (profissional_id,)
+            )
         
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Profissional não encontrado")
+            if cursor.rowcount == 0:
+                raise HTTPException(status_code=404, detail="Profissional não encontrado")
         
-        conn.commit()
-        conn.close()
+            conn.commit()
+        finally:
+            conn.close()
+        match_scores_worker.notificar()
         
         return {"success": True, "message": "Profissional excluído com sucesso"}
         
@@ -357,10 +371,11 @@ async def excluir_profissional(profissional_id: int):
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 @router.get("/stats/resumo")
-async def stats_profissionais():
+@db_thread
+def stats_profissionais():
     """Estatísticas dos profissionais"""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         
         # Total de profissionais
@@ -410,13 +425,14 @@ async def stats_profissionais():
 # ==========================================
 
 @router.get("/me/perfil")
-async def obter_meu_perfil(current_user: UserResponse = Depends(get_current_active_user)):
+@db_thread
+def obter_meu_perfil(current_user: UserResponse = Depends(get_current_active_user)):
     """Obtém perfil completo do profissional logado"""
     if not get_current_active_user:
         raise HTTPException(status_code=501, detail="Autenticação não disponível")
     
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         
         # Buscar profissional vinculado ao usuário
@@ -493,13 +509,14 @@ async def obter_meu_perfil(current_user: UserResponse = Depends(get_current_acti
 
 
 @router.get("/me/candidaturas")
-async def obter_minhas_candidaturas(current_user: UserResponse = Depends(get_current_active_user)):
+@db_thread
+def obter_minhas_candidaturas(current_user: UserResponse = Depends(get_current_active_user)):
     """Lista candidaturas do profissional logado"""
     if not get_current_active_user:
         raise HTTPException(status_code=501, detail="Autenticação não disponível")
     
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         
         # Buscar profissional vinculado ao usuário
@@ -577,7 +594,8 @@ async def obter_minhas_candidaturas(current_user: UserResponse = Depends(get_cur
 
 
 @router.get("/me/recomendacoes")
-async def obter_vagas_recomendadas(
+@db_thread
+def obter_vagas_recomendadas(
     current_user: UserResponse = Depends(get_current_active_user),
     limit: int = Query(10, ge=1, le=50)
 ):
@@ -586,7 +604,7 @@ async def obter_vagas_recomendadas(
         raise HTTPException(status_code=501, detail="Autenticação não disponível")
     
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         
         # Buscar profissional vinculado ao usuário
@@ -879,7 +897,8 @@ class ProfissionalUpdate(BaseModel):
 
 
 @router.put("/me/perfil")
-async def atualizar_meu_perfil(
+@db_thread
+def atualizar_meu_perfil(
     dados: ProfissionalUpdate,
     current_user: UserResponse = Depends(get_current_active_user)
 ):
@@ -932,8 +951,12 @@ async def atualizar_meu_perfil(
         valores.append(profissional_id)
         
         cursor.execute(query, valores)
+        if dados_dict.get('habilidades_esg') is not None:
+            sincronizar_habilidades(cursor, 'profissional', profissional_id, dados_dict['habilidades_esg'])
         conn.commit()
         conn.close()
+        # A trigger já pôs o profissional na fila de match_scores: o worker recalcula a coluna dele agora
+        match_scores_worker.notificar()
         
         return {
             "success": True,
@@ -948,13 +971,14 @@ async def atualizar_meu_perfil(
 
 
 @router.get("/me/estatisticas")
-async def obter_minhas_estatisticas(current_user: UserResponse = Depends(get_current_active_user)):
+@db_thread
+def obter_minhas_estatisticas(current_user: UserResponse = Depends(get_current_active_user)):
     """Estatísticas pessoais do profissional logado"""
     if not get_current_active_user:
         raise HTTPException(status_code=501, detail="Autenticação não disponível")
     
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         
         # Buscar profissional vinculado ao usuário
@@ -1053,10 +1077,11 @@ async def pagina_perfil_storytelling(request: Request, profissional_id: int):
 
 
 @router.get("/api/{profissional_id}/storytelling")
-async def obter_perfil_storytelling(profissional_id: int):
+@db_thread
+def obter_perfil_storytelling(profissional_id: int):
     """Obter perfil completo com storytelling do profissional"""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         
         # Buscar dados completos
@@ -1126,11 +1151,12 @@ async def obter_perfil_storytelling(profissional_id: int):
 
 
 @router.get("/editar/{profissional_id}", response_class=HTMLResponse)
-async def pagina_editar_storytelling(request: Request, profissional_id: int):
+@db_thread
+def pagina_editar_storytelling(request: Request, profissional_id: int):
     """Página HTML para editar storytelling"""
     # Buscar dados existentes
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM profissionais_esg WHERE id = ?", (profissional_id,))
         prof = cursor.fetchone()
@@ -1148,7 +1174,8 @@ async def pagina_editar_storytelling(request: Request, profissional_id: int):
 
 
 @router.put("/api/{profissional_id}/storytelling")
-async def atualizar_storytelling(profissional_id: int, dados: dict):
+@db_thread
+def atualizar_storytelling(profissional_id: int, dados: dict):
     """Atualizar storytelling do profissional"""
     try:
         conn = get_db()
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text, func
 from datetime import datetime
 from api.db import get_db
+from api.services.parquet_engine import get_parquet_engine
 from api.models import EmpresasVerdes, CnaeGreen
 from api.schemas import StatsResponse
 
@@ -28,6 +29,13 @@ async def obter_estatisticas_completas(db: Session = Depends(get_db)):
     - Last update timestamp
     """
     try:
+        # Analytical read engine over the ETL Parquet dataset, when enabled
+        engine = get_parquet_engine()
+        if engine is not None:
+            estatisticas = engine.estatisticas()
+            estatisticas["ultima_atualizacao"] = estatisticas["ultima_atualizacao"] or datetime.now()
+            return StatsResponse(**estatisticas)
+
         # Get total companies count
         total_empresas = db.query(EmpresasVerdes).count()
         
@@ -4,6 +4,7 @@ Endpoints para gerenciamento de vagas verdes
 """
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
+from collections import Counter
 from pydantic import BaseModel, Field
 from datetime import datetime, date
 import json
@@ -12,10 +13,15 @@ import sys
 
 # Adicionar path do db.py
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from db import get_db
+from db import db_thread, get_db
+from services.habilidades import sincronizar_habilidades
+from services.match_scores import match_scores_worker
 
 router = APIRouter(prefix="/api/vagas", tags=["Vagas ESG"])
 
+# Bit N da coluna ods_mask = ODS N (migration 003)
+ODS = range(1, 18)
+
 # ============= SCHEMAS PYDANTIC =============
 
 class VagaCreate(BaseModel):
@@ -88,17 +94,19 @@ class VagaResponse(BaseModel):
 # ============= ENDPOINTS =============
 
 @router.get("/", response_model=List[VagaResponse])
-async def listar_vagas(
+@db_thread
+def listar_vagas(
     status: Optional[str] = Query('ativa', description="Filtrar por status"),
     uf: Optional[str] = Query(None, description="Filtrar por UF"),
     remoto: Optional[bool] = Query(None, description="Apenas remotas"),
     nivel: Optional[str] = Query(None, description="Nível de experiência"),
+    ods: Optional[int] = Query(None, ge=1, le=17, description="Filtrar por ODS"),
     limit: int = Query(50, le=100),
     offset: int = Query(0, ge=0)
 ):
     """Listar vagas com filtros opcionais"""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         
         # Query simplificada - apenas da tabela vagas_esg
@@ -122,6 +130,12 @@ async def listar_vagas(
             query += " AND nivel_experiencia = ?"
             params.append(nivel)
         
+        if ods:
+            # Bit do ODS na máscara (idx_vagas_status_ods); máscara NULL = JSON fora do formato
+            query += """ AND ((ods_mask & ?) != 0 OR (ods_mask IS NULL AND json_valid(ods_tags) AND json_type(ods_tags) = 'array'
+                AND EXISTS (SELECT 1 FROM json_each(vagas_esg.ods_tags) WHERE value = ?)))"""
+            params.extend([1 << ods, ods])
+        
         # Ordenação e paginação
         query += " ORDER BY criada_em DESC LIMIT ? OFFSET ?"
         params.extend([limit, offset])
@@ -174,10 +188,11 @@ async def listar_vagas(
         raise HTTPException(status_code=500, detail=f"Erro ao listar vagas: {str(e)}")
 
 @router.get("/{vaga_id}", response_model=VagaResponse)
-async def obter_vaga(vaga_id: int):
+@db_thread
+def obter_vaga(vaga_id: int):
     """Obter detalhes de uma vaga específica"""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         
         # Buscar vaga
@@ -194,11 +209,8 @@ async def obter_vaga(vaga_id: int):
         if not row:
             raise HTTPException(status_code=404, detail="Vaga não encontrada")
         
-        vaga_dict = dict(row)
-        vaga_dict['ods_tags'] = json.loads(vaga_dict['ods_tags']) if vaga_dict['ods_tags'] else []
-        vaga_dict['habilidades_requeridas'] = json.loads(vaga_dict['habilidades_requeridas']) if vaga_dict['habilidades_requeridas'] else []
-        
-        return vaga_dict
+        # ods_tags e habilidades_requeridas seguem como string JSON (VagaResponse)
+        return dict(row)
         
     except HTTPException:
         raise
@@ -206,51 +218,58 @@ async def obter_vaga(vaga_id: int):
         raise HTTPException(status_code=500, detail=f"Erro ao obter vaga: {str(e)}")
 
 @router.post("/", response_model=VagaResponse, status_code=201)
-async def criar_vaga(vaga: VagaCreate):
+@db_thread
+def criar_vaga(vaga: VagaCreate):
     """Criar nova vaga ESG"""
     try:
         conn = get_db()
-        cursor = conn.cursor()
-        
-        # Verificar se empresa existe
-        cursor.execute("SELECT razao_social FROM empresas_verdes WHERE cnpj = ?", (vaga.cnpj,))
-        empresa = cursor.fetchone()
-        
-        if not empresa:
-            raise HTTPException(status_code=404, detail="Empresa não encontrada. Cadastre a empresa primeiro.")
-        
-        # Inserir vaga
-        cursor.execute("""
-            INSERT INTO vagas_esg (
-                cnpj, titulo, descricao, requisitos_adicionais, beneficios,
-                ods_tags, habilidades_requeridas, nivel_experiencia, tipo_contratacao,
-                localizacao_uf, localizacao_cidade, remoto, hibrido,
-                salario_min, salario_max, status, vagas_disponiveis
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'ativa', 1)
-        """, (
-            vaga.cnpj,
-            vaga.titulo,
-            vaga.descricao,
-            vaga.requisitos,
-            vaga.beneficios,
-            json.dumps(vaga.ods_tags),
-            json.dumps(vaga.habilidades_requeridas),
-            vaga.nivel_experiencia,
-            vaga.tipo_contratacao,
-            vaga.localizacao_uf,
-            vaga.localizacao_cidade,
-            1 if vaga.remoto else 0,
-            1 if vaga.hibrido else 0,
-            vaga.salario_min,
-            vaga.salario_max
-        ))
-        
-        vaga_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        try:
+            cursor = conn.cursor()
+        
+            # Verificar se empresa existe
+            cursor.execute("SELECT razao_social FROM empresas_verdes WHERE cnpj = ?", (vaga.cnpj,))
+            empresa = cursor.fetchone()
+        
+            if not empresa:
+                raise HTTPException(status_code=404, detail="Empresa não encontrada. Cadastre a empresa primeiro.")
+        
+            habilidades_json = json.dumps(vaga.habilidades_requeridas)
+        
+            # Inserir vaga
+            cursor.execute("""
+                INSERT INTO vagas_esg (
+                    cnpj, titulo, descricao, requisitos_adicionais, beneficios,
+                    ods_tags, habilidades_requeridas, nivel_experiencia, tipo_contratacao,
+                    localizacao_uf, localizacao_cidade, remoto, hibrido,
+                    salario_min, salario_max, status, vagas_disponiveis
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'ativa', 1)
+            """, (
+                vaga.cnpj,
+                vaga.titulo,
+                vaga.descricao,
+                vaga.requisitos,
+                vaga.beneficios,
+                json.dumps(vaga.ods_tags),
+                habilidades_json,
+                vaga.nivel_experiencia,
+                vaga.tipo_contratacao,
+                vaga.localizacao_uf,
+                vaga.localizacao_cidade,
+                1 if vaga.remoto else 0,
+                1 if vaga.hibrido else 0,
+                vaga.salario_min,
+                vaga.salario_max
+            ))
+        
+            vaga_id = cursor.lastrowid
+            sincronizar_habilidades(cursor, 'vaga', vaga_id, habilidades_json)
+            conn.commit()
+        finally:
+            conn.close()
+        match_scores_worker.notificar()
         
         # Retornar vaga criada
-        return await obter_vaga(vaga_id)
+        return obter_vaga.sync(vaga_id)
         
     except HTTPException:
         raise
@@ -258,47 +277,54 @@ async def criar_vaga(vaga: VagaCreate):
         raise HTTPException(status_code=500, detail=f"Erro ao criar vaga: {str(e)}")
 
 @router.put("/{vaga_id}", response_model=VagaResponse)
-async def atualizar_vaga(vaga_id: int, vaga_update: VagaUpdate):
+@db_thread
+def atualizar_vaga(vaga_id: int, vaga_update: VagaUpdate):
     """Atualizar vaga existente"""
     try:
         conn = get_db()
-        cursor = conn.cursor()
-        
-        # Verificar se vaga existe
-        cursor.execute("SELECT id FROM vagas_esg WHERE id = ?", (vaga_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Vaga não encontrada")
-        
-        # Construir query de update dinamicamente
-        updates = []
-        params = []
-        
-        update_data = vaga_update.dict(exclude_unset=True)
-        
-        for campo, valor in update_data.items():
-            if valor is not None:
-                if campo in ['ods_tags', 'habilidades_requeridas']:
-                    updates.append(f"{campo} = ?")
-                    params.append(json.dumps(valor))
-                elif isinstance(valor, bool):
-                    updates.append(f"{campo} = ?")
-                    params.append(1 if valor else 0)
-                else:
-                    updates.append(f"{campo} = ?")
-                    params.append(valor)
-        
-        if not updates:
-            raise HTTPException(status_code=400, detail="Nenhum campo para atualizar")
-        
-        # Executar update
-        query = f"UPDATE vagas_esg SET {', '.join(updates)} WHERE id = ?"
-        params.append(vaga_id)
-        
-        cursor.execute(query, params)
-        conn.commit()
-        conn.close()
-        
-        return await obter_vaga(vaga_id)
+        try:
+            cursor = conn.cursor()
+        
+            # Verificar se vaga existe
+            cursor.execute("SELECT id FROM vagas_esg WHERE id = ?", (vaga_id,))
+            if not cursor.fetchone():
+                raise HTTPException(status_code=404, detail="Vaga não encontrada")
+        
+            # Construir query de update dinamicamente
+            updates = []
+            params = []
+        
+            update_data = vaga_update.dict(exclude_unset=True)
+        
+            for campo, valor in update_data.items():
+                if valor is not None:
+                    if campo in ['ods_tags', 'habilidades_requeridas']:
+                        updates.append(f"{campo} = ?")
+                        params.append(json.dumps(valor))
+                    elif isinstance(valor, bool):
+                        updates.append(f"{campo} = ?")
+                        params.append(1 if valor else 0)
+                    else:
+                        updates.append(f"{campo} = ?")
+                        params.append(valor)
+        
+            if not updates:
+                raise HTTPException(status_code=400, detail="Nenhum campo para atualizar")
+        
+            # Executar update
+            query = f"UPDATE vagas_esg SET {', '.join(updates)} WHERE id = ?"
+            params.append(vaga_id)
+        
+            cursor.execute(query, params)
+            if update_data.get('habilidades_requeridas') is not None:
+                sincronizar_habilidades(cursor, 'vaga', vaga_id, update_data['habilidades_requeridas'])
+            conn.commit()
+        finally:
+            conn.close()
+        # A trigger já pôs a vaga na fila de match_scores: o worker recalcula a linha dela agora
+        match_scores_worker.notificar()
+        
+        return obter_vaga.sync(vaga_id)
         
     except HTTPException:
         raise
@@ -306,19 +332,23 @@ async def atualizar_vaga(vaga_id: int, vaga_update: VagaUpdate):
         raise HTTPException(status_code=500, detail=f"Erro ao atualizar vaga: {str(e)}")
 
 @router.delete("/{vaga_id}", status_code=204)
-async def deletar_vaga(vaga_id: int):
+@db_thread
+def deletar_vaga(vaga_id: int):
     """Deletar vaga (soft delete - muda status para cancelada)"""
     try:
         conn = get_db()
-        cursor = conn.cursor()
+        try:
+            cursor = conn.cursor()
         
-        cursor.execute("UPDATE vagas_esg SET status = 'cancelada' WHERE id = ?", (vaga_id,))
+            cursor.execute("UPDATE vagas_esg SET status = 'cancelada' WHERE id = ?", (vaga_id,))
         
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Vaga não encontrada")
+            if cursor.rowcount == 0:
+                raise HTTPException(status_code=404, detail="Vaga não encontrada")
         
-        conn.commit()
-        conn.close()
+            conn.commit()
+        finally:
+            conn.close()
+        match_scores_worker.notificar()
         
         return None
         
@@ -328,10 +358,11 @@ async def deletar_vaga(vaga_id: int):
         raise HTTPException(status_code=500, detail=f"Erro ao deletar vaga: {str(e)}")
 
 @router.get("/stats/resumo")
-async def estatisticas_vagas():
+@db_thread
+def estatisticas_vagas():
     """Estatísticas gerais de vagas"""
     try:
-        conn = get_db()
+        conn = get_db(readonly=True)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -348,16 +379,28 @@ async def estatisticas_vagas():
         
         stats = dict(cursor.fetchone())
         
-        # Vagas por ODS
-        cursor.execute("SELECT ods_tags FROM vagas_esg WHERE status = 'ativa'")
-        ods_counter = {}
+        # Vagas por ODS: agrupa pelas máscaras (lidas do índice idx_vagas_status_ods) e soma cada bit
+        cursor.execute("""
+            SELECT ods_mask, COUNT(*) AS total
+            FROM vagas_esg
+            WHERE status = 'ativa' AND ods_mask IS NOT NULL
+            GROUP BY ods_mask
+        """)
+        por_ods = Counter()
         for row in cursor.fetchall():
-            if row['ods_tags']:
-                ods_list = json.loads(row['ods_tags'])
-                for ods in ods_list:
-                    ods_counter[ods] = ods_counter.get(ods, 0) + 1
+            for n in ODS:
+                if row['ods_mask'] >> n & 1:
+                    por_ods[n] += row['total']
         
-        stats['vagas_por_ods'] = ods_counter
+        # Máscara NULL (JSON fora do formato) segue contada pelo JSON
+        cursor.execute("""
+            SELECT ods.value AS ods, COUNT(*) AS total
+            FROM vagas_esg, json_each(vagas_esg.ods_tags) AS ods
+            WHERE status = 'ativa' AND ods_mask IS NULL AND json_valid(vagas_esg.ods_tags)
+            GROUP BY ods.value
+        """)
+        por_ods.update({row['ods']: row['total'] for row in cursor.fetchall()})
+        stats['vagas_por_ods'] = dict(por_ods.most_common())
         
         conn.close()
         return stats
@@ -0,0 +1,201 @@
+"""
+Vocabulário de Habilidades ESG
+Habilidades (texto livre) viram IDs inteiros de uma forma canônica única:
+em memória para o matching (Vocabulario) e no banco (tabela habilidades +
+junções com profissionais e vagas, migration 005), com índice invertido
+habilidade -> IDs ordenados de profissionais / vagas
+"""
+
+import json
+import threading
+from typing import Dict, Iterable, Set, Tuple
+
+import numpy as np
+
+# tipo -> (tabela de junção, coluna da entidade, tabela de origem, coluna JSON)
+JUNCOES = {
+    'profissional': ('profissional_habilidades', 'profissional_id', 'profissionais_esg', 'habilidades_esg'),
+    'vaga': ('vaga_habilidades', 'vaga_id', 'vagas_esg', 'habilidades_requeridas'),
+}
+
+
+def normalizar_habilidade(habilidade: str) -> str:
+    """Forma canônica de uma habilidade (minúsculas, sem espaços nas pontas)"""
+    return habilidade.lower().strip()
+
+
+def habilidades_do_campo(valor) -> Set[str]:
+    """Habilidades canônicas de um campo JSON (texto ou lista); itens que não são texto ficam de fora"""
+    if isinstance(valor, str):
+        try:
+            valor = json.loads(valor)
+        except ValueError:
+            return set()
+    if not isinstance(valor, (list, tuple)):
+        return set()
+    return {normalizar_habilidade(h) for h in valor if isinstance(h, str)} - {''}
+
+
+class Vocabulario:
+    """
+    Interning de habilidades em memória: cada texto (como veio do banco) é
+    normalizado uma única vez e vira o ID da sua forma canônica
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}     # forma canônica -> ID
+        self._textos: Dict[str, int] = {}  # texto original -> ID
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def id(self, habilidade: str) -> int:
+        try:
+            return self._textos[habilidade]
+        except (KeyError, TypeError):
+            canonica = normalizar_habilidade(habilidade)  # AttributeError para o que não é texto
+        with self._lock:
+            id_ = self._ids.setdefault(canonica, len(self._ids))
+            self._textos[habilidade] = id_
+        return id_
+
+    def ids(self, habilidades: Iterable[str]) -> Set[int]:
+        """Conjunto de IDs das habilidades (repetições e variações de caixa/espaço colapsam)"""
+        return {self.id(h) for h in habilidades}
+
+
+# Vocabulário do processo, compartilhado por MatchCalculator, motor em lote e ML
+vocabulario = Vocabulario()
+
+
+# ============= DICIONÁRIO E JUNÇÕES NO BANCO =============
+
+def sincronizar_habilidades(cursor, tipo: str, entidade_id: int, habilidades) -> None:
+    """
+    Regrava as habilidades de um profissional ou vaga nas tabelas de junção
+
+    Chamado na mesma transação da escrita do JSON (criar/atualizar vaga, PUT
+    /me/perfil); quem grava direto no banco roda scripts/indexar_habilidades.py.
+
+    Args:
+        cursor: Cursor da conexão de escrita
+        tipo: 'profissional' ou 'vaga'
+        entidade_id: ID do profissional ou da vaga
+        habilidades: Valor do campo (lista ou texto JSON)
+    """
+    tabela, coluna = JUNCOES[tipo][:2]
+    nomes = sorted(habilidades_do_campo(habilidades))
+
+    cursor.executemany("INSERT OR IGNORE INTO habilidades (nome) VALUES (?)", [(nome,) for nome in nomes])
+    cursor.execute(f"DELETE FROM {tabela} WHERE {coluna} = ?", (entidade_id,))
+    if nomes:
+        cursor.execute(
+            f"INSERT INTO {tabela} ({coluna}, habilidade_id) "
+            f"SELECT ?, id FROM habilidades WHERE nome IN ({', '.join('?' * len(nomes))})",
+            (entidade_id, *nomes)
+        )
+    cursor.execute("UPDATE habilidades_versao SET versao = versao + 1")
+
+
+def reconstruir_habilidades(conn) -> Dict[str, int]:
+    """
+    Refaz dicionário e junções a partir das colunas JSON (backfill da migration
+    005 e depois de cargas feitas direto no banco)
+
+    Returns:
+        Quantidade de habilidades e de vínculos por tipo
+    """
+    cursor = conn.cursor()
+    por_tipo = {}
+    for tipo, (_, _, origem, campo) in JUNCOES.items():
+        cursor.execute(f"SELECT id, {campo} FROM {origem}")
+        por_tipo[tipo] = [(linha[0], habilidades_do_campo(linha[1])) for linha in cursor.fetchall()]
+
+    nomes = set().union(*(nomes for linhas in por_tipo.values() for _, nomes in linhas))
+    cursor.executemany("INSERT OR IGNORE INTO habilidades (nome) VALUES (?)", [(nome,) for nome in sorted(nomes)])
+    cursor.execute("SELECT nome, id FROM habilidades")
+    ids = {nome: id_ for nome, id_ in cursor.fetchall()}
+
+    contagem = {'habilidades': len(ids)}
+    for tipo, linhas in por_tipo.items():
+        tabela, coluna = JUNCOES[tipo][:2]
+        vinculos = [(entidade_id, ids[nome]) for entidade_id, nomes in linhas for nome in nomes]
+        cursor.execute(f"DELETE FROM {tabela}")
+        cursor.executemany(f"INSERT INTO {tabela} ({coluna}, habilidade_id) VALUES (?, ?)", vinculos)
+        contagem[tabela] = len(vinculos)
+
+    cursor.execute("UPDATE habilidades_versao SET versao = versao + 1")
+    conn.commit()
+    return contagem
+
+
+# ============= ÍNDICE INVERTIDO EM MEMÓRIA =============
+
+def _listas(conn, tabela: str, coluna: str) -> Dict[int, np.ndarray]:
+    """habilidade_id -> IDs ordenados, lidos em ordem do índice (habilidade_id, entidade)"""
+    linhas = conn.execute(f"SELECT habilidade_id, {coluna} FROM {tabela} ORDER BY habilidade_id, {coluna}").fetchall()
+    if not linhas:
+        return {}
+    pares = np.array([tuple(linha) for linha in linhas], dtype=np.int64)
+    habilidades, inicios = np.unique(pares[:, 0], return_index=True)
+    return dict(zip(habilidades.tolist(), np.split(pares[:, 1], inicios[1:])))
+
+
+class IndiceHabilidades:
+    """Índice invertido habilidade -> IDs ordenados de profissionais e de vagas"""
+
+    def __init__(self, ids: Dict[str, int], profissionais: Dict[int, np.ndarray],
+                 vagas: Dict[int, np.ndarray], versao: int):
+        self.ids = ids
+        self.listas = {'profissional': profissionais, 'vaga': vagas}
+        self.versao = versao
+
+    @classmethod
+    def carregar(cls, conn) -> "IndiceHabilidades":
+        versao = conn.execute("SELECT versao FROM habilidades_versao").fetchone()[0]
+        ids = {nome: id_ for nome, id_ in conn.execute("SELECT nome, id FROM habilidades").fetchall()}
+        return cls(
+            ids,
+            _listas(conn, *JUNCOES['profissional'][:2]),
+            _listas(conn, *JUNCOES['vaga'][:2]),
+            versao,
+        )
+
+    def habilidade_ids(self, habilidades) -> np.ndarray:
+        """IDs ordenados das habilidades conhecidas de um campo (lista ou texto JSON)"""
+        return np.array(sorted(self.ids[nome] for nome in habilidades_do_campo(habilidades) if nome in self.ids),
+                        dtype=np.int64)
+
+    def com_habilidade(self, tipo: str, habilidade: str) -> np.ndarray:
+        """IDs ordenados de profissionais ('profissional') ou vagas ('vaga') com a habilidade"""
+        id_ = self.ids.get(normalizar_habilidade(habilidade))
+        return self.listas[tipo].get(id_, np.zeros(0, dtype=np.int64))
+
+    def contar(self, tipo: str, habilidades) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Quem tem ao menos uma das habilidades e quantas delas tem
+
+        Returns:
+            (IDs ordenados, quantidade de habilidades em comum de cada um)
+        """
+        listas = [self.listas[tipo][id_] for id_ in self.habilidade_ids(habilidades).tolist()
+                  if id_ in self.listas[tipo]]
+        if not listas:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(listas), return_counts=True)
+
+
+_indices: Dict[str, IndiceHabilidades] = {}
+_indices_lock = threading.Lock()
+
+
+def obter_indice(conn) -> IndiceHabilidades:
+    """Índice do processo (um por arquivo de banco), recarregado quando alguma escrita mudou habilidades_versao"""
+    banco = conn.execute("PRAGMA database_list").fetchone()[2]
+    versao = conn.execute("SELECT versao FROM habilidades_versao").fetchone()[0]
+    with _indices_lock:
+        indice = _indices.get(banco)
+        if indice is None or indice.versao != versao:
+            indice = _indices[banco] = IndiceHabilidades.carregar(conn)
+        return indice
@@ -0,0 +1,381 @@
+"""
+Motor de Matching em Lote
+Pontua uma vaga contra um bloco colunar de profissionais (ou um profissional
+contra um bloco de vagas) com operações NumPy, com os mesmos números de
+MatchCalculator.calcular_match
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .habilidades import vocabulario
+from .match_calculator import MatchCalculator
+
+COMPONENTES = ('ods', 'habilidades', 'experiencia', 'localizacao', 'salario')
+
+# ODS viram bits de uma máscara de 64 bits (os 17 ODS cabem com folga)
+_MAX_BIT = 63
+# Inteiros acima disso não convertem exatamente para float64
+_MAX_EXATO = 2 ** 53
+
+if hasattr(np, 'bitwise_count'):
+    _popcount = np.bitwise_count
+else:  # NumPy < 2.0
+    _BITS_POR_BYTE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(mascaras: np.ndarray) -> np.ndarray:
+        bytes_ = np.ascontiguousarray(mascaras, dtype=np.uint64).view(np.uint8).reshape(-1, 8)
+        return _BITS_POR_BYTE[bytes_].sum(axis=1).reshape(np.shape(mascaras))
+
+_calculadora_padrao = MatchCalculator()
+
+
+def _lista(valor) -> Optional[list]:
+    """Lista já parseada, ou None se o campo não tem o formato de lista"""
+    return list(valor) if isinstance(valor, (list, tuple)) else None
+
+
+def _mascara_ods(valores: list) -> Optional[int]:
+    """Máscara de bits dos ODS, ou None se algum valor não é um inteiro 0-63"""
+    mascara = 0
+    for valor in valores:
+        if not isinstance(valor, int) or not 0 <= valor <= _MAX_BIT:
+            return None
+        mascara |= 1 << valor
+    return mascara
+
+
+def _numero(valor) -> bool:
+    """int/float que o NumPy representa sem perda (None também serve)"""
+    if valor is None:
+        return True
+    if isinstance(valor, float):
+        return not math.isnan(valor)
+    return isinstance(valor, int) and abs(valor) < _MAX_EXATO
+
+
+class _Bloco:
+    """
+    Colunas comuns a vagas e profissionais
+
+    Habilidades ficam em formato CSR sobre os IDs do vocabulário do processo
+    (sem repetição por linha); UF e cidade viram códigos inteiros.
+    ``escalar[componente]`` marca as linhas fora do formato esperado, que são
+    pontuadas pelo cálculo escalar para manter os mesmos resultados (e erros).
+    """
+
+    def __init__(self, registros: Sequence[Dict], calculadora: MatchCalculator, campo_skills: str):
+        self.registros = list(registros)
+        self.n = len(self.registros)
+        self.escalar = {componente: np.zeros(self.n, dtype=bool) for componente in COMPONENTES}
+
+        self.ufs: Dict[str, int] = {}
+        self.cidades: Dict[str, int] = {'': -1}
+        ponteiros = [0]
+        ids: List[int] = []
+        self.uf = np.empty(self.n, dtype=np.int32)
+        self.cidade = np.empty(self.n, dtype=np.int32)
+
+        for i, registro in enumerate(self.registros):
+            skills = _lista(calculadora._parse_json_field(registro.get(campo_skills, [])))
+            if skills is None or not all(isinstance(s, str) for s in skills):
+                self.escalar['habilidades'][i] = True
+                skills = []
+            ids.extend(sorted(vocabulario.ids(skills)))
+            ponteiros.append(len(ids))
+
+            uf = registro.get('localizacao_uf', '')
+            cidade = registro.get('localizacao_cidade', '')
+            if not isinstance(uf, str) or not isinstance(cidade, str):
+                self.escalar['localizacao'][i] = True
+                uf = cidade = ''
+            self.uf[i] = self.ufs.setdefault(uf.upper(), len(self.ufs))
+            self.cidade[i] = self.cidades.setdefault(cidade.lower(), len(self.cidades) - 1)
+
+        self.skills_ptr = np.array(ponteiros, dtype=np.int64)
+        self.skills_ids = np.array(ids, dtype=np.int32)
+        self.skills_linha = np.repeat(np.arange(self.n), np.diff(self.skills_ptr))
+        self.n_skills = np.diff(self.skills_ptr)
+
+    def contar_habilidades(self, ids: np.ndarray) -> np.ndarray:
+        """Quantas das habilidades ``ids`` cada linha do bloco tem"""
+        if not len(ids):
+            return np.zeros(self.n, dtype=np.int64)
+        presentes = np.isin(self.skills_ids, ids)
+        return np.bincount(self.skills_linha[presentes], minlength=self.n)
+
+    def habilidades(self, i: int) -> np.ndarray:
+        """IDs das habilidades da linha ``i``"""
+        return self.skills_ids[self.skills_ptr[i]:self.skills_ptr[i + 1]]
+
+    def codigo_uf(self, uf: str) -> int:
+        return self.ufs.get(uf, -2)
+
+    def codigo_cidade(self, cidade: str) -> int:
+        return self.cidades.get(cidade, -2)
+
+    def texto_uf(self, i: int) -> str:
+        return next(uf for uf, codigo in self.ufs.items() if codigo == self.uf[i])
+
+    def texto_cidade(self, i: int) -> str:
+        return next(cidade for cidade, codigo in self.cidades.items() if codigo == self.cidade[i])
+
+
+class VagasBlock(_Bloco):
+    """Bloco colunar de vagas"""
+
+    def __init__(self, vagas: Sequence[Dict], calculadora: MatchCalculator = _calculadora_padrao):
+        super().__init__(vagas, calculadora, 'habilidades_requeridas')
+        n = self.n
+        self.ods = np.zeros(n, dtype=np.uint64)
+        self.ods_total = np.zeros(n, dtype=np.float64)
+        self.ods_vazio = np.zeros(n, dtype=bool)
+        self.skills_vazio = np.zeros(n, dtype=bool)
+        self.nivel = np.empty(n, dtype=np.int8)
+        self.exp_esperada = np.empty(n, dtype=np.float64)
+        self.remoto = np.zeros(n, dtype=bool)
+        self.sal_min = np.zeros(n, dtype=np.float64)
+        self.sal_max = np.zeros(n, dtype=np.float64)
+        self.sal_informado = np.zeros(n, dtype=bool)
+
+        for i, vaga in enumerate(self.registros):
+            if vaga.get('ods_mask') is not None:
+                # Máscara mantida pelo banco: ODS distintos de 1-17, sem parse do JSON
+                mascara = vaga['ods_mask']
+                self.ods[i], self.ods_total[i], self.ods_vazio[i] = mascara, mascara.bit_count(), not mascara
+            else:
+                ods = calculadora._parse_json_field(vaga.get('ods_tags', []))
+                self.ods_vazio[i] = not ods
+                lista = _lista(ods)
+                mascara = _mascara_ods(lista) if lista is not None else None
+                if mascara is None:
+                    self.escalar['ods'][i] = not self.ods_vazio[i]
+                else:
+                    self.ods[i] = mascara
+                    self.ods_total[i] = len(lista)
+
+            self.skills_vazio[i] = not calculadora._parse_json_field(vaga.get('habilidades_requeridas', []))
+
+            nivel = vaga.get('nivel_experiencia', '') or ''
+            self.nivel[i] = calculadora.NIVEIS.get(str(nivel).lower() if nivel else 'pleno', 3)
+            self.exp_esperada[i] = calculadora.EXP_MINIMA_POR_NIVEL.get(int(self.nivel[i]), 3)
+
+            self.remoto[i] = bool(vaga.get('remoto', False))
+
+            sal_min, sal_max = vaga.get('salario_min'), vaga.get('salario_max')
+            self.sal_informado[i] = bool(sal_min) and bool(sal_max)
+            if not (_numero(sal_min) and _numero(sal_max)):
+                self.escalar['salario'][i] = True
+            elif self.sal_informado[i]:
+                self.sal_min[i], self.sal_max[i] = sal_min, sal_max
+
+
+class ProfissionaisBlock(_Bloco):
+    """Bloco colunar de profissionais"""
+
+    def __init__(self, profissionais: Sequence[Dict], calculadora: MatchCalculator = _calculadora_padrao):
+        super().__init__(profissionais, calculadora, 'habilidades_esg')
+        n = self.n
+        self.ods = np.zeros(n, dtype=np.uint64)
+        self.ods_experiencia = np.zeros(n, dtype=np.uint64)
+        self.nivel = np.empty(n, dtype=np.int8)
+        self.anos_esg = np.zeros(n, dtype=np.float64)
+        self.aceita_remoto = np.zeros(n, dtype=bool)
+        self.disponivel_mudanca = np.zeros(n, dtype=bool)
+        self.sal_min = np.zeros(n, dtype=np.float64)
+        self.sal_max = np.zeros(n, dtype=np.float64)
+        self.sal_informado = np.zeros(n, dtype=bool)
+
+        for i, prof in enumerate(self.registros):
+            mascara, experiencia = prof.get('ods_interesse_mask'), prof.get('ods_experiencia_mask')
+            if mascara is None or experiencia is None:
+                lista = _lista(calculadora._parse_json_field(prof.get('ods_interesse', [])))
+                mascara = _mascara_ods(lista) if lista is not None else None
+                experiencia = self._mascara_experiencia(calculadora._parse_json_field(prof.get('ods_experiencia', {})))
+            if mascara is None or experiencia is None:
+                self.escalar['ods'][i] = True
+            else:
+                self.ods[i], self.ods_experiencia[i] = mascara, experiencia
+
+            nivel = prof.get('nivel_desejado', '') or ''
+            self.nivel[i] = calculadora.NIVEIS.get(str(nivel).lower() if nivel else 'pleno', 3)
+            anos = prof.get('anos_experiencia_esg', 0) or 0
+            if _numero(anos):
+                self.anos_esg[i] = anos
+            else:
+                self.escalar['experiencia'][i] = True
+
+            self.aceita_remoto[i] = bool(prof.get('aceita_remoto', False))
+            self.disponivel_mudanca[i] = bool(prof.get('disponivel_mudanca', False))
+
+            sal_min, sal_max = prof.get('pretensao_salarial_min'), prof.get('pretensao_salarial_max')
+            self.sal_informado[i] = bool(sal_min) and bool(sal_max)
+            if not (_numero(sal_min) and _numero(sal_max)):
+                self.escalar['salario'][i] = True
+            elif self.sal_informado[i]:
+                self.sal_min[i], self.sal_max[i] = sal_min, sal_max
+
+    @staticmethod
+    def _mascara_experiencia(experiencia) -> Optional[int]:
+        """ODS com experiência > 0; None se o dict tem chave ou valor fora do formato"""
+        if not isinstance(experiencia, dict):
+            return 0
+        mascara = 0
+        for chave, valor in experiencia.items():
+            if not isinstance(valor, (int, float)):
+                return None
+            if valor > 0:
+                try:
+                    ods = int(chave)
+                except (TypeError, ValueError):
+                    return None
+                if 0 <= ods <= _MAX_BIT:
+                    mascara |= 1 << ods
+        return mascara
+
+
+def pontuar_experiencia(nivel_vaga, nivel_prof, esperada, anos) -> np.ndarray:
+    """Experiência: 60% distância entre níveis, 40% anos de ESG vs. mínimo do nível da vaga"""
+    diferenca = np.abs(np.asarray(nivel_vaga, dtype=np.int16) - np.asarray(nivel_prof, dtype=np.int16))
+    nivel_score = np.select([diferenca == 0, diferenca == 1, diferenca == 2], [100, 80, 50], 20)
+    exp_score = np.select([anos >= esperada, anos >= esperada * 0.7, anos >= esperada * 0.5], [100, 80, 60], 40)
+    return nivel_score * 0.6 + exp_score * 0.4
+
+
+def _pontuar(vagas: VagasBlock, profs: ProfissionaisBlock, calculadora: MatchCalculator) -> Dict[str, np.ndarray]:
+    """Componentes alinhados para 1 vaga x N profissionais ou 1 profissional x N vagas"""
+    n = max(vagas.n, profs.n)
+    pesos = calculadora.PESOS
+
+    # ODS: proporção dos ODS da vaga cobertos + bônus por experiência comprovada
+    comum = vagas.ods & profs.ods
+    n_comum = _popcount(comum).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ods = n_comum / vagas.ods_total * 100
+    bonus = np.minimum(10, _popcount(comum & profs.ods_experiencia).astype(np.float64) * 3)
+    ods = np.where(bonus > 0, np.minimum(100, ods + bonus), ods)
+    ods = np.where(n_comum == 0, 0.0, ods)
+    ods = np.where(vagas.ods_vazio, 100.0, ods)
+
+    # Habilidades: proporção das habilidades (normalizadas) da vaga que o profissional tem
+    if vagas.n == 1:
+        em_comum = profs.contar_habilidades(vagas.habilidades(0))
+    else:
+        em_comum = vagas.contar_habilidades(profs.habilidades(0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        habilidades = em_comum / vagas.n_skills.astype(np.float64) * 100
+    habilidades = np.where(em_comum == 0, 0.0, habilidades)
+    habilidades = np.where(vagas.skills_vazio, 100.0, habilidades)
+
+    experiencia = pontuar_experiencia(vagas.nivel, profs.nivel, vagas.exp_esperada, profs.anos_esg)
+
+    # Localização: remoto, mesma UF/cidade, disponibilidade para mudança
+    if vagas.n == 1:
+        mesma_uf = profs.uf == profs.codigo_uf(vagas.texto_uf(0))
+        mesma_cidade = profs.cidade == profs.codigo_cidade(vagas.texto_cidade(0))
+        cidade_informada = (profs.cidade >= 0) & (vagas.cidade >= 0)
+    else:
+        mesma_uf = vagas.uf == vagas.codigo_uf(profs.texto_uf(0))
+        mesma_cidade = vagas.cidade == vagas.codigo_cidade(profs.texto_cidade(0))
+        cidade_informada = (vagas.cidade >= 0) & (profs.cidade >= 0)
+    vaga_sem_uf = vagas.uf == vagas.codigo_uf('')
+    localizacao = np.select(
+        [vagas.remoto & profs.aceita_remoto, vaga_sem_uf, mesma_uf & mesma_cidade & cidade_informada, mesma_uf,
+         profs.disponivel_mudanca],
+        [100.0, 100.0, 100.0, 80.0, 60.0],
+        20.0
+    )
+
+    # Salário: sobreposição das faixas ou distância relativa entre elas
+    inicio = np.maximum(vagas.sal_min, profs.sal_min)
+    fim = np.minimum(vagas.sal_max, profs.sal_max)
+    media_faixas = ((vagas.sal_max - vagas.sal_min) + (profs.sal_max - profs.sal_min)) / 2
+    media_salarios = (vagas.sal_min + vagas.sal_max + profs.sal_min + profs.sal_max) / 4
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sobreposicao = np.where(media_faixas == 0, 100.0, np.minimum(100, (fim - inicio) / media_faixas * 100))
+        distancia = (inicio - fim) / media_salarios
+    distancia_score = np.select([distancia <= 0.1, distancia <= 0.2, distancia <= 0.3], [80.0, 60.0, 40.0], 20.0)
+    distancia_score = np.where(media_salarios == 0, 0.0, distancia_score)
+    salario = np.where(fim >= inicio, sobreposicao, distancia_score)
+    salario = np.where(vagas.sal_informado & profs.sal_informado, salario, 100.0)
+
+    componentes = {
+        'ods': ods, 'habilidades': habilidades, 'experiencia': experiencia,
+        'localizacao': localizacao, 'salario': salario,
+    }
+    metodos = {
+        'ods': calculadora._calcular_ods_match,
+        'habilidades': calculadora._calcular_skills_match,
+        'experiencia': calculadora._calcular_experiencia_match,
+        'localizacao': calculadora._calcular_localizacao_match,
+        'salario': calculadora._calcular_salario_match,
+    }
+    for nome in COMPONENTES:
+        valores = np.array(np.broadcast_to(componentes[nome], n), dtype=np.float64)
+        for i in np.flatnonzero(vagas.escalar[nome] | profs.escalar[nome]):
+            vaga = vagas.registros[i if vagas.n > 1 else 0]
+            prof = profs.registros[i if profs.n > 1 else 0]
+            valores[i] = metodos[nome](vaga, prof)
+        componentes[nome] = valores
+
+    # Mesma ordem de soma do cálculo escalar: mesmos bits antes do arredondamento
+    componentes['total'] = (
+        componentes['ods'] * pesos['ods'] +
+        componentes['habilidades'] * pesos['habilidades'] +
+        componentes['experiencia'] * pesos['experiencia'] +
+        componentes['localizacao'] * pesos['localizacao'] +
+        componentes['salario'] * pesos['salario']
+    )
+    return componentes
+
+
+def pontuar_profissionais(
+    vaga: Dict, bloco: ProfissionaisBlock, calculadora: MatchCalculator = _calculadora_padrao
+) -> Dict[str, np.ndarray]:
+    """
+    Pontua uma vaga contra todos os profissionais do bloco
+
+    Returns:
+        Arrays alinhados ao bloco: um por componente (0-100) e ``total``,
+        o score ponderado ainda sem arredondar
+    """
+    if bloco.n == 0:
+        return {nome: np.zeros(0) for nome in COMPONENTES + ('total',)}
+    return _pontuar(VagasBlock([vaga], calculadora), bloco, calculadora)
+
+
+def pontuar_vagas(
+    profissional: Dict, bloco: VagasBlock, calculadora: MatchCalculator = _calculadora_padrao
+) -> Dict[str, np.ndarray]:
+    """Pontua um profissional contra todas as vagas do bloco (mesmo retorno de pontuar_profissionais)"""
+    if bloco.n == 0:
+        return {nome: np.zeros(0) for nome in COMPONENTES + ('total',)}
+    return _pontuar(bloco, ProfissionaisBlock([profissional], calculadora), calculadora)
+
+
+def selecionar(total: np.ndarray, min_score: float, limite: Optional[int] = None) -> List[int]:
+    """
+    Índices com score arredondado >= min_score, do maior para o menor score
+
+    Mesma ordem de ``sort(reverse=True)`` sobre o score arredondado (empates
+    mantêm a ordem original). O arredondamento exato (round do Python) só roda
+    sobre as linhas perto do corte: arredondar a 2 casas move o valor em no
+    máximo 0,005.
+    """
+    margem = 0.011
+    candidatos = np.flatnonzero(total >= min_score - margem)
+    if limite is not None and len(candidatos) > limite:
+        if limite <= 0:
+            return []
+        corte = np.partition(total[candidatos], len(candidatos) - limite)[len(candidatos) - limite]
+        candidatos = candidatos[total[candidatos] >= corte - margem]
+
+    pares = [
+        (i, score) for i, score in zip(candidatos.tolist(), (round(v, 2) for v in total[candidatos].tolist()))
+        if score >= min_score
+    ]
+    pares.sort(key=lambda par: par[1], reverse=True)
+    indices = [i for i, _ in pares]
+    return indices[:limite] if limite is not None else indices
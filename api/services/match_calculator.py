@@ -4,9 +4,15 @@ Sistema de pontuação para match entre vagas e profissionais ESG
 Critérios: ODS (40%), Habilidades (30%), Experiência (15%), Localização (10%), Salário (5%)
 """
 
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 import json
 
+from .habilidades import vocabulario
+
+if TYPE_CHECKING:
+    # match_batch importa este módulo; em tempo de execução o import fica dentro dos métodos
+    from .match_batch import ProfissionaisBlock, VagasBlock
+
 
 class MatchCalculator:
     """Calculador de compatibilidade entre vagas e profissionais"""
@@ -20,6 +26,26 @@ class MatchCalculator:
         'salario': 0.05        # 5% - Faixa salarial
     }
     
+    # Hierarquia de níveis (desconhecido = pleno)
+    NIVEIS = {
+        'estagio': 1,
+        'junior': 2,
+        'pleno': 3,
+        'senior': 4,
+        'especialista': 5,
+        'gerencial': 6
+    }
+    
+    # Experiência mínima esperada por nível
+    EXP_MINIMA_POR_NIVEL = {
+        1: 0,   # Estágio
+        2: 1,   # Júnior
+        3: 3,   # Pleno
+        4: 5,   # Sênior
+        5: 7,   # Especialista
+        6: 10   # Gerencial
+    }
+    
     def __init__(self):
         """Inicializa o calculador"""
         pass
@@ -47,6 +73,18 @@ class MatchCalculator:
         loc_score = self._calcular_localizacao_match(vaga, profissional)
         sal_score = self._calcular_salario_match(vaga, profissional)
         
+        return self._montar_resultado(ods_score, skills_score, exp_score, loc_score, sal_score)
+    
+    def _montar_resultado(
+        self,
+        ods_score: float,
+        skills_score: float,
+        exp_score: float,
+        loc_score: float,
+        sal_score: float
+    ) -> Dict:
+        """Score total ponderado, classificação e breakdown a partir dos cinco componentes"""
+        
         # Score total ponderado
         score_total = (
             ods_score * self.PESOS['ods'] +
@@ -102,6 +140,11 @@ class MatchCalculator:
         Bônus: +10 pontos se profissional tem experiência comprovada nos ODS
         """
         
+        # Linhas do banco trazem as máscaras de bits (migrations 003/004); NULL = JSON fora do formato
+        mascaras = (vaga.get('ods_mask'), profissional.get('ods_interesse_mask'), profissional.get('ods_experiencia_mask'))
+        if None not in mascaras:
+            return self._calcular_ods_match_mascaras(*mascaras)
+        
         vaga_ods = self._parse_json_field(vaga.get('ods_tags', []))
         prof_ods = self._parse_json_field(profissional.get('ods_interesse', []))
         prof_ods_exp = self._parse_json_field(profissional.get('ods_experiencia', {}))
@@ -129,6 +172,26 @@ class MatchCalculator:
         
         return score
     
+    def _calcular_ods_match_mascaras(self, vaga_mask: int, prof_mask: int, exp_mask: int) -> float:
+        """_calcular_ods_match com AND bit a bit e popcount (bit N = ODS N)"""
+        
+        total = vaga_mask.bit_count()
+        if not total:
+            return 100.0
+        
+        comum = vaga_mask & prof_mask
+        if not comum:
+            return 0.0
+        
+        score = (comum.bit_count() / total) * 100
+        
+        overlap_experiente = comum & exp_mask
+        if overlap_experiente:
+            bonus = min(10, overlap_experiente.bit_count() * 3)
+            score = min(100, score + bonus)
+        
+        return score
+    
     def _calcular_skills_match(self, vaga: Dict, profissional: Dict) -> float:
         """
         Calcula compatibilidade de habilidades (0-100)
@@ -142,18 +205,18 @@ class MatchCalculator:
         if not vaga_skills:
             return 100.0  # Se vaga não especifica habilidades, aceita qualquer um
         
-        # Normalizar habilidades (lowercase, strip)
-        vaga_skills_norm = {s.lower().strip() for s in vaga_skills}
-        prof_skills_norm = {s.lower().strip() for s in prof_skills}
+        # IDs das formas normalizadas (lowercase, strip), normalizadas uma vez por texto
+        vaga_skills_ids = vocabulario.ids(vaga_skills)
+        prof_skills_ids = vocabulario.ids(prof_skills)
         
         # Calcular overlap
-        comum = vaga_skills_norm & prof_skills_norm
+        comum = vaga_skills_ids & prof_skills_ids
         
         if not comum:
             return 0.0
         
         # Score proporcional
-        score = (len(comum) / len(vaga_skills_norm)) * 100
+        score = (len(comum) / len(vaga_skills_ids)) * 100
         
         return score
     
@@ -174,30 +237,10 @@ class MatchCalculator:
         vaga_nivel = str(vaga_nivel).lower() if vaga_nivel else 'pleno'
         prof_nivel = str(prof_nivel).lower() if prof_nivel else 'pleno'
         
-        # Mapeamento de níveis para score
-        niveis_hierarchy = {
-            'estagio': 1,
-            'junior': 2,
-            'pleno': 3,
-            'senior': 4,
-            'especialista': 5,
-            'gerencial': 6
-        }
-        
-        vaga_nivel_num = niveis_hierarchy.get(vaga_nivel, 3)  # Default: pleno
-        prof_nivel_num = niveis_hierarchy.get(prof_nivel, 3)
-        
-        # Experiência mínima esperada por nível
-        exp_minima_por_nivel = {
-            1: 0,   # Estágio
-            2: 1,   # Júnior
-            3: 3,   # Pleno
-            4: 5,   # Sênior
-            5: 7,   # Especialista
-            6: 10   # Gerencial
-        }
+        vaga_nivel_num = self.NIVEIS.get(vaga_nivel, 3)  # Default: pleno
+        prof_nivel_num = self.NIVEIS.get(prof_nivel, 3)
         
-        exp_esperada = exp_minima_por_nivel.get(vaga_nivel_num, 3)
+        exp_esperada = self.EXP_MINIMA_POR_NIVEL.get(vaga_nivel_num, 3)
         
         # Score baseado em match de nível
         diff_nivel = abs(vaga_nivel_num - prof_nivel_num)
@@ -359,64 +402,64 @@ class MatchCalculator:
     def rankear_candidatos(
         self, 
         vaga: Dict, 
-        profissionais: List[Dict],
-        min_score: float = 40.0
+        profissionais: Union[List[Dict], "ProfissionaisBlock"],
+        min_score: float = 40.0,
+        limite: Optional[int] = None
     ) -> List[Tuple[Dict, Dict]]:
         """
         Rankeia profissionais para uma vaga
         
         Args:
             vaga: Dados da vaga
-            profissionais: Lista de profissionais
+            profissionais: Lista de profissionais ou ProfissionaisBlock já montado
+                (reaproveitável entre vagas)
             min_score: Score mínimo para considerar (default: 40)
+            limite: Máximo de resultados (default: todos)
             
         Returns:
             Lista de tuplas (profissional, match_data) ordenada por score
         """
+        from .match_batch import ProfissionaisBlock, pontuar_profissionais
         
-        matches = []
-        
-        for prof in profissionais:
-            match_data = self.calcular_match(vaga, prof)
-            
-            if match_data['score_total'] >= min_score:
-                matches.append((prof, match_data))
-        
-        # Ordenar por score (maior primeiro)
-        matches.sort(key=lambda x: x[1]['score_total'], reverse=True)
-        
-        return matches
+        bloco = profissionais if isinstance(profissionais, ProfissionaisBlock) else ProfissionaisBlock(profissionais, self)
+        scores = pontuar_profissionais(vaga, bloco, self)
+        return self._resultados_lote(bloco.registros, scores, min_score, limite)
     
     def rankear_vagas(
         self, 
         profissional: Dict, 
-        vagas: List[Dict],
-        min_score: float = 40.0
+        vagas: Union[List[Dict], "VagasBlock"],
+        min_score: float = 40.0,
+        limite: Optional[int] = None
     ) -> List[Tuple[Dict, Dict]]:
         """
         Rankeia vagas para um profissional
         
         Args:
             profissional: Dados do profissional
-            vagas: Lista de vagas
+            vagas: Lista de vagas ou VagasBlock já montado
             min_score: Score mínimo para considerar (default: 40)
+            limite: Máximo de resultados (default: todos)
             
         Returns:
             Lista de tuplas (vaga, match_data) ordenada por score
         """
+        from .match_batch import VagasBlock, pontuar_vagas
         
-        matches = []
-        
-        for vaga in vagas:
-            match_data = self.calcular_match(vaga, profissional)
-            
-            if match_data['score_total'] >= min_score:
-                matches.append((vaga, match_data))
-        
-        # Ordenar por score (maior primeiro)
-        matches.sort(key=lambda x: x[1]['score_total'], reverse=True)
-        
-        return matches
+        bloco = vagas if isinstance(vagas, VagasBlock) else VagasBlock(vagas, self)
+        scores = pontuar_vagas(profissional, bloco, self)
+        return self._resultados_lote(bloco.registros, scores, min_score, limite)
+    
+    def _resultados_lote(self, registros: List[Dict], scores: Dict, min_score: float,
+                         limite: Optional[int]) -> List[Tuple[Dict, Dict]]:
+        """Monta (registro, match_data) só para as linhas selecionadas do lote"""
+        from .match_batch import COMPONENTES, selecionar
+        
+        componentes = [scores[nome] for nome in COMPONENTES]
+        return [
+            (registros[i], self._montar_resultado(*(float(valores[i]) for valores in componentes)))
+            for i in selecionar(scores['total'], min_score, limite)
+        ]
 
 
 # Instância global
@@ -0,0 +1,310 @@
+"""
+Ranking em Dois Estágios
+1º estágio: colunas baratas em memória (máscaras de ODS, UF/remoto, nível e
+anos de ESG) e o índice invertido de habilidades dão a cada linha ativa um
+score otimista (nunca abaixo do exato); só as ``orcamento`` melhores seguem.
+2º estágio: MatchCalculator.calcular_match exato nesses candidatos.
+medir_recall compara com o ranking exaustivo para calibrar o orçamento.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .habilidades import habilidades_do_campo, obter_indice
+from .match_batch import _numero, _popcount, pontuar_experiencia
+from .match_calculator import MatchCalculator
+
+logger = logging.getLogger(__name__)
+
+# Candidatos que passam para o cálculo exato (MATCH_CANDIDATE_BUDGET)
+ORCAMENTO_CANDIDATOS = int(os.getenv("MATCH_CANDIDATE_BUDGET", "300"))
+
+_calculadora_padrao = MatchCalculator()
+
+# tipo -> (tabela, status ativo, colunas na ordem id, ods, ods com experiência, UF, remoto, mudança, nível, anos)
+TABELAS = {
+    'profissional': ('profissionais_esg', 'ativo',
+                     "id, ods_interesse_mask, ods_experiencia_mask, localizacao_uf, aceita_remoto, "
+                     "disponivel_mudanca, nivel_desejado, anos_experiencia_esg"),
+    'vaga': ('vagas_esg', 'ativa',
+             "id, ods_mask, 0, localizacao_uf, remoto, 0, nivel_experiencia, 0"),
+}
+
+# Ordem do ranking exaustivo (sort estável do score sobre esta ordem)
+_ORDEM = {
+    'profissional': "SELECT * FROM profissionais_esg WHERE status = 'ativo' {filtro} ORDER BY criado_em DESC",
+    'vaga': """
+        SELECT v.*, e.razao_social as empresa_nome
+        FROM vagas_esg v
+        LEFT JOIN empresas_verdes e ON v.cnpj = e.cnpj
+        WHERE v.status = 'ativa' {filtro}
+        ORDER BY v.criada_em DESC
+    """,
+}
+
+
+def _tuplas(conn):
+    """Cursor que devolve tuplas, qualquer que seja o row_factory da conexão"""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor
+
+
+def _mascaras(valores: Sequence[Optional[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(máscaras int64 com NULL = 0, quais eram NULL)"""
+    nulas = np.array([valor is None for valor in valores], dtype=bool)
+    return np.array([valor or 0 for valor in valores], dtype=np.int64), nulas
+
+
+def _nivel(nivel, calculadora: MatchCalculator) -> int:
+    return calculadora.NIVEIS.get(str(nivel).lower() if nivel else 'pleno', 3)
+
+
+def _anos(anos) -> float:
+    """Anos de ESG; o que o NumPy não compara fica com o máximo (o 2º estágio decide)"""
+    anos = anos or 0
+    return float(anos) if _numero(anos) else np.inf
+
+
+def _uf(uf) -> str:
+    return uf.upper() if isinstance(uf, str) else ''
+
+
+class IndiceCandidatos:
+    """Colunas baratas de todas as linhas ativas de uma tabela, alinhadas por ID"""
+
+    def __init__(self, tipo: str, linhas: Sequence[tuple], n_habilidades: Dict[int, int], versao: tuple,
+                 calculadora: MatchCalculator = _calculadora_padrao):
+        colunas = list(zip(*linhas)) if linhas else [()] * 8
+        self.tipo = tipo
+        self.versao = versao
+        self.ids = np.array(colunas[0], dtype=np.int64)
+        self.ods, self.ods_nula = _mascaras(colunas[1])
+        self.ods_experiencia, self.ods_experiencia_nula = _mascaras(colunas[2])
+        ufs = [_uf(uf) for uf in colunas[3]]
+        self.codigos_uf = {uf: codigo for codigo, uf in enumerate(sorted(set(ufs)))}
+        self.uf = np.array([self.codigos_uf[uf] for uf in ufs], dtype=np.int32)
+        self.remoto = np.array([bool(valor) for valor in colunas[4]], dtype=bool)
+        self.mudanca = np.array([bool(valor) for valor in colunas[5]], dtype=bool)
+        self.nivel = np.array([_nivel(nivel, calculadora) for nivel in colunas[6]], dtype=np.int16)
+        self.esperada = np.array([calculadora.EXP_MINIMA_POR_NIVEL.get(int(n), 3) for n in self.nivel],
+                                 dtype=np.float64)
+        self.anos = np.array([_anos(anos) for anos in colunas[7]], dtype=np.float64)
+        self.n_habilidades = np.array([n_habilidades.get(id_, 0) for id_ in colunas[0]], dtype=np.float64)
+
+    @classmethod
+    def carregar(cls, conn, tipo: str, versao: tuple = None) -> "IndiceCandidatos":
+        tabela, status, colunas = TABELAS[tipo]
+        linhas = _tuplas(conn).execute(f"SELECT {colunas} FROM {tabela} WHERE status = ? ORDER BY id",
+                                       (status,)).fetchall()
+        n_habilidades = {}
+        if tipo == 'vaga':
+            n_habilidades = dict(_tuplas(conn).execute(
+                "SELECT vaga_id, COUNT(*) FROM vaga_habilidades GROUP BY vaga_id").fetchall())
+        return cls(tipo, linhas, n_habilidades, versao)
+
+    def codigo_uf(self, uf) -> int:
+        return self.codigos_uf.get(_uf(uf), -1)
+
+    def em_comum(self, ids: np.ndarray, contagem: np.ndarray) -> np.ndarray:
+        """Espalha a contagem de IndiceHabilidades.contar pelas linhas (0 para quem não aparece)"""
+        resultado = np.zeros(len(self.ids))
+        pos = np.searchsorted(self.ids, ids)
+        presentes = pos < len(self.ids)
+        presentes[presentes] = self.ids[pos[presentes]] == ids[presentes]
+        resultado[pos[presentes]] = contagem[presentes]
+        return resultado
+
+
+_indices: Dict[Tuple[str, str], IndiceCandidatos] = {}
+_indices_lock = threading.Lock()
+
+
+def obter_candidatos(conn, tipo: str) -> IndiceCandidatos:
+    """Colunas do processo para ``tipo``, recarregadas quando matching_versao ou habilidades_versao muda"""
+    banco = conn.execute("PRAGMA database_list").fetchone()[2]
+    versao = tuple(conn.execute(
+        "SELECT (SELECT versao FROM matching_versao WHERE tabela = ?), (SELECT versao FROM habilidades_versao)",
+        (TABELAS[tipo][0],)
+    ).fetchone())
+    with _indices_lock:
+        indice = _indices.get((banco, tipo))
+        if indice is None or indice.versao != versao:
+            indice = _indices[(banco, tipo)] = IndiceCandidatos.carregar(conn, tipo, versao)
+        return indice
+
+
+# ============= 1º ESTÁGIO: SCORE OTIMISTA =============
+
+def _ods_otimista(vaga_mask, vaga_nula, prof_mask, prof_nula, exp_mask, exp_nula) -> np.ndarray:
+    """
+    _calcular_ods_match_mascaras vetorizado; máscara NULL (JSON fora do formato,
+    calculado de verdade só no 2º estágio) vale o máximo que poderia valer
+    """
+    total = _popcount(vaga_mask).astype(np.float64)
+    comum = vaga_mask & prof_mask
+    n_comum = _popcount(comum).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ods = n_comum / total * 100
+    bonus = np.where(exp_nula, 10.0, np.minimum(10, _popcount(comum & exp_mask).astype(np.float64) * 3))
+    ods = np.where(bonus > 0, np.minimum(100, ods + bonus), ods)
+    ods = np.where(n_comum == 0, 0.0, ods)
+    return np.where((total == 0) | vaga_nula | prof_nula, 100.0, ods)
+
+
+def _otimista(ods, habilidades, experiencia, localizacao, pesos: Dict[str, float]) -> np.ndarray:
+    """
+    Score com a localização no nível da UF (mesma UF = mesma cidade) e salário
+    sempre 100: os dois só podem baixar no cálculo exato
+    """
+    return (ods * pesos['ods'] + habilidades * pesos['habilidades'] + experiencia * pesos['experiencia'] +
+            localizacao * pesos['localizacao'] + 100.0 * pesos['salario'])
+
+
+def _melhores(indice: IndiceCandidatos, otimista: np.ndarray, orcamento: int) -> List[int]:
+    """IDs dos ``orcamento`` maiores scores otimistas, do maior para o menor"""
+    if orcamento <= 0:
+        return []
+    if len(otimista) > orcamento:
+        selecao = np.argpartition(-otimista, orcamento - 1)[:orcamento]
+    else:
+        selecao = np.arange(len(otimista))
+    selecao = selecao[np.argsort(-otimista[selecao], kind='stable')]
+    return indice.ids[selecao].tolist()
+
+
+def candidatos_profissionais(conn, vaga: Dict, orcamento: Optional[int] = None,
+                             calculadora: MatchCalculator = _calculadora_padrao) -> List[int]:
+    """1º estágio para uma vaga (linha de vagas_esg): IDs dos profissionais ativos mais promissores"""
+    orcamento = ORCAMENTO_CANDIDATOS if orcamento is None else orcamento
+    profs = obter_candidatos(conn, 'profissional')
+    n = len(profs.ids)
+    vaga_mask = vaga.get('ods_mask')
+
+    ods = _ods_otimista(np.int64(vaga_mask or 0), vaga_mask is None, profs.ods, profs.ods_nula,
+                        profs.ods_experiencia, profs.ods_experiencia_nula)
+
+    campo = vaga.get('habilidades_requeridas')
+    n_habilidades = len(habilidades_do_campo(campo))
+    if n_habilidades:
+        habilidades = profs.em_comum(*obter_indice(conn).contar('profissional', campo)) / n_habilidades * 100
+    else:
+        habilidades = np.full(n, 100.0)
+
+    nivel = _nivel(vaga.get('nivel_experiencia', '') or '', calculadora)
+    experiencia = pontuar_experiencia(nivel, profs.nivel, calculadora.EXP_MINIMA_POR_NIVEL.get(nivel, 3), profs.anos)
+
+    vaga_uf = _uf(vaga.get('localizacao_uf'))
+    localizacao = np.select(
+        [bool(vaga.get('remoto', False)) & profs.remoto, np.full(n, not vaga_uf),
+         profs.uf == profs.codigo_uf(vaga_uf), profs.mudanca],
+        [100.0, 100.0, 100.0, 60.0], 20.0
+    )
+    return _melhores(profs, _otimista(ods, habilidades, experiencia, localizacao, calculadora.PESOS), orcamento)
+
+
+def candidatos_vagas(conn, profissional: Dict, orcamento: Optional[int] = None,
+                     calculadora: MatchCalculator = _calculadora_padrao) -> List[int]:
+    """1º estágio para um profissional (linha de profissionais_esg): IDs das vagas ativas mais promissoras"""
+    orcamento = ORCAMENTO_CANDIDATOS if orcamento is None else orcamento
+    vagas = obter_candidatos(conn, 'vaga')
+    prof_mask, exp_mask = profissional.get('ods_interesse_mask'), profissional.get('ods_experiencia_mask')
+
+    ods = _ods_otimista(vagas.ods, vagas.ods_nula, np.int64(prof_mask or 0), prof_mask is None,
+                        np.int64(exp_mask or 0), exp_mask is None)
+
+    em_comum = vagas.em_comum(*obter_indice(conn).contar('vaga', profissional.get('habilidades_esg')))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        habilidades = np.where(vagas.n_habilidades == 0, 100.0, em_comum / vagas.n_habilidades * 100)
+
+    nivel = _nivel(profissional.get('nivel_desejado', '') or '', calculadora)
+    experiencia = pontuar_experiencia(vagas.nivel, nivel, vagas.esperada,
+                                      _anos(profissional.get('anos_experiencia_esg', 0)))
+
+    localizacao = np.select(
+        [vagas.remoto & bool(profissional.get('aceita_remoto', False)), vagas.uf == vagas.codigo_uf(''),
+         vagas.uf == vagas.codigo_uf(profissional.get('localizacao_uf')),
+         np.full(len(vagas.ids), bool(profissional.get('disponivel_mudanca', False)))],
+        [100.0, 100.0, 100.0, 60.0], 20.0
+    )
+    return _melhores(vagas, _otimista(ods, habilidades, experiencia, localizacao, calculadora.PESOS), orcamento)
+
+
+# ============= 2º ESTÁGIO: CÁLCULO EXATO =============
+
+def _linhas(conn, tipo: str, ids: Optional[List[int]]) -> List[Dict]:
+    """Linhas completas na ordem do ranking exaustivo (ids=None: todas as ativas)"""
+    coluna = 'id' if tipo == 'profissional' else 'v.id'
+    filtro = "" if ids is None else f"AND {coluna} IN (SELECT value FROM json_each(?))"
+    cursor = _tuplas(conn).execute(_ORDEM[tipo].format(filtro=filtro), () if ids is None else (json.dumps(ids),))
+    campos = [coluna[0] for coluna in cursor.description]
+    return [dict(zip(campos, linha)) for linha in cursor.fetchall()]
+
+
+def _pontuar(registro: Dict, tipo: str, linhas: List[Dict], min_score: float, limite: Optional[int],
+             calculadora: MatchCalculator) -> List[Tuple[Dict, Dict]]:
+    """(linha, match_data) com score >= min_score, do maior para o menor; pares com erro ficam de fora"""
+    resultados = []
+    for linha in linhas:
+        vaga, prof = (registro, linha) if tipo == 'profissional' else (linha, registro)
+        try:
+            match = calculadora.calcular_match(vaga, prof)
+        except Exception as e:
+            logger.warning(f"Erro no cálculo para {tipo} {linha.get('id')}: {e}")
+            continue
+        if match['score_total'] >= min_score:
+            resultados.append((linha, match))
+    resultados.sort(key=lambda par: par[1]['score_total'], reverse=True)
+    return resultados[:limite] if limite is not None else resultados
+
+
+def ranquear_profissionais(conn, vaga: Dict, min_score: float = 40.0, limite: Optional[int] = None,
+                           orcamento: Optional[int] = None,
+                           calculadora: MatchCalculator = _calculadora_padrao) -> List[Tuple[Dict, Dict]]:
+    """
+    Profissionais ativos ranqueados para uma vaga (linha de vagas_esg, com ods_mask)
+
+    Returns:
+        Lista de (profissional, match_data) ordenada por score: o ranking
+        exaustivo restrito aos candidatos do 1º estágio
+    """
+    ids = candidatos_profissionais(conn, vaga, orcamento, calculadora)
+    return _pontuar(vaga, 'profissional', _linhas(conn, 'profissional', ids), min_score, limite, calculadora)
+
+
+def ranquear_vagas(conn, profissional: Dict, min_score: float = 40.0, limite: Optional[int] = None,
+                   orcamento: Optional[int] = None,
+                   calculadora: MatchCalculator = _calculadora_padrao) -> List[Tuple[Dict, Dict]]:
+    """Vagas ativas ranqueadas para um profissional (mesmo retorno de ranquear_profissionais)"""
+    ids = candidatos_vagas(conn, profissional, orcamento, calculadora)
+    return _pontuar(profissional, 'vaga', _linhas(conn, 'vaga', ids), min_score, limite, calculadora)
+
+
+def ranquear_exaustivo(conn, tipo: str, registro: Dict, min_score: float = 40.0, limite: Optional[int] = None,
+                       calculadora: MatchCalculator = _calculadora_padrao) -> List[Tuple[Dict, Dict]]:
+    """
+    Referência sem 1º estágio: todas as linhas ativas de ``tipo`` ('profissional'
+    ou 'vaga') pontuadas contra ``registro``
+    """
+    return _pontuar(registro, tipo, _linhas(conn, tipo, None), min_score, limite, calculadora)
+
+
+def medir_recall(conn, tipo: str, registro: Dict, orcamento: int, k: int = 50, min_score: float = 40.0) -> float:
+    """
+    Recall@k do ranking em dois estágios contra o exaustivo (1.0 = nada perdido)
+
+    Empates contam pelo score: trocar uma linha por outra de mesmo score no
+    corte não é perda.
+    """
+    ranquear = ranquear_profissionais if tipo == 'profissional' else ranquear_vagas
+    esperado = Counter(m['score_total'] for _, m in ranquear_exaustivo(conn, tipo, registro, min_score, k))
+    if not esperado:
+        return 1.0
+    obtido = Counter(m['score_total'] for _, m in ranquear(conn, registro, min_score, k, orcamento))
+    return sum((esperado & obtido).values()) / sum(esperado.values())
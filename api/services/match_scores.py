@@ -0,0 +1,448 @@
+"""
+Scores de Matching Materializados
+match_scores (migration 007) guarda, para cada vaga e cada profissional, os
+pares do seu top-K com o score e os cinco componentes; os endpoints de ranking
+leem o top-K pelo índice em vez de pontuar todas as linhas ativas.
+Triggers enfileiram as vagas/profissionais alterados e o worker recalcula só a
+linha (vaga) ou a coluna (profissional) da matriz de cada pendente, com o motor
+em lote (match_batch).
+
+Invariante: todo par com score >= corte de uma das pontas está na tabela, e
+cada vaga/profissional tem pelo menos TOP_K pares no seu corte ou acima (ou
+corte 0, quando a outra ponta tem poucas linhas). O corte é recalculado com
+25% de folga; quando as saídas do corte de alguém o deixam abaixo de TOP_K,
+esse alguém volta para a fila.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .match_batch import COMPONENTES, ProfissionaisBlock, VagasBlock, pontuar_profissionais, pontuar_vagas
+from .match_calculator import MatchCalculator
+from .match_candidatos import _linhas, _tuplas
+
+logger = logging.getLogger(__name__)
+
+# Pares guardados por vaga/profissional; rankings com limit maior são calculados na hora
+TOP_K = int(os.getenv("MATCH_SCORES_TOP_K", "100"))
+# Pendentes por transação do worker (o escritor do SQLite fica preso durante o lote)
+LOTE = int(os.getenv("MATCH_SCORES_BATCH", "20"))
+# Varredura da fila (cargas feitas direto no banco não acordam o worker)
+INTERVALO_SEGUNDOS = float(os.getenv("MATCH_SCORES_POLL_SECONDS", "5"))
+
+# Trocar quando a fórmula do MatchCalculator mudar: linhas de outra versão não são lidas
+VERSAO_MODELO = "traditional-1"
+
+_calculadora_padrao = MatchCalculator()
+
+# tipo -> (coluna do ID em match_scores, tipo da outra ponta)
+_LADOS = {
+    'vaga': ('vaga_id', 'profissional'),
+    'profissional': ('profissional_id', 'vaga'),
+}
+
+# Top de ``tipo`` para uma vaga/profissional, na ordem do ranking exaustivo
+_LEITURA = {
+    'profissional': """
+        SELECT m.score_ods, m.score_habilidades, m.score_experiencia, m.score_localizacao, m.score_salario, p.*
+        FROM match_scores m
+        JOIN profissionais_esg p ON p.id = m.profissional_id
+        WHERE m.vaga_id = ? AND m.score >= ? AND p.status = 'ativo'
+        ORDER BY m.score DESC, p.criado_em DESC
+        LIMIT ?
+    """,
+    'vaga': """
+        SELECT m.score_ods, m.score_habilidades, m.score_experiencia, m.score_localizacao, m.score_salario,
+               v.*, e.razao_social as empresa_nome
+        FROM match_scores m
+        JOIN vagas_esg v ON v.id = m.vaga_id
+        LEFT JOIN empresas_verdes e ON v.cnpj = e.cnpj
+        WHERE m.profissional_id = ? AND m.score >= ? AND v.status = 'ativa'
+        ORDER BY m.score DESC, v.criada_em DESC
+        LIMIT ?
+    """,
+}
+
+
+def _posicoes(ids_ordenados: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Posição de cada ID em ``ids_ordenados`` (-1 para quem não está lá)"""
+    ids = np.asarray(ids, dtype=np.int64)
+    pos = np.searchsorted(ids_ordenados, ids)
+    presentes = pos < len(ids_ordenados)
+    presentes[presentes] = ids_ordenados[pos[presentes]] == ids[presentes]
+    return np.where(presentes, pos, -1)
+
+
+def _arredondar(total: np.ndarray) -> np.ndarray:
+    """
+    round(total, 2) do Python, elemento a elemento
+
+    np.round só pode divergir do round do Python quando o valor está a meio
+    centésimo; esses poucos passam pelo round do Python.
+    """
+    score = np.round(total, 2)
+    centesimos = total * 100
+    with np.errstate(invalid='ignore'):
+        duvida = np.flatnonzero(np.abs(centesimos - np.floor(centesimos) - 0.5) < 1e-6)
+    score[duvida] = [round(valor, 2) for valor in total[duvida].tolist()]
+    return score
+
+
+class _Ativos:
+    """
+    Linhas ativas de uma tabela, ordenadas por ID, em bloco colunar
+
+    Linhas fora do formato esperado ficam fora do bloco e são pontuadas par a
+    par: no cálculo escalar elas podem levantar erro, e o par fica de fora.
+    """
+
+    def __init__(self, tipo: str, linhas: List[Dict], versao: int, calculadora: MatchCalculator):
+        Bloco = VagasBlock if tipo == 'vaga' else ProfissionaisBlock
+        self.tipo = tipo
+        self.versao = versao
+        self.linhas = sorted(linhas, key=lambda linha: linha['id'])
+        self.ids = np.array([linha['id'] for linha in self.linhas], dtype=np.int64)
+        bloco = Bloco(self.linhas, calculadora)
+        escalar = np.zeros(len(self.linhas), dtype=bool)
+        for marcadas in bloco.escalar.values():
+            escalar |= marcadas
+        self.limpas = np.flatnonzero(~escalar)
+        self.escalares = [(i, self.linhas[i]) for i in np.flatnonzero(escalar).tolist()]
+        self.bloco = Bloco([self.linhas[i] for i in self.limpas.tolist()], calculadora) if escalar.any() else bloco
+
+
+_ativos: Dict[Tuple[str, str], _Ativos] = {}
+_ativos_lock = threading.Lock()
+
+
+def _obter_ativos(conn, tipo: str, calculadora: MatchCalculator) -> _Ativos:
+    """Linhas ativas de ``tipo`` do processo, recarregadas quando match_scores_versao muda"""
+    cursor = _tuplas(conn)
+    banco = cursor.execute("PRAGMA database_list").fetchone()[2]
+    versao = cursor.execute("SELECT versao FROM match_scores_versao WHERE tipo = ?", (tipo,)).fetchone()[0]
+    with _ativos_lock:
+        ativos = _ativos.get((banco, tipo))
+        if ativos is None or ativos.versao != versao:
+            ativos = _ativos[(banco, tipo)] = _Ativos(tipo, _linhas(conn, tipo, None), versao, calculadora)
+        return ativos
+
+
+class _Lote:
+    """Linhas ativas e cortes de cada tipo dentro de uma transação do worker"""
+
+    def __init__(self, conn, calculadora: MatchCalculator):
+        self.conn = conn
+        self.calculadora = calculadora
+        self._ativos: Dict[str, _Ativos] = {}
+        self._cortes: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def ativos(self, tipo: str) -> _Ativos:
+        if tipo not in self._ativos:
+            self._ativos[tipo] = _obter_ativos(self.conn, tipo, self.calculadora)
+        return self._ativos[tipo]
+
+    def cortes(self, tipo: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(corte, n) alinhados às linhas ativas; corte infinito para quem ainda não foi calculado"""
+        if tipo not in self._cortes:
+            ids = self.ativos(tipo).ids
+            corte, n = np.full(len(ids), np.inf), np.zeros(len(ids), dtype=np.int64)
+            linhas = _tuplas(self.conn).execute(
+                "SELECT entidade_id, corte, n FROM match_scores_cortes WHERE tipo = ? AND model_version = ?",
+                (tipo, VERSAO_MODELO)
+            ).fetchall()
+            if linhas:
+                entidades, cortes, ns = (np.array(coluna) for coluna in zip(*linhas))
+                pos = _posicoes(ids, entidades)
+                presentes = pos >= 0
+                corte[pos[presentes]], n[pos[presentes]] = cortes[presentes], ns[presentes]
+            self._cortes[tipo] = (corte, n)
+        return self._cortes[tipo]
+
+    def atualizar_corte(self, tipo: str, entidade_id: int, corte: float, n: int) -> None:
+        if tipo in self._cortes:
+            pos = _posicoes(self.ativos(tipo).ids, [entidade_id])[0]
+            if pos >= 0:
+                self._cortes[tipo][0][pos], self._cortes[tipo][1][pos] = corte, n
+
+
+def _componentes(calculadora: MatchCalculator, vaga: Dict, profissional: Dict) -> Tuple[float, ...]:
+    return (
+        calculadora._calcular_ods_match(vaga, profissional),
+        calculadora._calcular_skills_match(vaga, profissional),
+        calculadora._calcular_experiencia_match(vaga, profissional),
+        calculadora._calcular_localizacao_match(vaga, profissional),
+        calculadora._calcular_salario_match(vaga, profissional),
+    )
+
+
+def _pontuar(registro: Dict, tipo: str, alvo: _Ativos, calculadora: MatchCalculator) -> np.ndarray:
+    """Componentes (5 x N) de ``registro`` (linha de ``tipo``) contra as linhas de ``alvo``; NaN nos pares com erro"""
+    componentes = np.full((len(COMPONENTES), len(alvo.ids)), np.nan)
+    escalares = alvo.escalares
+    if alvo.bloco.n:
+        pontuar = pontuar_profissionais if tipo == 'vaga' else pontuar_vagas
+        try:
+            scores = pontuar(registro, alvo.bloco, calculadora)
+            componentes[:, alvo.limpas] = [scores[nome] for nome in COMPONENTES]
+        except Exception:
+            # O próprio registro está fora do formato: tudo par a par
+            escalares = list(enumerate(alvo.linhas))
+
+    erros = 0
+    for i, linha in escalares:
+        vaga, profissional = (registro, linha) if tipo == 'vaga' else (linha, registro)
+        try:
+            componentes[:, i] = _componentes(calculadora, vaga, profissional)
+        except Exception:
+            erros += 1
+    if erros:
+        logger.warning(f"{erros} pares com erro no cálculo para {tipo} {registro.get('id')}")
+    return componentes
+
+
+def _total(componentes: np.ndarray, pesos: Dict[str, float]) -> np.ndarray:
+    """Score ponderado na mesma ordem de soma de MatchCalculator._montar_resultado"""
+    ods, habilidades, experiencia, localizacao, salario = componentes
+    return (ods * pesos['ods'] + habilidades * pesos['habilidades'] + experiencia * pesos['experiencia'] +
+            localizacao * pesos['localizacao'] + salario * pesos['salario'])
+
+
+def _recalcular(lote: _Lote, tipo: str, entidade_id: int, top_k: int) -> None:
+    """Refaz os pares de uma vaga/profissional (linha ou coluna da matriz) e os cortes que eles tocam"""
+    coluna, outro = _LADOS[tipo]
+    coluna_outro = _LADOS[outro][0]
+    cursor = _tuplas(lote.conn)
+    alvo = lote.ativos(outro)
+    corte_outro, n_outro = lote.cortes(outro)
+
+    antigo = np.full(len(alvo.ids), np.nan)
+    guardados = cursor.execute(f"SELECT {coluna_outro}, score FROM match_scores WHERE {coluna} = ?",
+                               (entidade_id,)).fetchall()
+    if guardados:
+        ids, scores = (np.array(valores) for valores in zip(*guardados))
+        pos = _posicoes(alvo.ids, ids)
+        antigo[pos[pos >= 0]] = scores[pos >= 0]
+
+    registro = _linhas(lote.conn, tipo, [entidade_id])
+    if registro:
+        componentes = _pontuar(registro[0], tipo, alvo, lote.calculadora)
+        score = _arredondar(_total(componentes, lote.calculadora.PESOS))
+    else:
+        score = np.full(len(alvo.ids), np.nan)
+    validos = score[~np.isnan(score)]
+    # Corte com folga acima de top_k: saídas do corte só forçam recálculo depois de consumir a folga
+    guardados = top_k + top_k // 4
+    if len(validos) > guardados:
+        corte = float(np.partition(validos, len(validos) - guardados)[len(validos) - guardados])
+    else:
+        corte = 0.0
+
+    with np.errstate(invalid='ignore'):
+        estava = antigo >= corte_outro
+        esta = score >= corte_outro
+        guardar = np.flatnonzero((score >= corte) | esta)
+    mudou = np.flatnonzero(estava != esta)
+    n_outro[mudou] += np.where(esta[mudou], 1, -1)
+    # Quem perdeu par do corte e ficou com menos de top_k, ou acumulou pares demais, é recalculado
+    recalcular = mudou[(estava[mudou] & (n_outro[mudou] < top_k) & (corte_outro[mudou] > 0)) |
+                       (esta[mudou] & (n_outro[mudou] > 2 * top_k))]
+
+    cursor.execute(f"DELETE FROM match_scores WHERE {coluna} = ?", (entidade_id,))
+    if registro:
+        outros = alvo.ids[guardar].tolist()
+        pares = [(entidade_id, outro_id) if tipo == 'vaga' else (outro_id, entidade_id) for outro_id in outros]
+        cursor.executemany(
+            "INSERT INTO match_scores (vaga_id, profissional_id, score, score_ods, score_habilidades, "
+            "score_experiencia, score_localizacao, score_salario, model_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [par + (s,) + tuple(c) + (VERSAO_MODELO,) for par, s, c in
+             zip(pares, score[guardar].tolist(), componentes[:, guardar].T.tolist())]
+        )
+        n = int(np.count_nonzero(validos >= corte))
+        cursor.execute(
+            "INSERT OR REPLACE INTO match_scores_cortes (tipo, entidade_id, corte, n, model_version) "
+            "VALUES (?, ?, ?, ?, ?)", (tipo, entidade_id, corte, n, VERSAO_MODELO)
+        )
+        lote.atualizar_corte(tipo, entidade_id, corte, n)
+    else:
+        cursor.execute("DELETE FROM match_scores_cortes WHERE tipo = ? AND entidade_id = ?", (tipo, entidade_id))
+        lote.atualizar_corte(tipo, entidade_id, np.inf, 0)
+
+    cursor.executemany(
+        "UPDATE match_scores_cortes SET n = ? WHERE tipo = ? AND entidade_id = ?",
+        [(n, outro, id_) for n, id_ in zip(n_outro[mudou].tolist(), alvo.ids[mudou].tolist())]
+    )
+    cursor.executemany(
+        "INSERT OR IGNORE INTO match_scores_pendentes (tipo, entidade_id) VALUES (?, ?)",
+        [(outro, id_) for id_ in alvo.ids[recalcular].tolist()]
+    )
+
+
+def processar_pendentes(conn, lote: Optional[int] = None, top_k: Optional[int] = None,
+                        calculadora: MatchCalculator = _calculadora_padrao) -> int:
+    """
+    Recalcula até ``lote`` vagas/profissionais da fila em uma transação
+
+    Returns:
+        Quantos pendentes saíram da fila (0 = fila vazia)
+    """
+    lote = LOTE if lote is None else lote
+    top_k = max(1, TOP_K if top_k is None else top_k)
+    cursor = _tuplas(conn)
+    consulta = "SELECT id, tipo, entidade_id FROM match_scores_pendentes ORDER BY id LIMIT ?"
+    pendentes = cursor.execute(consulta, (lote,)).fetchall()
+    if not pendentes:
+        return 0
+    # Linhas ativas da outra ponta montadas antes do lock de escrita (no WAL, ler não bloqueia ninguém)
+    for tipo in {_LADOS[tipo][1] for _, tipo, _ in pendentes}:
+        _obter_ativos(conn, tipo, calculadora)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        estado = _Lote(conn, calculadora)
+        pendentes = cursor.execute(consulta, (lote,)).fetchall()
+        for id_, tipo, entidade_id in pendentes:
+            cursor.execute("DELETE FROM match_scores_pendentes WHERE id = ?", (id_,))
+            _recalcular(estado, tipo, entidade_id, top_k)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(pendentes)
+
+
+def reconstruir_match_scores(conn, top_k: Optional[int] = None,
+                             calculadora: MatchCalculator = _calculadora_padrao) -> Dict[str, int]:
+    """
+    Recalcula match_scores inteira (migration nova, troca de VERSAO_MODELO ou de TOP_K)
+
+    Returns:
+        Contagem de linhas por tabela
+    """
+    cursor = _tuplas(conn)
+    for tabela in ("match_scores", "match_scores_cortes", "match_scores_pendentes"):
+        cursor.execute(f"DELETE FROM {tabela}")
+    cursor.execute("INSERT INTO match_scores_pendentes (tipo, entidade_id) "
+                   "SELECT 'vaga', id FROM vagas_esg WHERE status = 'ativa' ORDER BY id")
+    cursor.execute("INSERT INTO match_scores_pendentes (tipo, entidade_id) "
+                   "SELECT 'profissional', id FROM profissionais_esg WHERE status = 'ativo' ORDER BY id")
+    conn.commit()
+    while processar_pendentes(conn, lote=500, top_k=top_k, calculadora=calculadora):
+        pass
+    return {
+        tabela: cursor.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+        for tabela in ("match_scores", "match_scores_cortes")
+    }
+
+
+def ler_ranking(conn, tipo: str, registro_id: int, min_score: float = 40.0, limite: Optional[int] = None,
+                top_k: Optional[int] = None,
+                calculadora: MatchCalculator = _calculadora_padrao) -> Optional[List[Tuple[Dict, Dict]]]:
+    """
+    Top de ``tipo`` ('profissional' ou 'vaga') para a vaga/profissional ``registro_id``, lido de match_scores
+
+    Returns:
+        O mesmo de match_candidatos.ranquear_profissionais/ranquear_vagas, ou
+        None quando a tabela não cobre a consulta (limite acima de TOP_K,
+        registro ainda na fila, banco sem a migration 007): aí quem chama
+        calcula o ranking na hora
+    """
+    top_k = TOP_K if top_k is None else top_k
+    if limite is None or limite > top_k:
+        return None
+    dono = _LADOS[tipo][1]
+    cursor = _tuplas(conn)
+    try:
+        estado = cursor.execute("""
+            SELECT c.corte, c.n, EXISTS (
+                SELECT 1 FROM match_scores_pendentes p WHERE p.tipo = c.tipo AND p.entidade_id = c.entidade_id
+            )
+            FROM match_scores_cortes c
+            WHERE c.tipo = ? AND c.entidade_id = ? AND c.model_version = ?
+        """, (dono, registro_id, VERSAO_MODELO)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if estado is None or estado[2] or (estado[0] > 0 and estado[1] < limite):
+        return None
+
+    cursor.execute(_LEITURA[tipo], (registro_id, min_score, limite))
+    campos = [coluna[0] for coluna in cursor.description][len(COMPONENTES):]
+    return [
+        (dict(zip(campos, linha[len(COMPONENTES):])), calculadora._montar_resultado(*linha[:len(COMPONENTES)]))
+        for linha in cursor.fetchall()
+    ]
+
+
+class MatchScoresWorker:
+    """
+    Thread que esvazia match_scores_pendentes em segundo plano
+
+    Acorda a cada ``intervalo`` segundos ou quando notificar() é chamado (as
+    rotas chamam depois de gravar vaga ou perfil). Entre um lote e outro a
+    conexão de escrita volta ao pool, e as escritas da API passam na frente.
+    """
+
+    def __init__(self, intervalo: float = INTERVALO_SEGUNDOS):
+        self.intervalo = intervalo
+        self._conectar: Optional[Callable] = None
+        self._thread: Optional[threading.Thread] = None
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self._ultimo_erro: Optional[str] = None
+
+    def iniciar(self, conectar: Callable) -> None:
+        """Sobe a thread, se ainda não está rodando; ``conectar`` empresta a conexão de escrita (db.get_db)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._conectar = conectar
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._rodar, name="gjb-match-scores", daemon=True)
+            self._thread.start()
+
+    def notificar(self) -> None:
+        """Acorda o worker agora (sem efeito se ele não foi iniciado)"""
+        self._acordar.set()
+
+    def parar(self, timeout: float = 10) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._parar.set()
+            self._acordar.set()
+            thread.join(timeout)
+
+    def esvaziar(self) -> int:
+        """Processa a fila até ela ficar vazia; devolve quantos pendentes saíram"""
+        total = 0
+        while not self._parar.is_set():
+            conn = self._conectar()
+            try:
+                processados = processar_pendentes(conn)
+            finally:
+                conn.close()
+            if not processados:
+                break
+            total += processados
+        return total
+
+    def _rodar(self) -> None:
+        while not self._parar.is_set():
+            self._acordar.clear()
+            try:
+                self.esvaziar()
+                self._ultimo_erro = None
+            except Exception as e:
+                # Banco sem a migration 007 falha a cada varredura: loga uma vez só
+                if str(e) != self._ultimo_erro:
+                    logger.exception(f"Erro ao recalcular match_scores: {e}")
+                self._ultimo_erro = str(e)
+            self._acordar.wait(self.intervalo)
+
+
+match_scores_worker = MatchScoresWorker()
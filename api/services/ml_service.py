@@ -7,10 +7,12 @@ Integração dos modelos treinados na API
 import joblib
 import numpy as np
 import json
-import sqlite3
 from typing import Dict, List, Optional
 import logging
 
+from db import get_db
+from .habilidades import vocabulario
+
 logger = logging.getLogger(__name__)
 
 class MLMatchingService:
@@ -158,9 +160,9 @@ class MLMatchingService:
             vaga_skills = json.loads(vaga_data.get('habilidades_requeridas', '[]')) if vaga_data.get('habilidades_requeridas') else []
             
             if prof_skills and vaga_skills:
-                prof_set = set([s.lower() for s in prof_skills])
-                vaga_set = set([s.lower() for s in vaga_skills])
-                skills_overlap = len(prof_set.intersection(vaga_set)) / len(vaga_set) if vaga_set else 0
+                prof_set = vocabulario.ids(prof_skills)
+                vaga_set = vocabulario.ids(vaga_skills)
+                skills_overlap = len(prof_set & vaga_set) / len(vaga_set) if vaga_set else 0
             else:
                 skills_overlap = 0
         except:
@@ -210,23 +212,22 @@ class MLMatchingService:
     def get_profissional_data(self, profissional_id: int) -> Optional[Dict]:
         """Buscar dados do profissional no banco"""
         try:
-            conn = sqlite3.connect('gjb_dev.db')
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT * FROM profissionais_esg WHERE id = ?
-            """, (profissional_id,))
-            
-            row = cursor.fetchone()
-            if not row:
-                return None
-            
-            # Converter para dict
-            columns = [description[0] for description in cursor.description]
-            prof_data = dict(zip(columns, row))
-            
-            conn.close()
-            return prof_data
+            conn = get_db(readonly=True)
+            try:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT * FROM profissionais_esg WHERE id = ?
+                """, (profissional_id,))
+                
+                row = cursor.fetchone()
+                if not row:
+                    return None
+                
+                # Converter para dict
+                columns = [description[0] for description in cursor.description]
+                return dict(zip(columns, row))
+            finally:
+                conn.close()
             
         except Exception as e:
             logger.error(f"Erro ao buscar profissional {profissional_id}: {e}")
@@ -235,23 +236,22 @@ class MLMatchingService:
     def get_vaga_data(self, vaga_id: int) -> Optional[Dict]:
         """Buscar dados da vaga no banco"""
         try:
-            conn = sqlite3.connect('gjb_dev.db')
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT * FROM vagas_esg WHERE id = ?
-            """, (vaga_id,))
-            
-            row = cursor.fetchone()
-            if not row:
-                return None
-            
-            # Converter para dict
-            columns = [description[0] for description in cursor.description]
-            vaga_data = dict(zip(columns, row))
-            
-            conn.close()
-            return vaga_data
+            conn = get_db(readonly=True)
+            try:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT * FROM vagas_esg WHERE id = ?
+                """, (vaga_id,))
+                
+                row = cursor.fetchone()
+                if not row:
+                    return None
+                
+                # Converter para dict
+                columns = [description[0] for description in cursor.description]
+                return dict(zip(columns, row))
+            finally:
+                conn.close()
             
         except Exception as e:
             logger.error(f"Erro ao buscar vaga {vaga_id}: {e}")
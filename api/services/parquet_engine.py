@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Motor de leitura analítica sobre o dataset Parquet de empresas verdes
+DuckDB embutido lê direto a saída do ETL (particionada por UF), sem passar pelo banco OLTP
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "_manifest.json"
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+DEFAULT_DATASET_DIR = ROOT_DIR / "data" / "processed" / "empresas_verdes"
+DEFAULT_CNAE_SEED = ROOT_DIR / "etl" / "cnae_green_seed.csv"
+
+COLUNAS_EMPRESA = [
+    "cnpj", "razao_social", "nome_fantasia", "cnae_principal", "cnaes_secundarias", "porte",
+    "municipio", "uf", "situacao_cadastral", "data_abertura", "score_verde", "ods_tags",
+    "fonte_atualizacao", "atualizado_em",
+]
+
+
+class ParquetReadEngine:
+    """
+    Consultas de listagem e estatísticas de empresas verdes via DuckDB
+
+    O filtro por UF vira poda de partição (só os arquivos ``uf=XX`` são abertos) e os
+    filtros de ``cnae_principal``, ``porte`` e ``score_verde`` são empurrados para o
+    leitor Parquet, que descarta row groups pelas estatísticas min/max.
+    Todos os filtros vão como parâmetros; cada consulta usa seu próprio cursor.
+    """
+
+    def __init__(self, dataset_dir: Optional[Path] = None, cnae_seed_path: Optional[Path] = None):
+        import duckdb
+
+        self.dataset_dir = Path(dataset_dir or DEFAULT_DATASET_DIR)
+        self.cnae_seed_path = Path(cnae_seed_path or DEFAULT_CNAE_SEED)
+        self.conn = duckdb.connect()
+        self._lock = threading.Lock()
+        self._manifest_mtime: Optional[int] = -1
+
+        self.conn.execute(
+            "CREATE TABLE cnae_green AS SELECT * FROM read_csv(?, header = true, all_varchar = true)",
+            [str(self.cnae_seed_path)]
+        )
+
+    def _atualizar_view(self) -> None:
+        """
+        (Re)cria a view ``empresas_verdes`` quando o ETL publica um novo manifesto
+
+        Com manifesto, só os arquivos listados são lidos (nunca um arquivo pela metade
+        ou já substituído); sem ele, o glob das partições é reavaliado a cada consulta.
+        """
+        manifesto = self.dataset_dir / MANIFEST_FILE
+        mtime = manifesto.stat().st_mtime_ns if manifesto.exists() else None
+        if mtime == self._manifest_mtime:
+            return
+
+        if mtime is None:
+            arquivos = [str(self.dataset_dir / "*" / "*.parquet")]
+        else:
+            arquivos = [str(self.dataset_dir / f["path"]) for f in json.loads(manifesto.read_text(encoding="utf-8"))["files"]]
+        lista = ", ".join("'" + arquivo.replace("'", "''") + "'" for arquivo in arquivos)
+        self.conn.execute(f"""
+            CREATE OR REPLACE VIEW empresas_verdes AS
+            SELECT * FROM read_parquet([{lista}], hive_partitioning = true, union_by_name = true)
+        """)
+        self._manifest_mtime = mtime
+
+    def _consultar(self, sql: str, params: Optional[List] = None) -> List[Dict]:
+        with self._lock:
+            self._atualizar_view()
+            cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql, params or [])
+            colunas = [d[0] for d in cursor.description]
+            return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def listar_empresas(
+        self,
+        uf: Optional[str] = None,
+        municipio: Optional[str] = None,
+        porte: Optional[str] = None,
+        situacao: Optional[str] = None,
+        cnae: Optional[str] = None,
+        cnae_principal: Optional[str] = None,
+        ods: Optional[int] = None,
+        q: Optional[str] = None,
+        score_min: Optional[int] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> Tuple[List[Dict], int]:
+        """
+        Lista empresas verdes com os mesmos filtros do router ``/empresas``
+
+        Returns:
+            Tupla (empresas da página, total de empresas que atendem aos filtros)
+        """
+        filtros, params = [], []
+        if uf:
+            filtros.append("uf = ?")
+            params.append(uf.upper())
+        if cnae_principal:
+            filtros.append("cnae_principal = ?")
+            params.append(cnae_principal)
+        if porte:
+            filtros.append("porte = ?")
+            params.append(porte)
+        if score_min is not None:
+            filtros.append("score_verde >= ?")
+            params.append(score_min)
+        if situacao:
+            filtros.append("situacao_cadastral = ?")
+            params.append(situacao)
+        if municipio:
+            filtros.append("municipio ILIKE ?")
+            params.append(f"%{municipio}%")
+        if cnae:
+            filtros.append("(cnae_principal = ? OR list_contains(cnaes_secundarias, ?))")
+            params.extend([cnae, cnae])
+        if ods:
+            filtros.append("list_contains(ods_tags, ?)")
+            params.append(ods)
+        if q:
+            filtros.append("(razao_social ILIKE ? OR nome_fantasia ILIKE ?)")
+            params.extend([f"%{q}%", f"%{q}%"])
+        where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+
+        # Total e página numa só varredura
+        linhas = self._consultar(f"""
+            SELECT {', '.join(COLUNAS_EMPRESA)}, COUNT(*) OVER () AS total
+            FROM empresas_verdes
+            {where}
+            ORDER BY score_verde DESC, razao_social, cnpj
+            LIMIT ? OFFSET ?
+        """, params + [limit, offset])
+
+        if linhas:
+            total = linhas[0]["total"]
+        elif offset:
+            total = self._consultar(f"SELECT COUNT(*) AS total FROM empresas_verdes {where}", params)[0]["total"]
+        else:
+            total = 0
+        for linha in linhas:
+            del linha["total"]
+        return linhas, total
+
+    def estatisticas(self) -> Dict:
+        """Estatísticas completas no formato de ``StatsResponse``"""
+        geral = self._consultar("""
+            SELECT COUNT(*) AS total, MAX(atualizado_em) AS ultima_atualizacao FROM empresas_verdes
+        """)[0]
+
+        por_uf = self._consultar("""
+            SELECT
+                ev.uf,
+                COUNT(*) AS total_empresas,
+                ROUND(AVG(ev.score_verde), 2) AS score_medio,
+                COUNT(CASE WHEN cg.prioridade = 'Core' THEN 1 END) AS empresas_core,
+                COUNT(CASE WHEN cg.prioridade = 'Adjacente' THEN 1 END) AS empresas_adjacentes
+            FROM empresas_verdes ev
+            LEFT JOIN cnae_green cg ON ev.cnae_principal = cg.cnae
+            GROUP BY ev.uf
+            ORDER BY total_empresas DESC, ev.uf
+        """)
+        for linha in por_uf:
+            linha["score_medio"] = float(linha["score_medio"] or 0)
+
+        # Distribuição por UF de cada CNAE na mesma consulta, em vez de uma consulta por CNAE
+        por_cnae = self._consultar("""
+            WITH contagem AS (
+                SELECT cnae_principal AS cnae, uf, COUNT(*) AS count
+                FROM empresas_verdes
+                GROUP BY cnae_principal, uf
+            )
+            SELECT
+                cg.cnae,
+                cg.titulo,
+                cg.categoria,
+                SUM(c.count) AS total_empresas,
+                list({'uf': c.uf, 'count': c.count} ORDER BY c.count DESC, c.uf) AS por_uf
+            FROM cnae_green cg
+            JOIN contagem c ON c.cnae = cg.cnae
+            GROUP BY cg.cnae, cg.titulo, cg.categoria
+            ORDER BY total_empresas DESC, cg.cnae
+            LIMIT 20
+        """)
+
+        por_porte = self._consultar("""
+            SELECT
+                COALESCE(porte, 'NÃO_INFORMADO') AS porte,
+                COUNT(*) AS total_empresas,
+                ROUND(AVG(score_verde), 2) AS score_medio
+            FROM empresas_verdes
+            GROUP BY porte
+            ORDER BY total_empresas DESC, porte
+        """)
+        for linha in por_porte:
+            linha["score_medio"] = float(linha["score_medio"] or 0)
+
+        ods_mais_frequentes = self._consultar("""
+            SELECT ods, COUNT(*) AS frequencia
+            FROM (SELECT unnest(ods_tags) AS ods FROM empresas_verdes)
+            GROUP BY ods
+            ORDER BY frequencia DESC, ods
+            LIMIT 10
+        """)
+
+        return {
+            "total_empresas_verdes": geral["total"],
+            "ultima_atualizacao": geral["ultima_atualizacao"],
+            "por_uf": por_uf,
+            "por_cnae": por_cnae,
+            "por_porte": por_porte,
+            "ods_mais_frequentes": ods_mais_frequentes,
+        }
+
+
+_engine: Optional[ParquetReadEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_parquet_engine() -> Optional[ParquetReadEngine]:
+    """
+    Motor DuckDB quando ``API_READ_ENGINE=duckdb``; None mantém a leitura pelo banco
+
+    O diretório do dataset vem de ``PARQUET_DATASET_DIR`` (padrão: saída do ETL).
+    """
+    global _engine
+    if os.getenv("API_READ_ENGINE", "database").lower() != "duckdb":
+        return None
+    with _engine_lock:
+        if _engine is None:
+            _engine = ParquetReadEngine(os.getenv("PARQUET_DATASET_DIR") or None)
+            logger.info(f"Leitura analítica via DuckDB sobre {_engine.dataset_dir}")
+    return _engine
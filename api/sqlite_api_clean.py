@@ -10,6 +10,7 @@ from starlette.requests import Request
 import uvicorn
 from datetime import datetime
 from typing import Optional, List, Dict, Any
+import asyncio
 import json
 import os
 
@@ -145,7 +146,7 @@ print("⚠️ Usando endpoints simplificados para MVP")
 async def status():
     """Endpoint de debug para verificar estrutura de arquivos"""
     import glob
-    from db import get_database_url
+    from db import get_database_url, pool_stats
     
     db_url = get_database_url()
     is_postgres = db_url.startswith("postgres")
@@ -157,6 +158,8 @@ async def status():
         "static_dir": STATIC_DIR,
         "database_type": "PostgreSQL" if is_postgres else "SQLite",
         "database_url_set": bool(db_url),
+        "db_pool": pool_stats(),
+        "db_read_pool": pool_stats(readonly=True),
         "templates_exists": os.path.exists(TEMPLATES_DIR),
         "static_exists": os.path.exists(STATIC_DIR),
         "templates_files": glob.glob(os.path.join(TEMPLATES_DIR, "*.html")) if os.path.exists(TEMPLATES_DIR) else [],
@@ -453,11 +456,39 @@ async def get_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro: {str(e)}")
 
+# Cliente ReceitaWS e índice local de CNPJs compartilhados com o ETL
+ETL_DIR = os.path.join(os.path.dirname(BASE_DIR), "etl")
+_receita_client = None
+_cnpj_index = None
+_cnae_priorities = None
+
+def get_receita_client():
+    global _receita_client
+    if _receita_client is None:
+        sys.path.insert(0, ETL_DIR)
+        from receita_client import ReceitaWSClient
+        _receita_client = ReceitaWSClient()
+    return _receita_client
+
+def get_cnpj_index():
+    """Índice das empresas verdes gravadas pelo ETL em data/processed/empresas_verdes"""
+    global _cnpj_index, _cnae_priorities
+    if _cnpj_index is None:
+        sys.path.insert(0, ETL_DIR)
+        from config import config
+        from cnpj_index import CnpjIndex, load_cnae_priorities
+        _cnae_priorities = load_cnae_priorities(os.path.join(ETL_DIR, "cnae_green_seed.csv"))
+        _cnpj_index = CnpjIndex(config.PROCESSED_DIR / "empresas_verdes", config.PROCESSED_DIR / "cnpj_index")
+    return _cnpj_index
+
 @app.get("/api/search-company/{cnpj}")
 async def search_company(cnpj: str):
-    """Busca empresa por CNPJ na Receita Federal"""
+    """Busca empresa por CNPJ nos dados do ETL e, se não encontrar, na Receita Federal"""
     try:
-        import requests
+        # Montar/recarregar o índice lê o Parquet do ETL: fora do event loop
+        index = await asyncio.to_thread(get_cnpj_index)
+        from cnpj_index import company_from_receita_ws
+        from receita_client import ReceitaWSError, ReceitaWSTimeout
         
         # Remove formatação do CNPJ
         cnpj_clean = ''.join(filter(str.isdigit, cnpj))
@@ -465,64 +496,47 @@ async def search_company(cnpj: str):
         if len(cnpj_clean) != 14:
             raise HTTPException(status_code=400, detail="CNPJ deve ter 14 dígitos")
         
-        # API da ReceitaWS
-        url = f"https://www.receitaws.com.br/v1/cnpj/{cnpj_clean}"
+        company = await asyncio.to_thread(index.lookup, cnpj_clean)
+        fonte = "local"
+        atividade_text = company['cnae_principal'] if company else ''
         
-        try:
-            response = requests.get(url, timeout=10)
+        if company is None:
+            try:
+                data = await get_receita_client().fetch(cnpj_clean)
+            except ReceitaWSTimeout:
+                raise HTTPException(status_code=408, detail="Timeout na consulta à Receita Federal")
+            except ReceitaWSError:
+                raise HTTPException(status_code=503, detail="Erro na comunicação com a Receita Federal")
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get('status') == 'OK':
-                    # Coleta CNAEs
-                    cnaes = []
-                    if data.get('atividade_principal'):
-                        ativ_principal = data['atividade_principal'][0].get('code', '') if data['atividade_principal'] else ''
-                        if ativ_principal:
-                            cnaes.append(ativ_principal)
-                    
-                    if data.get('atividades_secundarias'):
-                        for ativ in data['atividades_secundarias'][:5]:  # Limita a 5
-                            code = ativ.get('code', '')
-                            if code:
-                                cnaes.append(code)
-                    
-                    # Calcula score verde básico (simulado por enquanto)
-                    green_score = 0
-                    is_green = False
-                    
-                    # Verifica se algum CNAE contém palavras-chave verdes
-                    green_keywords = ['energia', 'renovável', 'solar', 'eólica', 'sustentável', 'reciclagem', 'ambiental']
-                    atividade_text = (data.get('atividade_principal', [{}])[0].get('text', '') if data.get('atividade_principal') else '').lower()
-                    
-                    for keyword in green_keywords:
-                        if keyword in atividade_text:
-                            green_score = 75
-                            is_green = True
-                            break
-                    
-                    return {
-                        "nome": data.get('nome', 'Nome não informado'),
-                        "cnpj": data.get('cnpj', cnpj),
-                        "situacao": data.get('situacao', 'Não informado'),
-                        "municipio": data.get('municipio'),
-                        "uf": data.get('uf'),
-                        "cnaes": cnaes,
-                        "green_score": green_score,
-                        "is_green": is_green,
-                        "atividade_principal": atividade_text
-                    }
-                else:
-                    raise HTTPException(status_code=404, detail="Empresa não encontrada na Receita Federal")
-            else:
-                raise HTTPException(status_code=503, detail="Serviço da Receita Federal indisponível")
-                
-        except requests.exceptions.Timeout:
-            raise HTTPException(status_code=408, detail="Timeout na consulta à Receita Federal")
-        except requests.exceptions.RequestException:
-            raise HTTPException(status_code=503, detail="Erro na comunicação com a Receita Federal")
+            if data is None:
+                raise HTTPException(status_code=404, detail="Empresa não encontrada na Receita Federal")
+            
+            company = company_from_receita_ws(data, _cnae_priorities)
+            fonte = "receita_ws"
+            atividade_text = (data.get('atividade_principal', [{}])[0].get('text', '') if data.get('atividade_principal') else '').lower()
+        
+        # CNAE principal + até 5 secundários
+        cnaes = [company['cnae_principal']] if company['cnae_principal'] else []
+        cnaes.extend((company['cnaes_secundarias'] or [])[:5])
+        
+        # Score verde das regras do ETL (ScoringRules)
+        green_score = company['score_verde'] or 0
+        
+        return {
+            "nome": company['razao_social'] or 'Nome não informado',
+            "cnpj": company['cnpj'] or cnpj,
+            "situacao": company['situacao_cadastral'] or 'Não informado',
+            "municipio": company['municipio'],
+            "uf": company['uf'],
+            "cnaes": cnaes,
+            "green_score": green_score,
+            "is_green": green_score > 0,
+            "atividade_principal": atividade_text,
+            "fonte": fonte
+        }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
@@ -0,0 +1,120 @@
+-- Migration 003: Máscaras de bits dos ODS
+-- Data: 2026-10-18
+-- Descrição: ODS guardados também como inteiro (bit N = ODS N, 1-17) ao lado do JSON,
+-- para filtro, contagem e matching com AND bit a bit e popcount em vez de json.loads.
+-- As colunas são mantidas por triggers em toda escrita (API, ETL e scripts).
+--
+-- Máscara NULL = JSON fora do formato (texto em vez de número, ODS repetido na vaga,
+-- valor fora de 1-17...): quem lê volta a interpretar o JSON, com o mesmo resultado de antes.
+-- JSON ausente ou inválido vale como lista vazia (máscara 0), como em _parse_json_field.
+--
+-- ALTER TABLE ADD COLUMN não é idempotente no SQLite: rodar de novo falha em "duplicate column".
+-- profissionais_esg fica na migration 004 (a tabela não é criada por nenhuma migration anterior).
+
+-- ============= vagas_esg.ods_mask =============
+
+ALTER TABLE vagas_esg ADD COLUMN ods_mask INTEGER;
+
+-- Backfill sem disparar update_vaga_timestamp (não é uma edição da vaga)
+DROP TRIGGER IF EXISTS update_vaga_timestamp;
+
+UPDATE vagas_esg SET ods_mask = CASE
+    WHEN ods_tags IS NULL OR NOT json_valid(ods_tags) THEN 0
+    WHEN json_type(ods_tags) <> 'array' THEN NULL
+    ELSE (
+        SELECT CASE WHEN COUNT(*) = COUNT(DISTINCT value)
+                     AND COUNT(*) = COUNT(CASE WHEN type = 'integer' AND value BETWEEN 1 AND 17 THEN 1 END)
+                    THEN COALESCE(SUM(1 << value), 0) END
+        FROM json_each(ods_tags)
+    )
+END;
+
+CREATE TRIGGER IF NOT EXISTS update_vaga_timestamp
+AFTER UPDATE ON vagas_esg
+BEGIN
+    UPDATE vagas_esg SET atualizada_em = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS vagas_ods_mask_insert
+AFTER INSERT ON vagas_esg
+BEGIN
+    UPDATE vagas_esg SET ods_mask = CASE
+        WHEN NEW.ods_tags IS NULL OR NOT json_valid(NEW.ods_tags) THEN 0
+        WHEN json_type(NEW.ods_tags) <> 'array' THEN NULL
+        ELSE (
+            SELECT CASE WHEN COUNT(*) = COUNT(DISTINCT value)
+                         AND COUNT(*) = COUNT(CASE WHEN type = 'integer' AND value BETWEEN 1 AND 17 THEN 1 END)
+                        THEN COALESCE(SUM(1 << value), 0) END
+            FROM json_each(NEW.ods_tags)
+        )
+    END
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS vagas_ods_mask_update
+AFTER UPDATE OF ods_tags ON vagas_esg
+WHEN NEW.ods_tags IS NOT OLD.ods_tags
+BEGIN
+    UPDATE vagas_esg SET ods_mask = CASE
+        WHEN NEW.ods_tags IS NULL OR NOT json_valid(NEW.ods_tags) THEN 0
+        WHEN json_type(NEW.ods_tags) <> 'array' THEN NULL
+        ELSE (
+            SELECT CASE WHEN COUNT(*) = COUNT(DISTINCT value)
+                         AND COUNT(*) = COUNT(CASE WHEN type = 'integer' AND value BETWEEN 1 AND 17 THEN 1 END)
+                        THEN COALESCE(SUM(1 << value), 0) END
+            FROM json_each(NEW.ods_tags)
+        )
+    END
+    WHERE id = NEW.id;
+END;
+
+-- Listagem (status + mais recentes) e contagem por ODS leem a máscara direto do índice
+CREATE INDEX IF NOT EXISTS idx_vagas_status_ods ON vagas_esg(status, criada_em DESC, ods_mask);
+
+-- ============= empresas_verdes.ods_mask =============
+
+ALTER TABLE empresas_verdes ADD COLUMN ods_mask INTEGER;
+
+UPDATE empresas_verdes SET ods_mask = CASE
+    WHEN ods_tags IS NULL OR NOT json_valid(ods_tags) THEN 0
+    WHEN json_type(ods_tags) <> 'array' THEN NULL
+    ELSE (
+        SELECT CASE WHEN COUNT(*) = COUNT(CASE WHEN type = 'integer' AND value BETWEEN 1 AND 17 THEN 1 END)
+                    THEN COALESCE(SUM(DISTINCT 1 << value), 0) END
+        FROM json_each(ods_tags)
+    )
+END;
+
+CREATE TRIGGER IF NOT EXISTS empresas_ods_mask_insert
+AFTER INSERT ON empresas_verdes
+BEGIN
+    UPDATE empresas_verdes SET ods_mask = CASE
+        WHEN NEW.ods_tags IS NULL OR NOT json_valid(NEW.ods_tags) THEN 0
+        WHEN json_type(NEW.ods_tags) <> 'array' THEN NULL
+        ELSE (
+            SELECT CASE WHEN COUNT(*) = COUNT(CASE WHEN type = 'integer' AND value BETWEEN 1 AND 17 THEN 1 END)
+                        THEN COALESCE(SUM(DISTINCT 1 << value), 0) END
+            FROM json_each(NEW.ods_tags)
+        )
+    END
+    WHERE cnpj = NEW.cnpj;
+END;
+
+-- O upsert do ETL regrava ods_tags em toda empresa; só recalcula o que mudou
+CREATE TRIGGER IF NOT EXISTS empresas_ods_mask_update
+AFTER UPDATE OF ods_tags ON empresas_verdes
+WHEN NEW.ods_tags IS NOT OLD.ods_tags
+BEGIN
+    UPDATE empresas_verdes SET ods_mask = CASE
+        WHEN NEW.ods_tags IS NULL OR NOT json_valid(NEW.ods_tags) THEN 0
+        WHEN json_type(NEW.ods_tags) <> 'array' THEN NULL
+        ELSE (
+            SELECT CASE WHEN COUNT(*) = COUNT(CASE WHEN type = 'integer' AND value BETWEEN 1 AND 17 THEN 1 END)
+                        THEN COALESCE(SUM(DISTINCT 1 << value), 0) END
+            FROM json_each(NEW.ods_tags)
+        )
+    END
+    WHERE cnpj = NEW.cnpj;
+END;
+
+CREATE INDEX IF NOT EXISTS idx_empresas_verdes_ods_mask ON empresas_verdes(ods_mask);
@@ -0,0 +1,88 @@
+-- Migration 004: Máscaras de bits dos ODS de profissionais_esg
+-- Data: 2026-10-18
+-- Descrição: Mesmo esquema da migration 003 (bit N = ODS N, NULL = JSON fora do formato)
+-- para ods_interesse e ods_experiencia, mantidas por triggers em toda escrita.
+-- ods_interesse: repetições não importam (conjunto); valores fora de 1-17 nunca casam com uma vaga.
+-- ods_experiencia: {"ODS": anos}; entram as chaves com anos > 0 (bônus de experiência).
+
+ALTER TABLE profissionais_esg ADD COLUMN ods_interesse_mask INTEGER;
+ALTER TABLE profissionais_esg ADD COLUMN ods_experiencia_mask INTEGER;
+
+UPDATE profissionais_esg SET
+    ods_interesse_mask = CASE
+        WHEN ods_interesse IS NULL OR NOT json_valid(ods_interesse) THEN 0
+        WHEN json_type(ods_interesse) <> 'array' THEN NULL
+        ELSE (
+            SELECT CASE WHEN COUNT(*) = COUNT(CASE WHEN type = 'integer' THEN 1 END)
+                        THEN COALESCE(SUM(DISTINCT CASE WHEN value BETWEEN 1 AND 17 THEN 1 << value END), 0) END
+            FROM json_each(ods_interesse)
+        )
+    END,
+    ods_experiencia_mask = CASE
+        WHEN ods_experiencia IS NULL OR NOT json_valid(ods_experiencia) OR json_type(ods_experiencia) <> 'object' THEN 0
+        ELSE (
+            SELECT CASE WHEN COUNT(*) = COUNT(DISTINCT key)
+                         AND COUNT(*) = COUNT(CASE WHEN type IN ('integer', 'real')
+                                                    AND (value <= 0 OR CAST(CAST(key AS INTEGER) AS TEXT) = key) THEN 1 END)
+                        THEN COALESCE(SUM(DISTINCT CASE WHEN value > 0 AND CAST(key AS INTEGER) BETWEEN 1 AND 17
+                                                        THEN 1 << CAST(key AS INTEGER) END), 0) END
+            FROM json_each(ods_experiencia)
+        )
+    END;
+
+CREATE TRIGGER IF NOT EXISTS profissionais_ods_mask_insert
+AFTER INSERT ON profissionais_esg
+BEGIN
+    UPDATE profissionais_esg SET
+        ods_interesse_mask = CASE
+            WHEN NEW.ods_interesse IS NULL OR NOT json_valid(NEW.ods_interesse) THEN 0
+            WHEN json_type(NEW.ods_interesse) <> 'array' THEN NULL
+            ELSE (
+                SELECT CASE WHEN COUNT(*) = COUNT(CASE WHEN type = 'integer' THEN 1 END)
+                            THEN COALESCE(SUM(DISTINCT CASE WHEN value BETWEEN 1 AND 17 THEN 1 << value END), 0) END
+                FROM json_each(NEW.ods_interesse)
+            )
+        END,
+        ods_experiencia_mask = CASE
+            WHEN NEW.ods_experiencia IS NULL OR NOT json_valid(NEW.ods_experiencia)
+                 OR json_type(NEW.ods_experiencia) <> 'object' THEN 0
+            ELSE (
+                SELECT CASE WHEN COUNT(*) = COUNT(DISTINCT key)
+                             AND COUNT(*) = COUNT(CASE WHEN type IN ('integer', 'real')
+                                                        AND (value <= 0 OR CAST(CAST(key AS INTEGER) AS TEXT) = key) THEN 1 END)
+                            THEN COALESCE(SUM(DISTINCT CASE WHEN value > 0 AND CAST(key AS INTEGER) BETWEEN 1 AND 17
+                                                            THEN 1 << CAST(key AS INTEGER) END), 0) END
+                FROM json_each(NEW.ods_experiencia)
+            )
+        END
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS profissionais_ods_mask_update
+AFTER UPDATE OF ods_interesse, ods_experiencia ON profissionais_esg
+WHEN NEW.ods_interesse IS NOT OLD.ods_interesse OR NEW.ods_experiencia IS NOT OLD.ods_experiencia
+BEGIN
+    UPDATE profissionais_esg SET
+        ods_interesse_mask = CASE
+            WHEN NEW.ods_interesse IS NULL OR NOT json_valid(NEW.ods_interesse) THEN 0
+            WHEN json_type(NEW.ods_interesse) <> 'array' THEN NULL
+            ELSE (
+                SELECT CASE WHEN COUNT(*) = COUNT(CASE WHEN type = 'integer' THEN 1 END)
+                            THEN COALESCE(SUM(DISTINCT CASE WHEN value BETWEEN 1 AND 17 THEN 1 << value END), 0) END
+                FROM json_each(NEW.ods_interesse)
+            )
+        END,
+        ods_experiencia_mask = CASE
+            WHEN NEW.ods_experiencia IS NULL OR NOT json_valid(NEW.ods_experiencia)
+                 OR json_type(NEW.ods_experiencia) <> 'object' THEN 0
+            ELSE (
+                SELECT CASE WHEN COUNT(*) = COUNT(DISTINCT key)
+                             AND COUNT(*) = COUNT(CASE WHEN type IN ('integer', 'real')
+                                                        AND (value <= 0 OR CAST(CAST(key AS INTEGER) AS TEXT) = key) THEN 1 END)
+                            THEN COALESCE(SUM(DISTINCT CASE WHEN value > 0 AND CAST(key AS INTEGER) BETWEEN 1 AND 17
+                                                            THEN 1 << CAST(key AS INTEGER) END), 0) END
+                FROM json_each(NEW.ods_experiencia)
+            )
+        END
+    WHERE id = NEW.id;
+END;
@@ -0,0 +1,44 @@
+-- Migration 005: Dicionário de habilidades e junções com profissionais e vagas
+-- Data: 2026-10-18
+-- Descrição: Cada habilidade canônica (minúsculas, sem espaços nas pontas) ganha um ID;
+-- profissional_habilidades e vaga_habilidades ligam os IDs às colunas JSON
+-- habilidades_esg / habilidades_requeridas. "Quem tem a habilidade X" vira busca no índice
+-- (habilidade_id, entidade) e a API monta dele o índice invertido em memória.
+--
+-- As junções são mantidas pela API na mesma transação da escrita do JSON
+-- (api/services/habilidades.py). A normalização é a do Python (lower() de Unicode,
+-- que o lower() do SQLite não faz), por isso não há triggers nem backfill aqui:
+-- depois desta migration, e de cargas feitas direto no banco, rode
+-- scripts/indexar_habilidades.py.
+
+CREATE TABLE IF NOT EXISTS habilidades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL UNIQUE -- forma canônica
+);
+
+CREATE TABLE IF NOT EXISTS profissional_habilidades (
+    profissional_id INTEGER NOT NULL,
+    habilidade_id INTEGER NOT NULL,
+    PRIMARY KEY (profissional_id, habilidade_id),
+    FOREIGN KEY (habilidade_id) REFERENCES habilidades(id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS vaga_habilidades (
+    vaga_id INTEGER NOT NULL,
+    habilidade_id INTEGER NOT NULL,
+    PRIMARY KEY (vaga_id, habilidade_id),
+    FOREIGN KEY (vaga_id) REFERENCES vagas_esg(id) ON DELETE CASCADE,
+    FOREIGN KEY (habilidade_id) REFERENCES habilidades(id)
+) WITHOUT ROWID;
+
+-- Índice invertido no banco: habilidade -> IDs já ordenados
+CREATE INDEX IF NOT EXISTS idx_profissional_habilidades_habilidade ON profissional_habilidades(habilidade_id, profissional_id);
+CREATE INDEX IF NOT EXISTS idx_vaga_habilidades_habilidade ON vaga_habilidades(habilidade_id, vaga_id);
+
+-- Incrementada a cada escrita nas junções; a API recarrega o índice em memória quando muda
+CREATE TABLE IF NOT EXISTS habilidades_versao (
+    versao INTEGER NOT NULL
+);
+
+INSERT INTO habilidades_versao (versao)
+SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM habilidades_versao);
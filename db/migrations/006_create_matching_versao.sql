@@ -0,0 +1,53 @@
+-- Migration 006: Versão das colunas usadas na geração de candidatos do matching
+-- Data: 2026-10-18
+-- Descrição: A API guarda em memória, por tabela, as colunas baratas do ranking
+-- (máscaras de ODS, UF, remoto, nível, anos de ESG) e as recarrega quando a versão
+-- muda (api/services/match_candidatos.py). Triggers incrementam a versão em toda
+-- escrita que mexe nessas colunas, venha ela da API ou de cargas direto no banco;
+-- contadores como candidaturas_recebidas não invalidam nada.
+
+CREATE TABLE IF NOT EXISTS matching_versao (
+    tabela TEXT PRIMARY KEY,
+    versao INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO matching_versao (tabela, versao) VALUES ('vagas_esg', 0), ('profissionais_esg', 0);
+
+CREATE TRIGGER IF NOT EXISTS vagas_matching_versao_insert
+AFTER INSERT ON vagas_esg
+BEGIN
+    UPDATE matching_versao SET versao = versao + 1 WHERE tabela = 'vagas_esg';
+END;
+
+CREATE TRIGGER IF NOT EXISTS vagas_matching_versao_update
+AFTER UPDATE OF status, ods_tags, habilidades_requeridas, nivel_experiencia, localizacao_uf, remoto ON vagas_esg
+BEGIN
+    UPDATE matching_versao SET versao = versao + 1 WHERE tabela = 'vagas_esg';
+END;
+
+CREATE TRIGGER IF NOT EXISTS vagas_matching_versao_delete
+AFTER DELETE ON vagas_esg
+BEGIN
+    UPDATE matching_versao SET versao = versao + 1 WHERE tabela = 'vagas_esg';
+END;
+
+-- profissionais_esg não é criada por migration (002 vazia): esta parte falha
+-- sozinha, sem desfazer a de vagas, em bancos que ainda não têm a tabela
+CREATE TRIGGER IF NOT EXISTS profissionais_matching_versao_insert
+AFTER INSERT ON profissionais_esg
+BEGIN
+    UPDATE matching_versao SET versao = versao + 1 WHERE tabela = 'profissionais_esg';
+END;
+
+CREATE TRIGGER IF NOT EXISTS profissionais_matching_versao_update
+AFTER UPDATE OF status, ods_interesse, ods_experiencia, habilidades_esg, localizacao_uf, aceita_remoto,
+                disponivel_mudanca, nivel_desejado, anos_experiencia_esg ON profissionais_esg
+BEGIN
+    UPDATE matching_versao SET versao = versao + 1 WHERE tabela = 'profissionais_esg';
+END;
+
+CREATE TRIGGER IF NOT EXISTS profissionais_matching_versao_delete
+AFTER DELETE ON profissionais_esg
+BEGIN
+    UPDATE matching_versao SET versao = versao + 1 WHERE tabela = 'profissionais_esg';
+END;
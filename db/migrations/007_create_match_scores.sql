@@ -0,0 +1,117 @@
+-- Migration 007: Scores de matching materializados
+-- Data: 2026-10-18
+-- Descrição: match_scores guarda os scores (total e componentes) de cada vaga com os
+-- seus MATCH_SCORES_TOP_K melhores profissionais e de cada profissional com as suas
+-- melhores vagas; os endpoints de ranking leem o top-K pelo índice (vaga_id, score) /
+-- (profissional_id, score) em vez de pontuar a tabela inteira.
+-- A matriz completa não cabe (100k profissionais x 20k vagas = 2 bilhões de pares).
+--
+-- match_scores_cortes: por vaga/profissional, o score de corte (K-ésimo melhor par, com
+-- folga) e quantos pares guardados estão no corte ou acima (n). Todo par com score >= corte
+-- de uma das pontas está em match_scores.
+--
+-- Triggers enfileiram em match_scores_pendentes toda vaga/profissional inserido, removido
+-- ou com coluna pontuada alterada (API, ETL ou carga direto no banco); o worker da API
+-- (api/services/match_scores.py) recalcula só a linha/coluna da matriz de cada pendente.
+-- As linhas que já existem entram na fila aqui: o worker preenche a tabela em segundo
+-- plano, ou rode scripts/calcular_match_scores.py.
+
+CREATE TABLE IF NOT EXISTS match_scores (
+    vaga_id INTEGER NOT NULL,
+    profissional_id INTEGER NOT NULL,
+    score REAL NOT NULL,
+    score_ods REAL NOT NULL,
+    score_habilidades REAL NOT NULL,
+    score_experiencia REAL NOT NULL,
+    score_localizacao REAL NOT NULL,
+    score_salario REAL NOT NULL,
+    model_version TEXT NOT NULL,
+    calculado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (vaga_id, profissional_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_match_scores_vaga_score ON match_scores(vaga_id, score DESC);
+CREATE INDEX IF NOT EXISTS idx_match_scores_profissional_score ON match_scores(profissional_id, score DESC);
+
+CREATE TABLE IF NOT EXISTS match_scores_cortes (
+    tipo TEXT NOT NULL CHECK (tipo IN ('vaga', 'profissional')),
+    entidade_id INTEGER NOT NULL,
+    corte REAL NOT NULL,
+    n INTEGER NOT NULL,
+    model_version TEXT NOT NULL,
+    calculado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (tipo, entidade_id)
+);
+
+CREATE TABLE IF NOT EXISTS match_scores_pendentes (
+    id INTEGER PRIMARY KEY,
+    tipo TEXT NOT NULL CHECK (tipo IN ('vaga', 'profissional')),
+    entidade_id INTEGER NOT NULL,
+    UNIQUE (tipo, entidade_id)
+);
+
+-- Versão das linhas de cada tabela pontuada, para o worker saber quando recarregar
+-- as colunas que mantém em memória (inclui salário e cidade, fora da matching_versao)
+CREATE TABLE IF NOT EXISTS match_scores_versao (
+    tipo TEXT PRIMARY KEY,
+    versao INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO match_scores_versao (tipo, versao) VALUES ('vaga', 0), ('profissional', 0);
+
+-- ============= vagas_esg =============
+
+CREATE TRIGGER IF NOT EXISTS vagas_match_scores_insert
+AFTER INSERT ON vagas_esg
+BEGIN
+    INSERT OR IGNORE INTO match_scores_pendentes (tipo, entidade_id) VALUES ('vaga', NEW.id);
+    UPDATE match_scores_versao SET versao = versao + 1 WHERE tipo = 'vaga';
+END;
+
+CREATE TRIGGER IF NOT EXISTS vagas_match_scores_update
+AFTER UPDATE OF status, ods_tags, ods_mask, habilidades_requeridas, nivel_experiencia, localizacao_uf,
+                localizacao_cidade, remoto, salario_min, salario_max ON vagas_esg
+BEGIN
+    INSERT OR IGNORE INTO match_scores_pendentes (tipo, entidade_id) VALUES ('vaga', NEW.id);
+    UPDATE match_scores_versao SET versao = versao + 1 WHERE tipo = 'vaga';
+END;
+
+CREATE TRIGGER IF NOT EXISTS vagas_match_scores_delete
+AFTER DELETE ON vagas_esg
+BEGIN
+    INSERT OR IGNORE INTO match_scores_pendentes (tipo, entidade_id) VALUES ('vaga', OLD.id);
+    UPDATE match_scores_versao SET versao = versao + 1 WHERE tipo = 'vaga';
+END;
+
+INSERT OR IGNORE INTO match_scores_pendentes (tipo, entidade_id)
+SELECT 'vaga', id FROM vagas_esg WHERE status = 'ativa' ORDER BY id;
+
+-- ============= profissionais_esg =============
+-- profissionais_esg não é criada por migration (002 vazia): esta parte falha
+-- sozinha, sem desfazer a de vagas, em bancos que ainda não têm a tabela
+
+CREATE TRIGGER IF NOT EXISTS profissionais_match_scores_insert
+AFTER INSERT ON profissionais_esg
+BEGIN
+    INSERT OR IGNORE INTO match_scores_pendentes (tipo, entidade_id) VALUES ('profissional', NEW.id);
+    UPDATE match_scores_versao SET versao = versao + 1 WHERE tipo = 'profissional';
+END;
+
+CREATE TRIGGER IF NOT EXISTS profissionais_match_scores_update
+AFTER UPDATE OF status, ods_interesse, ods_experiencia, ods_interesse_mask, ods_experiencia_mask, habilidades_esg,
+                nivel_desejado, anos_experiencia_esg, localizacao_uf, localizacao_cidade, aceita_remoto,
+                disponivel_mudanca, pretensao_salarial_min, pretensao_salarial_max ON profissionais_esg
+BEGIN
+    INSERT OR IGNORE INTO match_scores_pendentes (tipo, entidade_id) VALUES ('profissional', NEW.id);
+    UPDATE match_scores_versao SET versao = versao + 1 WHERE tipo = 'profissional';
+END;
+
+CREATE TRIGGER IF NOT EXISTS profissionais_match_scores_delete
+AFTER DELETE ON profissionais_esg
+BEGIN
+    INSERT OR IGNORE INTO match_scores_pendentes (tipo, entidade_id) VALUES ('profissional', OLD.id);
+    UPDATE match_scores_versao SET versao = versao + 1 WHERE tipo = 'profissional';
+END;
+
+INSERT OR IGNORE INTO match_scores_pendentes (tipo, entidade_id)
+SELECT 'profissional', id FROM profissionais_esg WHERE status = 'ativo' ORDER BY id;
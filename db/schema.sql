@@ -41,10 +41,12 @@ CREATE TABLE gjb.empresas_verdes (
     score_verde INTEGER CHECK (score_verde >= 0 AND score_verde <= 100),
     ods_tags INTEGER[],
     fonte_atualizacao TEXT DEFAULT 'ETL_RFB',
-    atualizado_em TIMESTAMPTZ DEFAULT NOW(),
-    
-    -- Foreign key constraint
-    FOREIGN KEY (cnae_principal) REFERENCES gjb.cnae_green(cnae)
+    atualizado_em TIMESTAMPTZ DEFAULT NOW()
+
+    -- cnae_principal is the RFB primary activity and may not be green (the company
+    -- qualifies through a green secondary CNAE); the green links live in empresa_cnae.
+    -- Databases created with the old foreign key:
+    --   ALTER TABLE gjb.empresas_verdes DROP CONSTRAINT empresas_verdes_cnae_principal_fkey;
 );
 
 -- Table: gjb.empresa_cnae
@@ -86,6 +88,6 @@ CREATE INDEX idx_empresas_verdes_data_abertura ON gjb.empresas_verdes(data_abert
 COMMENT ON SCHEMA gjb IS 'Green Jobs Brasil - Schema for green companies classification system';
 COMMENT ON TABLE gjb.cnae_green IS 'Master table for green CNAEs with ODS mapping and priority classification';
 COMMENT ON TABLE gjb.empresas_verdes IS 'Companies classified as green with scoring and ODS tags';
-COMMENT ON TABLE gjb.empresa_cnae IS 'Junction table mapping companies to their CNAEs (primary and secondary)';
+COMMENT ON TABLE gjb.empresa_cnae IS 'Junction table mapping companies to their green CNAEs (primary and secondary)';
 COMMENT ON COLUMN gjb.cnae_green.ods_tags IS 'Generated array of ODS numbers extracted from ods_raw field';
 COMMENT ON COLUMN gjb.empresas_verdes.score_verde IS 'Green score: 0-100 based on CNAE priority and company status';
\ No newline at end of file
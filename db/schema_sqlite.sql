@@ -30,10 +30,10 @@ CREATE TABLE IF NOT EXISTS empresas_verdes (
     score_verde INTEGER CHECK (score_verde >= 0 AND score_verde <= 100),
     ods_tags TEXT, -- JSON array as text
     fonte_atualizacao TEXT DEFAULT 'ETL_RFB',
-    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
-    
-    -- Foreign key constraint
-    FOREIGN KEY (cnae_principal) REFERENCES cnae_green(cnae)
+    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+
+    -- cnae_principal is the RFB primary activity and may not be green (the company
+    -- qualifies through a green secondary CNAE); the green links live in empresa_cnae
 );
 
 -- Table: empresa_cnae
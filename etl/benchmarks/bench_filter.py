@@ -0,0 +1,147 @@
+"""
+Green Jobs Brasil - Green Companies Filter Benchmark
+Compares the string-built IN/EXISTS filter with the semi-join filter of the
+green_companies view on a synthetic Estabelecimentos file.
+
+Usage:
+    python etl/benchmarks/bench_filter.py --rows 10000000
+    python etl/benchmarks/bench_filter.py --rows 10000000 --in-memory
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+ETL_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ETL_DIR))
+
+from config import config  # noqa: E402
+from main import GreenJobsETL  # noqa: E402
+
+ALL_UFS = [
+    "AC", "AL", "AP", "AM", "BA", "CE", "DF", "ES", "GO", "MA", "MT", "MS", "MG", "PA",
+    "PB", "PR", "PE", "PI", "RJ", "RN", "RS", "RO", "RR", "SC", "SP", "SE", "TO",
+]
+NON_GREEN_CNAES = [f"{code:04d}-{code % 10}/0{code % 7}" for code in range(1000, 1400)]
+
+
+def write_estabelecimentos(etl: GreenJobsETL, path: Path, rows: int, seed: float) -> None:
+    """Write a ';'-separated Estabelecimentos file with the DuckDB table layout."""
+    conn = etl.duckdb_conn
+    cnaes = [row[0] for row in conn.execute("SELECT cnae FROM cnae_green").fetchall()] + NON_GREEN_CNAES
+    columns = [row[0] for row in conn.execute("DESCRIBE estabelecimentos").fetchall()]
+    generated = {
+        "cnpj": "lpad(i::VARCHAR, 8, '0')",
+        "identificador_matriz_filial": "CASE WHEN random() < 0.85 THEN '1' ELSE '2' END",
+        "situacao_cadastral": "CASE WHEN random() < 0.9 THEN 'ATIVA' ELSE 'BAIXADA' END",
+        "cnae_fiscal_principal": "cnaes[1 + floor(random() * len(cnaes))::INTEGER]",
+        "cnae_fiscal_secundaria": """array_to_string(list_transform(range(floor(random() * 8)::INTEGER),
+                                     x -> cnaes[1 + floor(random() * len(cnaes))::INTEGER]), ',')""",
+        "uf": "ufs[1 + floor(random() * len(ufs))::INTEGER]",
+        "data_situacao_cadastral": "DATE '2020-01-01'",
+        "data_inicio_atividade": "DATE '2020-01-01'",
+        "data_situacao_especial": "NULL::DATE",
+    }
+    filler = "'x'"
+    select = ",\n".join(f"{generated.get(column, filler)} as {column}" for column in columns)
+
+    conn.execute(f"SELECT setseed({seed})")
+    conn.execute(f"""
+        COPY (
+            WITH pool AS (SELECT ?::VARCHAR[] as cnaes, ?::VARCHAR[] as ufs)
+            SELECT {select}
+            FROM range({rows}) r(i), pool
+        ) TO '{path}' (HEADER, DELIMITER ';')
+    """, [cnaes, ALL_UFS])
+
+
+def create_empresas(conn: duckdb.DuckDBPyConnection, rows: int) -> None:
+    conn.execute(f"""
+        INSERT INTO empresas
+        SELECT lpad(i::VARCHAR, 8, '0'), 'Empresa ' || i, '2062', '49', 1000, '01', ''
+        FROM range({rows}) r(i)
+    """)
+
+
+def create_legacy_view(etl: GreenJobsETL) -> None:
+    """Previous filter: string-built IN lists, per-row EXISTS over unnest, UF filter after the join."""
+    green_cnaes_str = "','".join(etl.cnae_green_mapping.keys())
+    target_ufs_str = "','".join(config.TARGET_UFS)
+
+    etl.duckdb_conn.execute(f"""
+        CREATE OR REPLACE VIEW green_companies_legacy AS
+        SELECT e.cnpj, e.razao_social, est.nome_fantasia,
+               est.cnae_fiscal_principal as cnae_principal,
+               CASE WHEN est.cnae_fiscal_secundaria IS NOT NULL AND est.cnae_fiscal_secundaria != ''
+                    THEN string_split(est.cnae_fiscal_secundaria, ',') ELSE [] END as cnaes_secundarias,
+               e.porte, est.uf, est.municipio, est.situacao_cadastral,
+               est.data_inicio_atividade as data_abertura
+        FROM empresas e
+        JOIN estabelecimentos est ON e.cnpj = est.cnpj
+        WHERE (est.cnae_fiscal_principal IN ('{green_cnaes_str}')
+               OR EXISTS (
+                   SELECT 1 FROM unnest(string_split(est.cnae_fiscal_secundaria, ',')) AS t(sec_cnae)
+                   WHERE sec_cnae IN ('{green_cnaes_str}')
+               ))
+          AND est.uf IN ('{target_ufs_str}')
+          AND est.identificador_matriz_filial = '1'
+    """)
+
+
+def time_view(conn: duckdb.DuckDBPyConnection, view: str) -> tuple:
+    start = time.perf_counter()
+    rows = conn.execute(f"SELECT COUNT(*) FROM {view}").fetchone()[0]
+    return rows, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Number of synthetic establishments")
+    parser.add_argument("--seed", type=float, default=0.42, help="DuckDB random seed (-1..1)")
+    parser.add_argument("--file", type=Path, default=Path("data/bench/Estabelecimentos_bench.ESTABCSV"),
+                        help="Synthetic file, generated when missing")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="Load the file into a DuckDB table first and time only the filter")
+    args = parser.parse_args()
+
+    config.CNAE_GREEN_SEED = ETL_DIR / "cnae_green_seed.csv"
+    etl = GreenJobsETL()
+    etl.duckdb_conn = duckdb.connect(":memory:")
+    etl.load_cnae_green_mapping()
+    etl.setup_duckdb_schema()
+    etl.register_cnae_green_table()
+
+    if not args.file.exists():
+        args.file.parent.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        write_estabelecimentos(etl, args.file, args.rows, args.seed)
+        print(f"generated   : {args.file} in {time.perf_counter() - start:.2f}s")
+
+    create_empresas(etl.duckdb_conn, args.rows)
+
+    # Every query scans the file again unless it is loaded once up front
+    columns = [(row[0], row[1]) for row in etl.duckdb_conn.execute("DESCRIBE estabelecimentos").fetchall()]
+    etl.duckdb_conn.execute("DROP TABLE estabelecimentos")
+    kind = "TABLE" if args.in_memory else "VIEW"
+    casts = ", ".join(f"CAST({name} AS {column_type}) as {name}" for name, column_type in columns)
+    etl.duckdb_conn.execute(
+        f"CREATE {kind} estabelecimentos AS SELECT {casts} FROM {etl._csv_source(args.file, columns)}"
+    )
+    total = etl.duckdb_conn.execute("SELECT COUNT(*) FROM estabelecimentos").fetchone()[0]
+
+    create_legacy_view(etl)
+    etl._create_green_companies_view()
+
+    for label, view in (("legacy", "green_companies_legacy"), ("semi-join", "green_companies")):
+        rows, seconds = time_view(etl.duckdb_conn, view)
+        print(f"{label:<12}: {seconds:8.2f}s  ({total / seconds:,.0f} rows/s scanned, {rows} green companies)")
+
+    etl.duckdb_conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Green Jobs Brasil - End-to-End ETL Benchmark
+Generates synthetic RFB archives at several scales and runs the full
+GreenJobsETL pipeline on each one in a fresh process, collecting wall time,
+throughput and peak memory from the pipeline's run report.
+
+Usage:
+    python etl/benchmarks/bench_pipeline.py --scales 1000000,10000000,50000000
+    python etl/benchmarks/bench_pipeline.py --scales 1000000 --env STREAMING_ENABLED=true
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+ETL_DIR = BENCH_DIR.parent
+REPO_DIR = ETL_DIR.parent
+
+sys.path.insert(0, str(BENCH_DIR))
+
+import synthetic_rfb  # noqa: E402
+
+
+def prepare_workspace(workspace: Path) -> None:
+    """Fresh SQLite serving DB and seed file, laid out as the pipeline expects relative to its cwd."""
+    if workspace.exists():
+        shutil.rmtree(workspace)
+    (workspace / "etl").mkdir(parents=True)
+    shutil.copy(ETL_DIR / "cnae_green_seed.csv", workspace / "etl" / "cnae_green_seed.csv")
+
+    conn = sqlite3.connect(workspace / "gjb_dev.db")
+    conn.executescript((REPO_DIR / "db" / "schema_sqlite.sql").read_text(encoding="utf-8"))
+    conn.close()
+
+
+def run_scale(rows: int, data_dir: Path, extra_env: Dict[str, str], seed: int) -> Dict:
+    """Generate (or reuse) the archives for one scale and run the pipeline on them."""
+    raw_dir = data_dir / f"rows_{rows}" / "raw"
+    if not (raw_dir / "Estabelecimentos0.zip").exists():
+        start = time.perf_counter()
+        synthetic_rfb.generate(raw_dir, rows, seed=seed)
+        print(f"[{rows:,}] generated archives in {time.perf_counter() - start:.1f}s")
+
+    workspace = data_dir / f"rows_{rows}" / "run"
+    prepare_workspace(workspace)
+
+    env = {
+        **os.environ,
+        "RAW_DIR": str(raw_dir),
+        "PROCESSED_DIR": str(workspace / "processed"),
+        "HASH_STATE_FILE": str(workspace / "processed" / "empresas_verdes_hashes.parquet"),
+        **extra_env,
+    }
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, str(ETL_DIR / "main.py")], cwd=workspace, env=env,
+        capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Pipeline failed at {rows:,} rows:\n{result.stderr[-2000:]}")
+
+    with open(workspace / "processed" / "run_report.json", encoding="utf-8") as f:
+        report = json.load(f)
+
+    green = sqlite3.connect(workspace / "gjb_dev.db").execute("SELECT COUNT(*) FROM empresas_verdes").fetchone()[0]
+    raw_bytes = sum(path.stat().st_size for path in raw_dir.glob("*.zip"))
+    return {
+        'rows': rows,
+        'raw_mb': round(raw_bytes / 1e6, 1),
+        'wall_seconds': round(wall, 2),
+        'rows_per_second': round(rows / wall),
+        'peak_rss_mb': report.get('peak_rss_mb'),
+        'green_companies': green,
+        'stages': {
+            stage['name']: {key: stage[key] for key in ('wall_seconds', 'rows_per_second', 'peak_rss_mb')}
+            for stage in report.get('stages', [])
+        },
+    }
+
+
+def print_results(results: List[Dict]) -> None:
+    print(f"{'rows':>12}{'raw MB':>10}{'wall s':>10}{'rows/s':>12}{'peak MB':>10}{'green':>10}")
+    for result in results:
+        print(
+            f"{result['rows']:>12,}{result['raw_mb']:>10}{result['wall_seconds']:>10}"
+            f"{result['rows_per_second']:>12,}{str(result['peak_rss_mb']):>10}{result['green_companies']:>10,}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1000000,10000000,50000000",
+                        help="Comma-separated numbers of establishments")
+    parser.add_argument("--data-dir", type=Path, default=Path("data/bench"),
+                        help="Where archives, run workspaces and results are kept")
+    parser.add_argument("--seed", type=int, default=42, help="Generator seed")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra ETL setting for the runs (repeatable)")
+    args = parser.parse_args()
+
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    results = []
+    for rows in (int(scale) for scale in args.scales.split(",")):
+        result = run_scale(rows, args.data_dir.resolve(), extra_env, args.seed)
+        print(f"[{rows:,}] {result['wall_seconds']}s, {result['rows_per_second']:,} rows/s, "
+              f"peak {result['peak_rss_mb']} MB")
+        results.append(result)
+
+    print_results(results)
+
+    output = args.data_dir / "bench_pipeline_results.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({'env': extra_env, 'results': results}, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Green Jobs Brasil - Scoring Benchmark
+Compares the row-wise pandas scoring (df.apply) with the set-based DuckDB view.
+
+Usage:
+    python etl/benchmarks/bench_scoring.py --rows 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+ETL_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ETL_DIR))
+
+from config import config, ScoringRules  # noqa: E402
+from main import GreenJobsETL  # noqa: E402
+
+NON_GREEN_CNAES = [f"{code:04d}-{code % 10}/0{code % 7}" for code in range(1000, 1100)]
+
+
+def create_companies(conn: duckdb.DuckDBPyConnection, rows: int, seed: float) -> None:
+    """Create a green_companies table with random primary/secondary CNAEs."""
+    cnaes = [row[0] for row in conn.execute("SELECT cnae FROM cnae_green").fetchall()] + NON_GREEN_CNAES
+    conn.execute(f"SELECT setseed({seed})")
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE green_companies AS
+        WITH pool AS (SELECT ?::VARCHAR[] as cnaes)
+        SELECT
+            lpad(i::VARCHAR, 14, '0') as cnpj,
+            cnaes[1 + floor(random() * len(cnaes))::INTEGER] as cnae_principal,
+            list_transform(range(floor(random() * 8)::INTEGER),
+                           x -> cnaes[1 + floor(random() * len(cnaes))::INTEGER]) as cnaes_secundarias,
+            CASE WHEN random() < 0.9 THEN 'ATIVA' ELSE 'BAIXADA' END as situacao_cadastral
+        FROM range({rows}) r(i), pool
+    """, [cnaes])
+
+
+def bench_pandas_apply(etl: GreenJobsETL) -> float:
+    """Previous implementation: two df.apply(axis=1) passes over a DataFrame."""
+    df = etl.duckdb_conn.execute("SELECT * FROM green_companies").df()
+    df['cnaes_secundarias'] = df['cnaes_secundarias'].apply(list)
+
+    start = time.perf_counter()
+    df['score_verde'] = df.apply(
+        lambda row: ScoringRules.calculate_score(
+            row['cnae_principal'],
+            row['cnaes_secundarias'],
+            row['situacao_cadastral'],
+            etl.cnae_priorities
+        ), axis=1
+    )
+    df['ods_tags'] = df.apply(etl._calculate_ods_tags, axis=1)
+    return time.perf_counter() - start
+
+
+def bench_duckdb_view(etl: GreenJobsETL) -> float:
+    """Current implementation: green_companies_scored view materialized in DuckDB."""
+    etl._create_scored_view()
+    start = time.perf_counter()
+    etl.duckdb_conn.execute("CREATE OR REPLACE TEMP TABLE scored AS SELECT * FROM green_companies_scored")
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of synthetic companies")
+    parser.add_argument("--seed", type=float, default=0.42, help="DuckDB random seed (-1..1)")
+    parser.add_argument("--skip-pandas", action="store_true", help="Only time the DuckDB view")
+    args = parser.parse_args()
+
+    config.CNAE_GREEN_SEED = ETL_DIR / "cnae_green_seed.csv"
+    etl = GreenJobsETL()
+    etl.duckdb_conn = duckdb.connect(":memory:")
+    etl.load_cnae_green_mapping()
+    etl.register_cnae_green_table()
+    create_companies(etl.duckdb_conn, args.rows, args.seed)
+
+    duckdb_seconds = bench_duckdb_view(etl)
+    print(f"duckdb view : {duckdb_seconds:8.2f}s  ({args.rows / duckdb_seconds:,.0f} rows/s)")
+
+    if not args.skip_pandas:
+        pandas_seconds = bench_pandas_apply(etl)
+        print(f"pandas apply: {pandas_seconds:8.2f}s  ({args.rows / pandas_seconds:,.0f} rows/s)")
+        print(f"speedup     : {pandas_seconds / duckdb_seconds:8.1f}x")
+
+    etl.duckdb_conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
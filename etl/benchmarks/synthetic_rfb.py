@@ -0,0 +1,192 @@
+"""
+Green Jobs Brasil - Synthetic RFB Dataset Generator
+Writes seeded Empresas*.zip / Estabelecimentos*.zip archives in the RFB layout:
+headerless, ';'-separated, every field quoted, latin-1, YYYYMMDD dates and
+comma decimals. CNAEs follow the cnae_green_seed.csv format (e.g. 3511-5/01),
+so the green share of the output is controlled by --green-share.
+
+Usage:
+    python etl/benchmarks/synthetic_rfb.py --rows 1000000 --output data/raw
+"""
+
+import argparse
+import codecs
+import sys
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List
+
+import duckdb
+import pandas as pd
+
+ETL_DIR = Path(__file__).resolve().parent.parent
+
+# Share of establishments per UF, roughly the RFB distribution of active companies
+UF_WEIGHTS = {
+    "SP": 28.0, "MG": 10.8, "RJ": 8.4, "PR": 7.1, "RS": 6.9, "SC": 5.3, "BA": 5.0,
+    "GO": 3.6, "PE": 3.1, "CE": 2.9, "DF": 2.2, "ES": 2.1, "PA": 2.0, "MT": 1.9,
+    "MS": 1.4, "MA": 1.4, "PB": 1.2, "RN": 1.1, "AM": 1.1, "AL": 0.9, "PI": 0.9,
+    "SE": 0.6, "RO": 0.6, "TO": 0.5, "AC": 0.2, "AP": 0.2, "RR": 0.2,
+}
+
+# Most frequent non-green CNAEs, most frequent first
+NON_GREEN_CNAES = [
+    "4781-4/00", "5611-2/01", "9602-5/01", "4712-1/00", "4399-1/03", "8219-9/99",
+    "4930-2/02", "7319-0/02", "5611-2/03", "4744-0/99", "4120-4/00", "8599-6/04",
+    "6201-5/01", "4789-0/99", "9430-8/00", "4321-5/00", "8630-5/04", "4520-0/01",
+    "4723-7/00", "5620-1/04", "4772-5/00", "7020-4/00", "6911-7/01", "8211-3/00",
+    "4711-3/02", "1412-6/01", "4530-7/03", "8112-5/00", "9492-8/00", "4637-1/07",
+]
+
+SITUACOES = [("02", 0.62), ("08", 0.28), ("04", 0.07), ("03", 0.03)]  # ativa, baixada, inapta, suspensa
+PORTES = [("01", 0.70), ("03", 0.12), ("05", 0.18)]                   # ME, EPP, demais
+MUNICIPIOS = ["São Paulo", "Belo Horizonte", "Niterói", "Uberlândia", "Ribeirão Preto", "Jundiaí"]
+FILIAL_SHARE = 0.1
+
+
+def _list(values: List[str]) -> str:
+    return "[" + ", ".join(f"'{value}'" for value in values) + "]"
+
+
+def _weighted_case(draw: str, choices: List[tuple]) -> str:
+    """CASE expression picking a value from (value, weight) pairs with a uniform draw."""
+    total = sum(weight for _, weight in choices)
+    cases = []
+    cumulative = 0.0
+    for value, weight in choices[:-1]:
+        cumulative += weight / total
+        cases.append(f"WHEN {draw} < {cumulative:.6f} THEN '{value}'")
+    return f"CASE {' '.join(cases)} ELSE '{choices[-1][0]}' END"
+
+
+def _setup(conn: duckdb.DuckDBPyConnection, rows: int, seed: int, green_share: float) -> int:
+    """Register the lookup lists and the deterministic draw macro; return the number of companies."""
+    green = pd.read_csv(ETL_DIR / "cnae_green_seed.csv")['cnae'].tolist()
+    companies = rows - int(rows * FILIAL_SHARE)
+
+    # hash() keeps every draw reproducible regardless of DuckDB's thread count
+    conn.execute(f"CREATE OR REPLACE MACRO draw(i, k) AS (hash(i, k, {seed}) % 1000000) / 1000000.0")
+    conn.execute("CREATE OR REPLACE MACRO pick(lst, u) AS lst[1 + floor(u * len(lst))::INTEGER]")
+    conn.execute(f"""
+        CREATE OR REPLACE MACRO cnae(i, k) AS
+            CASE WHEN draw(i, k) < {green_share} THEN pick({_list(green)}, draw(i, k + 1))
+                 -- squared draw skews towards the most frequent codes
+                 ELSE pick({_list(NON_GREEN_CNAES)}, pow(draw(i, k + 1), 2))
+            END
+    """)
+    return companies
+
+
+def _estabelecimentos_query(rows: int, companies: int, where: str) -> str:
+    uf = _weighted_case("draw(i, 2)", list(UF_WEIGHTS.items()))
+    situacao = _weighted_case("draw(i, 3)", SITUACOES)
+    return f"""
+        SELECT
+            lpad((CASE WHEN i < {companies} THEN i ELSE hash(i, 1) % {companies} END)::VARCHAR, 8, '0'),
+            CASE WHEN i < {companies} THEN '0001' ELSE lpad((2 + i % 50)::VARCHAR, 4, '0') END,
+            lpad((i % 100)::VARCHAR, 2, '0'),
+            CASE WHEN i < {companies} THEN '1' ELSE '2' END,
+            CASE WHEN draw(i, 4) < 0.6 THEN 'Fantasia ' || i ELSE '' END,
+            {situacao},
+            strftime(DATE '2024-01-01' - CAST(draw(i, 5) * 3650 AS INTEGER), '%Y%m%d'),
+            '00', '', '',
+            strftime(DATE '2024-01-01' - CAST(draw(i, 6) * 9000 AS INTEGER), '%Y%m%d'),
+            cnae(i, 10),
+            CASE WHEN draw(i, 7) < 0.4 THEN ''
+                 ELSE array_to_string(list_transform(range(1 + floor(draw(i, 8) * 8)::INTEGER),
+                                                     x -> cnae(i * 16 + x, 20)), ',')
+            END,
+            'RUA', 'Rua ' || (i % 1000), (i % 2000)::VARCHAR, '', 'Centro',
+            lpad((hash(i, 9) % 100000000)::VARCHAR, 8, '0'),
+            {uf},
+            {_list(MUNICIPIOS)}[1 + (i % {len(MUNICIPIOS)})],
+            '11', lpad((i % 100000000)::VARCHAR, 8, '0'), '', '', '', '',
+            'contato' || i || '@example.com.br', '', ''
+        FROM range({rows}) r(i)
+        {where}
+    """
+
+
+def _empresas_query(companies: int, where: str) -> str:
+    porte = _weighted_case("draw(i, 31)", PORTES)
+    return f"""
+        SELECT
+            lpad(i::VARCHAR, 8, '0'),
+            'Empresa Sintética ' || i || ' Ltda',
+            CASE WHEN draw(i, 30) < 0.8 THEN '2062' ELSE '2135' END,
+            '49',
+            replace(printf('%.2f', floor(draw(i, 32) * 1000000) / 100.0), '.', ','),
+            {porte},
+            ''
+        FROM range({companies}) r(i)
+        {where}
+    """
+
+
+def _write_zip(conn: duckdb.DuckDBPyConnection, query: str, csv_path: Path,
+               zip_path: Path, member: str) -> None:
+    """COPY the query to a temporary UTF-8 CSV, then stream it latin-1 encoded into a zip member."""
+    conn.execute(f"COPY ({query}) TO '{csv_path}' (DELIMITER ';', HEADER false, FORCE_QUOTE *)")
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(csv_path, "rb") as source, zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        with archive.open(member, "w", force_zip64=True) as target:
+            while True:
+                chunk = source.read(16 << 20)
+                text = decoder.decode(chunk, final=not chunk)
+                target.write(text.encode("latin-1"))
+                if not chunk:
+                    break
+    csv_path.unlink()
+
+
+def generate(output_dir: Path, rows: int, shards: int = 10, seed: int = 42,
+             green_share: float = 0.04) -> Dict[str, List[Path]]:
+    """
+    Write ``shards`` Empresas and Estabelecimentos archives with ``rows`` establishments in total.
+
+    Returns:
+        Paths of the written archives per dataset
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    conn = duckdb.connect(":memory:")
+    companies = _setup(conn, rows, seed, green_share)
+    written = {'empresas': [], 'estabelecimentos': []}
+
+    for shard in range(shards):
+        where = f"WHERE i % {shards} = {shard}"
+        estab_query = _estabelecimentos_query(rows, companies, where)
+        empresas_query = _empresas_query(companies, where)
+
+        for dataset, query, name, extension in (
+            ('empresas', empresas_query, f"Empresas{shard}", "EMPRECSV"),
+            ('estabelecimentos', estab_query, f"Estabelecimentos{shard}", "ESTABCSV"),
+        ):
+            zip_path = output_dir / f"{name}.zip"
+            _write_zip(conn, query, output_dir / f".{name}.csv", zip_path,
+                       f"K3241.K03200Y{shard}.D40511.{extension}")
+            written[dataset].append(zip_path)
+
+    conn.close()
+    return written
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of establishments")
+    parser.add_argument("--shards", type=int, default=10, help="Archives per dataset (RFB publishes 10)")
+    parser.add_argument("--seed", type=int, default=42, help="Generator seed")
+    parser.add_argument("--green-share", type=float, default=0.04, help="Share of green CNAE draws")
+    parser.add_argument("--output", type=Path, default=Path("data/raw"), help="Output directory")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    written = generate(args.output, args.rows, args.shards, args.seed, args.green_share)
+    size = sum(path.stat().st_size for paths in written.values() for path in paths)
+    print(f"Wrote {args.rows:,} establishments in {len(written['estabelecimentos'])} shards "
+          f"to {args.output} ({size / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
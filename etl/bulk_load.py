@@ -0,0 +1,211 @@
+"""
+Green Jobs Brasil - Serving Database Bulk Loaders
+Stage processed companies in bulk and merge them into the serving tables in one transaction.
+"""
+
+import io
+import json
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Set, Tuple
+
+COMPANY_COLUMNS = [
+    'cnpj', 'razao_social', 'nome_fantasia', 'cnae_principal', 'cnaes_secundarias',
+    'porte', 'uf', 'municipio', 'situacao_cadastral', 'data_abertura', 'score_verde',
+    'ods_tags', 'fonte_atualizacao', 'atualizado_em',
+]
+
+COMPANIES_STAGING = "empresas_verdes_staging"
+LINKS_STAGING = "empresa_cnae_staging"
+
+
+class BulkLoader(ABC):
+    """
+    Loads empresas_verdes and empresa_cnae through staging tables.
+
+    Rows are first written to staging tables, then ``merge`` upserts them into
+    the serving tables inside the caller's transaction. Until the commit,
+    readers keep seeing the previous load, never an empty table. The serving
+    tables are merged into rather than renamed, because empresa_cnae, vagas_esg
+    and users hold foreign keys on empresas_verdes.cnpj.
+    """
+
+    placeholder = "?"
+
+    def __init__(self, conn, green_cnaes: Set[str]):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.green_cnaes = green_cnaes
+        self.staged = 0
+
+    @abstractmethod
+    def create_staging(self) -> None:
+        """Create (or empty) the staging tables."""
+
+    @abstractmethod
+    def stage(self, records: List[Dict]) -> int:
+        """Write processed companies and their green CNAE links to the staging tables."""
+
+    def merge(self, replace: bool = True) -> None:
+        """
+        Upsert the staged companies into the serving tables.
+
+        Args:
+            replace: Also remove companies that are not staged (full reload)
+        """
+        columns = ", ".join(COMPANY_COLUMNS)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in COMPANY_COLUMNS[1:])
+
+        self.cursor.execute(f"""
+            INSERT INTO empresas_verdes ({columns})
+            SELECT {columns} FROM {COMPANIES_STAGING} WHERE true
+            ON CONFLICT (cnpj) DO UPDATE SET {updates}
+        """)
+        self.cursor.execute(f"""
+            DELETE FROM empresa_cnae
+            WHERE cnpj IN (SELECT cnpj FROM {COMPANIES_STAGING})
+        """)
+        if replace:
+            self.cursor.execute(f"""
+                DELETE FROM empresa_cnae
+                WHERE cnpj NOT IN (SELECT cnpj FROM {COMPANIES_STAGING})
+            """)
+            self.cursor.execute(f"""
+                DELETE FROM empresas_verdes
+                WHERE cnpj NOT IN (SELECT cnpj FROM {COMPANIES_STAGING})
+            """)
+        self.cursor.execute(f"""
+            INSERT INTO empresa_cnae (cnpj, codigo_cnae)
+            SELECT cnpj, codigo_cnae FROM {LINKS_STAGING} WHERE true
+            ON CONFLICT DO NOTHING
+        """)
+
+    def delete(self, cnpjs: Iterable[str]) -> None:
+        """Remove companies (and their CNAE links) from the serving tables."""
+        params = [(cnpj,) for cnpj in cnpjs]
+        self.cursor.executemany(f"DELETE FROM empresa_cnae WHERE cnpj = {self.placeholder}", params)
+        self.cursor.executemany(f"DELETE FROM empresas_verdes WHERE cnpj = {self.placeholder}", params)
+
+    def _split(self, records: List[Dict]) -> Tuple[List[tuple], List[tuple]]:
+        """Company rows (lists kept as lists) and (cnpj, codigo_cnae) link rows."""
+        companies = []
+        links = []
+        for row in records:
+            cnaes_secundarias = list(row['cnaes_secundarias']) if row['cnaes_secundarias'] is not None else []
+            ods_tags = [int(ods) for ods in row['ods_tags']] if row['ods_tags'] is not None else []
+
+            companies.append((
+                row['cnpj'], row['razao_social'], row['nome_fantasia'],
+                row['cnae_principal'], cnaes_secundarias, row['porte'],
+                row['uf'], row['municipio'], row['situacao_cadastral'],
+                row['data_abertura'], int(row['score_verde']), ods_tags,
+                row['fonte_atualizacao'], row['atualizado_em']
+            ))
+
+            # Green CNAEs only: empresa_cnae.codigo_cnae references cnae_green, and a
+            # company may qualify through a secondary CNAE while its primary is not green
+            for cnae in dict.fromkeys([row['cnae_principal'], *cnaes_secundarias]):
+                cnae = (cnae or "").strip()
+                if cnae and cnae in self.green_cnaes:
+                    links.append((row['cnpj'], cnae))
+
+        return companies, links
+
+
+class SQLiteBulkLoader(BulkLoader):
+    """SQLite: TEMP staging tables filled with executemany."""
+
+    def create_staging(self) -> None:
+        columns = ", ".join(COMPANY_COLUMNS)
+        self.cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {COMPANIES_STAGING} AS
+            SELECT {columns} FROM empresas_verdes WHERE 0
+        """)
+        self.cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {LINKS_STAGING} AS
+            SELECT cnpj, codigo_cnae FROM empresa_cnae WHERE 0
+        """)
+        self.cursor.execute(f"DELETE FROM {COMPANIES_STAGING}")
+        self.cursor.execute(f"DELETE FROM {LINKS_STAGING}")
+        self.staged = 0
+
+    def stage(self, records: List[Dict]) -> int:
+        companies, links = self._split(records)
+
+        # Lists are stored as JSON text in SQLite
+        companies = [
+            row[:4] + (json.dumps(row[4]),) + row[5:11] + (json.dumps(row[11]),) + row[12:]
+            for row in companies
+        ]
+        marks = ", ".join("?" for _ in COMPANY_COLUMNS)
+        self.cursor.executemany(
+            f"INSERT INTO {COMPANIES_STAGING} ({', '.join(COMPANY_COLUMNS)}) VALUES ({marks})", companies
+        )
+        self.cursor.executemany(f"INSERT INTO {LINKS_STAGING} (cnpj, codigo_cnae) VALUES (?, ?)", links)
+
+        self.staged += len(companies)
+        return len(companies)
+
+
+class PostgresBulkLoader(BulkLoader):
+    """PostgreSQL: TEMP staging tables filled with COPY FROM STDIN."""
+
+    placeholder = "%s"
+
+    def create_staging(self) -> None:
+        self.cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {COMPANIES_STAGING}
+            (LIKE empresas_verdes INCLUDING DEFAULTS)
+        """)
+        self.cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {LINKS_STAGING}
+            (LIKE empresa_cnae INCLUDING DEFAULTS)
+        """)
+        self.cursor.execute(f"TRUNCATE {COMPANIES_STAGING}, {LINKS_STAGING}")
+        self.staged = 0
+
+    def stage(self, records: List[Dict]) -> int:
+        companies, links = self._split(records)
+
+        self._copy(COMPANIES_STAGING, COMPANY_COLUMNS, companies)
+        self._copy(LINKS_STAGING, ['cnpj', 'codigo_cnae'], links)
+
+        self.staged += len(companies)
+        return len(companies)
+
+    def _copy(self, table: str, columns: List[str], rows: List[tuple]) -> None:
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_copy_value(value) for value in row))
+            buffer.write("\n")
+        buffer.seek(0)
+        self.cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def _copy_value(value) -> str:
+    """Format a value for COPY text format (\\N for NULL, arrays as {...} literals)."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, list):
+        items = ",".join(
+            "NULL" if item is None
+            else str(item) if isinstance(item, int)
+            else '"' + str(item).replace("\\", "\\\\").replace('"', '\\"') + '"'
+            for item in value
+        )
+        value = "{" + items + "}"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def create_bulk_loader(target: str, conn, green_cnaes: Set[str]) -> BulkLoader:
+    """Bulk loader for the LOAD_TARGET database ('sqlite' or 'postgres')."""
+    if target == "postgres":
+        return PostgresBulkLoader(conn, green_cnaes)
+    if target == "sqlite":
+        return SQLiteBulkLoader(conn, green_cnaes)
+    raise ValueError(f"Unsupported LOAD_TARGET: {target}")
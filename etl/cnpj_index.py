@@ -0,0 +1,207 @@
+"""
+Green Jobs Brasil - Local CNPJ Index
+Memory-mapped lookup of green companies by CNPJ over the ETL Parquet output,
+so the API only calls ReceitaWS for companies the ETL does not know.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from config import ScoringRules
+from parquet_dataset import dataset_files
+
+logger = logging.getLogger(__name__)
+
+COMPANIES_FILE = "companies.arrow"
+KEYS_FILE = "cnpj_keys.npy"
+MANIFEST_FILE = "manifest.json"
+
+
+def cnpj_key(cnpj: str) -> Optional[int]:
+    """Numeric key of a CNPJ (formatting ignored), None when it has no digits."""
+    digits = ''.join(filter(str.isdigit, str(cnpj)))
+    return int(digits) if digits else None
+
+
+def _source_files(dataset_dir: Path) -> List[List]:
+    """Parquet files of the dataset with size and mtime, used to detect a stale index."""
+    return [
+        [str(path.relative_to(dataset_dir)), path.stat().st_size, path.stat().st_mtime_ns]
+        for path in dataset_files(dataset_dir)
+    ]
+
+
+def build_index(dataset_dir: Path, index_dir: Path) -> int:
+    """
+    Build the index of a hive-partitioned Parquet dataset.
+
+    Writes the rows sorted by CNPJ as an uncompressed Arrow IPC file plus a
+    sorted uint64 key array, so the position of a key is the row offset. The
+    new index replaces the old one with a directory swap; readers holding the
+    old files keep a valid memory map.
+
+    Returns:
+        Number of indexed companies
+    """
+    dataset_dir, index_dir = Path(dataset_dir), Path(index_dir)
+    sources = _source_files(dataset_dir)
+    if sources:
+        table = ds.dataset(
+            [str(dataset_dir / path) for path, _, _ in sources], format="parquet",
+            partitioning="hive", partition_base_dir=str(dataset_dir)
+        ).to_table()
+    else:
+        table = pa.table({'cnpj': pa.array([], pa.string())})
+
+    digits = pc.replace_substring_regex(table['cnpj'], pattern=r"\D", replacement="")
+    valid = pc.and_(pc.is_valid(digits), pc.not_equal(digits, ""))
+    table = table.filter(valid).append_column('cnpj_key', pc.cast(digits.filter(valid), pa.uint64()))
+    table = table.sort_by('cnpj_key')
+
+    tmp_dir = index_dir.with_name(f"{index_dir.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    np.save(tmp_dir / KEYS_FILE, table['cnpj_key'].to_numpy())
+    with pa.OSFile(str(tmp_dir / COMPANIES_FILE), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=65536)
+    with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump({'sources': sources, 'rows': table.num_rows}, f)
+
+    old_dir = index_dir.with_name(f"{index_dir.name}.old-{os.getpid()}")
+    if index_dir.exists():
+        os.replace(index_dir, old_dir)
+    os.replace(tmp_dir, index_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    logger.info(f"Indexed {table.num_rows} companies from {dataset_dir} into {index_dir}")
+    return table.num_rows
+
+
+class CnpjIndex:
+    """
+    Looks up green companies by CNPJ in the ETL output.
+
+    A binary search over the memory-mapped sorted keys gives the row offset
+    in the memory-mapped Arrow file; results (hits and misses) go through an
+    LRU cache. The index is rebuilt when the Parquet files change, checked at
+    most every ``refresh_seconds``. Safe to call from several threads (the API
+    runs lookups in a thread pool); one rebuild runs at a time.
+    """
+
+    def __init__(self, dataset_dir: Path, index_dir: Path, cache_size: int = 10000,
+                 refresh_seconds: float = 60):
+        self.dataset_dir = Path(dataset_dir)
+        self.index_dir = Path(index_dir)
+        self.cache_size = cache_size
+        self.refresh_seconds = refresh_seconds
+        self._checked_at = float("-inf")
+        # (generation, sorted keys, ((name, column), ...)) of one index build, swapped as a whole
+        self._snapshot: Optional[Tuple[int, np.ndarray, Tuple]] = None
+        self._cached_lookup = lru_cache(maxsize=cache_size)(self._lookup)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._snapshot[1])
+
+    def refresh(self, force: bool = False) -> None:
+        """Open the index, rebuilding it first when it is missing or stale."""
+        now = time.monotonic()
+        if not force and self._snapshot is not None and now - self._checked_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if not force and self._snapshot is not None and now - self._checked_at < self.refresh_seconds:
+                return
+            self._checked_at = now
+            self._open(force)
+
+    def _open(self, force: bool) -> None:
+        """Rebuild the index when the dataset changed and map it (caller holds the lock)."""
+        sources = _source_files(self.dataset_dir) if self.dataset_dir.exists() else []
+        manifest_path = self.index_dir / MANIFEST_FILE
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else None
+        if manifest is None or manifest['sources'] != sources:
+            build_index(self.dataset_dir, self.index_dir)
+        elif self._snapshot is not None and not force:
+            return
+
+        keys = np.load(self.index_dir / KEYS_FILE, mmap_mode="r")
+        table = pa.ipc.open_file(pa.memory_map(str(self.index_dir / COMPANIES_FILE))).read_all()
+        columns = tuple((name, table.column(name)) for name in table.column_names if name != 'cnpj_key')
+        # One assignment, so a concurrent lookup never pairs the keys of one build
+        # with the rows of another; the generation keeps a result computed on the old
+        # build from answering cache hits after the swap
+        generation = self._snapshot[0] + 1 if self._snapshot is not None else 0
+        self._snapshot = (generation, keys, columns)
+        self._cached_lookup.cache_clear()
+
+    def lookup(self, cnpj: str) -> Optional[Dict]:
+        """Company row for a CNPJ (any formatting), or None when the ETL did not load it."""
+        self.refresh()
+        key = cnpj_key(cnpj)
+        if key is None:
+            return None
+        row = self._cached_lookup(key, self._snapshot[0])
+        return dict(row) if row is not None else None
+
+    def _lookup(self, key: int, generation: int) -> Optional[Dict]:
+        # generation is only part of the cache key; a newer build answers just as well
+        _, keys, columns = self._snapshot
+        # A numpy scalar key keeps the search in uint64 instead of converting the array
+        position = int(np.searchsorted(keys, np.uint64(key)))
+        if position >= len(keys) or keys[position] != key:
+            return None
+        # Scalar access per column is cheaper than slicing the table for one row
+        return {name: column[position].as_py() for name, column in columns}
+
+
+def load_cnae_priorities(seed_path: Path) -> Dict[str, str]:
+    """CNAE -> prioridade from the green CNAE seed file."""
+    seed = pd.read_csv(seed_path, dtype=str)
+    return dict(zip(seed['cnae'], seed['prioridade']))
+
+
+def _seed_cnae(code: Optional[str]) -> Optional[str]:
+    """ReceitaWS CNAE code (e.g. 35.11-5-01) in the seed format (3511-5/01)."""
+    digits = ''.join(filter(str.isdigit, str(code or '')))
+    if len(digits) != 7:
+        return code
+    return f"{digits[:4]}-{digits[4]}/{digits[5:]}"
+
+
+def company_from_receita_ws(data: Dict, cnae_priorities: Dict[str, str]) -> Dict:
+    """
+    ReceitaWS payload in the shape of an index row, scored with ScoringRules.
+    """
+    principal = data.get('atividade_principal') or [{}]
+    cnae_principal = _seed_cnae(principal[0].get('code'))
+    cnaes_secundarias = [
+        _seed_cnae(activity.get('code')) for activity in data.get('atividades_secundarias', [])
+        if activity.get('code')
+    ]
+    situacao = data.get('situacao')
+    return {
+        'cnpj': ''.join(filter(str.isdigit, data.get('cnpj', ''))),
+        'razao_social': data.get('nome'),
+        'nome_fantasia': data.get('fantasia'),
+        'cnae_principal': cnae_principal,
+        'cnaes_secundarias': cnaes_secundarias,
+        'situacao_cadastral': situacao,
+        'municipio': data.get('municipio'),
+        'uf': data.get('uf'),
+        'score_verde': ScoringRules.calculate_score(cnae_principal, cnaes_secundarias, situacao, cnae_priorities),
+    }
@@ -0,0 +1,118 @@
+"""
+Green Jobs Brasil - Incremental ETL Helpers
+Content hashes per CNPJ and delta detection between monthly RFB releases.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import duckdb
+
+# Change types stored in the company_delta table
+INSERT = 'insert'
+UPDATE = 'update'
+DELETE = 'delete'
+
+
+def create_hashed_companies(conn: duckdb.DuckDBPyConnection, source: str,
+                            target: str = "current_companies") -> int:
+    """
+    Materialize ``source`` with an md5 content hash per CNPJ.
+
+    The hash covers every column of the source, so any change in the RFB
+    data or in the scoring rules marks the company as updated. Upgrading
+    DuckDB may change the text form of lists and therefore every hash,
+    which costs one full update and nothing else.
+
+    Returns:
+        Number of companies in the current release
+    """
+    columns = [row[0] for row in conn.execute(f"DESCRIBE {source}").fetchall()]
+    packed = ", ".join(f"{column} := {column}" for column in columns)
+
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE {target} AS
+        SELECT *, md5(CAST(struct_pack({packed}) AS VARCHAR)) as content_hash
+        FROM {source}
+    """)
+    return conn.execute(f"SELECT COUNT(*) FROM {target}").fetchone()[0]
+
+
+def load_previous_hashes(conn: duckdb.DuckDBPyConnection, state_path: Path,
+                         target: str = "previous_hashes") -> bool:
+    """
+    Load the (cnpj, uf, content_hash) state saved by the previous run.
+
+    Returns:
+        False when there is no previous state (first incremental run)
+    """
+    if not state_path.exists():
+        conn.execute(f"""
+            CREATE OR REPLACE TEMP TABLE {target}
+            (cnpj VARCHAR, uf VARCHAR, content_hash VARCHAR)
+        """)
+        return False
+
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE {target} AS
+        SELECT cnpj, uf, content_hash FROM read_parquet('{state_path}')
+    """)
+    return True
+
+
+def compute_delta(conn: duckdb.DuckDBPyConnection, current: str = "current_companies",
+                  previous: str = "previous_hashes", target: str = "company_delta") -> Dict[str, int]:
+    """
+    Compare current and previous hashes into ``target`` (cnpj, uf, previous_uf, change).
+
+    Returns:
+        Number of inserted, updated and deleted companies
+    """
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE {target} AS
+        SELECT
+            COALESCE(c.cnpj, p.cnpj) as cnpj,
+            c.uf,
+            p.uf as previous_uf,
+            CASE
+                WHEN p.cnpj IS NULL THEN '{INSERT}'
+                WHEN c.cnpj IS NULL THEN '{DELETE}'
+                ELSE '{UPDATE}'
+            END as change
+        FROM {current} c
+        FULL OUTER JOIN {previous} p ON c.cnpj = p.cnpj
+        WHERE p.cnpj IS NULL
+           OR c.cnpj IS NULL
+           OR c.content_hash != p.content_hash
+    """)
+
+    counts = {INSERT: 0, UPDATE: 0, DELETE: 0}
+    for change, total in conn.execute(f"SELECT change, COUNT(*) FROM {target} GROUP BY change").fetchall():
+        counts[change] = total
+    return counts
+
+
+def affected_partitions(conn: duckdb.DuckDBPyConnection, delta: str = "company_delta") -> List[str]:
+    """UFs whose Parquet partition has at least one inserted, updated or deleted company."""
+    rows = conn.execute(f"""
+        SELECT DISTINCT uf FROM (
+            SELECT uf FROM {delta} WHERE uf IS NOT NULL
+            UNION
+            SELECT previous_uf FROM {delta} WHERE previous_uf IS NOT NULL
+        ) ORDER BY uf
+    """).fetchall()
+    return [row[0] for row in rows]
+
+
+def save_hashes(conn: duckdb.DuckDBPyConnection, state_path: Path,
+                current: str = "current_companies") -> None:
+    """Atomically replace the saved state with the current hashes."""
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_name(state_path.name + ".tmp")
+
+    conn.execute(f"""
+        COPY (SELECT cnpj, uf, content_hash FROM {current} ORDER BY cnpj)
+        TO '{tmp_path}' (FORMAT PARQUET)
+    """)
+    os.replace(tmp_path, state_path)
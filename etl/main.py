@@ -3,20 +3,29 @@ Green Jobs Brasil - ETL Main Pipeline
 Processes RFB CNPJ datasets to identify and classify green companies.
 """
 
+import argparse
 import logging
+import shutil
 import sys
+import tempfile
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 import pandas as pd
 import duckdb
 import psycopg2
 import pyarrow as pa
-import pyarrow.parquet as pq
 from datetime import datetime, date
 
+import incremental
+import rfb_reader
+from bulk_load import create_bulk_loader
+from run_report import RunReport, compare_reports, directory_size, load_report, PREVIOUS_REPORT_FILE, REPORT_FILE
 from config import config, ScoringRules
+from parquet_dataset import SORT_KEYS, publish_manifest
+from streaming import PartitionedParquetSink, StageThroughput
 
 # Configure logging
 logging.basicConfig(
@@ -25,6 +34,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pipeline stages recorded in etl_checkpoints, in execution order
+STAGES = ['load_rfb_data', 'process_green_companies', 'save_to_parquet', 'load_to_postgres']
+
 class GreenJobsETL:
     """Main ETL pipeline for Green Jobs Brasil."""
     
@@ -33,18 +45,37 @@ class GreenJobsETL:
         self.postgres_conn = None
         self.cnae_green_mapping = {}
         self.cnae_priorities = {}
+        self.shard_timings = []
+        self.completed_stages = set()
+        self.report = None
         
     def __enter__(self):
         """Context manager entry."""
         try:
             # Initialize DuckDB connection
-            self.duckdb_conn = duckdb.connect(':memory:')
-            logger.info("DuckDB connection established")
+            if config.DUCKDB_PATH:
+                Path(config.DUCKDB_PATH).parent.mkdir(parents=True, exist_ok=True)
+                self.duckdb_conn = duckdb.connect(config.DUCKDB_PATH)
+            else:
+                self.duckdb_conn = duckdb.connect(':memory:')
+            self.duckdb_conn.execute(f"SET threads TO {config.MAX_WORKERS}")
+            if config.DUCKDB_MEMORY_LIMIT:
+                self.duckdb_conn.execute(f"SET memory_limit = '{config.DUCKDB_MEMORY_LIMIT}'")
+            if config.DUCKDB_TEMP_DIR:
+                # Spill location for joins and sorts that exceed memory_limit
+                self.duckdb_conn.execute(f"SET temp_directory = '{config.DUCKDB_TEMP_DIR}'")
+            logger.info(f"DuckDB connection established ({config.DUCKDB_PATH or ':memory:'})")
             
-            # Initialize SQLite connection
-            import sqlite3
-            self.postgres_conn = sqlite3.connect('gjb_dev.db')
-            logger.info("SQLite connection established")
+            # Initialize serving database connection
+            if config.LOAD_TARGET == 'postgres':
+                self.postgres_conn = psycopg2.connect(
+                    **config.get_database_params(), options="-c search_path=gjb,public"
+                )
+                logger.info("PostgreSQL connection established")
+            else:
+                import sqlite3
+                self.postgres_conn = sqlite3.connect('gjb_dev.db')
+                logger.info("SQLite connection established")
             
             return self
             
@@ -81,12 +112,42 @@ class GreenJobsETL:
             logger.error(f"Failed to load CNAE green mapping: {e}")
             raise
     
+    def register_cnae_green_table(self) -> None:
+        """Register the green CNAE mapping and the target UFs in DuckDB as lookup tables."""
+        try:
+            cnaes = list(self.cnae_green_mapping.keys())
+            lookup = pa.table({
+                'cnae': pa.array(cnaes, pa.string()),
+                'prioridade': pa.array([self.cnae_priorities[cnae] for cnae in cnaes], pa.string()),
+                # ods_raw pre-split once, so SQL never parses strings per company
+                'ods': pa.array(
+                    [sorted(self._parse_ods_string(self.cnae_green_mapping[cnae].get('ods_raw', '')))
+                     for cnae in cnaes],
+                    pa.list_(pa.int32())
+                ),
+            })
+            
+            self.duckdb_conn.register('cnae_green_arrow', lookup)
+            self.duckdb_conn.execute("CREATE OR REPLACE TABLE cnae_green AS SELECT * FROM cnae_green_arrow")
+            self.duckdb_conn.unregister('cnae_green_arrow')
+            
+            target_ufs = pa.table({'uf': pa.array([uf.strip() for uf in config.TARGET_UFS], pa.string())})
+            self.duckdb_conn.register('target_ufs_arrow', target_ufs)
+            self.duckdb_conn.execute("CREATE OR REPLACE TABLE target_ufs AS SELECT * FROM target_ufs_arrow")
+            self.duckdb_conn.unregister('target_ufs_arrow')
+            
+            logger.info(f"Registered {len(cnaes)} green CNAEs and {target_ufs.num_rows} target UFs in DuckDB")
+            
+        except Exception as e:
+            logger.error(f"Failed to register cnae_green table: {e}")
+            raise
+    
     def setup_duckdb_schema(self) -> None:
         """Create DuckDB tables for data processing."""
         try:
             # Create empresas table
             self.duckdb_conn.execute("""
-                CREATE TABLE empresas (
+                CREATE OR REPLACE TABLE empresas (
                     cnpj VARCHAR,
                     razao_social VARCHAR,
                     natureza_juridica VARCHAR,
@@ -99,7 +160,7 @@ class GreenJobsETL:
             
             # Create estabelecimentos table
             self.duckdb_conn.execute("""
-                CREATE TABLE estabelecimentos (
+                CREATE OR REPLACE TABLE estabelecimentos (
                     cnpj VARCHAR,
                     cnpj_ordem VARCHAR,
                     cnpj_dv VARCHAR,
@@ -142,33 +203,36 @@ class GreenJobsETL:
     def load_rfb_data(self) -> None:
         """Load RFB datasets into DuckDB."""
         try:
+            self.shard_timings = []
+            
             # Load empresas data
-            empresas_files = list(config.RAW_DIR.glob(config.CNPJ_FILE))
+            empresas_files = self._find_rfb_files(config.CNPJ_FILE, config.CNPJ_ZIP_FILE)
             if not empresas_files:
-                logger.warning(f"No empresas files found matching {config.CNPJ_FILE}")
+                logger.warning(f"No empresas files found matching {config.CNPJ_FILE} or {config.CNPJ_ZIP_FILE}")
                 # Create sample data for testing
                 self._create_sample_empresas_data()
             else:
-                for file_path in empresas_files:
-                    logger.info(f"Loading empresas data from {file_path}")
-                    self.duckdb_conn.execute(f"""
-                        INSERT INTO empresas 
-                        SELECT * FROM read_csv_auto('{file_path}', header=true, delimiter=';')
-                    """)
+                self._load_shards('empresas', empresas_files)
             
             # Load estabelecimentos data
-            estab_files = list(config.RAW_DIR.glob(config.ESTABELECIMENTOS_FILE))
+            estab_files = self._find_rfb_files(config.ESTABELECIMENTOS_FILE, config.ESTABELECIMENTOS_ZIP_FILE)
             if not estab_files:
-                logger.warning(f"No estabelecimentos files found matching {config.ESTABELECIMENTOS_FILE}")
+                logger.warning(
+                    f"No estabelecimentos files found matching "
+                    f"{config.ESTABELECIMENTOS_FILE} or {config.ESTABELECIMENTOS_ZIP_FILE}"
+                )
                 # Create sample data for testing
                 self._create_sample_estabelecimentos_data()
             else:
-                for file_path in estab_files:
-                    logger.info(f"Loading estabelecimentos data from {file_path}")
-                    self.duckdb_conn.execute(f"""
-                        INSERT INTO estabelecimentos 
-                        SELECT * FROM read_csv_auto('{file_path}', header=true, delimiter=';')
-                    """)
+                # Only head offices in the target UFs are ever joined, so filter while reading
+                self._load_shards(
+                    'estabelecimentos', estab_files,
+                    where="uf IN (SELECT uf FROM target_ufs) AND identificador_matriz_filial = '1'",
+                    order_by='uf'
+                )
+            
+            if self.shard_timings:
+                self._log_shard_timings()
             
             # Log data counts
             empresas_count = self.duckdb_conn.execute("SELECT COUNT(*) FROM empresas").fetchone()[0]
@@ -180,19 +244,131 @@ class GreenJobsETL:
             logger.error(f"Failed to load RFB data: {e}")
             raise
     
+    def _find_rfb_files(self, pattern: str, zip_pattern: str) -> List[Path]:
+        """Extracted RFB files matching ``pattern``, or else the zip archives matching ``zip_pattern``."""
+        files = sorted(config.RAW_DIR.glob(pattern))
+        if files:
+            return files
+        return sorted(config.RAW_DIR.glob(zip_pattern))
+    
+    def _csv_source(self, file_path: Path, columns: List[Tuple[str, str]]) -> str:
+        """Typed relation for an extracted RFB shard, with columns named after the DuckDB table."""
+        raw = rfb_reader.read_csv_extracted(file_path, [name for name, _ in columns])
+        return rfb_reader.typed_select(raw, columns)
+    
+    def _load_shards(self, table: str, files: List[Path], where: Optional[str] = None,
+                     order_by: Optional[str] = None) -> None:
+        """
+        Load RFB shards into a DuckDB table, in parallel when MAX_WORKERS > 1.
+        
+        Parallel workers each read and filter one shard into its own staging
+        table through a separate DuckDB cursor (DuckDB releases the GIL while
+        scanning), then the staging tables are merged ordered by ``order_by``.
+        """
+        columns = [(row[0], row[1]) for row in self.duckdb_conn.execute(f"DESCRIBE {table}").fetchall()]
+        workers = min(config.MAX_WORKERS, len(files))
+        
+        if workers <= 1:
+            for file_path in files:
+                self._load_shard(self.duckdb_conn, table, table, file_path, columns, where)
+            return
+        
+        logger.info(f"Loading {len(files)} {table} shards with {workers} workers")
+        staging_tables = [f"{table}_shard_{i}" for i in range(len(files))]
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._load_shard, self.duckdb_conn.cursor(), table,
+                                staging, file_path, columns, where)
+                for staging, file_path in zip(staging_tables, files)
+            ]
+            for future in futures:
+                future.result()
+        
+        self._merge_shards(table, staging_tables, order_by)
+    
+    def _load_shard(self, conn, table: str, target: str, file_path: Path,
+                    columns: List[Tuple[str, str]], where: Optional[str] = None) -> None:
+        """
+        Read one shard into ``target`` and record its timing.
+        
+        Zip archives are decompressed in memory and streamed to DuckDB as
+        Arrow batches, so the RFB releases never need to be extracted.
+        """
+        logger.info(f"Loading {table} data from {file_path}")
+        start = time.perf_counter()
+        
+        if target != table:
+            conn.execute(f"CREATE OR REPLACE TABLE {target} AS SELECT * FROM {table} LIMIT 0")
+        
+        is_zip = file_path.suffix.lower() == '.zip'
+        if is_zip:
+            raw_view = f"{target}_raw"
+            conn.register(raw_view, rfb_reader.open_zip_csv(file_path, [name for name, _ in columns]))
+            source = rfb_reader.typed_select(raw_view, columns)
+        else:
+            source = self._csv_source(file_path, columns)
+        
+        where_clause = f"WHERE {where}" if where else ""
+        try:
+            rows = conn.execute(f"INSERT INTO {target} SELECT * FROM {source} {where_clause}").fetchone()[0]
+        finally:
+            if is_zip:
+                conn.unregister(raw_view)
+        
+        seconds = time.perf_counter() - start
+        self.shard_timings.append({
+            'table': table,
+            'file': file_path.name,
+            'bytes': file_path.stat().st_size,
+            'rows': rows,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(rows / seconds) if seconds > 0 else 0,
+        })
+        
+        if conn is not self.duckdb_conn:
+            conn.close()
+    
+    def _merge_shards(self, table: str, staging_tables: List[str], order_by: Optional[str] = None) -> None:
+        """Merge per-shard staging tables into the final table and drop them."""
+        start = time.perf_counter()
+        union = " UNION ALL ".join(f"SELECT * FROM {staging}" for staging in staging_tables)
+        order_clause = f"ORDER BY {order_by}" if order_by else ""
+        
+        self._execute_profiled(f"merge_{table}", f"INSERT INTO {table} SELECT * FROM ({union}) {order_clause}")
+        for staging in staging_tables:
+            self.duckdb_conn.execute(f"DROP TABLE {staging}")
+        
+        if order_by:
+            counts = self.duckdb_conn.execute(
+                f"SELECT {order_by}, COUNT(*) FROM {table} GROUP BY {order_by} ORDER BY {order_by}"
+            ).fetchall()
+            logger.info(f"Merged {table} by {order_by}: " + ", ".join(f"{key}={count}" for key, count in counts))
+        
+        logger.info(f"Merged {len(staging_tables)} {table} shards in {time.perf_counter() - start:.2f}s")
+    
+    def _log_shard_timings(self) -> None:
+        """Log the per-shard load timings."""
+        for timing in self.shard_timings:
+            logger.info(
+                f"Shard {timing['table']}/{timing['file']}: {timing['rows']} rows, "
+                f"{timing['bytes'] / 1e6:.1f} MB in {timing['seconds']:.2f}s "
+                f"({timing['rows_per_second']:,} rows/s)"
+            )
+    
     def _create_sample_empresas_data(self) -> None:
-        """Create sample empresas data for testing."""
+        """Create sample empresas data for testing (cnpj is the 8-digit cnpj_basico, as in the RFB files)."""
         sample_data = [
-            ("12345678000195", "Solar Energy Brasil Ltda", "206", "05", 1000000.00, "03", ""),
-            ("98765432000123", "Reciclagem Verde SA", "205", "05", 500000.00, "02", ""),
-            ("11223344000167", "Tratamento de Água Limpa", "206", "05", 2000000.00, "03", ""),
-            ("55667788000145", "Energia Eólica do Norte", "205", "05", 5000000.00, "04", ""),
-            ("99887766000134", "Consultoria Sustentável", "206", "05", 100000.00, "01", ""),
-            ("88776655000178", "Biomassa Energia Verde", "205", "05", 3000000.00, "04", ""),
-            ("77665544000189", "Coleta Seletiva MG", "206", "05", 800000.00, "02", ""),
-            ("66554433000190", "Hidrelétrica Sustentável", "205", "05", 10000000.00, "04", ""),
-            ("55443322000101", "Gestão Resíduos SP", "206", "05", 1500000.00, "03", ""),
-            ("44332211000112", "Energia Solar RJ", "205", "05", 2500000.00, "03", ""),
+            ("12345678", "Solar Energy Brasil Ltda", "206", "05", 1000000.00, "03", ""),
+            ("98765432", "Reciclagem Verde SA", "205", "05", 500000.00, "02", ""),
+            ("11223344", "Tratamento de Água Limpa", "206", "05", 2000000.00, "03", ""),
+            ("55667788", "Energia Eólica do Norte", "205", "05", 5000000.00, "04", ""),
+            ("99887766", "Consultoria Sustentável", "206", "05", 100000.00, "01", ""),
+            ("88776655", "Biomassa Energia Verde", "205", "05", 3000000.00, "04", ""),
+            ("77665544", "Coleta Seletiva MG", "206", "05", 800000.00, "02", ""),
+            ("66554433", "Hidrelétrica Sustentável", "205", "05", 10000000.00, "04", ""),
+            ("55443322", "Gestão Resíduos SP", "206", "05", 1500000.00, "03", ""),
+            ("44332211", "Energia Solar RJ", "205", "05", 2500000.00, "03", ""),
         ]
         
         for data in sample_data:
@@ -206,85 +382,149 @@ class GreenJobsETL:
         """Create sample estabelecimentos data for testing."""
         # Usar apenas os campos necessários para o schema DuckDB
         estabelecimentos_data = [
-            ("12345678000195", "0001", "95", "1", "Solar Energy Brasil", "02", "2020-01-15", "00", "", "", "2020-01-15", "3511-5/02", "3511-5/01,3512-3/01", "RUA", "Das Energias", "100", "", "Centro", "30000000", "MG", "Belo Horizonte", "", "", "", "", "", "", "", ""),
-            ("98765432000123", "0001", "23", "1", "Reciclagem Verde", "02", "2019-05-20", "00", "", "", "2019-05-20", "3831-9/00", "3832-7/00", "AV", "Sustentável", "200", "", "Industrial", "20000000", "RJ", "Rio de Janeiro", "", "", "", "", "", "", "", ""),
-            ("11223344000167", "0001", "67", "1", "Água Limpa", "02", "2018-03-10", "00", "", "", "2018-03-10", "3600-6/01", "", "RUA", "Das Águas", "300", "", "Saneamento", "01000000", "SP", "São Paulo", "", "", "", "", "", "", "", ""),
-            ("55667788000145", "0001", "45", "1", "Eólica Norte", "02", "2021-07-01", "00", "", "", "2021-07-01", "3511-5/03", "", "EST", "dos Ventos", "400", "", "Energia", "40000000", "RJ", "Niterói", "", "", "", "", "", "", "", ""),
-            ("99887766000134", "0001", "34", "1", "Consultoria Verde", "02", "2022-02-28", "00", "", "", "2022-02-28", "7490-1/04", "", "RUA", "Consultores", "500", "", "Comercial", "30000000", "MG", "Uberlândia", "", "", "", "", "", "", "", ""),
-            ("88776655000178", "0001", "78", "1", "Biomassa Energia", "02", "2020-08-15", "00", "", "", "2020-08-15", "3511-5/04", "3600-6/01", "AV", "Biomassa", "600", "", "Industrial", "35000000", "MG", "Juiz de Fora", "", "", "", "", "", "", "", ""),
-            ("77665544000189", "0001", "89", "1", "Coleta Seletiva", "02", "2021-03-20", "00", "", "", "2021-03-20", "3811-4/00", "3831-9/00", "RUA", "Reciclagem", "700", "", "Centro", "31000000", "MG", "Contagem", "", "", "", "", "", "", "", ""),
-            ("66554433000190", "0001", "90", "1", "Hidrelétrica Verde", "02", "2019-11-10", "00", "", "", "2019-11-10", "3511-5/01", "", "EST", "Energia", "800", "", "Rural", "22000000", "RJ", "Teresópolis", "", "", "", "", "", "", "", ""),
-            ("55443322000101", "0001", "01", "1", "Gestão Resíduos", "02", "2020-05-25", "00", "", "", "2020-05-25", "3821-1/00", "3822-0/00", "AV", "Limpeza", "900", "", "Industrial", "05000000", "SP", "Guarulhos", "", "", "", "", "", "", "", ""),
-            ("44332211000112", "0001", "12", "1", "Solar RJ", "02", "2021-09-30", "00", "", "", "2021-09-30", "3511-5/02", "3513-1/01", "RUA", "Solar", "1000", "", "Tecnológico", "21000000", "RJ", "Rio de Janeiro", "", "", "", "", "", "", "", ""),
+            ("12345678", "0001", "95", "1", "Solar Energy Brasil", "02", "2020-01-15", "00", "", "", "2020-01-15", "3511-5/02", "3511-5/01,3512-3/01", "RUA", "Das Energias", "100", "", "Centro", "30000000", "MG", "Belo Horizonte", "", "", "", "", "", "", "", ""),
+            ("98765432", "0001", "23", "1", "Reciclagem Verde", "02", "2019-05-20", "00", "", "", "2019-05-20", "3831-9/00", "3832-7/00", "AV", "Sustentável", "200", "", "Industrial", "20000000", "RJ", "Rio de Janeiro", "", "", "", "", "", "", "", ""),
+            ("11223344", "0001", "67", "1", "Água Limpa", "02", "2018-03-10", "00", "", "", "2018-03-10", "3600-6/01", "", "RUA", "Das Águas", "300", "", "Saneamento", "01000000", "SP", "São Paulo", "", "", "", "", "", "", "", ""),
+            ("55667788", "0001", "45", "1", "Eólica Norte", "02", "2021-07-01", "00", "", "", "2021-07-01", "3511-5/03", "", "EST", "dos Ventos", "400", "", "Energia", "40000000", "RJ", "Niterói", "", "", "", "", "", "", "", ""),
+            ("99887766", "0001", "34", "1", "Consultoria Verde", "02", "2022-02-28", "00", "", "", "2022-02-28", "7490-1/04", "", "RUA", "Consultores", "500", "", "Comercial", "30000000", "MG", "Uberlândia", "", "", "", "", "", "", "", ""),
+            ("88776655", "0001", "78", "1", "Biomassa Energia", "02", "2020-08-15", "00", "", "", "2020-08-15", "3511-5/04", "3600-6/01", "AV", "Biomassa", "600", "", "Industrial", "35000000", "MG", "Juiz de Fora", "", "", "", "", "", "", "", ""),
+            ("77665544", "0001", "89", "1", "Coleta Seletiva", "02", "2021-03-20", "00", "", "", "2021-03-20", "3811-4/00", "3831-9/00", "RUA", "Reciclagem", "700", "", "Centro", "31000000", "MG", "Contagem", "", "", "", "", "", "", "", ""),
+            ("66554433", "0001", "90", "1", "Hidrelétrica Verde", "02", "2019-11-10", "00", "", "", "2019-11-10", "3511-5/01", "", "EST", "Energia", "800", "", "Rural", "22000000", "RJ", "Teresópolis", "", "", "", "", "", "", "", ""),
+            ("55443322", "0001", "01", "1", "Gestão Resíduos", "02", "2020-05-25", "00", "", "", "2020-05-25", "3821-1/00", "3822-0/00", "AV", "Limpeza", "900", "", "Industrial", "05000000", "SP", "Guarulhos", "", "", "", "", "", "", "", ""),
+            ("44332211", "0001", "12", "1", "Solar RJ", "02", "2021-09-30", "00", "", "", "2021-09-30", "3511-5/02", "3513-1/01", "RUA", "Solar", "1000", "", "Tecnológico", "21000000", "RJ", "Rio de Janeiro", "", "", "", "", "", "", "", ""),
         ]
         
         for data in estabelecimentos_data:
             self.duckdb_conn.execute("""
-                INSERT INTO estabelecimentos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO estabelecimentos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)
             """, data)
         
         logger.info("Created sample estabelecimentos data")
     
-    def process_green_companies(self) -> pd.DataFrame:
-        """Process and identify green companies."""
-        try:
-            # Create view with joined data filtered by green CNAEs and target UFs
-            green_cnaes = list(self.cnae_green_mapping.keys())
-            green_cnaes_str = "','".join(green_cnaes)
-            target_ufs_str = "','".join(config.TARGET_UFS)
-            
-            self.duckdb_conn.execute(f"""
-                CREATE VIEW green_companies AS
+    def _create_green_companies_view(self) -> None:
+        """
+        Create the view joining empresas and estabelecimentos filtered by green CNAEs and target UFs.
+        
+        Establishments are reduced to head offices in the target UFs before
+        the join with empresas. The secondary CNAE list is split once, and
+        both CNAE checks are hash semi-joins against the cnae_green table.
+        The RFB tables carry the 8-digit cnpj_basico; the output cnpj is the
+        full 14-digit CNPJ of the head office (basico + ordem + dv).
+        """
+        self.duckdb_conn.execute("""
+            CREATE OR REPLACE VIEW green_companies AS
+            WITH matrizes AS MATERIALIZED (
                 SELECT 
-                    e.cnpj,
-                    e.razao_social,
+                    est.cnpj as cnpj_basico,
+                    est.cnpj || est.cnpj_ordem || est.cnpj_dv as cnpj,
                     est.nome_fantasia,
-                    est.cnae_fiscal_principal as cnae_principal,
+                    est.cnae_fiscal_principal,
                     CASE 
                         WHEN est.cnae_fiscal_secundaria IS NOT NULL AND est.cnae_fiscal_secundaria != ''
                         THEN string_split(est.cnae_fiscal_secundaria, ',')
                         ELSE []
                     END as cnaes_secundarias,
-                    e.porte,
                     est.uf,
                     est.municipio,
                     est.situacao_cadastral,
-                    est.data_inicio_atividade as data_abertura
-                FROM empresas e
-                JOIN estabelecimentos est ON e.cnpj = est.cnpj
-                WHERE (est.cnae_fiscal_principal IN ('{green_cnaes_str}')
-                       OR EXISTS (
-                           SELECT 1 FROM unnest(string_split(est.cnae_fiscal_secundaria, ',')) as sec_cnae
-                           WHERE sec_cnae IN ('{green_cnaes_str}')
-                       ))
-                  AND est.uf IN ('{target_ufs_str}')
-                  AND est.identificador_matriz_filial = '1'
-            """)
+                    est.data_inicio_atividade
+                FROM estabelecimentos est
+                SEMI JOIN target_ufs t ON t.uf = est.uf
+                WHERE est.identificador_matriz_filial = '1'
+            ),
+            secundarias_verdes AS (
+                SELECT s.cnpj
+                FROM (SELECT cnpj, unnest(cnaes_secundarias) as cnae FROM matrizes) s
+                SEMI JOIN cnae_green g ON g.cnae = s.cnae
+            )
+            SELECT 
+                est.cnpj,
+                e.razao_social,
+                est.nome_fantasia,
+                est.cnae_fiscal_principal as cnae_principal,
+                est.cnaes_secundarias,
+                e.porte,
+                est.uf,
+                est.municipio,
+                est.situacao_cadastral,
+                est.data_inicio_atividade as data_abertura
+            FROM matrizes est
+            JOIN empresas e ON e.cnpj = est.cnpj_basico
+            WHERE est.cnae_fiscal_principal IN (SELECT cnae FROM cnae_green)
+               OR est.cnpj IN (SELECT cnpj FROM secundarias_verdes)
+        """)
+    
+    def _create_scored_view(self, source: str = "green_companies") -> None:
+        """
+        Create the green_companies_scored view with score_verde and ods_tags.
+        
+        Set-based equivalent of ScoringRules.calculate_score and
+        _calculate_ods_tags: secondary CNAEs are exploded once, hash-joined
+        against cnae_green and grouped back by CNPJ.
+        """
+        active_status = "', '".join(ScoringRules.ACTIVE_STATUS)
+        
+        self.duckdb_conn.execute(f"""
+            CREATE OR REPLACE VIEW green_companies_scored AS
+            WITH secundarias AS (
+                SELECT 
+                    cnpj,
+                    unnest(cnaes_secundarias) as cnae,
+                    generate_subscripts(cnaes_secundarias, 1) as posicao
+                FROM {source}
+            ),
+            secundarias_verdes AS (
+                SELECT 
+                    s.cnpj,
+                    -- Scoring matches the raw code within the first secondary CNAEs
+                    COUNT(*) FILTER (
+                        WHERE s.posicao <= {ScoringRules.MAX_SECONDARY_CNAES} AND s.cnae = g.cnae
+                    ) as total_verdes,
+                    flatten(list(g.ods)) as ods
+                FROM secundarias s
+                JOIN cnae_green g ON g.cnae = trim(s.cnae)
+                GROUP BY s.cnpj
+            )
+            SELECT 
+                c.*,
+                greatest({ScoringRules.MIN_SCORE}, least({ScoringRules.MAX_SCORE},
+                    CASE p.prioridade
+                        WHEN 'Core' THEN {ScoringRules.CORE_CNAE_SCORE}
+                        WHEN 'Adjacente' THEN {ScoringRules.ADJACENT_CNAE_SCORE}
+                        ELSE 0
+                    END
+                    + least(COALESCE(sv.total_verdes, 0) * {ScoringRules.SECONDARY_CNAE_SCORE},
+                            {ScoringRules.MAX_SECONDARY_SCORE})
+                    - CASE WHEN c.situacao_cadastral IN ('{active_status}') THEN 0
+                           ELSE {ScoringRules.INACTIVE_PENALTY} END
+                )) as score_verde,
+                list_sort(list_distinct(list_concat(COALESCE(p.ods, []), COALESCE(sv.ods, [])))) as ods_tags
+            FROM {source} c
+            LEFT JOIN cnae_green p ON p.cnae = c.cnae_principal
+            LEFT JOIN secundarias_verdes sv ON sv.cnpj = c.cnpj
+        """)
+    
+    def process_green_companies(self) -> pd.DataFrame:
+        """Process and identify green companies."""
+        try:
+            # Create view with joined data filtered by green CNAEs and target UFs
+            self._create_green_companies_view()
+            
+            self._create_scored_view()
+            
+            # Materialized with the load metadata, so a resumed run can skip this stage
+            self._execute_profiled('process_green_companies', """
+                CREATE OR REPLACE TABLE green_companies_processed AS
+                SELECT *, 'ETL_RFB' as fonte_atualizacao, CAST(? AS TIMESTAMP) as atualizado_em
+                FROM green_companies_scored
+            """, [datetime.now()])
             
-            # Fetch processed data
-            df = self.duckdb_conn.execute("SELECT * FROM green_companies").df()
+            df = self._processed_companies()
             
             if df.empty:
                 logger.warning("No green companies found in the data")
                 return df
             
-            # Calculate green scores and ODS tags
-            df['score_verde'] = df.apply(
-                lambda row: ScoringRules.calculate_score(
-                    row['cnae_principal'],
-                    row['cnaes_secundarias'] if row['cnaes_secundarias'] else [],
-                    row['situacao_cadastral'],
-                    self.cnae_priorities
-                ), axis=1
-            )
-            
-            # Calculate ODS tags
-            df['ods_tags'] = df.apply(self._calculate_ods_tags, axis=1)
-            
-            # Add metadata
-            df['fonte_atualizacao'] = 'ETL_RFB'
-            df['atualizado_em'] = datetime.now()
-            
             logger.info(f"Processed {len(df)} green companies")
             return df
             
@@ -292,6 +532,30 @@ class GreenJobsETL:
             logger.error(f"Failed to process green companies: {e}")
             raise
     
+    def _execute_profiled(self, name: str, sql: str, params: Optional[list] = None) -> None:
+        """Execute a heavy statement with DuckDB JSON profiling and keep the profile in the run report."""
+        if self.report is None:
+            self.duckdb_conn.execute(sql, params)
+            return
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            profile_path = Path(tmp_dir) / "profile.json"
+            self.duckdb_conn.execute("SET enable_profiling = 'json'")
+            self.duckdb_conn.execute(f"SET profiling_output = '{profile_path}'")
+            try:
+                self.duckdb_conn.execute(sql, params)
+            finally:
+                self.duckdb_conn.execute("PRAGMA disable_profiling")
+            
+            if profile_path.exists():
+                with open(profile_path, encoding='utf-8') as f:
+                    self.report.add_profile(name, json.load(f))
+    
+    def _processed_companies(self) -> pd.DataFrame:
+        """Scored green companies stored by process_green_companies."""
+        # Through Arrow, so DATE columns stay dates (.df() turns them into timestamps)
+        return self.duckdb_conn.execute("SELECT * FROM green_companies_processed").to_arrow_table().to_pandas()
+    
     def _calculate_ods_tags(self, row) -> List[int]:
         """Calculate ODS tags for a company based on its CNAEs."""
         ods_tags = set()
@@ -323,24 +587,29 @@ class GreenJobsETL:
             return set()
     
     def save_to_parquet(self, df: pd.DataFrame) -> None:
-        """Save processed data to partitioned Parquet files."""
+        """
+        Save processed data to partitioned Parquet files.
+        
+        Each UF partition is replaced by one file sorted by SORT_KEYS, with
+        row groups of PARQUET_ROW_GROUP_SIZE rows, then the dataset manifest
+        is published.
+        """
         try:
             config.ensure_directories()
             
-            # Convert to PyArrow table
-            table = pa.Table.from_pandas(df)
+            # Convert to PyArrow table, ordered within each partition
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.sort_by([('uf', 'ascending')] + SORT_KEYS)
             
             # Write partitioned by UF
             output_path = config.PROCESSED_DIR / "empresas_verdes"
             output_path.mkdir(exist_ok=True)
             
-            pq.write_to_dataset(
-                table,
-                root_path=str(output_path),
-                partition_cols=['uf'],
-                compression='snappy',
-                existing_data_behavior='overwrite_or_ignore'
-            )
+            # Replace the partitions being written, so a rerun does not duplicate rows
+            with self._parquet_sink(output_path, sorted_by=SORT_KEYS) as sink:
+                sink.write(table)
+            
+            self._publish_full_load(output_path, sink.files)
             
             logger.info(f"Saved Parquet data to {output_path}")
             
@@ -348,65 +617,268 @@ class GreenJobsETL:
             logger.error(f"Failed to save Parquet data: {e}")
             raise
     
+    def _publish_full_load(self, output_path: Path, written: Dict[str, List[Path]]) -> None:
+        """Publish a full load: partitions it did not write (UFs no longer loaded) are dropped."""
+        stale = {path.name: [] for path in output_path.glob("uf=*") if path.is_dir()}
+        publish_manifest(output_path, stale | written)
+    
+    def _parquet_sink(self, output_path: Path, sorted_by=None) -> PartitionedParquetSink:
+        """Partitioned writer with the dataset layout settings."""
+        return PartitionedParquetSink(
+            output_path, partition_col='uf',
+            row_group_size=config.PARQUET_ROW_GROUP_SIZE, sorted_by=sorted_by
+        )
+    
     def load_to_postgres(self, df: pd.DataFrame) -> None:
-        """Load processed data to SQLite."""
+        """Bulk load processed data into the serving database (LOAD_TARGET)."""
         try:
-            cursor = self.postgres_conn.cursor()
+            loader = self._bulk_loader()
+            loader.create_staging()
             
-            # Clear existing data
-            cursor.execute("DELETE FROM empresas_verdes")
-            cursor.execute("DELETE FROM empresa_cnae")
+            # Arrow conversion yields plain Python values (lists, ints) for the driver
+            loader.stage(pa.Table.from_pandas(df, preserve_index=False).to_pylist())
             
-            # Insert empresas_verdes data
-            for _, row in df.iterrows():
-                # Convert arrays to JSON strings for SQLite
-                cnaes_secundarias_json = json.dumps(row['cnaes_secundarias'] if row['cnaes_secundarias'] else [])
-                ods_tags_json = json.dumps(row['ods_tags'] if row['ods_tags'] else [])
-                
-                cursor.execute("""
-                    INSERT INTO empresas_verdes 
-                    (cnpj, razao_social, nome_fantasia, cnae_principal, cnaes_secundarias,
-                     porte, uf, municipio, situacao_cadastral, data_abertura, score_verde,
-                     ods_tags, fonte_atualizacao, atualizado_em)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    row['cnpj'], row['razao_social'], row['nome_fantasia'],
-                    row['cnae_principal'], cnaes_secundarias_json, row['porte'],
-                    row['uf'], row['municipio'], row['situacao_cadastral'],
-                    row['data_abertura'], row['score_verde'], ods_tags_json,
-                    row['fonte_atualizacao'], row['atualizado_em']
-                ))
-                
-                # Insert empresa_cnae relationships
-                # Primary CNAE
-                cursor.execute("""
-                    INSERT OR IGNORE INTO empresa_cnae (cnpj, codigo_cnae)
-                    VALUES (?, ?)
-                """, (row['cnpj'], row['cnae_principal']))
-                
-                # Secondary CNAEs
-                for cnae in row['cnaes_secundarias'] if row['cnaes_secundarias'] else []:
-                    cnae = cnae.strip()
-                    if cnae and cnae in self.cnae_green_mapping:
-                        cursor.execute("""
-                            INSERT OR IGNORE INTO empresa_cnae (cnpj, codigo_cnae)
-                            VALUES (?, ?)
-                        """, (row['cnpj'], cnae))
-            
-            # Commit changes
+            # Readers see the previous load until this commit
+            loader.merge(replace=True)
             self.postgres_conn.commit()
             
-            logger.info(f"Loaded {len(df)} companies to SQLite")
+            logger.info(f"Loaded {loader.staged} companies to {config.LOAD_TARGET}")
             
         except Exception as e:
-            logger.error(f"Failed to load data to SQLite: {e}")
+            logger.error(f"Failed to load data to {config.LOAD_TARGET}: {e}")
             if self.postgres_conn:
                 self.postgres_conn.rollback()
             raise
     
+    def _bulk_loader(self):
+        """Bulk loader for the serving database connection."""
+        return create_bulk_loader(config.LOAD_TARGET, self.postgres_conn, set(self.cnae_green_mapping))
+    
+    def _with_load_metadata(self, batch: pa.RecordBatch, atualizado_em: datetime) -> pa.Table:
+        """Append the load metadata columns to a scored batch."""
+        table = pa.Table.from_batches([batch])
+        table = table.append_column('fonte_atualizacao', pa.array(['ETL_RFB'] * batch.num_rows, pa.string()))
+        return table.append_column(
+            'atualizado_em', pa.array([atualizado_em] * batch.num_rows, pa.timestamp('us'))
+        )
+    
+    def stream_green_companies(self) -> int:
+        """
+        Process green companies in Arrow record batches of CHUNK_SIZE rows.
+        
+        Each batch is scored and ODS-tagged by DuckDB, then goes through
+        Parquet writing and the SQLite load before the next one is fetched,
+        so memory use does not grow with the size of the RFB input.
+        
+        Returns:
+            Number of green companies processed
+        """
+        throughput = StageThroughput()
+        atualizado_em = datetime.now()
+        total_rows = 0
+        
+        try:
+            self._create_green_companies_view()
+            self._create_scored_view()
+            
+            reader = self.duckdb_conn.execute(
+                "SELECT * FROM green_companies_scored"
+            ).to_arrow_reader(config.CHUNK_SIZE)
+            
+            config.ensure_directories()
+            output_path = config.PROCESSED_DIR / "empresas_verdes"
+            
+            loader = self._bulk_loader()
+            loader.create_staging()
+            
+            with self._parquet_sink(output_path) as sink:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        batch = reader.read_next_batch()
+                    except StopIteration:
+                        break
+                    throughput.record('fetch_score', batch.num_rows, time.perf_counter() - start)
+                    
+                    table = self._with_load_metadata(batch, atualizado_em)
+                    
+                    with throughput.stage('parquet', table.num_rows):
+                        sink.write(table)
+                    
+                    with throughput.stage('database', table.num_rows):
+                        loader.stage(table.to_pylist())
+                    
+                    total_rows += table.num_rows
+                    logger.debug(f"Processed batch of {table.num_rows} rows ({total_rows} total)")
+            
+            self._publish_full_load(output_path, sink.files)
+            
+            with throughput.stage('merge', total_rows):
+                loader.merge(replace=True)
+                self.postgres_conn.commit()
+            
+            throughput.log_summary(logger)
+            logger.info(f"Streamed {total_rows} green companies to {output_path} and {config.LOAD_TARGET}")
+            return total_rows
+            
+        except Exception as e:
+            logger.error(f"Failed to stream green companies: {e}")
+            if self.postgres_conn:
+                self.postgres_conn.rollback()
+            raise
+    
+    def load_incremental(self) -> Dict[str, int]:
+        """
+        Apply only the changes since the previous run to SQLite and Parquet.
+        
+        Every scored company gets a content hash, which is compared with the
+        hashes saved by the previous run. Inserted, updated and deleted CNPJs
+        are applied in a single transaction, and only the UF partitions that
+        contain a change are rewritten. Without a saved state (first run) the
+        serving tables and dataset are rebuilt from scratch.
+        
+        Returns:
+            Number of inserted, updated and deleted companies
+        """
+        atualizado_em = datetime.now()
+        output_path = config.PROCESSED_DIR / "empresas_verdes"
+        
+        try:
+            self._create_green_companies_view()
+            self._create_scored_view()
+            
+            total = incremental.create_hashed_companies(self.duckdb_conn, "green_companies_scored")
+            has_state = incremental.load_previous_hashes(self.duckdb_conn, config.HASH_STATE_FILE)
+            counts = incremental.compute_delta(self.duckdb_conn)
+            
+            logger.info(
+                f"Delta against {'previous run' if has_state else 'empty state'}: "
+                f"{counts[incremental.INSERT]} inserted, {counts[incremental.UPDATE]} updated, "
+                f"{counts[incremental.DELETE]} deleted, "
+                f"{total - counts[incremental.INSERT] - counts[incremental.UPDATE]} unchanged"
+            )
+            
+            if not has_state and output_path.exists():
+                shutil.rmtree(output_path)
+            
+            # Without a previous state every company is staged and the rest removed
+            self._apply_delta(replace=not has_state, atualizado_em=atualizado_em)
+            self.postgres_conn.commit()
+            
+            config.ensure_directories()
+            partitions = incremental.affected_partitions(self.duckdb_conn)
+            self._rewrite_partitions(output_path, partitions, atualizado_em)
+            
+            # Saved last, so a failed run is simply recomputed against the old state
+            incremental.save_hashes(self.duckdb_conn, config.HASH_STATE_FILE)
+            
+            if partitions:
+                logger.info(f"Rewrote {len(partitions)} partitions in {output_path}: {', '.join(partitions)}")
+            return counts
+            
+        except Exception as e:
+            logger.error(f"Failed to apply incremental load: {e}")
+            if self.postgres_conn:
+                self.postgres_conn.rollback()
+            raise
+    
+    def _apply_delta(self, replace: bool, atualizado_em: datetime) -> None:
+        """Stage the new and changed companies, merge them and delete the removed ones."""
+        loader = self._bulk_loader()
+        loader.create_staging()
+        
+        reader = self.duckdb_conn.execute(f"""
+            SELECT c.* EXCLUDE (content_hash)
+            FROM current_companies c
+            JOIN company_delta d ON d.cnpj = c.cnpj
+            WHERE d.change IN ('{incremental.INSERT}', '{incremental.UPDATE}')
+        """).to_arrow_reader(config.CHUNK_SIZE)
+        
+        for batch in reader:
+            loader.stage(self._with_load_metadata(batch, atualizado_em).to_pylist())
+        
+        loader.merge(replace=replace)
+        
+        removed = self.duckdb_conn.execute(
+            f"SELECT cnpj FROM company_delta WHERE change = '{incremental.DELETE}'"
+        ).fetchall()
+        loader.delete(cnpj for cnpj, in removed)
+    
+    def _rewrite_partitions(self, output_path: Path, partitions: List[str], atualizado_em: datetime) -> None:
+        """Replace the given UF partitions with the current companies of those UFs."""
+        if not partitions:
+            return
+        
+        ufs_str = "','".join(partitions)
+        reader = self.duckdb_conn.execute(f"""
+            SELECT * EXCLUDE (content_hash) FROM current_companies
+            WHERE uf IN ('{ufs_str}')
+            ORDER BY uf, cnae_principal, score_verde DESC
+        """).to_arrow_reader(config.CHUNK_SIZE)
+        
+        with self._parquet_sink(output_path, sorted_by=SORT_KEYS) as sink:
+            for batch in reader:
+                sink.write(self._with_load_metadata(batch, atualizado_em))
+        
+        # Partitions left without companies are dropped
+        publish_manifest(output_path, {f"uf={uf}": [] for uf in partitions} | sink.files)
+    
+    def _open_checkpoints(self) -> None:
+        """Read the stages completed by an interrupted run from the persistent DuckDB file."""
+        if not config.DUCKDB_PATH:
+            return
+        
+        self.duckdb_conn.execute("""
+            CREATE TABLE IF NOT EXISTS etl_checkpoints (
+                stage VARCHAR PRIMARY KEY,
+                rows BIGINT,
+                completed_at TIMESTAMP
+            )
+        """)
+        self.completed_stages = {
+            row[0] for row in self.duckdb_conn.execute("SELECT stage FROM etl_checkpoints").fetchall()
+        }
+        if self.completed_stages:
+            last_stage = [stage for stage in STAGES if stage in self.completed_stages][-1]
+            logger.info(f"Resuming from checkpoint: last completed stage is {last_stage}")
+    
+    def _stage_done(self, stage: str) -> bool:
+        return stage in self.completed_stages
+    
+    def _checkpoint(self, stage: str, rows: int) -> None:
+        """Record a completed stage (persistent DuckDB only)."""
+        self.completed_stages.add(stage)
+        if not config.DUCKDB_PATH:
+            return
+        
+        self.duckdb_conn.execute(
+            "INSERT OR REPLACE INTO etl_checkpoints VALUES (?, ?, ?)", [stage, rows, datetime.now()]
+        )
+        logger.info(f"Checkpoint: {stage} completed ({rows} rows)")
+    
+    def _clear_checkpoints(self) -> None:
+        """Forget the checkpoints once the run completes, so the next run starts over."""
+        self.completed_stages = set()
+        if config.DUCKDB_PATH:
+            self.duckdb_conn.execute("DELETE FROM etl_checkpoints")
+    
     def run_pipeline(self) -> None:
-        """Execute the complete ETL pipeline."""
+        """Execute the complete ETL pipeline and write its run report."""
         start_time = time.time()
+        self.report = RunReport()
+        self.report.details = {
+            'mode': 'incremental' if config.INCREMENTAL_ENABLED else 'streaming' if config.STREAMING_ENABLED else 'batch',
+            'config': {
+                'target_ufs': [uf.strip() for uf in config.TARGET_UFS],
+                'max_workers': config.MAX_WORKERS,
+                'chunk_size': config.CHUNK_SIZE,
+                'load_target': config.LOAD_TARGET,
+                'duckdb_path': config.DUCKDB_PATH or ':memory:',
+                'duckdb_memory_limit': config.DUCKDB_MEMORY_LIMIT or None,
+            },
+        }
+        status = 'failed'
+        output_path = config.PROCESSED_DIR / "empresas_verdes"
         
         try:
             logger.info("Starting Green Jobs Brasil ETL pipeline")
@@ -417,34 +889,120 @@ class GreenJobsETL:
             
             # Load CNAE green mapping
             self.load_cnae_green_mapping()
-            
-            # Setup DuckDB schema
-            self.setup_duckdb_schema()
+            self.register_cnae_green_table()
+            self._open_checkpoints()
             
             # Load RFB data
-            self.load_rfb_data()
+            with self.report.stage('load_rfb_data') as stage:
+                if self._stage_done('load_rfb_data'):
+                    logger.info("Skipping load_rfb_data, RFB tables already loaded")
+                    stage.skipped = True
+                else:
+                    self.setup_duckdb_schema()
+                    self.load_rfb_data()
+                    stage.rows_out = self._count('empresas') + self._count('estabelecimentos')
+                    stage.bytes_read = sum(timing['bytes'] for timing in self.shard_timings)
+                    self._checkpoint('load_rfb_data', self._count('estabelecimentos'))
+            
+            if config.INCREMENTAL_ENABLED:
+                with self.report.stage('load_incremental') as stage:
+                    counts = self.load_incremental()
+                    stage.rows_in = self._count('current_companies')
+                    stage.rows_out = sum(counts.values())
+                self.report.details['delta'] = counts
+                self._clear_checkpoints()
+                status = 'success'
+                logger.info(f"Pipeline completed successfully in {time.time() - start_time:.2f} seconds")
+                logger.info(f"Applied {sum(counts.values())} changed green companies")
+                return
+            
+            # A full load makes the hashes of a previous incremental run stale
+            config.HASH_STATE_FILE.unlink(missing_ok=True)
+            
+            if config.STREAMING_ENABLED:
+                with self.report.stage('stream_green_companies') as stage:
+                    total_rows = self.stream_green_companies()
+                    stage.rows_in = self._count('estabelecimentos')
+                    stage.rows_out = total_rows
+                    stage.bytes_written = directory_size(output_path)
+                self._clear_checkpoints()
+                status = 'success'
+                if total_rows:
+                    logger.info(f"Pipeline completed successfully in {time.time() - start_time:.2f} seconds")
+                    logger.info(f"Processed {total_rows} green companies")
+                else:
+                    logger.warning("No data to process")
+                return
             
             # Process green companies
-            df = self.process_green_companies()
+            with self.report.stage('process_green_companies') as stage:
+                if self._stage_done('process_green_companies'):
+                    logger.info("Skipping process_green_companies, using stored result")
+                    stage.skipped = True
+                    df = self._processed_companies()
+                else:
+                    df = self.process_green_companies()
+                    stage.rows_in = self._count('estabelecimentos')
+                    stage.rows_out = len(df)
+                    self._checkpoint('process_green_companies', len(df))
             
             if not df.empty:
                 # Save to Parquet
-                self.save_to_parquet(df)
+                with self.report.stage('save_to_parquet') as stage:
+                    if self._stage_done('save_to_parquet'):
+                        stage.skipped = True
+                    else:
+                        self.save_to_parquet(df)
+                        stage.rows_in = stage.rows_out = len(df)
+                        stage.bytes_written = directory_size(output_path)
+                        self._checkpoint('save_to_parquet', len(df))
                 
                 # Load to PostgreSQL
-                self.load_to_postgres(df)
+                with self.report.stage('load_to_postgres') as stage:
+                    if self._stage_done('load_to_postgres'):
+                        stage.skipped = True
+                    else:
+                        self.load_to_postgres(df)
+                        stage.rows_in = stage.rows_out = len(df)
+                        self._checkpoint('load_to_postgres', len(df))
                 
                 logger.info(f"Pipeline completed successfully in {time.time() - start_time:.2f} seconds")
                 logger.info(f"Processed {len(df)} green companies")
             else:
                 logger.warning("No data to process")
             
+            self._clear_checkpoints()
+            status = 'success'
+            
         except Exception as e:
             logger.error(f"Pipeline failed: {e}")
             raise
+        
+        finally:
+            self._write_run_report(status)
+    
+    def _count(self, table: str) -> int:
+        return self.duckdb_conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    
+    def _write_run_report(self, status: str) -> None:
+        """Write the run report next to the Parquet output (never fails the run)."""
+        try:
+            self.report.details['shard_timings'] = self.shard_timings
+            self.report.finish(status)
+            path = self.report.write(config.PROCESSED_DIR)
+            logger.info(f"Run report written to {path}")
+        except Exception as e:
+            logger.warning(f"Failed to write run report: {e}")
 
 def main():
     """Main entry point."""
+    parser = argparse.ArgumentParser(description="Green Jobs Brasil ETL pipeline")
+    parser.add_argument(
+        "--compare", action="store_true",
+        help="Print a comparison of this run's report against the previous run's"
+    )
+    args = parser.parse_args()
+    
     try:
         with GreenJobsETL() as etl:
             etl.run_pipeline()
@@ -454,6 +1012,19 @@ def main():
     except Exception as e:
         logger.error(f"ETL execution failed: {e}")
         return 1
+    
+    finally:
+        if args.compare:
+            print_report_comparison()
+
+def print_report_comparison() -> None:
+    """Print the latest run report against the previous one."""
+    current = load_report(config.PROCESSED_DIR / REPORT_FILE)
+    previous = load_report(config.PROCESSED_DIR / PREVIOUS_REPORT_FILE)
+    if current is None or previous is None:
+        print("No previous run report to compare with")
+        return
+    print(compare_reports(previous, current))
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
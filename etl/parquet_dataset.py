@@ -0,0 +1,139 @@
+"""
+Green Jobs Brasil - Parquet Dataset Layout
+Writer settings and the manifest of the hive-partitioned empresas_verdes dataset.
+"""
+
+import inspect
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+MANIFEST_FILE = "_manifest.json"
+DEFAULT_ROW_GROUP_SIZE = 100000
+
+# Order of the rows inside each partition, so row groups cover narrow CNAE and score ranges
+SORT_KEYS: List[Tuple[str, str]] = [('cnae_principal', 'ascending'), ('score_verde', 'descending')]
+
+# Point lookups by CNPJ can skip row groups whose Bloom filter rules the key out
+BLOOM_FILTER_COLUMNS = ('cnpj',)
+BLOOM_FILTER_FPP = 0.01
+BLOOM_FILTERS_SUPPORTED = 'bloom_filter_options' in inspect.signature(pq.ParquetWriter.__init__).parameters
+
+
+def writer_options(schema: pa.Schema, row_group_size: int,
+                   sorted_by: Optional[Sequence[Tuple[str, str]]] = None) -> Dict:
+    """
+    ParquetWriter keyword arguments for a dataset file.
+
+    Min/max statistics are always written. ``sorted_by`` is recorded in the
+    row group metadata and must match the order the rows are written in.
+    Bloom filters are sized for one row group and need pyarrow with
+    Bloom filter write support; older versions skip them.
+    """
+    options = {'write_statistics': True}
+    if sorted_by:
+        options['sorting_columns'] = pq.SortingColumn.from_ordering(schema, sorted_by)
+    if BLOOM_FILTERS_SUPPORTED:
+        options['bloom_filter_options'] = {
+            column: {'ndv': row_group_size, 'fpp': BLOOM_FILTER_FPP}
+            for column in BLOOM_FILTER_COLUMNS if column in schema.names
+        }
+    return options
+
+
+def read_manifest(root_path: Path) -> Optional[Dict]:
+    """Published manifest of a dataset, or None when it has none."""
+    manifest_path = Path(root_path) / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+    return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+
+def dataset_files(root_path: Path) -> List[Path]:
+    """
+    Data files of a dataset.
+
+    Files listed in the manifest when there is one, so files still being
+    written or already replaced are never read; otherwise every Parquet file
+    under the partition directories.
+    """
+    root_path = Path(root_path)
+    manifest = read_manifest(root_path)
+    if manifest is None:
+        return sorted(root_path.glob("*/*.parquet"))
+    return [root_path / entry['path'] for entry in manifest['files']]
+
+
+def publish_manifest(root_path: Path, partition_files: Dict[str, List[Path]]) -> Dict:
+    """
+    Publish the manifest after partitions were rewritten.
+
+    ``partition_files`` maps a partition directory (``uf=MG``) to the files
+    that now make it up; an empty list drops the partition. Other partitions
+    keep their files. The manifest is swapped in atomically, and only then
+    are the replaced files deleted.
+
+    Returns:
+        The published manifest
+    """
+    root_path = Path(root_path)
+    files = {
+        path.relative_to(root_path).as_posix()
+        for path in dataset_files(root_path)
+        if path.parent.name not in partition_files
+    }
+    files.update(
+        Path(path).relative_to(root_path).as_posix()
+        for paths in partition_files.values() for path in paths
+    )
+
+    entries = []
+    for relative in sorted(files):
+        path = root_path / relative
+        metadata = pq.read_metadata(path)
+        entries.append({
+            'path': relative,
+            'rows': metadata.num_rows,
+            'row_groups': metadata.num_row_groups,
+            'size_bytes': path.stat().st_size,
+        })
+    schema = pq.read_schema(root_path / entries[0]['path']) if entries else pa.schema([])
+
+    manifest = {
+        'schema_version': SCHEMA_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'partition_col': 'uf',
+        'sort_keys': [list(key) for key in SORT_KEYS],
+        'total_rows': sum(entry['rows'] for entry in entries),
+        'schema': [{'name': field.name, 'type': str(field.type)} for field in schema],
+        'files': entries,
+    }
+
+    tmp_path = root_path / f"{MANIFEST_FILE}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, root_path / MANIFEST_FILE)
+
+    for partition in partition_files:
+        partition_dir = root_path / partition
+        if not partition_dir.exists():
+            continue
+        for path in partition_dir.glob("*.parquet"):
+            if path.relative_to(root_path).as_posix() not in files:
+                path.unlink()
+        if not any(partition_dir.iterdir()):
+            partition_dir.rmdir()
+
+    logger.info(f"Published manifest of {root_path}: {len(entries)} files, {manifest['total_rows']} rows")
+    return manifest
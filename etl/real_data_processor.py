@@ -3,14 +3,49 @@ ETL para processar dados reais de empresas brasileiras
 Sistema Green Jobs Brasil - Processamento de dados da Receita Federal
 """
 
+import asyncio
+import logging
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import sqlite3
-import requests
 import time
-from typing import Dict, List, Optional
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import os
 from pathlib import Path
 
+from receita_client import ReceitaWSClient, ReceitaWSError, clean_cnpj
+
+logger = logging.getLogger(__name__)
+
+# Pontos por CNAE verde conforme a classificação
+CLASSIFICATION_SCORES = {'Core': 100, 'Adjacent': 70, 'Secondary': 40}
+
+# Campos da empresa verde -> colunas do CSV da Receita
+RECEITA_FIELDS = {
+    'nome': 'razao_social',
+    'fantasia': 'nome_fantasia',
+    'situacao': 'situacao_cadastral',
+    'municipio': 'municipio',
+    'uf': 'uf',
+    'cep': 'cep',
+}
+RECEITA_COLUMNS = {
+    'cnpj', 'cnpj_basico', 'cnpj_ordem', 'cnpj_dv',
+    'cnae_fiscal_principal', 'cnae_fiscal_secundaria', *RECEITA_FIELDS.values()
+}
+
+GREEN_COMPANY_COLUMNS = ['cnpj', 'nome', 'fantasia', 'green_score', 'situacao',
+                         'municipio', 'uf', 'cep', 'green_cnaes']
+GREEN_COMPANY_SCHEMA = pa.schema([
+    (column, pa.int32() if column == 'green_score' else
+     pa.list_(pa.string()) if column == 'green_cnaes' else pa.string())
+    for column in GREEN_COMPANY_COLUMNS
+])
+
 class RealDataProcessor:
     def __init__(self, db_path: str = None):
         """Inicializa o processador de dados reais"""
@@ -22,6 +57,8 @@ class RealDataProcessor:
         
         # CNAEs verdes já classificados no sistema
         self.green_cnaes = self._load_green_cnaes()
+        self.green_index, self.green_prefix_index = self._build_green_index(self.green_cnaes)
+        self._receita_client = None
     
     def _load_green_cnaes(self) -> Dict[str, Dict]:
         """Carrega os CNAEs verdes já classificados"""
@@ -38,6 +75,44 @@ class RealDataProcessor:
             }
         return green_cnaes
     
+    def _build_green_index(self, green_cnaes: Dict[str, Dict]) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """
+        Monta os índices de busca dos CNAEs verdes (normalizados uma única vez)
+
+        Returns:
+            Código normalizado de 7 dígitos -> classificação e
+            classe de 4 dígitos -> classificação de maior pontuação da classe
+        """
+        index = {}
+        prefix_index = {}
+        for green_cnae, info in green_cnaes.items():
+            normalized = self._normalize_cnae(green_cnae)
+            if not normalized:
+                continue
+            entry = {**info, 'cnae': green_cnae}
+            # O primeiro CNAE cadastrado vence, como na busca sequencial
+            index.setdefault(normalized, entry)
+
+            best = prefix_index.get(normalized[:4])
+            if best is None or (CLASSIFICATION_SCORES.get(entry['classificacao'], 0)
+                                > CLASSIFICATION_SCORES.get(best['classificacao'], 0)):
+                prefix_index[normalized[:4]] = entry
+        return index, prefix_index
+    
+    def match_green_cnae(self, cnae: str) -> Optional[Dict]:
+        """
+        Retorna a classificação do CNAE verde correspondente (ou None)
+
+        Busca o código exato; códigos só com a classe (4 a 6 dígitos)
+        caem no índice por classe.
+        """
+        digits_only = self._cnae_digits(cnae)
+        normalized = self._normalize_digits(digits_only)
+        match = self.green_index.get(normalized)
+        if match is None and 4 <= len(digits_only) < 7:
+            match = self.green_prefix_index.get(normalized[:4])
+        return match
+    
     def calculate_green_score(self, cnaes: List[str]) -> int:
         """Calcula a pontuação verde baseado nos CNAEs da empresa"""
         if not cnaes:
@@ -48,31 +123,21 @@ class RealDataProcessor:
         matched_cnaes = []
         
         for cnae in cnaes:
-            # Normaliza o CNAE removendo pontuação e padronizando formato
-            cnae_normalized = self._normalize_cnae(cnae)
+            # Busca por CNAE exato ou pela classe
+            match = self.match_green_cnae(cnae)
+            if match is None:
+                continue
             
-            # Busca por CNAE exato ou similar
-            for green_cnae, info in self.green_cnaes.items():
-                green_cnae_normalized = self._normalize_cnae(green_cnae)
-                
-                if cnae_normalized == green_cnae_normalized:
-                    green_cnaes_count += 1
-                    matched_cnaes.append(f"{cnae} -> {green_cnae}")
-                    
-                    # Pontuação baseada na classificação
-                    if info['classificacao'] == 'Core':
-                        total_score += 100
-                    elif info['classificacao'] == 'Adjacent':
-                        total_score += 70
-                    elif info['classificacao'] == 'Secondary':
-                        total_score += 40
-                    break
+            green_cnaes_count += 1
+            matched_cnaes.append(f"{cnae} -> {match['cnae']}")
+            
+            # Pontuação baseada na classificação
+            total_score += CLASSIFICATION_SCORES.get(match['classificacao'], 0)
         
         if green_cnaes_count == 0:
             return 0
         
-        # Debug: mostra CNAEs encontrados
-        print(f"   CNAEs verdes encontrados: {matched_cnaes}")
+        logger.debug("CNAEs verdes encontrados: %s", matched_cnaes)
         
         # Média ponderada considerando total de CNAEs
         base_score = total_score / green_cnaes_count
@@ -84,14 +149,19 @@ class RealDataProcessor:
         final_score = min(100, int(base_score + bonus))
         return final_score
     
-    def _normalize_cnae(self, cnae: str) -> str:
-        """Normaliza CNAE para comparação (remove pontuação e padroniza)"""
+    @staticmethod
+    def _cnae_digits(cnae: str) -> str:
+        """Remove todos os caracteres não numéricos"""
         if not cnae or cnae == '00.00-0-00':
             return ''
-        
-        # Remove todos os caracteres não numéricos
-        digits_only = ''.join(filter(str.isdigit, str(cnae)))
-        
+        return ''.join(filter(str.isdigit, str(cnae)))
+    
+    def _normalize_cnae(self, cnae: str) -> str:
+        """Normaliza CNAE para comparação (remove pontuação e padroniza)"""
+        return self._normalize_digits(self._cnae_digits(cnae))
+    
+    @staticmethod
+    def _normalize_digits(digits_only: str) -> str:
         # Garante que tenha pelo menos 7 dígitos
         if len(digits_only) >= 7:
             # Formato padrão: XXXXXXX (7 dígitos)
@@ -102,50 +172,55 @@ class RealDataProcessor:
         
         return digits_only
     
+    @property
+    def receita_client(self) -> ReceitaWSClient:
+        """Cliente ReceitaWS compartilhado (rate limit, retries e cache em disco)"""
+        if self._receita_client is None:
+            self._receita_client = ReceitaWSClient()
+        return self._receita_client
+    
+    def __getstate__(self):
+        # O cliente (sessão HTTP e conexão do cache) não vai para os processos do pool
+        return {**self.__dict__, '_receita_client': None}
+    
+    def _parse_receita_ws(self, data: Dict) -> Dict:
+        """Extrai os campos usados na classificação da resposta da ReceitaWS"""
+        return {
+            'cnpj': data.get('cnpj'),
+            'nome': data.get('nome'),
+            'fantasia': data.get('fantasia'),
+            'situacao': data.get('situacao'),
+            'atividade_principal': data.get('atividade_principal', [{}])[0].get('code') if data.get('atividade_principal') else None,
+            'atividades_secundarias': [ativ.get('code') for ativ in data.get('atividades_secundarias', [])],
+            'municipio': data.get('municipio'),
+            'uf': data.get('uf'),
+            'cep': data.get('cep'),
+            'telefone': data.get('telefone'),
+            'email': data.get('email')
+        }
+    
     def search_cnpj_receita_ws(self, cnpj: str) -> Optional[Dict]:
         """Busca dados de uma empresa pelo CNPJ usando ReceitaWS"""
         try:
-            # Remove formatação do CNPJ
-            cnpj_clean = ''.join(filter(str.isdigit, cnpj))
-            
-            # API da ReceitaWS (gratuita com limite)
-            url = f"https://www.receitaws.com.br/v1/cnpj/{cnpj_clean}"
-            
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get('status') == 'OK':
-                    return {
-                        'cnpj': data.get('cnpj'),
-                        'nome': data.get('nome'),
-                        'fantasia': data.get('fantasia'),
-                        'situacao': data.get('situacao'),
-                        'atividade_principal': data.get('atividade_principal', [{}])[0].get('code') if data.get('atividade_principal') else None,
-                        'atividades_secundarias': [ativ.get('code') for ativ in data.get('atividades_secundarias', [])],
-                        'municipio': data.get('municipio'),
-                        'uf': data.get('uf'),
-                        'cep': data.get('cep'),
-                        'telefone': data.get('telefone'),
-                        'email': data.get('email')
-                    }
-            
-            return None
-            
-        except Exception as e:
+            data = asyncio.run(self.receita_client.fetch(cnpj))
+        except ReceitaWSError as e:
             print(f"Erro ao buscar CNPJ {cnpj}: {str(e)}")
             return None
+        
+        return self._parse_receita_ws(data) if data else None
     
     def process_cnpj_list(self, cnpj_list: List[str]) -> List[Dict]:
         """Processa uma lista de CNPJs e retorna empresas verdes"""
         green_companies = []
         
+        # Busca todas as empresas de uma vez; o cliente respeita o limite da API
+        payloads = asyncio.run(self.receita_client.fetch_many(cnpj_list))
+        
         for i, cnpj in enumerate(cnpj_list):
             print(f"Processando {i+1}/{len(cnpj_list)}: {cnpj}")
             
-            # Busca dados da empresa
-            company_data = self.search_cnpj_receita_ws(cnpj)
+            data = payloads[clean_cnpj(cnpj)]
+            company_data = self._parse_receita_ws(data) if data else None
             
             if company_data and company_data['situacao'] == 'ATIVA':
                 # Coleta todos os CNAEs
@@ -161,102 +236,232 @@ class RealDataProcessor:
                 # Se tem pontuação verde, adiciona à lista
                 if green_score > 0:
                     company_data['green_score'] = green_score
-                    company_data['green_cnaes'] = [cnae for cnae in all_cnaes if any(cnae.replace('.','').replace('-','') == gc.replace('.','').replace('-','') for gc in self.green_cnaes.keys())]
+                    company_data['green_cnaes'] = [cnae for cnae in all_cnaes if self.match_green_cnae(cnae)]
                     green_companies.append(company_data)
                     
                     print(f"✅ Empresa verde encontrada: {company_data['nome']} (Score: {green_score})")
                 else:
                     print(f"❌ Empresa não verde: {company_data['nome']}")
-            
-            # Delay para não sobrecarregar a API
-            time.sleep(1)  # 1 segundo entre requisições
         
         return green_companies
     
-    def save_green_companies(self, companies: List[Dict]):
-        """Salva empresas verdes no banco de dados"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def save_green_companies(self, companies: List[Dict], batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Salva empresas verdes no banco de dados em lotes
+        
+        Empresas e vínculos de CNAE são acumulados e gravados com executemany
+        a cada ``batch_size`` empresas, tudo em uma única transação. Empresas
+        sem os campos obrigatórios da tabela são ignoradas.
         
+        Returns:
+            Quantidade de empresas inseridas, atualizadas e ignoradas
+        """
+        counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        
+        # A última ocorrência de cada CNPJ vence; os vínculos de todas são mantidos
+        latest = {}
+        links = []
         for company in companies:
-            try:
-                # Insere empresa - usar esquema atual
-                cursor.execute("""
-                    INSERT OR REPLACE INTO empresas_verdes 
+            if not all(company.get(field) for field in ('cnpj', 'nome', 'uf', 'atividade_principal')):
+                counts['skipped'] += 1
+                continue
+            latest[company['cnpj']] = company
+            links.extend((company['cnpj'], cnae) for cnae in company.get('green_cnaes') or [])
+        
+        rows = [
+            (
+                company['cnpj'],
+                company['nome'],
+                company.get('fantasia'),
+                company['green_score'],
+                company['situacao'],
+                company.get('municipio'),
+                company.get('uf'),
+                company.get('atividade_principal')
+            )
+            for company in latest.values()
+        ]
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                cnpjs = [row[0] for row in batch]
+                existing = conn.execute(
+                    f"SELECT COUNT(*) FROM empresas_verdes WHERE cnpj IN ({','.join('?' * len(cnpjs))})", cnpjs
+                ).fetchone()[0]
+                counts['updated'] += existing
+                counts['inserted'] += len(batch) - existing
+                
+                # Upsert: colunas fora do lote (porte, ods_tags...) são preservadas
+                conn.executemany("""
+                    INSERT INTO empresas_verdes
                     (cnpj, razao_social, nome_fantasia, score_verde, situacao_cadastral, municipio, uf, cnae_principal)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    company['cnpj'],
-                    company['nome'],
-                    company.get('fantasia'),
-                    company['green_score'],
-                    company['situacao'],
-                    company.get('municipio'),
-                    company.get('uf'),
-                    company.get('atividade_principal')
-                ))
-                
-                # Insere relacionamentos com CNAEs verdes
-                for cnae in company.get('green_cnaes', []):
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO empresa_cnae (cnpj, codigo_cnae)
-                        VALUES (?, ?)
-                    """, (company['cnpj'], cnae))
-                
-                print(f"✅ Empresa salva: {company['nome']}")
-                
-            except Exception as e:
-                print(f"❌ Erro ao salvar empresa {company['nome']}: {str(e)}")
+                    ON CONFLICT (cnpj) DO UPDATE SET
+                        razao_social = excluded.razao_social,
+                        nome_fantasia = excluded.nome_fantasia,
+                        score_verde = excluded.score_verde,
+                        situacao_cadastral = excluded.situacao_cadastral,
+                        municipio = excluded.municipio,
+                        uf = excluded.uf,
+                        cnae_principal = excluded.cnae_principal,
+                        atualizado_em = CURRENT_TIMESTAMP
+                """, batch)
+            
+            for start in range(0, len(links), batch_size):
+                conn.executemany("""
+                    INSERT OR IGNORE INTO empresa_cnae (cnpj, codigo_cnae)
+                    VALUES (?, ?)
+                """, links[start:start + batch_size])
+            
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         
-        conn.commit()
-        conn.close()
+        print(f"✅ Empresas salvas: {counts['inserted']} inseridas, {counts['updated']} atualizadas, "
+              f"{counts['skipped']} ignoradas")
+        return counts
+    
+    def _read_receita_csv(self, csv_path: str, chunk_size: int,
+                          column_names: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Lê o CSV da Receita em blocos, só com as colunas usadas na classificação
+
+        Com ``column_names`` o arquivo é tratado como sem cabeçalho (layout dos
+        arquivos publicados pela Receita).
+        """
+        return pd.read_csv(
+            csv_path, chunksize=chunk_size, encoding='latin-1', sep=';', dtype=str,
+            header=None if column_names else 'infer', names=column_names,
+            usecols=lambda column: column in RECEITA_COLUMNS
+        )
+    
+    def _classify_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Classifica um bloco do CSV da Receita com operações vetorizadas
+        
+        Os CNAEs secundários são separados em uma linha por CNAE, cada código
+        distinto passa uma única vez pelo índice de CNAEs verdes e as pontuações
+        são agregadas de volta por CNPJ, com a mesma regra de calculate_green_score.
+        
+        Returns:
+            Empresas verdes do bloco (colunas de GREEN_COMPANY_COLUMNS)
+        """
+        chunk = chunk.reset_index(drop=True)
+        missing = pd.Series(None, index=chunk.index, dtype=object)
+        
+        # Uma linha por CNAE, na ordem principal + secundárias de cada empresa
+        cnaes = pd.concat([
+            chunk.get('cnae_fiscal_principal', missing).dropna(),
+            chunk.get('cnae_fiscal_secundaria', missing).dropna().str.split(',').explode(),
+        ]).sort_index(kind='stable').astype(str).str.strip()
+        cnaes = cnaes[cnaes != '']
+        
+        points = {}
+        for cnae in cnaes.unique():
+            match = self.match_green_cnae(cnae)
+            if match is not None:
+                points[cnae] = CLASSIFICATION_SCORES.get(match['classificacao'], 0)
+        
+        green = cnaes[cnaes.isin(list(points))]
+        green_count = green.groupby(level=0).size()
+        total_count = cnaes.groupby(level=0).size().reindex(green_count.index)
+        total_score = green.map(points).groupby(level=0).sum()
+        
+        # Média das pontuações + até 20 pontos de bonus pela proporção de CNAEs verdes
+        scores = np.minimum(100, np.floor(total_score / green_count + green_count / total_count * 20)).astype(int)
+        scores = scores[scores > 0]
+        
+        rows = chunk.loc[scores.index]
+        if 'cnpj' in rows:
+            cnpj = rows['cnpj']
+        elif 'cnpj_basico' in rows:
+            cnpj = rows['cnpj_basico'] + rows['cnpj_ordem'] + rows['cnpj_dv']
+        else:
+            cnpj = missing.loc[scores.index]
+        
+        companies = pd.DataFrame({'cnpj': cnpj, 'green_score': scores})
+        for column, source in RECEITA_FIELDS.items():
+            companies[column] = rows.get(source, missing.loc[scores.index])
+        companies['green_cnaes'] = green.groupby(level=0).agg(list).reindex(scores.index)
+        return companies[GREEN_COMPANY_COLUMNS]
+    
+    def _classify_chunks(self, chunks: Iterable[pd.DataFrame], workers: int) -> Iterator[pd.DataFrame]:
+        """Classifica os blocos em um pool de processos, mantendo a ordem e no máximo 2 blocos por worker em memória"""
+        if workers <= 1:
+            for chunk in chunks:
+                yield self._classify_chunk(chunk)
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(self._classify_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
     
-    def process_receita_federal_csv(self, csv_path: str, sample_size: int = 1000):
-        """Processa arquivo CSV da Receita Federal (versão otimizada)"""
+    def process_receita_federal_csv(self, csv_path: str, sample_size: int = 1000,
+                                    column_names: Optional[List[str]] = None):
+        """Processa uma amostra do arquivo CSV da Receita Federal"""
         print(f"Processando arquivo CSV da Receita Federal: {csv_path}")
         
-        # Lê apenas uma amostra do arquivo (muito grande)
+        # Lê apenas uma amostra do arquivo (muito grande); o arquivo inteiro
+        # é processado por classify_receita_federal_csv
         chunk_size = 10000
         green_companies = []
         processed = 0
         
-        for chunk in pd.read_csv(csv_path, chunksize=chunk_size, encoding='latin-1', sep=';'):
-            for _, row in chunk.iterrows():
-                if processed >= sample_size:
-                    break
-                
-                # Extrai CNAEs da linha
-                cnae_principal = row.get('cnae_fiscal_principal')
-                cnaes_secundarios = str(row.get('cnae_fiscal_secundaria', '')).split(',') if pd.notna(row.get('cnae_fiscal_secundaria')) else []
-                
-                all_cnaes = [cnae_principal] + cnaes_secundarios if cnae_principal else cnaes_secundarios
-                all_cnaes = [cnae.strip() for cnae in all_cnaes if cnae and str(cnae).strip()]
-                
-                # Calcula pontuação verde
-                green_score = self.calculate_green_score(all_cnaes)
-                
-                if green_score > 0:
-                    green_company = {
-                        'cnpj': row.get('cnpj'),
-                        'nome': row.get('razao_social'),
-                        'fantasia': row.get('nome_fantasia'),
-                        'green_score': green_score,
-                        'situacao': row.get('situacao_cadastral'),
-                        'municipio': row.get('municipio'),
-                        'uf': row.get('uf'),
-                        'cep': row.get('cep'),
-                        'green_cnaes': [cnae for cnae in all_cnaes if any(cnae.replace('.','').replace('-','') == gc.replace('.','').replace('-','') for gc in self.green_cnaes.keys())]
-                    }
-                    green_companies.append(green_company)
-                    print(f"✅ Empresa verde encontrada: {green_company['nome']} (Score: {green_score})")
-                
-                processed += 1
+        for chunk in self._read_receita_csv(csv_path, chunk_size, column_names):
+            chunk = chunk.iloc[:sample_size - processed]
+            companies = self._classify_chunk(chunk)
+            for company in companies.to_dict('records'):
+                green_companies.append(company)
+                print(f"✅ Empresa verde encontrada: {company['nome']} (Score: {company['green_score']})")
             
+            processed += len(chunk)
             if processed >= sample_size:
                 break
         
         print(f"Processamento concluído. {len(green_companies)} empresas verdes encontradas.")
         return green_companies
+    
+    def classify_receita_federal_csv(self, csv_path: str, output_path: str, workers: Optional[int] = None,
+                                     chunk_size: int = 100000, column_names: Optional[List[str]] = None) -> int:
+        """
+        Classifica o arquivo inteiro da Receita Federal e grava as empresas verdes em Parquet
+        
+        Os blocos são classificados em paralelo (um processo por CPU por padrão)
+        e gravados no arquivo à medida que ficam prontos, sem acumular o
+        resultado em memória.
+        
+        Returns:
+            Número de empresas verdes gravadas
+        """
+        workers = workers or os.cpu_count() or 1
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+        
+        start = time.perf_counter()
+        green_total = 0
+        chunks = self._read_receita_csv(csv_path, chunk_size, column_names)
+        
+        with pq.ParquetWriter(tmp_path, GREEN_COMPANY_SCHEMA) as writer:
+            for number, companies in enumerate(self._classify_chunks(chunks, workers), 1):
+                writer.write_table(pa.Table.from_pandas(companies, schema=GREEN_COMPANY_SCHEMA, preserve_index=False))
+                green_total += len(companies)
+                logger.info("Bloco %d classificado: %d empresas verdes até agora", number, green_total)
+        os.replace(tmp_path, output_path)
+        
+        print(f"Processamento concluído em {time.perf_counter() - start:.1f}s. "
+              f"{green_total} empresas verdes gravadas em {output_path}.")
+        return green_total
 
 def main():
     """Exemplo de uso do processador"""
@@ -0,0 +1,213 @@
+"""
+Green Jobs Brasil - ReceitaWS Enrichment Client
+Async CNPJ lookups shared by the ETL and the API: token-bucket rate limiting,
+pooled connections, exponential backoff and a persistent SQLite cache.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class ReceitaWSError(Exception):
+    """ReceitaWS could not answer after all retries."""
+
+
+class ReceitaWSTimeout(ReceitaWSError):
+    """The last attempt timed out."""
+
+
+def clean_cnpj(cnpj: str) -> str:
+    return ''.join(filter(str.isdigit, str(cnpj)))
+
+
+class TokenBucket:
+    """
+    Allows ``rate`` acquisitions per second with bursts of up to ``capacity``.
+
+    Tokens are reserved before sleeping, so concurrent callers queue up in
+    arrival order without a lock (the event loop runs one coroutine at a time).
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+class CnpjCache:
+    """ReceitaWS payloads keyed by CNPJ in a SQLite table, valid for ``ttl_seconds``."""
+
+    def __init__(self, path: Path, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS receita_ws_cache (
+                cnpj TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, cnpj: str) -> Optional[Dict]:
+        row = self.conn.execute(
+            "SELECT payload FROM receita_ws_cache WHERE cnpj = ? AND fetched_at >= ?",
+            (cnpj, time.time() - self.ttl_seconds)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, cnpj: str, payload: Dict) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO receita_ws_cache (cnpj, payload, fetched_at) VALUES (?, ?, ?)",
+            (cnpj, json.dumps(payload), time.time())
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class ReceitaWSClient:
+    """
+    Looks up CNPJs on ReceitaWS without exceeding its rate limit.
+
+    Every answer, including "CNPJ not found", is cached, so a CNPJ is fetched
+    at most once per TTL; concurrent lookups of the same CNPJ share one request.
+    HTTP calls go through a pooled ``requests.Session`` on worker threads.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, rate_per_minute: Optional[float] = None,
+                 burst: int = 1, max_retries: int = 3, backoff_seconds: float = 1.0,
+                 timeout: float = 10, cache_path: Optional[Path] = None,
+                 cache_ttl_days: Optional[float] = None, max_connections: int = 10):
+        self.base_url = (base_url or config.RECEITA_WS_URL).rstrip("/")
+        self.bucket = TokenBucket((rate_per_minute or config.RECEITA_WS_RATE_PER_MINUTE) / 60, burst)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.cache = CnpjCache(
+            cache_path or config.RECEITA_WS_CACHE_FILE,
+            (cache_ttl_days if cache_ttl_days is not None else config.RECEITA_WS_CACHE_TTL_DAYS) * 86400
+        )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.stats = {'cache_hits': 0, 'requests': 0, 'retries': 0}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def fetch(self, cnpj: str) -> Optional[Dict]:
+        """
+        ReceitaWS payload of a CNPJ, or None when ReceitaWS does not know it.
+
+        Raises:
+            ReceitaWSError: the service kept failing after ``max_retries`` retries
+        """
+        cnpj = clean_cnpj(cnpj)
+        payload = self.cache.get(cnpj)
+        if payload is not None:
+            self.stats['cache_hits'] += 1
+        elif cnpj in self._inflight:
+            self.stats['cache_hits'] += 1
+            payload = await asyncio.shield(self._inflight[cnpj])
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[cnpj] = future
+            try:
+                payload = await self._request(cnpj)
+                self.cache.put(cnpj, payload)
+                future.set_result(payload)
+            except Exception as e:
+                future.set_exception(e)
+                # Mark the exception as retrieved when nobody else is waiting
+                future.exception()
+                raise
+            finally:
+                del self._inflight[cnpj]
+
+        return payload if payload.get('status') == 'OK' else None
+
+    async def fetch_many(self, cnpjs: Iterable[str], concurrency: int = 10) -> Dict[str, Optional[Dict]]:
+        """
+        Look up several CNPJs concurrently (still bounded by the rate limit).
+
+        Returns:
+            Payload (or None when not found or unavailable) per cleaned CNPJ
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(cnpj: str) -> Optional[Dict]:
+            async with semaphore:
+                try:
+                    return await self.fetch(cnpj)
+                except ReceitaWSError as e:
+                    logger.warning(f"ReceitaWS lookup failed for {cnpj}: {e}")
+                    return None
+
+        unique = list(dict.fromkeys(clean_cnpj(cnpj) for cnpj in cnpjs))
+        results = await asyncio.gather(*(one(cnpj) for cnpj in unique))
+        return dict(zip(unique, results))
+
+    async def _request(self, cnpj: str) -> Dict:
+        url = f"{self.base_url}/{cnpj}"
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats['retries'] += 1
+            await self.bucket.acquire()
+            self.stats['requests'] += 1
+            delay = self.backoff_seconds * 2 ** attempt
+            try:
+                response = await asyncio.to_thread(self.session.get, url, timeout=self.timeout)
+            except requests.exceptions.Timeout as e:
+                error = ReceitaWSTimeout(f"Timeout fetching {cnpj}: {e}")
+            except requests.exceptions.RequestException as e:
+                error = ReceitaWSError(f"Error fetching {cnpj}: {e}")
+            else:
+                if response.status_code == 200:
+                    try:
+                        return response.json()
+                    except ValueError as e:
+                        # Truncated bodies and HTML error pages are transient: retry them
+                        error = ReceitaWSError(f"Invalid JSON from ReceitaWS for {cnpj}: {e}")
+                elif response.status_code == 404:
+                    return {'status': 'ERROR', 'message': 'CNPJ não encontrado'}
+                elif response.status_code not in RETRY_STATUS:
+                    raise ReceitaWSError(f"ReceitaWS returned {response.status_code} for {cnpj}")
+                else:
+                    error = ReceitaWSError(f"ReceitaWS returned {response.status_code} for {cnpj}")
+                    retry_after = response.headers.get("Retry-After", "")
+                    if retry_after.isdigit():
+                        delay = max(delay, float(retry_after))
+
+            if attempt == self.max_retries:
+                raise error
+            logger.debug(f"Retrying {cnpj} in {delay:.1f}s ({error})")
+            await asyncio.sleep(delay)
+
+    def close(self) -> None:
+        self.session.close()
+        self.cache.close()
@@ -0,0 +1,89 @@
+"""
+Green Jobs Brasil - RFB Archive Reader
+Streams the CSV members of the RFB zip archives as Arrow record batches,
+and reads extracted RFB files with the same layout.
+"""
+
+import zipfile
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# RFB open data layout: latin-1, ';'-separated, quoted, no header row
+RFB_ENCODING = "latin-1"
+RFB_DELIMITER = ";"
+BLOCK_SIZE = 16 << 20
+
+
+def zip_members(zip_path: Path) -> List[str]:
+    """Names of the data files inside an RFB archive."""
+    with zipfile.ZipFile(zip_path) as archive:
+        return [info.filename for info in archive.infolist() if not info.is_dir()]
+
+
+def open_zip_csv(zip_path: Path, column_names: List[str]) -> pa.RecordBatchReader:
+    """
+    Open every member of an RFB zip archive as one stream of record batches.
+
+    Members are decompressed on the fly while the CSV reader pulls blocks,
+    so nothing is extracted to disk. All columns are read as strings and
+    empty fields as nulls; typing is left to ``typed_select``.
+    """
+    schema = pa.schema([(name, pa.string()) for name in column_names])
+    return pa.RecordBatchReader.from_batches(schema, _read_members(zip_path, column_names))
+
+
+def _read_members(zip_path: Path, column_names: List[str]) -> Iterator[pa.RecordBatch]:
+    read_options = pacsv.ReadOptions(
+        column_names=column_names, encoding=RFB_ENCODING, block_size=BLOCK_SIZE
+    )
+    parse_options = pacsv.ParseOptions(delimiter=RFB_DELIMITER)
+    convert_options = pacsv.ConvertOptions(
+        column_types={name: pa.string() for name in column_names},
+        strings_can_be_null=True
+    )
+
+    with zipfile.ZipFile(zip_path) as archive:
+        for member in zip_members(zip_path):
+            with archive.open(member) as stream:
+                reader = pacsv.open_csv(
+                    stream, read_options=read_options,
+                    parse_options=parse_options, convert_options=convert_options
+                )
+                yield from reader
+
+
+def read_csv_extracted(file_path: Path, column_names: List[str]) -> str:
+    """
+    DuckDB read_csv expression for an RFB file already extracted from its zip.
+
+    Parsed like the zip members: no header, latin-1, ';', every column as a
+    string (quoted empty fields become nulls), typed by ``typed_select``.
+    """
+    names = ", ".join(f"'{name}'" for name in column_names)
+    return (
+        f"read_csv('{file_path}', header=false, delim='{RFB_DELIMITER}', quote='\"', "
+        f"encoding='{RFB_ENCODING}', all_varchar=true, names=[{names}])"
+    )
+
+
+def typed_select(relation: str, columns: List[Tuple[str, str]]) -> str:
+    """
+    SELECT casting the raw RFB strings to the DuckDB table column types.
+
+    RFB dates are YYYYMMDD with 00000000 for "no date", and decimals use a
+    comma, so both are converted leniently (invalid values become NULL).
+    """
+    expressions = []
+    for name, column_type in columns:
+        if column_type == "DATE":
+            expressions.append(f"CAST(try_strptime({name}, '%Y%m%d') AS DATE) as {name}")
+        elif column_type.startswith("DECIMAL"):
+            expressions.append(f"TRY_CAST(replace({name}, ',', '.') AS {column_type}) as {name}")
+        elif column_type != "VARCHAR":
+            expressions.append(f"TRY_CAST({name} AS {column_type}) as {name}")
+        else:
+            expressions.append(name)
+    return f"(SELECT {', '.join(expressions)} FROM {relation})"
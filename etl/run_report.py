@@ -0,0 +1,235 @@
+"""
+Green Jobs Brasil - ETL Run Report
+Per-stage wall/CPU time, rows, bytes and peak memory, saved as JSON after every run.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+REPORT_FILE = "run_report.json"
+PREVIOUS_REPORT_FILE = "run_report.previous.json"
+
+# Interval of the RSS samples taken while a stage runs
+RSS_SAMPLE_SECONDS = 0.05
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size over the whole process lifetime (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of the process right now (psutil, or /proc on Linux; None where unavailable)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class RssSampler:
+    """
+    Peak RSS of a block of work.
+
+    ru_maxrss only ever grows over the process lifetime, so every stage after
+    the most expensive one would report that stage's peak. Instead the current
+    RSS is sampled when the block starts and ends and every
+    ``RSS_SAMPLE_SECONDS`` from a background thread in between.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.peak: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "RssSampler":
+        self._sample()
+        if self.peak is not None:
+            self._thread = threading.Thread(target=self._run, name="gjb-rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+
+    @property
+    def peak_mb(self) -> Optional[float]:
+        return round(self.peak / (1024 * 1024), 1) if self.peak is not None else None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        rss = current_rss_bytes()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+
+def directory_size(path: Path) -> int:
+    """Total size in bytes of the files under ``path``."""
+    if not path.exists():
+        return 0
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+class StageMetrics:
+    """Counters filled in by a stage while it runs."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows_in: Optional[int] = None
+        self.rows_out: Optional[int] = None
+        self.bytes_read: Optional[int] = None
+        self.bytes_written: Optional[int] = None
+        self.skipped = False
+
+
+class RunReport:
+    """Collects stage metrics and DuckDB query profiles for one pipeline run."""
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.status = "running"
+        self.stages: List[Dict] = []
+        self.query_profiles: Dict[str, Dict] = {}
+        self.details: Dict = {}
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """Measure wall time, CPU time and peak RSS of a block of work."""
+        metrics = StageMetrics(name)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        status = "failed"
+        sampler = RssSampler()
+        try:
+            with sampler:
+                yield metrics
+            status = "skipped" if metrics.skipped else "success"
+        finally:
+            wall = time.perf_counter() - wall_start
+            rows = max(metrics.rows_in or 0, metrics.rows_out or 0)
+            self.stages.append({
+                'name': name,
+                'status': status,
+                'wall_seconds': round(wall, 3),
+                'cpu_seconds': round(time.process_time() - cpu_start, 3),
+                'rows_in': metrics.rows_in,
+                'rows_out': metrics.rows_out,
+                'rows_per_second': round(rows / wall) if wall > 0 and not metrics.skipped else None,
+                'bytes_read': metrics.bytes_read,
+                'bytes_written': metrics.bytes_written,
+                'peak_rss_mb': sampler.peak_mb,
+            })
+
+    def add_profile(self, name: str, profile: Dict) -> None:
+        """Attach a DuckDB JSON query profile."""
+        self.query_profiles[name] = profile
+
+    def finish(self, status: str) -> None:
+        self.status = status
+        self.finished_at = datetime.now()
+
+    def to_dict(self) -> Dict:
+        return {
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'status': self.status,
+            'wall_seconds': round(time.perf_counter() - self._wall_start, 3),
+            'cpu_seconds': round(time.process_time() - self._cpu_start, 3),
+            'peak_rss_mb': peak_rss_mb(),
+            **self.details,
+            'stages': self.stages,
+            'query_profiles': self.query_profiles,
+        }
+
+    def write(self, directory: Path) -> Path:
+        """
+        Write the report as ``run_report.json`` in ``directory``.
+
+        The report of the previous run is kept as ``run_report.previous.json``.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / REPORT_FILE
+        if path.exists():
+            os.replace(path, directory / PREVIOUS_REPORT_FILE)
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        os.replace(tmp_path, path)
+        return path
+
+
+def load_report(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _change(previous, current) -> str:
+    if not previous or current is None:
+        return ""
+    return f"{(current - previous) / previous * 100:+.1f}%"
+
+
+def compare_reports(previous: Dict, current: Dict) -> str:
+    """Text table comparing wall time, CPU time, rows and peak RSS stage by stage."""
+    lines = [
+        f"Run {current['started_at']} vs {previous['started_at']}",
+        f"{'stage':<26}{'wall s':>10}{'prev':>10}{'diff':>9}"
+        f"{'cpu s':>10}{'rows out':>12}{'prev':>12}{'rss MB':>9}{'prev':>9}",
+    ]
+    previous_stages = {stage['name']: stage for stage in previous.get('stages', [])}
+    rows = current.get('stages', []) + [{'name': 'total', **{
+        key: current.get(key) for key in ('wall_seconds', 'cpu_seconds', 'peak_rss_mb')
+    }}]
+    previous_stages['total'] = {key: previous.get(key) for key in ('wall_seconds', 'cpu_seconds', 'peak_rss_mb')}
+
+    def fmt(value, width):
+        return f"{'-' if value is None else value:>{width}}"
+
+    for stage in rows:
+        before = previous_stages.get(stage['name'], {})
+        lines.append(
+            f"{stage['name']:<26}"
+            f"{fmt(stage.get('wall_seconds'), 10)}{fmt(before.get('wall_seconds'), 10)}"
+            f"{_change(before.get('wall_seconds'), stage.get('wall_seconds')):>9}"
+            f"{fmt(stage.get('cpu_seconds'), 10)}"
+            f"{fmt(stage.get('rows_out'), 12)}{fmt(before.get('rows_out'), 12)}"
+            f"{fmt(stage.get('peak_rss_mb'), 9)}{fmt(before.get('peak_rss_mb'), 9)}"
+        )
+    return "\n".join(lines)
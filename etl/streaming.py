@@ -0,0 +1,155 @@
+"""
+Green Jobs Brasil - ETL Streaming Helpers
+Building blocks for processing the green companies result in bounded-size batches.
+"""
+
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from parquet_dataset import DEFAULT_ROW_GROUP_SIZE, writer_options
+
+HIVE_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+class StageThroughput:
+    """Accumulates processed rows and wall-clock time per pipeline stage."""
+
+    def __init__(self):
+        self.rows: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str, rows: int) -> Iterator[None]:
+        """Time a block of work and attribute ``rows`` to the given stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, rows, time.perf_counter() - start)
+
+    def record(self, name: str, rows: int, seconds: float) -> None:
+        """Add an already measured amount of work to a stage."""
+        self.rows[name] = self.rows.get(name, 0) + rows
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def rows_per_second(self, name: str) -> float:
+        """Average throughput of a stage (0 when nothing was recorded)."""
+        seconds = self.seconds.get(name, 0.0)
+        return self.rows.get(name, 0) / seconds if seconds > 0 else 0.0
+
+    def log_summary(self, logger: logging.Logger) -> None:
+        """Log rows, elapsed time and rows/s for every recorded stage."""
+        for name in self.rows:
+            logger.info(
+                f"Stage {name}: {self.rows[name]} rows in {self.seconds[name]:.2f}s "
+                f"({self.rows_per_second(name):,.0f} rows/s)"
+            )
+
+
+class PartitionedParquetSink:
+    """
+    Writes Arrow tables into a hive-partitioned Parquet dataset.
+
+    One ParquetWriter is kept open per partition value, so every batch is
+    appended to the same file instead of producing one file per batch. Rows
+    are buffered per partition into row groups of ``row_group_size`` rows.
+    Files are written under a temporary name and renamed when the sink
+    closes without error; ``files`` then lists them for the manifest.
+    """
+
+    def __init__(self, root_path: Path, partition_col: str = "uf",
+                 compression: str = "snappy", basename: Optional[str] = None,
+                 row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 sorted_by: Optional[Sequence[Tuple[str, str]]] = None):
+        self.root_path = Path(root_path)
+        self.partition_col = partition_col
+        self.compression = compression
+        self.basename = basename or f"part-{uuid.uuid4().hex}.parquet"
+        self.row_group_size = row_group_size
+        self.sorted_by = sorted_by
+        self.files: Dict[str, List[Path]] = {}
+        self._writers: Dict[str, pq.ParquetWriter] = {}
+        self._buffers: Dict[str, List[pa.Table]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, table: pa.Table) -> None:
+        """Split a table by partition value and append each slice to its file."""
+        column = table[self.partition_col]
+        data = table.remove_column(table.schema.get_field_index(self.partition_col))
+
+        for value in pc.unique(column).to_pylist():
+            if value is None:
+                mask = pc.is_null(column)
+            else:
+                mask = pc.equal(column, value)
+            key = HIVE_DEFAULT_PARTITION if value is None else str(value)
+            buffer = self._buffers.setdefault(key, [])
+            buffer.append(data.filter(mask))
+            if sum(part.num_rows for part in buffer) >= self.row_group_size:
+                self._flush(key, final=False)
+
+    def close(self) -> None:
+        """Write the buffered rows, close every partition writer and publish its file."""
+        for key in list(self._buffers):
+            self._flush(key, final=True)
+        for key, writer in self._writers.items():
+            writer.close()
+            path = self._path_for(key)
+            os.replace(self._tmp_path(path), path)
+            self.files[f"{self.partition_col}={key}"] = [path]
+        self._writers.clear()
+
+    def abort(self) -> None:
+        """Discard everything written so far."""
+        for key, writer in self._writers.items():
+            writer.close()
+            self._tmp_path(self._path_for(key)).unlink(missing_ok=True)
+        self._writers.clear()
+        self._buffers.clear()
+
+    @property
+    def partitions(self) -> int:
+        return len(self._writers) or len(self.files)
+
+    def _flush(self, key: str, final: bool) -> None:
+        buffer = self._buffers.pop(key)
+        table = pa.concat_tables(buffer)
+        full = table.num_rows if final else table.num_rows - table.num_rows % self.row_group_size
+        if full:
+            self._writer_for(key, table.schema).write_table(table.slice(0, full), row_group_size=self.row_group_size)
+        if full < table.num_rows:
+            self._buffers[key] = [table.slice(full)]
+
+    def _path_for(self, key: str) -> Path:
+        return self.root_path / f"{self.partition_col}={key}" / self.basename
+
+    @staticmethod
+    def _tmp_path(path: Path) -> Path:
+        return path.with_name(f"{path.name}.tmp")
+
+    def _writer_for(self, key: str, schema: pa.Schema) -> pq.ParquetWriter:
+        if key not in self._writers:
+            path = self._path_for(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._writers[key] = pq.ParquetWriter(
+                str(self._tmp_path(path)), schema, compression=self.compression,
+                **writer_options(schema, self.row_group_size, self.sorted_by)
+            )
+        return self._writers[key]
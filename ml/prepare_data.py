@@ -9,7 +9,13 @@ import pandas as pd
 import numpy as np
 import json
 from datetime import datetime
+from pathlib import Path
 import re
+import sys
+
+# Mesma normalização de habilidades da API (features de treino = features servidas)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from api.services.habilidades import vocabulario
 
 def extrair_dados_ml():
     """Extrair e processar dados das candidaturas para ML"""
@@ -193,13 +199,13 @@ def calcular_skills_overlap(row):
         if not prof_skills or not vaga_skills:
             return 0
         
-        prof_set = set([s.lower() for s in prof_skills])
-        vaga_set = set([s.lower() for s in vaga_skills])
+        prof_set = vocabulario.ids(prof_skills)
+        vaga_set = vocabulario.ids(vaga_skills)
         
         if len(vaga_set) == 0:
             return 0
         
-        return len(prof_set.intersection(vaga_set)) / len(vaga_set)
+        return len(prof_set & vaga_set) / len(vaga_set)
     except:
         return 0
 
@@ -0,0 +1,43 @@
+"""
+Script para (re)calcular a tabela match_scores (migration 007): top-K de cada
+vaga e de cada profissional ativo. Rodar depois da migration, ao trocar
+MATCH_SCORES_TOP_K ou o modelo de score; no dia a dia o worker da API mantém
+a tabela pela fila de pendentes.
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from api.services.match_scores import TOP_K, reconstruir_match_scores  # noqa: E402
+
+
+def main():
+    db_path = Path(sys.argv[1]) if len(sys.argv) > 1 else PROJECT_ROOT / "gjb_dev.db"
+
+    print("🚀 Green Jobs Brasil - Scores de Matching")
+    print("=" * 50)
+    print(f"📂 Banco de dados: {db_path}")
+    print(f"🔢 Top-K por vaga/profissional: {TOP_K}")
+
+    if not db_path.exists():
+        print(f"❌ Banco de dados não encontrado: {db_path}")
+        return 1
+
+    conn = sqlite3.connect(db_path)
+    try:
+        contagem = reconstruir_match_scores(conn)
+    finally:
+        conn.close()
+
+    for tabela, total in contagem.items():
+        print(f"  - {tabela}: {total}")
+    print("\n✅ Scores calculados!")
+    print("=" * 50)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
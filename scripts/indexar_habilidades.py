@@ -0,0 +1,41 @@
+"""
+Script para (re)montar o dicionário de habilidades e as junções com
+profissionais e vagas (migration 005) a partir das colunas JSON.
+Rodar depois da migration e de cargas feitas direto no banco.
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from api.services.habilidades import reconstruir_habilidades  # noqa: E402
+
+
+def main():
+    db_path = Path(sys.argv[1]) if len(sys.argv) > 1 else PROJECT_ROOT / "gjb_dev.db"
+
+    print("🚀 Green Jobs Brasil - Índice de Habilidades")
+    print("=" * 50)
+    print(f"📂 Banco de dados: {db_path}")
+
+    if not db_path.exists():
+        print(f"❌ Banco de dados não encontrado: {db_path}")
+        return 1
+
+    conn = sqlite3.connect(db_path)
+    try:
+        contagem = reconstruir_habilidades(conn)
+    finally:
+        conn.close()
+
+    for tabela, total in contagem.items():
+        print(f"  - {tabela}: {total}")
+    print("\n✅ Habilidades indexadas!")
+    print("=" * 50)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
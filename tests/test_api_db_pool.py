@@ -0,0 +1,151 @@
+"""
+Pool de conexões da API (api/db.py) sobre SQLite
+"""
+import asyncio
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from api import db  # noqa: E402
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    caminho = tmp_path / "gjb.db"
+    conn = sqlite3.connect(caminho)
+    conn.execute("CREATE TABLE vagas_esg (id INTEGER PRIMARY KEY, titulo TEXT)")
+    conn.execute("INSERT INTO vagas_esg VALUES (1, 'Analista ESG')")
+    conn.commit()
+    conn.close()
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{caminho}")
+    yield caminho
+    for modo in (False, True):
+        pool = db._pools.pop((f"sqlite:///{caminho}", modo), None)
+        if pool is not None:
+            pool.close()
+
+
+def test_conexao_reaproveitada_e_estado_restaurado(banco):
+    conn = db.get_db()
+    conn.row_factory = lambda cursor, row: {"titulo": row[1]}
+    assert conn.execute("SELECT * FROM vagas_esg").fetchone() == {"titulo": "Analista ESG"}
+    # Escrita sem commit é desfeita na devolução
+    conn.execute("INSERT INTO vagas_esg VALUES (2, 'Engenheira Ambiental')")
+    conn.close()
+    conn.close()
+
+    conn = db.get_db()
+    linha = conn.execute("SELECT COUNT(*) AS total FROM vagas_esg").fetchone()
+    assert isinstance(linha, sqlite3.Row) and linha["total"] == 1
+    conn.close()
+
+    stats = db.pool_stats()
+    assert stats["checkouts"] == 2 and stats["created"] == 1
+    assert stats["size"] == 1 and stats["in_use"] == 0
+
+
+def test_pool_limitado_espera_e_expira(banco):
+    pool = db.ConnectionPool(lambda: sqlite3.connect(banco, check_same_thread=False), max_size=2, timeout=0.2)
+    a, b = pool.acquire(), pool.acquire()
+    with pytest.raises(db.PoolTimeout):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+
+    # Quem espera recebe a conexão assim que outra é devolvida
+    threading.Timer(0.05, b.close).start()
+    inicio = time.monotonic()
+    c = pool.acquire()
+    assert time.monotonic() - inicio < 0.2
+    assert pool.stats()["size"] == 2
+
+    # Conexão esquecida sem close() volta ao pool quando é coletada
+    del a
+    d = pool.acquire()
+    c.close()
+    d.close()
+    assert pool.stats()["in_use"] == 0
+    pool.close()
+
+
+def test_conexao_quebrada_e_substituida(banco):
+    pool = db.ConnectionPool(lambda: sqlite3.connect(banco, check_same_thread=False),
+                             max_size=1, health_check_seconds=0)
+    conn = pool.acquire()
+    quebrada = conn._raw
+    conn.close()
+    quebrada.close()
+
+    conn = pool.acquire()
+    assert conn._raw is not quebrada
+    assert conn.execute("SELECT titulo FROM vagas_esg").fetchone()[0] == "Analista ESG"
+    conn.close()
+    assert pool.stats()["health_check_failures"] == 1 and pool.stats()["size"] == 1
+    pool.close()
+
+
+def test_dependencia_por_requisicao(banco):
+    dependencia = db.db_connection()
+    conn = next(dependencia)
+    assert db.pool_stats()["in_use"] == 1
+    with pytest.raises(StopIteration):
+        next(dependencia)
+    assert db.pool_stats()["in_use"] == 0
+    with pytest.raises(RuntimeError):
+        conn.cursor()
+
+
+def test_db_thread_nao_bloqueia_o_event_loop(banco):
+    @db.db_thread
+    def consulta_lenta(atraso):
+        conn = db.get_db()
+        try:
+            time.sleep(atraso)
+            return conn.execute("SELECT titulo FROM vagas_esg").fetchone()["titulo"], threading.current_thread().name
+        finally:
+            conn.close()
+
+    async def cenario():
+        tarefa = asyncio.create_task(consulta_lenta(0.3))
+        inicio = time.monotonic()
+        await asyncio.sleep(0.01)
+        # O loop segue atendendo enquanto a consulta roda no executor
+        assert time.monotonic() - inicio < 0.1
+        return await tarefa
+
+    titulo, thread = asyncio.run(cenario())
+    assert titulo == "Analista ESG" and thread.startswith("gjb-db")
+    assert consulta_lenta.sync(0)[0] == "Analista ESG"
+
+
+def test_perfil_sqlite_e_leitura_durante_escrita(banco):
+    escrita = db.get_db()
+    pragmas = {nome: escrita.execute(f"PRAGMA {nome}").fetchone()[0]
+               for nome in ("journal_mode", "synchronous", "temp_store", "busy_timeout", "cache_size")}
+    assert pragmas == {"journal_mode": "wal", "synchronous": 1, "temp_store": 2,
+                       "busy_timeout": db.SQLITE_BUSY_TIMEOUT_MS, "cache_size": -db.SQLITE_CACHE_SIZE_KB}
+
+    # Escrita em andamento (sem commit) não bloqueia os leitores, que veem o último commit
+    escrita.execute("UPDATE vagas_esg SET titulo = 'Gestor de Carbono' WHERE id = 1")
+    leituras = [db.get_db(readonly=True) for _ in range(3)]
+    assert all(conn.execute("SELECT titulo FROM vagas_esg").fetchone()[0] == "Analista ESG" for conn in leituras)
+    escrita.commit()
+    assert leituras[0].execute("SELECT titulo FROM vagas_esg").fetchone()[0] == "Gestor de Carbono"
+
+    # Conexões de leitura recusam escrita
+    with pytest.raises(sqlite3.OperationalError):
+        leituras[1].execute("DELETE FROM vagas_esg")
+    for conn in leituras:
+        conn.close()
+    escrita.close()
+
+    assert db.pool_stats()["max_size"] == db.SQLITE_WRITER_POOL_SIZE
+    assert db.pool_stats(readonly=True)["size"] == 3
@@ -0,0 +1,135 @@
+"""
+Vocabulário de habilidades, junções (migration 005) e índice invertido em memória
+"""
+import json
+import random
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+fastapi = pytest.importorskip("fastapi")
+pytest.importorskip("psycopg2")
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "api"))
+
+from api.services.habilidades import (  # noqa: E402
+    IndiceHabilidades, Vocabulario, habilidades_do_campo, obter_indice, reconstruir_habilidades,
+    sincronizar_habilidades,
+)
+from routers import vagas  # noqa: E402
+
+MIGRATIONS = ROOT_DIR / "db" / "migrations"
+SKILLS = ["ISO 14001", "GRI", "Gestão de Resíduos", "ÉTICA", "LCA", "Energia Solar", "Compliance"]
+
+
+def variar(skill, rng):
+    return rng.choice([skill, skill.lower(), f"  {skill.upper()} "])
+
+
+def campo(rng):
+    if rng.random() < 0.1:
+        return rng.choice([None, "", "não é json", '"ISO 14001"', '[1, "GRI"]'])
+    return json.dumps([variar(s, rng) for s in rng.sample(SKILLS, rng.randint(0, 4))], ensure_ascii=False)
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    caminho = tmp_path / "gjb.db"
+    rng = random.Random(23)
+    conn = sqlite3.connect(caminho)
+    conn.executescript((ROOT_DIR / "db" / "schema_sqlite.sql").read_text(encoding="utf-8"))
+    conn.executescript((MIGRATIONS / "001_create_vagas_esg.sql").read_text(encoding="utf-8"))
+    conn.execute("CREATE TABLE profissionais_esg (id INTEGER PRIMARY KEY, habilidades_esg TEXT)")
+    conn.executemany("INSERT INTO vagas_esg (cnpj, titulo, habilidades_requeridas) VALUES ('00000000000191', 'Vaga', ?)",
+                     [(campo(rng),) for _ in range(120)])
+    conn.executemany("INSERT INTO profissionais_esg (habilidades_esg) VALUES (?)", [(campo(rng),) for _ in range(300)])
+    conn.executescript((MIGRATIONS / "005_create_habilidades.sql").read_text(encoding="utf-8"))
+    reconstruir_habilidades(conn)
+    conn.close()
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{caminho}")
+    yield caminho
+    for modo in (False, True):
+        pool = sys.modules["db"]._pools.pop((f"sqlite:///{caminho}", modo), None)
+        if pool is not None:
+            pool.close()
+
+
+def test_vocabulario_normaliza_uma_vez_por_texto():
+    vocabulario = Vocabulario()
+    assert vocabulario.ids(["ISO 14001", " iso 14001 ", "ISO 14001", "GRI"]) == {0, 1}
+    assert vocabulario.id("GESTÃO") == vocabulario.id("gestão ")
+    assert len(vocabulario) == 3
+    with pytest.raises(AttributeError):
+        vocabulario.ids(["GRI", 7])
+    assert habilidades_do_campo('[" GRI ", "gri", 7, ""]') == {"gri"}
+    assert habilidades_do_campo('"GRI"') == habilidades_do_campo("não é json") == set()
+
+
+def test_indice_invertido_igual_a_varredura_do_json(banco):
+    conn = sqlite3.connect(banco)
+    indice = IndiceHabilidades.carregar(conn)
+    profissionais = {id_: habilidades_do_campo(h) for id_, h in conn.execute("SELECT id, habilidades_esg FROM profissionais_esg")}
+    vagas_db = {id_: habilidades_do_campo(h) for id_, h in conn.execute("SELECT id, habilidades_requeridas FROM vagas_esg")}
+
+    assert set(indice.ids) == set().union(*profissionais.values(), *vagas_db.values())
+    for skill in SKILLS:
+        nome = skill.lower()
+        assert indice.com_habilidade("profissional", f" {skill.upper()}").tolist() == sorted(
+            id_ for id_, nomes in profissionais.items() if nome in nomes)
+        assert indice.com_habilidade("vaga", skill).tolist() == sorted(
+            id_ for id_, nomes in vagas_db.items() if nome in nomes)
+    assert len(indice.com_habilidade("vaga", "não existe")) == 0
+
+    # Sobreposição de cada profissional com as habilidades de uma vaga
+    for nomes_vaga in list(vagas_db.values())[:20]:
+        ids, contagem = indice.contar("profissional", sorted(nomes_vaga))
+        esperado = {id_: len(nomes & nomes_vaga) for id_, nomes in profissionais.items() if nomes & nomes_vaga}
+        assert dict(zip(ids.tolist(), contagem.tolist())) == esperado
+
+    plano = " ".join(row[-1] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT profissional_id FROM profissional_habilidades WHERE habilidade_id = 1"))
+    assert "idx_profissional_habilidades_habilidade" in plano
+    conn.close()
+
+
+def test_escrita_mantem_juncoes_e_recarrega_indice(banco):
+    conn = sqlite3.connect(banco)
+    antes = obter_indice(conn)
+    assert obter_indice(conn) is antes
+
+    sincronizar_habilidades(conn.cursor(), "profissional", 1, ["Hidrogênio Verde", " GRI "])
+    conn.commit()
+    depois = obter_indice(conn)
+    assert depois is not antes and depois.versao == antes.versao + 1
+    assert 1 in depois.com_habilidade("profissional", "HIDROGÊNIO VERDE").tolist()
+    assert 1 in depois.com_habilidade("profissional", "gri").tolist()
+
+    # PUT da vaga regrava a junção junto com o JSON
+    vagas.atualizar_vaga.sync(5, vagas.VagaUpdate(habilidades_requeridas=["Taxonomia Verde", "LCA"]))
+    assert obter_indice(conn).habilidade_ids('["lca", "TAXONOMIA VERDE"]').tolist() == sorted(
+        id_ for (id_,) in conn.execute("SELECT habilidade_id FROM vaga_habilidades WHERE vaga_id = 5"))
+    assert obter_indice(conn).com_habilidade("vaga", "taxonomia verde").tolist() == [5]
+    conn.close()
+
+
+def test_escrita_recusada_devolve_a_conexao_de_escrita(banco):
+    """404/400 nas rotas de escrita devolvem a única conexão de escrita ao pool"""
+    db = sys.modules["db"]
+    nova = vagas.VagaCreate(cnpj="99999999999999", titulo="Analista ESG", descricao="Descrição com mais de vinte letras",
+                            nivel_experiencia="pleno", tipo_contratacao="CLT", publicada_por="rh@empresa.com")
+    for rota, argumentos, status in (
+        (vagas.criar_vaga, (nova,), 404),
+        (vagas.atualizar_vaga, (1, vagas.VagaUpdate()), 400),
+        (vagas.atualizar_vaga, (99999, vagas.VagaUpdate(titulo="Outra vaga")), 404),
+        (vagas.deletar_vaga, (99999,), 404),
+    ):
+        with pytest.raises(fastapi.HTTPException) as erro:
+            rota.sync(*argumentos)
+        assert erro.value.status_code == status
+        assert db.pool_stats()["in_use"] == 0
@@ -0,0 +1,160 @@
+"""
+Paridade do motor de matching em lote (NumPy) com MatchCalculator.calcular_match
+"""
+import json
+import random
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from api.services.match_batch import (  # noqa: E402
+    COMPONENTES, ProfissionaisBlock, VagasBlock, pontuar_profissionais, pontuar_vagas, selecionar,
+)
+from api.services.match_calculator import MatchCalculator  # noqa: E402
+
+SKILLS = ["ISO 14001", "GRI", "Carbon Footprint", "ESG Reporting", "LCA", "Energia Solar", "Compliance"]
+NIVEIS = ["estagio", "junior", "pleno", "senior", "especialista", "gerencial", "Senior", "", None, "diretor"]
+UFS = ["SP", "sp", "RJ", "MG", ""]
+CIDADES = ["São Paulo", "são paulo", "Campinas", "Rio de Janeiro", ""]
+SALARIOS = [None, 0, 3000, 4500, 5000, 6000.5, 8000, 12000, 20000]
+
+
+def variar(skill, rng):
+    return rng.choice([skill, skill.lower(), f"  {skill.upper()} "])
+
+
+def ods(rng, json_texto):
+    valores = rng.sample(range(1, 18), rng.randint(0, 4))
+    if valores and rng.random() < 0.1:
+        valores.append(valores[0])  # repetido conta no denominador da vaga
+    return json.dumps(valores) if json_texto else valores
+
+
+def gerar_vaga(rng, i):
+    minimo = rng.choice(SALARIOS)
+    return {
+        "id": i,
+        "ods_tags": ods(rng, rng.random() < 0.5),
+        "habilidades_requeridas": json.dumps([variar(s, rng) for s in rng.sample(SKILLS, rng.randint(0, 4))]),
+        "nivel_experiencia": rng.choice(NIVEIS),
+        "localizacao_uf": rng.choice(UFS),
+        "localizacao_cidade": rng.choice(CIDADES),
+        "remoto": rng.choice([0, 1, True, False]),
+        "salario_min": minimo,
+        "salario_max": (minimo or 0) + rng.choice([0, 1000, 2500, 7000]) if rng.random() < 0.9 else None,
+    }
+
+
+def gerar_profissional(rng, i):
+    minimo = rng.choice(SALARIOS)
+    experiencia = {str(o): rng.choice([0, 1, 2.5]) for o in rng.sample(range(1, 18), rng.randint(0, 3))}
+    return {
+        "id": i,
+        "ods_interesse": ods(rng, rng.random() < 0.5),
+        "ods_experiencia": json.dumps(experiencia) if rng.random() < 0.7 else None,
+        "habilidades_esg": [variar(s, rng) for s in rng.sample(SKILLS, rng.randint(0, 5))],
+        "nivel_desejado": rng.choice(NIVEIS),
+        "anos_experiencia_esg": rng.choice([None, 0, 1, 2, 2.1, 3, 3.5, 5, 7, 12]),
+        "localizacao_uf": rng.choice(UFS),
+        "localizacao_cidade": rng.choice(CIDADES),
+        "aceita_remoto": rng.choice([0, 1]),
+        "disponivel_mudanca": rng.choice([0, 1, None]),
+        "pretensao_salarial_min": minimo,
+        "pretensao_salarial_max": (minimo or 0) + rng.choice([0, 500, 3000]),
+    }
+
+
+@pytest.fixture(scope="module")
+def dados():
+    rng = random.Random(21)
+    vagas = [gerar_vaga(rng, i) for i in range(60)]
+    profissionais = [gerar_profissional(rng, i) for i in range(400)]
+    # Linhas fora do formato esperado seguem pelo cálculo escalar
+    profissionais[3]["ods_interesse"] = ["7", 13]
+    profissionais[5].update(pretensao_salarial_min=Decimal("4000"), pretensao_salarial_max=None)
+    profissionais[8]["anos_experiencia_esg"] = Decimal("2.1")
+    profissionais[13].update(localizacao_uf="", localizacao_cidade=None)
+    profissionais[21]["ods_experiencia"] = {"x": 0, "7": 2}
+    profissionais[34]["habilidades_esg"] = "não é json"
+    vagas[4]["ods_tags"] = [7, 99]
+    vagas[6]["habilidades_requeridas"] = []
+    return vagas, profissionais
+
+
+def scores_escalares(calc, vaga, prof):
+    return [
+        calc._calcular_ods_match(vaga, prof), calc._calcular_skills_match(vaga, prof),
+        calc._calcular_experiencia_match(vaga, prof), calc._calcular_localizacao_match(vaga, prof),
+        calc._calcular_salario_match(vaga, prof),
+    ]
+
+
+def test_componentes_identicos_nas_duas_direcoes(dados):
+    vagas, profissionais = dados
+    calc = MatchCalculator()
+    bloco_profs = ProfissionaisBlock(profissionais)
+    bloco_vagas = VagasBlock(vagas)
+
+    for vaga in vagas:
+        lote = pontuar_profissionais(vaga, bloco_profs)
+        for j, prof in enumerate(profissionais):
+            esperado = scores_escalares(calc, vaga, prof)
+            assert [lote[nome][j] for nome in COMPONENTES] == esperado, (vaga["id"], prof["id"])
+            # Mesmos bits do score ponderado antes do arredondamento
+            assert lote["total"][j] == sum(
+                (score * calc.PESOS[nome] for score, nome in zip(esperado[1:], COMPONENTES[1:])),
+                esperado[0] * calc.PESOS["ods"]
+            )
+
+    for prof in profissionais[:80]:
+        lote = pontuar_vagas(prof, bloco_vagas)
+        for i, vaga in enumerate(vagas):
+            assert [lote[nome][i] for nome in COMPONENTES] == scores_escalares(calc, vaga, prof)
+
+
+def ranking_escalar(calc, vaga, profissionais, min_score):
+    matches = [(p, calc.calcular_match(vaga, p)) for p in profissionais]
+    matches = [m for m in matches if m[1]["score_total"] >= min_score]
+    matches.sort(key=lambda m: m[1]["score_total"], reverse=True)
+    return matches
+
+
+def test_rankings_iguais_ao_loop_escalar(dados):
+    vagas, profissionais = dados
+    calc = MatchCalculator()
+    bloco = ProfissionaisBlock(profissionais, calc)
+
+    for vaga in vagas[:20]:
+        for min_score in (0, 40.0, 62.5):
+            esperado = ranking_escalar(calc, vaga, profissionais, min_score)
+            assert calc.rankear_candidatos(vaga, profissionais, min_score) == esperado
+            assert calc.rankear_candidatos(vaga, bloco, min_score, limite=10) == esperado[:10]
+
+    prof = profissionais[0]
+    esperado = [(v, calc.calcular_match(v, prof)) for v in vagas]
+    esperado = sorted((m for m in esperado if m[1]["score_total"] >= 40), key=lambda m: m[1]["score_total"], reverse=True)
+    assert calc.rankear_vagas(prof, vagas) == esperado
+
+
+def test_selecionar_desempata_pela_ordem_original():
+    total = np.array([50.004, 70.0, 50.0, 49.996, 39.994, 70.001])
+    assert selecionar(total, 40.0) == [1, 5, 0, 2, 3]
+    assert selecionar(total, 40.0, limite=3) == [1, 5, 0]
+    assert selecionar(total, 39.99) == [1, 5, 0, 2, 3, 4]
+    assert selecionar(np.zeros(0), 0) == []
+
+
+def test_erros_do_calculo_escalar_sao_mantidos():
+    calc = MatchCalculator()
+    bloco = ProfissionaisBlock([{"localizacao_uf": None}])
+    with pytest.raises(AttributeError):
+        pontuar_profissionais({"localizacao_uf": "SP"}, bloco)
+    with pytest.raises(AttributeError):
+        calc.calcular_match({"localizacao_uf": "SP"}, {"localizacao_uf": None})
@@ -0,0 +1,180 @@
+"""
+Ranking em dois estágios: candidatos pelos índices baratos, score exato só neles
+"""
+import json
+import random
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("fastapi")
+pytest.importorskip("psycopg2")
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "api"))
+
+from api.services.habilidades import reconstruir_habilidades  # noqa: E402
+from api.services.match_candidatos import (  # noqa: E402
+    candidatos_profissionais, medir_recall, obter_candidatos, ranquear_exaustivo, ranquear_profissionais,
+    ranquear_vagas,
+)
+
+MIGRATIONS = ROOT_DIR / "db" / "migrations"
+SKILLS = ["ISO 14001", "GRI", "SASB", "LCA", "Energia Solar", "Gestão de Resíduos", "Compliance", "TCFD"]
+UFS = ["SP", "RJ", "MG", "BA"]
+NIVEIS = ["junior", "pleno", "senior", None]
+
+
+def ods(rng):
+    if rng.random() < 0.1:
+        return rng.choice([None, "[]", "[7, 7]", '["7"]', "não é json"])
+    return json.dumps(rng.sample(range(1, 18), rng.randint(1, 4)))
+
+
+def skills(rng):
+    if rng.random() < 0.1:
+        return rng.choice([None, "[]", "não é json"])
+    return json.dumps(rng.sample(SKILLS, rng.randint(1, 4)))
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    caminho = tmp_path / "gjb.db"
+    rng = random.Random(24)
+    conn = sqlite3.connect(caminho)
+    conn.executescript((ROOT_DIR / "db" / "schema_sqlite.sql").read_text(encoding="utf-8"))
+    conn.executescript((MIGRATIONS / "001_create_vagas_esg.sql").read_text(encoding="utf-8"))
+    conn.execute("""
+        CREATE TABLE profissionais_esg (
+            id INTEGER PRIMARY KEY, nome_completo TEXT, email TEXT, cargo_atual TEXT, empresa_atual TEXT,
+            anos_experiencia_esg INTEGER, localizacao_cidade TEXT, localizacao_uf TEXT, aceita_remoto BOOLEAN,
+            disponivel_mudanca BOOLEAN, habilidades_esg TEXT, ods_interesse TEXT, ods_experiencia TEXT,
+            nivel_desejado TEXT, pretensao_salarial_min REAL, pretensao_salarial_max REAL,
+            status TEXT DEFAULT 'ativo', criado_em TIMESTAMP
+        )
+    """)
+    for migration in ("003_add_ods_mask.sql", "004_add_ods_mask_profissionais.sql", "005_create_habilidades.sql",
+                      "006_create_matching_versao.sql"):
+        conn.executescript((MIGRATIONS / migration).read_text(encoding="utf-8"))
+
+    conn.executemany(
+        "INSERT INTO vagas_esg (cnpj, titulo, descricao, ods_tags, habilidades_requeridas, nivel_experiencia, "
+        "localizacao_uf, localizacao_cidade, remoto, salario_min, salario_max, status, criada_em) "
+        "VALUES ('00000000000191', 'Vaga', '', ?, ?, ?, ?, 'Capital', ?, ?, ?, ?, ?)",
+        [(ods(rng), skills(rng), rng.choice(NIVEIS), rng.choice(UFS + [""]), rng.random() < 0.3,
+          rng.choice([None, 5000]), rng.choice([None, 9000]), rng.choice(["ativa", "ativa", "pausada"]),
+          f"2026-01-{rng.randint(1, 28):02d}") for _ in range(150)]
+    )
+    conn.executemany(
+        "INSERT INTO profissionais_esg (nome_completo, anos_experiencia_esg, localizacao_cidade, localizacao_uf, "
+        "aceita_remoto, disponivel_mudanca, habilidades_esg, ods_interesse, ods_experiencia, nivel_desejado, "
+        "pretensao_salarial_min, pretensao_salarial_max, status, criado_em) "
+        "VALUES ('P', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(rng.randint(0, 12), rng.choice(["Capital", "Interior"]), rng.choice(UFS), rng.random() < 0.5,
+          rng.random() < 0.3, skills(rng), ods(rng),
+          json.dumps({str(o): rng.randint(0, 3) for o in rng.sample(range(1, 18), 2)}), rng.choice(NIVEIS),
+          rng.choice([None, 4000, 8000]), rng.choice([None, 10000]), rng.choice(["ativo", "ativo", "inativo"]),
+          f"2026-02-{rng.randint(1, 28):02d}") for _ in range(400)]
+    )
+    # UF nula quebra o cálculo escalar: o par fica de fora dos dois rankings
+    conn.execute("UPDATE profissionais_esg SET localizacao_uf = NULL WHERE id % 50 = 0")
+    reconstruir_habilidades(conn)
+    conn.close()
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{caminho}")
+    yield caminho
+    db = sys.modules.get("db")
+    for modo in (False, True) if db else ():
+        pool = db._pools.pop((f"sqlite:///{caminho}", modo), None)
+        if pool is not None:
+            pool.close()
+
+
+def linhas(conn, tabela, status):
+    conn.row_factory = sqlite3.Row
+    resultado = [dict(row) for row in conn.execute(f"SELECT * FROM {tabela} WHERE status = ? ORDER BY id", (status,))]
+    conn.row_factory = None
+    return resultado
+
+
+def resumo(ranking):
+    return [(linha["id"], match["score_total"]) for linha, match in ranking]
+
+
+def test_orcamento_do_tamanho_da_tabela_e_o_ranking_exaustivo(banco):
+    conn = sqlite3.connect(banco)
+    for vaga in linhas(conn, "vagas_esg", "ativa")[::4]:
+        esperado = ranquear_exaustivo(conn, "profissional", vaga, min_score=0, limite=20)
+        assert resumo(ranquear_profissionais(conn, vaga, min_score=0, limite=20, orcamento=400)) == resumo(esperado)
+    for prof in linhas(conn, "profissionais_esg", "ativo")[::10]:
+        esperado = ranquear_exaustivo(conn, "vaga", prof, min_score=0, limite=20)
+        assert resumo(ranquear_vagas(conn, prof, min_score=0, limite=20, orcamento=150)) == resumo(esperado)
+    conn.close()
+
+
+def test_candidatos_respeitam_o_orcamento(banco):
+    conn = sqlite3.connect(banco)
+    ativos = {p["id"] for p in linhas(conn, "profissionais_esg", "ativo")}
+    for vaga in linhas(conn, "vagas_esg", "ativa")[::6]:
+        candidatos = candidatos_profissionais(conn, vaga, orcamento=60)
+        assert len(candidatos) == len(set(candidatos)) == 60 and set(candidatos) <= ativos
+        assert set(candidatos_profissionais(conn, vaga, orcamento=1000)) == ativos
+
+    conn.close()
+
+
+def test_colunas_em_memoria_recarregam_com_a_versao(banco):
+    conn = sqlite3.connect(banco)
+    antes = obter_candidatos(conn, "profissional")
+    assert obter_candidatos(conn, "profissional") is antes
+
+    # Contador que não entra no ranking não invalida; status e ODS sim
+    conn.execute("UPDATE profissionais_esg SET nome_completo = 'Q' WHERE id = 3")
+    conn.commit()
+    assert obter_candidatos(conn, "profissional") is antes
+    conn.execute("UPDATE profissionais_esg SET status = 'inativo' WHERE id = 3")
+    conn.execute("UPDATE profissionais_esg SET status = 'ativo', ods_interesse = '[16]' WHERE id = 4")
+    conn.commit()
+    depois = obter_candidatos(conn, "profissional")
+    assert 3 not in depois.ids.tolist()
+    assert depois.ods[depois.ids.tolist().index(4)] == 1 << 16
+
+    vaga = {"ods_mask": 1 << 16, "habilidades_requeridas": "[]", "localizacao_uf": "SP", "remoto": True}
+    assert 3 not in candidatos_profissionais(conn, vaga, orcamento=1000)
+    conn.close()
+
+
+def test_recall_contra_o_exaustivo(banco):
+    conn = sqlite3.connect(banco)
+    vagas_db = linhas(conn, "vagas_esg", "ativa")
+    profissionais = linhas(conn, "profissionais_esg", "ativo")
+
+    recall = [medir_recall(conn, "profissional", vaga, orcamento=80, k=10) for vaga in vagas_db]
+    assert np.mean(recall) >= 0.98
+    assert all(medir_recall(conn, "profissional", vaga, orcamento=400, k=10) == 1.0 for vaga in vagas_db[::5])
+    recall = [medir_recall(conn, "vaga", prof, orcamento=40, k=10) for prof in profissionais[::4]]
+    assert np.mean(recall) >= 0.99
+    assert medir_recall(conn, "profissional", vagas_db[0], orcamento=0, k=10) < 1.0
+    conn.close()
+
+
+def test_endpoints_de_ranking(banco):
+    pytest.importorskip("joblib")  # ml_service, importado pelo router
+    from routers import matching
+
+    conn = sqlite3.connect(banco)
+    vaga = next(v for v in linhas(conn, "vagas_esg", "ativa") if v["localizacao_uf"] is not None)
+    prof = next(p for p in linhas(conn, "profissionais_esg", "ativo") if p["localizacao_uf"] is not None)
+    melhor_prof = ranquear_exaustivo(conn, "profissional", vaga, min_score=0, limite=1)[0][1]["score_total"]
+    melhor_vaga = ranquear_exaustivo(conn, "vaga", prof, min_score=0, limite=1)[0][1]["score_total"]
+    top = resumo(ranquear_exaustivo(conn, "vaga", prof, min_score=40, limite=5))
+    conn.close()
+
+    assert matching.obter_melhor_candidato(vaga["id"])["score_compatibilidade"] == melhor_prof
+    assert matching.obter_melhor_vaga(prof["id"])["score_compatibilidade"] == melhor_vaga
+    resposta = matching.ranquear_vagas_para_profissional(prof["id"], min_score=40, limit=5)
+    assert [(v["vaga"]["id"], v["score_compatibilidade"]) for v in resposta["vagas"]] == top
@@ -0,0 +1,259 @@
+"""
+Scores materializados (migration 007): fila por triggers, recálculo incremental e leitura do top-K
+"""
+import json
+import random
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("fastapi")
+pytest.importorskip("psycopg2")
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "api"))
+
+from api.services.habilidades import reconstruir_habilidades  # noqa: E402
+from api.services.match_calculator import MatchCalculator  # noqa: E402
+from api.services.match_candidatos import ranquear_exaustivo  # noqa: E402
+from api.services.match_scores import (  # noqa: E402
+    MatchScoresWorker, ler_ranking, processar_pendentes, reconstruir_match_scores,
+)
+
+MIGRATIONS = ROOT_DIR / "db" / "migrations"
+SKILLS = ["ISO 14001", "GRI", "SASB", "LCA", "Energia Solar", "Gestão de Resíduos", "Compliance", "TCFD"]
+UFS = ["SP", "RJ", "MG", "BA"]
+NIVEIS = ["junior", "pleno", "senior", None]
+TOP_K = 12
+
+
+def ods(rng):
+    if rng.random() < 0.1:
+        return rng.choice([None, "[]", "[7, 7]", '["7"]', "não é json"])
+    return json.dumps(rng.sample(range(1, 18), rng.randint(1, 4)))
+
+
+def skills(rng):
+    if rng.random() < 0.1:
+        return rng.choice([None, "[]", "não é json"])
+    return json.dumps(rng.sample(SKILLS, rng.randint(1, 4)))
+
+
+def vaga(rng):
+    return (ods(rng), skills(rng), rng.choice(NIVEIS), rng.choice(UFS + [""]), rng.random() < 0.3,
+            rng.choice([None, 5000]), rng.choice([None, 9000]), rng.choice(["ativa", "ativa", "pausada"]))
+
+
+def profissional(rng):
+    return (rng.randint(0, 12), rng.choice(["Capital", "Interior"]), rng.choice(UFS), rng.random() < 0.5,
+            rng.random() < 0.3, skills(rng), ods(rng),
+            json.dumps({str(o): rng.randint(0, 3) for o in rng.sample(range(1, 18), 2)}), rng.choice(NIVEIS),
+            rng.choice([None, 4000, 8000]), rng.choice([None, 10000]), rng.choice(["ativo", "ativo", "inativo"]))
+
+
+def inserir(conn, rng, vagas=0, profissionais=0):
+    # criado_em distinto por linha: a ordem dos empates é a mesma do ranking exaustivo
+    conn.executemany(
+        "INSERT INTO vagas_esg (cnpj, titulo, descricao, ods_tags, habilidades_requeridas, nivel_experiencia, "
+        "localizacao_uf, localizacao_cidade, remoto, salario_min, salario_max, status, criada_em) "
+        "VALUES ('00000000000191', 'Vaga', '', ?, ?, ?, ?, 'Capital', ?, ?, ?, ?, "
+        "datetime('2026-01-01', '+' || abs(random() % 1000000000) || ' seconds'))",
+        [vaga(rng) for _ in range(vagas)]
+    )
+    conn.executemany(
+        "INSERT INTO profissionais_esg (nome_completo, anos_experiencia_esg, localizacao_cidade, localizacao_uf, "
+        "aceita_remoto, disponivel_mudanca, habilidades_esg, ods_interesse, ods_experiencia, nivel_desejado, "
+        "pretensao_salarial_min, pretensao_salarial_max, status, criado_em) "
+        "VALUES ('P', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, "
+        "datetime('2026-02-01', '+' || abs(random() % 1000000000) || ' seconds'))",
+        [profissional(rng) for _ in range(profissionais)]
+    )
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    caminho = tmp_path / "gjb.db"
+    rng = random.Random(25)
+    conn = sqlite3.connect(caminho)
+    conn.executescript((ROOT_DIR / "db" / "schema_sqlite.sql").read_text(encoding="utf-8"))
+    conn.executescript((MIGRATIONS / "001_create_vagas_esg.sql").read_text(encoding="utf-8"))
+    conn.execute("""
+        CREATE TABLE profissionais_esg (
+            id INTEGER PRIMARY KEY, nome_completo TEXT, email TEXT, cargo_atual TEXT, empresa_atual TEXT,
+            anos_experiencia_esg INTEGER, localizacao_cidade TEXT, localizacao_uf TEXT, aceita_remoto BOOLEAN,
+            disponivel_mudanca BOOLEAN, habilidades_esg TEXT, ods_interesse TEXT, ods_experiencia TEXT,
+            nivel_desejado TEXT, pretensao_salarial_min REAL, pretensao_salarial_max REAL,
+            status TEXT DEFAULT 'ativo', criado_em TIMESTAMP
+        )
+    """)
+    for migration in ("003_add_ods_mask.sql", "004_add_ods_mask_profissionais.sql", "005_create_habilidades.sql",
+                      "006_create_matching_versao.sql"):
+        conn.executescript((MIGRATIONS / migration).read_text(encoding="utf-8"))
+    inserir(conn, rng, vagas=120, profissionais=300)
+    # UF nula quebra o cálculo escalar: o par fica de fora, como no ranking exaustivo
+    conn.execute("UPDATE profissionais_esg SET localizacao_uf = NULL WHERE id % 50 = 0")
+    reconstruir_habilidades(conn)
+    conn.executescript((MIGRATIONS / "007_create_match_scores.sql").read_text(encoding="utf-8"))
+    conn.close()
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{caminho}")
+    yield caminho
+    db = sys.modules.get("db")
+    for modo in (False, True) if db else ():
+        pool = db._pools.pop((f"sqlite:///{caminho}", modo), None)
+        if pool is not None:
+            pool.close()
+
+
+def ativos(conn, tabela, status):
+    conn.row_factory = sqlite3.Row
+    resultado = [dict(row) for row in conn.execute(f"SELECT * FROM {tabela} WHERE status = ? ORDER BY id", (status,))]
+    conn.row_factory = None
+    return resultado
+
+
+def esvaziar(conn):
+    while processar_pendentes(conn, lote=25, top_k=TOP_K):
+        pass
+
+
+def conferir(conn, passo=1, limite=TOP_K):
+    """Top lido de match_scores igual ao ranking exaustivo, nos dois sentidos"""
+    for vaga_db in ativos(conn, "vagas_esg", "ativa")[::passo]:
+        lido = ler_ranking(conn, "profissional", vaga_db["id"], min_score=0, limite=limite, top_k=TOP_K)
+        esperado = ranquear_exaustivo(conn, "profissional", vaga_db, min_score=0, limite=limite)
+        assert [(p["id"], m) for p, m in lido] == [(p["id"], m) for p, m in esperado]
+    for prof in ativos(conn, "profissionais_esg", "ativo")[::passo]:
+        lido = ler_ranking(conn, "vaga", prof["id"], min_score=0, limite=limite, top_k=TOP_K)
+        esperado = ranquear_exaustivo(conn, "vaga", prof, min_score=0, limite=limite)
+        assert [(v["id"], m) for v, m in lido] == [(v["id"], m) for v, m in esperado]
+
+
+def test_fila_da_migration_preenche_o_top_k(banco):
+    conn = sqlite3.connect(banco)
+    pendentes = conn.execute("SELECT tipo, COUNT(*) FROM match_scores_pendentes GROUP BY tipo ORDER BY tipo").fetchall()
+    assert pendentes == [("profissional", len(ativos(conn, "profissionais_esg", "ativo"))),
+                         ("vaga", len(ativos(conn, "vagas_esg", "ativa")))]
+    esvaziar(conn)
+    conferir(conn)
+
+    # Resultado idêntico ao calcular_match: score, classificação e breakdown
+    vaga_db = ativos(conn, "vagas_esg", "ativa")[0]
+    calculadora = MatchCalculator()
+    for prof, match in ler_ranking(conn, "profissional", vaga_db["id"], min_score=0, limite=5, top_k=TOP_K):
+        assert match == calculadora.calcular_match(vaga_db, prof)
+
+    # Nem a matriz inteira, nem menos que o top-K de cada ponta
+    total = conn.execute("SELECT COUNT(*) FROM match_scores").fetchone()[0]
+    assert total < 120 * 300 / 3
+    assert conn.execute("SELECT MIN(n) FROM match_scores_cortes WHERE corte > 0").fetchone()[0] >= TOP_K
+    assert reconstruir_match_scores(conn, top_k=TOP_K)["match_scores"] == total
+    conn.close()
+
+
+def test_escritas_recalculam_so_a_linha_ou_coluna_afetada(banco):
+    conn = sqlite3.connect(banco)
+    esvaziar(conn)
+
+    # Coluna que não entra no score não enfileira nada
+    conn.execute("UPDATE profissionais_esg SET nome_completo = 'Q' WHERE id = 3")
+    conn.execute("UPDATE vagas_esg SET titulo = 'Outra', candidaturas_recebidas = 5 WHERE id = 3")
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM match_scores_pendentes").fetchone()[0] == 0
+
+    conn.execute("UPDATE profissionais_esg SET pretensao_salarial_min = 20000, pretensao_salarial_max = 30000 "
+                 "WHERE id = 4")
+    conn.execute("UPDATE profissionais_esg SET status = 'inativo' WHERE id = 5")
+    conn.execute("UPDATE vagas_esg SET localizacao_cidade = 'Interior', ods_tags = '[13]' WHERE id = 6")
+    conn.execute("DELETE FROM vagas_esg WHERE id = 7")
+    conn.commit()
+    assert sorted(conn.execute("SELECT tipo, entidade_id FROM match_scores_pendentes")) == [
+        ("profissional", 4), ("profissional", 5), ("vaga", 6), ("vaga", 7)]
+    antes = dict(conn.execute("SELECT vaga_id || '-' || profissional_id, calculado_em FROM match_scores "
+                              "WHERE vaga_id NOT IN (6, 7) AND profissional_id NOT IN (4, 5)"))
+
+    # Enquanto está na fila, a leitura fica para o cálculo na hora
+    assert ler_ranking(conn, "vaga", 4, min_score=0, limite=5, top_k=TOP_K) is None
+    recalculados = 0
+    while (processados := processar_pendentes(conn, lote=1, top_k=TOP_K)):
+        recalculados += processados
+    assert recalculados < 20
+    assert conn.execute("SELECT COUNT(*) FROM match_scores WHERE profissional_id = 5 OR vaga_id = 7").fetchone()[0] == 0
+    conferir(conn)
+    depois = dict(conn.execute("SELECT vaga_id || '-' || profissional_id, calculado_em FROM match_scores"))
+    assert sum(depois.get(par) == calculado for par, calculado in antes.items()) > 0.9 * len(antes)
+    conn.close()
+
+
+def test_fluxo_de_escritas_mantem_os_cortes(banco):
+    conn = sqlite3.connect(banco)
+    esvaziar(conn)
+    rng = random.Random(7)
+    for rodada in range(6):
+        for _ in range(15):
+            tabela, status = rng.choice([("vagas_esg", "ativa"), ("profissionais_esg", "ativo")])
+            id_ = rng.choice(ativos(conn, tabela, status))["id"]
+            if tabela == "vagas_esg":
+                conn.execute("UPDATE vagas_esg SET ods_tags = ?, nivel_experiencia = ?, status = ? WHERE id = ?",
+                             (ods(rng), rng.choice(NIVEIS), rng.choice(["ativa", "ativa", "pausada"]), id_))
+            else:
+                conn.execute("UPDATE profissionais_esg SET habilidades_esg = ?, localizacao_uf = ?, "
+                             "anos_experiencia_esg = ? WHERE id = ?", (skills(rng), rng.choice(UFS), rng.randint(0, 9), id_))
+        inserir(conn, rng, vagas=3, profissionais=5)
+        conn.commit()
+        reconstruir_habilidades(conn)
+        esvaziar(conn)
+        conferir(conn, passo=4)
+        assert conn.execute("SELECT MIN(n) FROM match_scores_cortes WHERE corte > 0").fetchone()[0] >= TOP_K
+    conn.close()
+
+
+def test_leitura_fora_do_que_a_tabela_cobre(banco, tmp_path):
+    conn = sqlite3.connect(banco)
+    esvaziar(conn)
+    assert ler_ranking(conn, "profissional", 1, limite=TOP_K + 1, top_k=TOP_K) is None
+    assert ler_ranking(conn, "profissional", 1, limite=None, top_k=TOP_K) is None
+    assert ler_ranking(conn, "profissional", 10 ** 6, limite=5, top_k=TOP_K) is None
+    # min_score corta a lista, mas ela continua exata
+    prof = ativos(conn, "profissionais_esg", "ativo")[0]
+    lido = ler_ranking(conn, "vaga", prof["id"], min_score=60, limite=TOP_K, top_k=TOP_K)
+    esperado = ranquear_exaustivo(conn, "vaga", prof, min_score=60, limite=TOP_K)
+    assert [(v["id"], m["score_total"]) for v, m in lido] == [(v["id"], m["score_total"]) for v, m in esperado]
+    conn.close()
+
+    sem_migration = sqlite3.connect(tmp_path / "vazio.db")
+    assert ler_ranking(sem_migration, "vaga", 1, limite=5) is None
+    sem_migration.close()
+
+
+def test_worker_esvazia_a_fila(banco):
+    from db import get_db
+
+    worker = MatchScoresWorker(intervalo=60)
+    worker.iniciar(get_db)
+    try:
+        conn = sqlite3.connect(banco)
+        for _ in range(100):
+            if conn.execute("SELECT COUNT(*) FROM match_scores_pendentes").fetchone()[0] == 0:
+                break
+            worker._parar.wait(0.1)
+        vaga_id = ativos(conn, "vagas_esg", "ativa")[1]["id"]
+        conn.execute("UPDATE vagas_esg SET ods_tags = '[13, 14]' WHERE id = ?", (vaga_id,))
+        conn.commit()
+        worker.notificar()
+        for _ in range(100):
+            if conn.execute("SELECT COUNT(*) FROM match_scores_pendentes").fetchone()[0] == 0:
+                break
+            worker._parar.wait(0.1)
+        assert conn.execute("SELECT COUNT(*) FROM match_scores_pendentes").fetchone()[0] == 0
+        vaga_db = ativos(conn, "vagas_esg", "ativa")[1]
+        lido = ler_ranking(conn, "profissional", vaga_id, min_score=0, limite=10)
+        esperado = ranquear_exaustivo(conn, "profissional", vaga_db, min_score=0, limite=10)
+        assert [(p["id"], m) for p, m in lido] == [(p["id"], m) for p, m in esperado]
+        conn.close()
+    finally:
+        worker.parar()
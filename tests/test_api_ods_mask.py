@@ -0,0 +1,187 @@
+"""
+Máscaras de bits dos ODS (migrations 003 e 004): backfill, triggers, matching, filtro e estatísticas
+"""
+import json
+import random
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("psycopg2")
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "api"))
+
+from api.services.match_calculator import MatchCalculator  # noqa: E402
+from routers import vagas  # noqa: E402
+
+MIGRATIONS = ROOT_DIR / "db" / "migrations"
+
+# Formatos irregulares que já existem nos dados: voltam ao JSON (máscara NULL) ou valem lista vazia (0)
+ODS_VAGA_IRREGULARES = [None, "", "não é json", "[]", "[7, 7, 13]", '["7", 13]', "[7, 99]", "[7.0]", '{"7": 1}', "null"]
+ODS_PROF_IRREGULARES = [None, "", "[]", "[7, 7]", '["7"]', "[7, 99, -1]", "[true]", "{}"]
+EXPERIENCIA_IRREGULARES = [None, "", "[7]", '{"7": 0}', '{"x": 0, "7": 2}', '{"x": 1}', '{"07": 2}',
+                           '{"7": "2"}', '{"7": 1.5, "30": 2}', '{"-3": 1}']
+
+
+def gerar_ods_vaga(rng):
+    if rng.random() < 0.3:
+        return rng.choice(ODS_VAGA_IRREGULARES)
+    return json.dumps(rng.sample(range(1, 18), rng.randint(0, 4)))
+
+
+def gerar_ods_prof(rng):
+    if rng.random() < 0.3:
+        return rng.choice(ODS_PROF_IRREGULARES), rng.choice(EXPERIENCIA_IRREGULARES)
+    experiencia = {str(o): rng.choice([0, 1, 3]) for o in rng.sample(range(1, 18), rng.randint(0, 3))}
+    return json.dumps(rng.sample(range(1, 18), rng.randint(0, 5))), json.dumps(experiencia)
+
+
+def inserir(conn, rng, vagas_n, profissionais_n):
+    conn.executemany(
+        "INSERT INTO vagas_esg (cnpj, titulo, ods_tags, status) VALUES (?, ?, ?, ?)",
+        [("00000000000191", "Vaga", gerar_ods_vaga(rng), rng.choice(["ativa", "ativa", "pausada"]))
+         for _ in range(vagas_n)]
+    )
+    conn.executemany(
+        "INSERT INTO profissionais_esg (nome_completo, ods_interesse, ods_experiencia) VALUES ('P', ?, ?)",
+        [gerar_ods_prof(rng) for _ in range(profissionais_n)]
+    )
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    caminho = tmp_path / "gjb.db"
+    rng = random.Random(22)
+    conn = sqlite3.connect(caminho)
+    conn.executescript((ROOT_DIR / "db" / "schema_sqlite.sql").read_text(encoding="utf-8"))
+    conn.executescript((MIGRATIONS / "001_create_vagas_esg.sql").read_text(encoding="utf-8"))
+    conn.execute("""
+        CREATE TABLE profissionais_esg (
+            id INTEGER PRIMARY KEY, nome_completo TEXT, ods_interesse TEXT, ods_experiencia TEXT,
+            status TEXT DEFAULT 'ativo'
+        )
+    """)
+    # Metade antes da migration (backfill), metade depois (triggers)
+    inserir(conn, rng, 150, 150)
+    conn.commit()
+    for migration in ("003_add_ods_mask.sql", "004_add_ods_mask_profissionais.sql"):
+        conn.executescript((MIGRATIONS / migration).read_text(encoding="utf-8"))
+    inserir(conn, rng, 150, 150)
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{caminho}")
+    yield caminho
+    for modo in (False, True):
+        pool = sys.modules["db"]._pools.pop((f"sqlite:///{caminho}", modo), None)
+        if pool is not None:
+            pool.close()
+
+
+def linhas(caminho, tabela):
+    conn = sqlite3.connect(caminho)
+    conn.row_factory = sqlite3.Row
+    resultado = [dict(row) for row in conn.execute(f"SELECT * FROM {tabela} ORDER BY id")]
+    conn.close()
+    return resultado
+
+
+def sem_mascaras(linha):
+    return {k: v for k, v in linha.items() if not k.endswith("_mask")}
+
+
+def test_mascaras_do_banco(banco):
+    conn = sqlite3.connect(banco)
+
+    def mascara(ods_tags):
+        cursor = conn.execute("INSERT INTO vagas_esg (cnpj, titulo, ods_tags) VALUES ('00000000000191', 'Vaga', ?)", (ods_tags,))
+        return conn.execute("SELECT ods_mask FROM vagas_esg WHERE id = ?", (cursor.lastrowid,)).fetchone()[0]
+
+    assert mascara("[7, 13]") == (1 << 7) | (1 << 13)
+    assert mascara("[1, 17]") == (1 << 1) | (1 << 17)
+    assert mascara(None) == mascara("[]") == mascara("não é json") == 0
+    assert mascara("[7, 7]") is mascara('["7"]') is mascara("[7, 99]") is mascara('{"7": 1}') is None
+
+    # Atualização recalcula a máscara
+    conn.execute("UPDATE vagas_esg SET ods_tags = '[15]' WHERE id = 1")
+    assert conn.execute("SELECT ods_mask FROM vagas_esg WHERE id = 1").fetchone()[0] == 1 << 15
+    conn.execute("UPDATE profissionais_esg SET ods_interesse = '[7, 7, 99]', ods_experiencia = '{\"7\": 2, \"x\": 0}' WHERE id = 1")
+    assert conn.execute(
+        "SELECT ods_interesse_mask, ods_experiencia_mask FROM profissionais_esg WHERE id = 1"
+    ).fetchone() == (1 << 7, 1 << 7)
+    conn.close()
+
+
+def test_match_ods_pelas_mascaras_igual_ao_json(banco):
+    calc = MatchCalculator()
+    vagas_db, profissionais = linhas(banco, "vagas_esg"), linhas(banco, "profissionais_esg")
+    assert any(v["ods_mask"] is None for v in vagas_db) and any(v["ods_mask"] for v in vagas_db)
+
+    for vaga in vagas_db[::3]:
+        for prof in profissionais:
+            try:
+                esperado = calc._calcular_ods_match(sem_mascaras(vaga), sem_mascaras(prof))
+            except (TypeError, ValueError) as erro:
+                with pytest.raises(type(erro)):
+                    calc._calcular_ods_match(vaga, prof)
+                continue
+            assert calc._calcular_ods_match(vaga, prof) == esperado, (vaga["ods_tags"], prof)
+
+
+def test_motor_em_lote_le_as_mascaras(banco):
+    np = pytest.importorskip("numpy")
+    from api.services.match_batch import ProfissionaisBlock, VagasBlock, pontuar_profissionais, pontuar_vagas
+
+    calc = MatchCalculator()
+    local = {"localizacao_uf": "SP", "localizacao_cidade": "São Paulo"}
+    vagas_db = [{**v, **local} for v in linhas(banco, "vagas_esg") if v["ods_mask"] is not None]
+    profissionais = [{**p, **local} for p in linhas(banco, "profissionais_esg")
+                     if None not in (p["ods_interesse_mask"], p["ods_experiencia_mask"])]
+    bloco = ProfissionaisBlock(profissionais)
+    assert not bloco.escalar["ods"].any()
+
+    for vaga in vagas_db[::5]:
+        esperado = [calc._calcular_ods_match(sem_mascaras(vaga), sem_mascaras(p)) for p in profissionais]
+        assert np.array_equal(pontuar_profissionais(vaga, bloco)["ods"], esperado)
+
+    prof = profissionais[0]
+    esperado = [calc._calcular_ods_match(sem_mascaras(v), sem_mascaras(prof)) for v in vagas_db]
+    assert np.array_equal(pontuar_vagas(prof, VagasBlock(vagas_db))["ods"], esperado)
+
+
+def test_filtro_e_contagem_por_ods(banco):
+    todas = linhas(banco, "vagas_esg")
+    ativas = [v for v in todas if v["status"] == "ativa"]
+
+    def tem_ods(vaga, ods):
+        try:
+            valores = json.loads(vaga["ods_tags"])
+        except (TypeError, ValueError):
+            return False
+        return isinstance(valores, list) and ods in valores
+
+    for ods in (1, 7, 13, 17):
+        resultado = vagas.listar_vagas.sync(status="ativa", uf=None, remoto=None, nivel=None, ods=ods, limit=100, offset=0)
+        assert sorted(v["id"] for v in resultado) == [v["id"] for v in ativas if tem_ods(v, ods)]
+
+    # Mesma contagem da versão que percorria o JSON de todas as vagas
+    conn = sqlite3.connect(banco)
+    contagem = dict(conn.execute("""
+        SELECT ods.value, COUNT(*) FROM vagas_esg, json_each(vagas_esg.ods_tags) AS ods
+        WHERE status = 'ativa' AND json_valid(vagas_esg.ods_tags) GROUP BY ods.value
+    """).fetchall())
+    conn.close()
+    assert vagas.estatisticas_vagas.sync()["vagas_por_ods"] == contagem
+
+    conn = sqlite3.connect(banco)
+    plano = " ".join(row[-1] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM vagas_esg WHERE status = 'ativa' AND (ods_mask & 128) != 0 "
+        "ORDER BY criada_em DESC LIMIT 50"
+    ))
+    conn.close()
+    assert "idx_vagas_status_ods" in plano and "TEMP B-TREE" not in plano
@@ -0,0 +1,88 @@
+"""
+Motor DuckDB da API sobre o dataset Parquet particionado por UF
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("duckdb")
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+pd = pytest.importorskip("pandas")
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from api.services.parquet_engine import ParquetReadEngine, get_parquet_engine  # noqa: E402
+
+CNAES = ["3511-5/01", "3511-5/02", "3831-9/00", "4711-3/02"]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    empresas = pd.DataFrame([
+        {
+            "cnpj": f"{i:014d}",
+            "razao_social": f"Empresa {'Solar' if i % 7 == 0 else 'Verde'} {i}",
+            "nome_fantasia": None,
+            "cnae_principal": CNAES[i % 3],
+            "cnaes_secundarias": [CNAES[(i + 1) % 4]] if i % 2 else [],
+            "porte": ["01", "03", "05"][i % 3],
+            "municipio": ["Belo Horizonte", "Niterói", "Campinas"][i % 3],
+            "situacao_cadastral": "ATIVA",
+            "score_verde": i % 101,
+            "data_abertura": pd.Timestamp("2015-01-01") + pd.Timedelta(days=i),
+            "ods_tags": [7, 13] if i % 3 < 2 else [12],
+            "fonte_atualizacao": "ETL_RFB",
+            "atualizado_em": pd.Timestamp("2025-10-01") + pd.Timedelta(minutes=i),
+            "uf": ["MG", "RJ", "SP"][i % 5 % 3],
+        }
+        for i in range(600)
+    ])
+    pq.write_to_dataset(pa.Table.from_pandas(empresas, preserve_index=False),
+                        root_path=str(tmp_path / "empresas_verdes"), partition_cols=["uf"])
+    return tmp_path / "empresas_verdes", empresas
+
+
+def test_listagem_igual_ao_filtro_em_pandas(dataset):
+    raiz, empresas = dataset
+    engine = ParquetReadEngine(raiz)
+
+    itens, total = engine.listar_empresas(uf="mg", porte="03", score_min=30, limit=5, offset=2)
+    esperado = empresas[(empresas.uf == "MG") & (empresas.porte == "03") & (empresas.score_verde >= 30)]
+    esperado = esperado.sort_values(["score_verde", "razao_social"], ascending=[False, True])
+    assert total == len(esperado)
+    assert [e["cnpj"] for e in itens] == esperado.cnpj.iloc[2:7].tolist()
+    assert all(e["uf"] == "MG" for e in itens)
+
+    _, total = engine.listar_empresas(cnae="3831-9/00")
+    com_cnae = empresas.cnae_principal.eq("3831-9/00") | empresas.cnaes_secundarias.map(lambda c: "3831-9/00" in c)
+    assert total == com_cnae.sum()
+    _, total = engine.listar_empresas(cnae_principal="3831-9/00", q="solar", ods=7)
+    assert total == ((empresas.cnae_principal == "3831-9/00") & empresas.razao_social.str.contains("Solar")
+                     & empresas.ods_tags.map(lambda o: 7 in o)).sum()
+
+    assert engine.listar_empresas(uf="MG", offset=10_000) == ([], (empresas.uf == "MG").sum())
+    assert engine.listar_empresas(uf="AC") == ([], 0)
+
+
+def test_estatisticas_em_uma_passada(dataset):
+    raiz, empresas = dataset
+    stats = ParquetReadEngine(raiz).estatisticas()
+
+    assert stats["total_empresas_verdes"] == len(empresas)
+    assert stats["ultima_atualizacao"] == empresas.atualizado_em.max()
+    assert {e["uf"]: e["total_empresas"] for e in stats["por_uf"]} == empresas.uf.value_counts().to_dict()
+    por_uf_cnae = empresas.groupby(["cnae_principal", "uf"]).size()
+    for cnae in stats["por_cnae"]:
+        assert cnae["total_empresas"] == por_uf_cnae[cnae["cnae"]].sum()
+        assert {d["uf"]: d["count"] for d in cnae["por_uf"]} == por_uf_cnae[cnae["cnae"]].to_dict()
+    # 4711-3/02 não é CNAE verde no seed
+    assert "4711-3/02" not in {c["cnae"] for c in stats["por_cnae"]}
+    assert stats["ods_mais_frequentes"][0] == {"ods": 7, "frequencia": 400}
+
+
+def test_motor_desligado_por_padrao(monkeypatch):
+    monkeypatch.delenv("API_READ_ENGINE", raising=False)
+    assert get_parquet_engine() is None
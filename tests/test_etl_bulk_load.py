@@ -0,0 +1,180 @@
+"""
+Carga em lote das empresas verdes no SQLite via tabelas de staging
+"""
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "etl"))
+
+from bulk_load import BulkLoader, PostgresBulkLoader, SQLiteBulkLoader  # noqa: E402
+
+VERDES = {"3511-5/01", "3831-9/00"}
+
+
+def empresa(cnpj, cnae_principal, secundarias, score):
+    return {
+        "cnpj": cnpj, "razao_social": f"Empresa {cnpj}", "nome_fantasia": None,
+        "cnae_principal": cnae_principal, "cnaes_secundarias": secundarias,
+        "porte": "03", "uf": "MG", "municipio": "Belo Horizonte", "situacao_cadastral": "ATIVA",
+        "data_abertura": "2020-01-15", "score_verde": score, "ods_tags": [7, 13],
+        "fonte_atualizacao": "ETL_RFB", "atualizado_em": datetime(2024, 5, 1),
+    }
+
+
+def carregar(conn, registros, replace=True):
+    loader = SQLiteBulkLoader(conn, VERDES)
+    loader.create_staging()
+    loader.stage(registros)
+    loader.merge(replace=replace)
+    conn.commit()
+    return loader
+
+
+def test_recarga_completa_substitui_empresas():
+    """A recarga atualiza, insere e remove empresas sem esvaziar a tabela antes"""
+    conn = sqlite3.connect(":memory:")
+    conn.executescript((ROOT_DIR / "db" / "schema_sqlite.sql").read_text())
+
+    carregar(conn, [
+        empresa("111", "3511-5/01", ["3831-9/00", "4711-3/02"], 90),
+        empresa("222", "3831-9/00", [], 80),
+    ])
+    assert conn.execute("SELECT COUNT(*) FROM empresa_cnae").fetchone()[0] == 3
+
+    loader = carregar(conn, [
+        empresa("111", "3511-5/01", [], 80),
+        empresa("333", "3831-9/00", ["3511-5/01"], 90),
+    ])
+
+    assert loader.staged == 2
+    assert conn.execute("SELECT cnpj, score_verde, cnaes_secundarias, ods_tags FROM empresas_verdes ORDER BY cnpj").fetchall() == [
+        ("111", 80, "[]", "[7, 13]"),
+        ("333", 90, '["3511-5/01"]', "[7, 13]"),
+    ]
+    assert conn.execute("SELECT cnpj, codigo_cnae FROM empresa_cnae ORDER BY 1, 2").fetchall() == [
+        ("111", "3511-5/01"),
+        ("333", "3511-5/01"),
+        ("333", "3831-9/00"),
+    ]
+
+
+def test_carga_parcial_mantem_demais_empresas():
+    """Com replace=False só as empresas do lote mudam e as removidas saem via delete()"""
+    conn = sqlite3.connect(":memory:")
+    conn.executescript((ROOT_DIR / "db" / "schema_sqlite.sql").read_text())
+    carregar(conn, [empresa(cnpj, "3511-5/01", [], 80) for cnpj in ("111", "222", "333")])
+
+    loader = SQLiteBulkLoader(conn, VERDES)
+    loader.create_staging()
+    loader.stage([empresa("222", "3831-9/00", [], 60)])
+    loader.merge(replace=False)
+    loader.delete(["333"])
+    conn.commit()
+
+    assert conn.execute("SELECT cnpj, cnae_principal, score_verde FROM empresas_verdes ORDER BY cnpj").fetchall() == [
+        ("111", "3511-5/01", 80),
+        ("222", "3831-9/00", 60),
+    ]
+    assert conn.execute("SELECT cnpj, codigo_cnae FROM empresa_cnae ORDER BY 1").fetchall() == [
+        ("111", "3511-5/01"),
+        ("222", "3831-9/00"),
+    ]
+
+
+def test_loader_incompleto_falha_ao_ser_criado():
+    """Um loader sem stage() não chega a começar a carga"""
+    class SemStage(BulkLoader):
+        def create_staging(self):
+            pass
+
+    with pytest.raises(TypeError):
+        SemStage(sqlite3.connect(":memory:"), VERDES)
+
+
+def test_vinculos_respeitam_chaves_estrangeiras():
+    """Empresa verde só pelo CNAE secundário carrega com as FKs ativas e sem vínculo do principal"""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript((ROOT_DIR / "db" / "schema_sqlite.sql").read_text())
+    conn.executemany(
+        "INSERT INTO cnae_green (cnae, titulo, categoria) VALUES (?, ?, ?)",
+        [(cnae, cnae, "Teste") for cnae in VERDES],
+    )
+
+    registros = [
+        empresa("111", "4711-3/02", ["3831-9/00", "4711-3/01"], 60),
+        empresa("222", "3511-5/01", ["3511-5/01"], 90),
+    ]
+    _, vinculos = SQLiteBulkLoader(conn, VERDES)._split(registros)
+    assert vinculos == [("111", "3831-9/00"), ("222", "3511-5/01")]
+
+    carregar(conn, registros)
+
+    assert conn.execute("SELECT cnpj, cnae_principal FROM empresas_verdes ORDER BY cnpj").fetchall() == [
+        ("111", "4711-3/02"),
+        ("222", "3511-5/01"),
+    ]
+    assert conn.execute("SELECT cnpj, codigo_cnae FROM empresa_cnae ORDER BY 1").fetchall() == vinculos
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+
+
+def test_copy_e_merge_no_postgres():
+    """COPY nas tabelas de staging e merge no PostgreSQL (TEST_DATABASE_URL)"""
+    psycopg2 = pytest.importorskip("psycopg2")
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL não definida")
+    try:
+        conn = psycopg2.connect(url)
+    except psycopg2.OperationalError as erro:
+        pytest.skip(f"PostgreSQL indisponível: {erro}")
+
+    schema = f"gjb_teste_{os.getpid()}"
+    ddl = re.sub(r"\bgjb\b", schema, (ROOT_DIR / "db" / "schema.sql").read_text())
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(ddl)
+            cursor.execute(f"SET search_path = {schema}, public")
+            cursor.executemany(
+                "INSERT INTO cnae_green (cnae, titulo, categoria) VALUES (%s, %s, %s)",
+                [(cnae, cnae, "Teste") for cnae in VERDES],
+            )
+        conn.commit()
+
+        for registros in (
+            [empresa("111", "3511-5/01", ["3831-9/00"], 90), empresa("222", "3831-9/00", [], 80)],
+            [
+                empresa("111", "4711-3/02", ["3831-9/00", "4711-3/01"], 60),
+                empresa("333", "3511-5/01", ["Tab\tcom \\ e \"aspas\""], 70),
+            ],
+        ):
+            loader = PostgresBulkLoader(conn, VERDES)
+            loader.create_staging()
+            loader.stage(registros)
+            loader.merge()
+            conn.commit()
+
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT cnpj, cnae_principal, cnaes_secundarias, score_verde, ods_tags "
+                "FROM empresas_verdes ORDER BY cnpj"
+            )
+            assert cursor.fetchall() == [
+                ("111", "4711-3/02", ["3831-9/00", "4711-3/01"], 60, [7, 13]),
+                ("333", "3511-5/01", ["Tab\tcom \\ e \"aspas\""], 70, [7, 13]),
+            ]
+            cursor.execute("SELECT cnpj, codigo_cnae FROM empresa_cnae ORDER BY 1")
+            assert cursor.fetchall() == [("111", "3831-9/00"), ("333", "3511-5/01")]
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.commit()
+        conn.close()
@@ -0,0 +1,145 @@
+"""
+Índice local de CNPJs sobre o Parquet de empresas verdes do ETL
+"""
+import random
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+pytest.importorskip("pandas")
+pytest.importorskip("dotenv")
+pytest.importorskip("psycopg2")
+
+ETL_DIR = Path(__file__).resolve().parent.parent / "etl"
+sys.path.insert(0, str(ETL_DIR))
+
+from cnpj_index import CnpjIndex, company_from_receita_ws, load_cnae_priorities  # noqa: E402
+from config import ETLConfig, ScoringRules  # noqa: E402
+from main import GreenJobsETL  # noqa: E402
+
+
+def gravar_dataset(raiz, empresas):
+    tabela = pa.Table.from_pylist(empresas)
+    pq.write_to_dataset(tabela, root_path=str(raiz), partition_cols=["uf"],
+                        existing_data_behavior="delete_matching")
+
+
+def empresa(i, uf, score):
+    return {"cnpj": f"{i:014d}", "razao_social": f"Empresa {i}", "cnae_principal": "3511-5/01",
+            "cnaes_secundarias": ["3831-9/00"], "situacao_cadastral": "ATIVA", "score_verde": score, "uf": uf}
+
+
+def test_busca_por_cnpj_e_reconstrucao(tmp_path):
+    dados = tmp_path / "empresas_verdes"
+    gravar_dataset(dados, [empresa(i, ["MG", "RJ", "SP"][i % 3], i % 100) for i in range(0, 2000, 2)])
+
+    indice = CnpjIndex(dados, tmp_path / "cnpj_index", refresh_seconds=0)
+    assert len(indice) == 1000
+
+    achada = indice.lookup("00.000.000/0015-00")
+    assert achada["razao_social"] == "Empresa 1500"
+    assert achada["uf"] == "MG" and achada["score_verde"] == 0
+    assert indice.lookup("00000000001501") is None
+    assert indice.lookup("99999999999999") is None
+
+    # Nova carga do ETL numa partição: o índice é refeito na próxima consulta
+    gravar_dataset(dados, [empresa(1501, "RJ", 77)])
+    assert indice.lookup("00000000001501")["score_verde"] == 77
+    assert indice.lookup("00000000001504") is None  # partição RJ substituída
+    assert indice.lookup("00000000001502")["uf"] == "SP"
+    assert indice.lookup("00000000001500")["uf"] == "MG"
+
+
+def test_consultas_durante_reconstrucao(tmp_path):
+    """Consultas concorrentes com o índice sendo refeito só devolvem a empresa do CNPJ pedido"""
+    dados = tmp_path / "empresas_verdes"
+    gravar_dataset(dados, [empresa(i, "MG", i % 100) for i in range(0, 3000, 2)])
+    indice = CnpjIndex(dados, tmp_path / "cnpj_index", cache_size=64, refresh_seconds=3600)
+    indice.refresh()
+
+    parar = threading.Event()
+    erros = []
+
+    def consultar(semente):
+        rng = random.Random(semente)
+        while not parar.is_set():
+            cnpj = f"{rng.randrange(3000):014d}"
+            try:
+                achada = indice.lookup(cnpj)
+            except Exception as erro:  # noqa: BLE001 - qualquer falha conta
+                erros.append(repr(erro))
+                return
+            if achada is not None and achada["cnpj"] != cnpj:
+                erros.append(f"{cnpj} -> {achada['cnpj']}")
+                return
+
+    threads = [threading.Thread(target=consultar, args=(semente,)) for semente in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        # Cada carga desloca as posições: pares num passo, ímpares no seguinte
+        for passo in range(8):
+            gravar_dataset(dados, [empresa(i, "MG", i % 100) for i in range(passo % 2, 3000, 2)])
+            indice.refresh(force=True)
+    finally:
+        parar.set()
+        for thread in threads:
+            thread.join()
+
+    assert erros == []
+    assert indice.lookup("00000000000001")["cnpj"] == "00000000000001"
+    assert indice.lookup("00000000000002") is None
+
+
+def test_empresa_da_receita_usa_scoring_rules():
+    prioridades = load_cnae_priorities(ETL_DIR / "cnae_green_seed.csv")
+    dados = {
+        "cnpj": "11.222.333/0001-81", "nome": "Solar Ltda", "situacao": "ATIVA", "uf": "MG",
+        "atividade_principal": [{"code": "35.11-5-02", "text": "Geração de energia solar"}],
+        "atividades_secundarias": [{"code": "38.31-9-00"}, {"code": "47.11-3-02"}],
+    }
+    empresa_receita = company_from_receita_ws(dados, prioridades)
+
+    assert empresa_receita["cnpj"] == "11222333000181"
+    assert empresa_receita["cnae_principal"] == "3511-5/02"
+    assert empresa_receita["score_verde"] == ScoringRules.calculate_score(
+        "3511-5/02", ["3831-9/00", "4711-3/02"], "ATIVA", prioridades
+    ) > 0
+
+
+def test_indice_sobre_a_saida_do_etl(tmp_path, monkeypatch):
+    """Arquivos da RFB trazem o CNPJ básico (8 dígitos); a busca é pelo CNPJ completo da matriz"""
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    (raw / "Empresas0.EMPRECSV").write_bytes(
+        '"11222333";"Solar Ação Ltda";"2062";"49";"1000,00";"03";""\n'.encode("latin-1"))
+    estabelecimentos = []
+    for ordem, dv, matriz in (("0001", "81", "1"), ("0002", "62", "2")):
+        campos = ["11222333", ordem, dv, matriz, "Solar", "02", "20200115", "00", "", "", "20200115",
+                  "3511-5/02", "3831-9/00"] + [""] * 6 + ["MG", "Belo Horizonte"] + [""] * 9
+        estabelecimentos.append(";".join(f'"{campo}"' for campo in campos) + "\n")
+    (raw / "Estabelecimentos0.ESTABCSV").write_bytes("".join(estabelecimentos).encode("latin-1"))
+    for nome, valor in (("RAW_DIR", raw), ("PROCESSED_DIR", tmp_path / "processed"),
+                        ("CNAE_GREEN_SEED", ETL_DIR / "cnae_green_seed.csv"), ("TARGET_UFS", ["MG"])):
+        monkeypatch.setattr(ETLConfig, nome, valor)
+
+    etl = GreenJobsETL()
+    etl.duckdb_conn = duckdb.connect(":memory:")
+    etl.load_cnae_green_mapping()
+    etl.register_cnae_green_table()
+    etl.setup_duckdb_schema()
+    etl.load_rfb_data()
+    etl.save_to_parquet(etl.process_green_companies())
+    etl.duckdb_conn.close()
+
+    indice = CnpjIndex(tmp_path / "processed" / "empresas_verdes", tmp_path / "cnpj_index")
+    achada = indice.lookup("11.222.333/0001-81")
+    assert achada["cnpj"] == "11222333000181"
+    assert achada["razao_social"] == "Solar Ação Ltda" and achada["score_verde"] > 0
+    assert indice.lookup("11222333") is None
+    assert indice.lookup("11222333000262") is None  # só a matriz entra na saída
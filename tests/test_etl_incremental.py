@@ -0,0 +1,59 @@
+"""
+Detecção do delta (inserções, alterações e remoções) entre duas cargas do ETL
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+
+ETL_DIR = Path(__file__).resolve().parent.parent / "etl"
+sys.path.insert(0, str(ETL_DIR))
+
+import incremental  # noqa: E402
+
+
+def criar_empresas(conn, linhas):
+    conn.execute("""
+        CREATE OR REPLACE TABLE empresas_scored
+        (cnpj VARCHAR, uf VARCHAR, score_verde INTEGER, ods_tags INTEGER[])
+    """)
+    conn.executemany("INSERT INTO empresas_scored VALUES (?, ?, ?, ?)", linhas)
+
+
+def test_delta_entre_cargas(tmp_path):
+    """Somente empresas novas, alteradas ou removidas entram no delta"""
+    conn = duckdb.connect(":memory:")
+    estado = tmp_path / "hashes.parquet"
+
+    criar_empresas(conn, [
+        ("00000000000001", "MG", 90, [7, 13]),
+        ("00000000000002", "RJ", 60, [6]),
+        ("00000000000003", "SP", 40, []),
+        ("00000000000004", "SP", 10, None),
+    ])
+    assert incremental.create_hashed_companies(conn, "empresas_scored") == 4
+    assert incremental.load_previous_hashes(conn, estado) is False
+    assert incremental.compute_delta(conn) == {"insert": 4, "update": 0, "delete": 0}
+    incremental.save_hashes(conn, estado)
+
+    criar_empresas(conn, [
+        ("00000000000001", "MG", 90, [7, 13]),   # sem alteração
+        ("00000000000002", "RJ", 60, [6, 14]),   # ODS alterado
+        ("00000000000004", "MG", 10, None),      # mudou de UF
+        ("00000000000005", "RJ", 80, [7]),       # nova
+    ])                                           # 0003 removida
+    incremental.create_hashed_companies(conn, "empresas_scored")
+    assert incremental.load_previous_hashes(conn, estado) is True
+    assert incremental.compute_delta(conn) == {"insert": 1, "update": 2, "delete": 1}
+
+    mudancas = dict(conn.execute("SELECT cnpj, change FROM company_delta").fetchall())
+    assert mudancas == {
+        "00000000000002": "update",
+        "00000000000003": "delete",
+        "00000000000004": "update",
+        "00000000000005": "insert",
+    }
+    assert incremental.affected_partitions(conn) == ["MG", "RJ", "SP"]
+    conn.close()
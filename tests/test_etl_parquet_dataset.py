@@ -0,0 +1,96 @@
+"""
+Layout do dataset Parquet de empresas verdes: row groups ordenados, estatísticas e manifesto
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+duckdb = pytest.importorskip("duckdb")
+
+ETL_DIR = Path(__file__).resolve().parent.parent / "etl"
+sys.path.insert(0, str(ETL_DIR))
+
+from parquet_dataset import (  # noqa: E402
+    BLOOM_FILTERS_SUPPORTED, SORT_KEYS, dataset_files, publish_manifest, read_manifest,
+)
+from streaming import PartitionedParquetSink  # noqa: E402
+
+CNAES = ["3511-5/01", "3600-6/02", "3831-9/00", "4211-1/01"]
+
+
+def empresas(inicio, total, ufs=("MG", "RJ", "SP")):
+    linhas = [
+        {"cnpj": f"{i:014d}", "cnae_principal": CNAES[i * 7 % 4], "score_verde": i * 13 % 101,
+         "uf": ufs[i % len(ufs)]}
+        for i in range(inicio, inicio + total)
+    ]
+    tabela = pa.Table.from_pylist(linhas)
+    return tabela.sort_by([("uf", "ascending")] + SORT_KEYS)
+
+
+def gravar(raiz, tabela, lote=None):
+    with PartitionedParquetSink(raiz, row_group_size=100, sorted_by=SORT_KEYS) as sink:
+        for inicio in range(0, tabela.num_rows, lote or tabela.num_rows):
+            sink.write(tabela.slice(inicio, lote or tabela.num_rows))
+    return publish_manifest(raiz, sink.files)
+
+
+def test_particoes_ordenadas_com_row_groups_e_manifesto(tmp_path):
+    raiz = tmp_path / "empresas_verdes"
+    manifesto = gravar(raiz, empresas(0, 900), lote=64)
+
+    assert manifesto["schema_version"] == 1
+    assert manifesto["total_rows"] == 900
+    assert [f["path"].split("/")[0] for f in manifesto["files"]] == ["uf=MG", "uf=RJ", "uf=SP"]
+    assert {c["name"] for c in manifesto["schema"]} == {"cnpj", "cnae_principal", "score_verde"}
+    assert read_manifest(raiz) == manifesto
+
+    arquivo = raiz / manifesto["files"][0]["path"]
+    metadados = pq.read_metadata(arquivo)
+    assert [metadados.row_group(i).num_rows for i in range(metadados.num_row_groups)] == [100, 100, 100]
+    assert metadados.row_group(0).sorting_columns[0].column_index == 1
+    assert metadados.row_group(0).column(0).statistics.has_min_max
+
+    particao = pq.read_table(arquivo)
+    assert particao.to_pylist() == particao.sort_by(SORT_KEYS).to_pylist()
+
+    if BLOOM_FILTERS_SUPPORTED:
+        offsets = duckdb.sql(
+            f"SELECT bloom_filter_offset FROM parquet_metadata('{arquivo}') WHERE path_in_schema = 'cnpj'"
+        ).fetchall()
+        assert offsets and all(offset is not None for offset, in offsets)
+
+
+def test_nova_carga_substitui_so_as_particoes_escritas(tmp_path):
+    raiz = tmp_path / "empresas_verdes"
+    gravar(raiz, empresas(0, 300))
+    antigos = {p.parent.name: p for p in dataset_files(raiz)}
+
+    manifesto = gravar(raiz, empresas(1000, 50, ufs=("RJ",)))
+    assert manifesto["total_rows"] == 200 + 50
+    assert sorted(raiz.rglob("*.parquet")) == sorted(dataset_files(raiz))
+    assert not antigos["uf=RJ"].exists() and antigos["uf=MG"].exists()
+
+    # UF sem empresas sai do dataset
+    manifesto = publish_manifest(raiz, {"uf=SP": []})
+    assert manifesto["total_rows"] == 100 + 50
+    assert not (raiz / "uf=SP").exists()
+
+
+def test_falha_na_escrita_mantem_o_dataset_publicado(tmp_path):
+    raiz = tmp_path / "empresas_verdes"
+    gravar(raiz, empresas(0, 300))
+    publicado = read_manifest(raiz)
+
+    with pytest.raises(RuntimeError):
+        with PartitionedParquetSink(raiz, row_group_size=10) as sink:
+            sink.write(empresas(5000, 300))
+            raise RuntimeError("falha no meio da carga")
+
+    assert read_manifest(raiz) == publicado
+    assert sorted(p.name for p in raiz.rglob("*") if p.is_file()) == sorted(
+        [Path(f["path"]).name for f in publicado["files"]] + ["_manifest.json"]
+    )
@@ -0,0 +1,281 @@
+"""
+Pipeline do ETL de ponta a ponta (DuckDB -> Parquet -> SQLite) em diretórios temporários
+"""
+import random
+import sqlite3
+import sys
+import zipfile
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+pytest.importorskip("pandas")
+pytest.importorskip("dotenv")
+pytest.importorskip("psycopg2")
+
+import pyarrow.dataset as ds  # noqa: E402
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+ETL_DIR = ROOT_DIR / "etl"
+sys.path.insert(0, str(ETL_DIR))
+
+from config import ETLConfig  # noqa: E402
+from main import GreenJobsETL  # noqa: E402
+from parquet_dataset import dataset_files  # noqa: E402
+
+NAO_VERDES = ["4711-3/02", "6201-5/01", "8599-6/04"]
+UFS = ["MG", "RJ", "SP", "BA"]
+
+
+def shards_rfb(total_empresas, shards, seed=7):
+    """
+    Empresas e estabelecimentos sintéticos no layout da RFB (CNPJ básico de 8 dígitos,
+    datas YYYYMMDD, capital com vírgula), divididos em ``shards`` arquivos de cada tipo
+    """
+    rng = random.Random(seed)
+    verdes = [cnae for cnae in _seed_cnaes() if rng.random() < 0.5]
+    empresas, estabelecimentos = [], []
+    for i in range(total_empresas):
+        basico = f"{rng.randint(0, 99999999):08d}"
+        empresas.append([basico, f"Empresa São {i}", "2062", "49", f"{rng.randint(1, 10 ** 6)},00",
+                         rng.choice(["01", "03", "05"]), ""])
+        # Matriz e, às vezes, uma filial
+        for ordem in ["0001"] + (["0002"] if rng.random() < 0.3 else []):
+            cnaes = [rng.choice(verdes if rng.random() < 0.5 else NAO_VERDES) for _ in range(rng.randint(1, 4))]
+            estabelecimento = [""] * 30
+            estabelecimento[:13] = [
+                basico, ordem, f"{rng.randint(0, 99):02d}", "1" if ordem == "0001" else "2", f"Fantasia {i}",
+                rng.choice(["02", "08"]), "20200115", "00", "", "", rng.choice(["20180310", "00000000"]),
+                cnaes[0], ",".join(cnaes[1:]),
+            ]
+            estabelecimento[19:21] = [rng.choice(UFS), "Município Ação"]
+            estabelecimentos.append(estabelecimento)
+    return [empresas[i::shards] for i in range(shards)], [estabelecimentos[i::shards] for i in range(shards)]
+
+
+def _seed_cnaes():
+    linhas = (ETL_DIR / "cnae_green_seed.csv").read_text(encoding="utf-8").splitlines()[1:]
+    return [linha.split(",")[0] for linha in linhas if linha]
+
+
+def _csv_rfb(linhas):
+    return "".join(";".join(f'"{campo}"' for campo in linha) + "\n" for linha in linhas).encode("latin-1")
+
+
+def gravar_zips(raw, empresas, estabelecimentos):
+    """Um zip por shard, como a RFB publica (membro sem cabeçalho, latin-1, ';')"""
+    for prefixo, membro, shards in (("Empresas", "EMPRECSV", empresas),
+                                    ("Estabelecimentos", "ESTABCSV", estabelecimentos)):
+        for i, linhas in enumerate(shards):
+            with zipfile.ZipFile(raw / f"{prefixo}{i}.zip", "w", zipfile.ZIP_DEFLATED) as arquivo:
+                arquivo.writestr(f"K3241.K03200Y{i}.D40511.{membro}", _csv_rfb(linhas))
+
+
+def gravar_extraidos(raw, empresas, estabelecimentos):
+    """Os mesmos shards já extraídos dos zips"""
+    for prefixo, extensao, shards in (("Empresas", "EMPRECSV", empresas),
+                                      ("Estabelecimentos", "ESTABCSV", estabelecimentos)):
+        for i, linhas in enumerate(shards):
+            (raw / f"{prefixo}{i}.{extensao}").write_bytes(_csv_rfb(linhas))
+
+
+@pytest.fixture
+def rodar(monkeypatch):
+    """Roda o pipeline em ``pasta`` (dados brutos em pasta/raw, gjb_dev.db na pasta) com a configuração dada"""
+    def executar(pasta, **ajustes):
+        (pasta / "raw").mkdir(parents=True, exist_ok=True)
+        ajustes = {
+            "RAW_DIR": pasta / "raw",
+            "PROCESSED_DIR": pasta / "processed",
+            "HASH_STATE_FILE": pasta / "processed" / "empresas_verdes_hashes.parquet",
+            "CNAE_GREEN_SEED": ETL_DIR / "cnae_green_seed.csv",
+            "LOAD_TARGET": "sqlite",
+            "DUCKDB_PATH": "",
+            "MAX_WORKERS": 1,
+            "STREAMING_ENABLED": False,
+            "INCREMENTAL_ENABLED": False,
+            **ajustes,
+        }
+        # validate_config lê os atributos da classe
+        for nome, valor in ajustes.items():
+            monkeypatch.setattr(ETLConfig, nome, valor)
+        monkeypatch.chdir(pasta)
+        if not (pasta / "gjb_dev.db").exists():
+            conn = sqlite3.connect(pasta / "gjb_dev.db")
+            conn.executescript((ROOT_DIR / "db" / "schema_sqlite.sql").read_text(encoding="utf-8"))
+            conn.close()
+
+        with GreenJobsETL() as etl:
+            etl.run_pipeline()
+        return etl
+
+    return executar
+
+
+def parquet(pasta):
+    """Linhas do dataset empresas_verdes ordenadas por CNPJ, sem a data da carga"""
+    raiz = pasta / "processed" / "empresas_verdes"
+    tabela = ds.dataset([str(arquivo) for arquivo in dataset_files(raiz)], format="parquet",
+                        partitioning="hive", partition_base_dir=str(raiz)).to_table()
+    return tabela.drop_columns(["atualizado_em"]).sort_by("cnpj").to_pylist()
+
+
+def banco(pasta):
+    """empresas_verdes e empresa_cnae do SQLite, sem a data da carga"""
+    conn = sqlite3.connect(pasta / "gjb_dev.db")
+    empresas = conn.execute(
+        "SELECT cnpj, razao_social, nome_fantasia, cnae_principal, cnaes_secundarias, porte, uf, municipio, "
+        "situacao_cadastral, data_abertura, score_verde, ods_tags, fonte_atualizacao "
+        "FROM empresas_verdes ORDER BY cnpj"
+    ).fetchall()
+    links = conn.execute("SELECT cnpj, codigo_cnae FROM empresa_cnae ORDER BY 1, 2").fetchall()
+    conn.close()
+    return empresas, links
+
+
+def test_streaming_igual_ao_lote(tmp_path, rodar):
+    """Com STREAMING_ENABLED, lotes de CHUNK_SIZE geram o mesmo Parquet e a mesma carga que o modo em lote"""
+    rodar(tmp_path / "lote")
+    rodar(tmp_path / "streaming", STREAMING_ENABLED=True, CHUNK_SIZE=3)
+
+    esperado = parquet(tmp_path / "lote")
+    assert len(esperado) == 10
+    assert parquet(tmp_path / "streaming") == esperado
+    assert banco(tmp_path / "streaming") == banco(tmp_path / "lote")
+    assert {linha[10] for linha in banco(tmp_path / "lote")[0]} != {0}
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_recarga_completa_remove_uf_fora_do_alvo(tmp_path, rodar, streaming):
+    """Uma carga completa que deixa de ter uma UF apaga a partição dela do Parquet e do manifesto"""
+    empresas, estabelecimentos = shards_rfb(200, 2)
+    for nome in ("recarga", "direto"):
+        (tmp_path / nome / "raw").mkdir(parents=True)
+        gravar_zips(tmp_path / nome / "raw", empresas, estabelecimentos)
+
+    pasta = tmp_path / "recarga"
+    rodar(pasta, STREAMING_ENABLED=streaming, CHUNK_SIZE=7)
+    assert {linha["uf"] for linha in parquet(pasta)} == {"MG", "RJ", "SP"}
+
+    rodar(pasta, STREAMING_ENABLED=streaming, CHUNK_SIZE=7, TARGET_UFS=["MG", "SP"])
+    rodar(tmp_path / "direto", STREAMING_ENABLED=streaming, CHUNK_SIZE=7, TARGET_UFS=["MG", "SP"])
+
+    raiz = pasta / "processed" / "empresas_verdes"
+    assert not (raiz / "uf=RJ").exists()
+    assert {arquivo.parent.name for arquivo in dataset_files(raiz)} == {"uf=MG", "uf=SP"}
+    assert parquet(pasta) == parquet(tmp_path / "direto")
+    assert banco(pasta) == banco(tmp_path / "direto")
+
+
+def test_shards_em_paralelo_iguais_ao_serial(tmp_path, rodar):
+    """MAX_WORKERS=4 carrega cada shard numa tabela de staging e o merge dá as mesmas tabelas do serial"""
+    empresas, estabelecimentos = shards_rfb(400, 4)
+    tabelas, relatorios = {}, {}
+    for workers in (1, 4):
+        pasta = tmp_path / f"workers_{workers}"
+        (pasta / "raw").mkdir(parents=True)
+        gravar_zips(pasta / "raw", empresas, estabelecimentos)
+        etl = rodar(pasta, MAX_WORKERS=workers, DUCKDB_PATH=str(pasta / "etl.duckdb"))
+
+        conn = duckdb.connect(str(pasta / "etl.duckdb"))
+        tabelas[workers] = {
+            tabela: conn.execute(f"SELECT * FROM {tabela}").fetchall() for tabela in ("empresas", "estabelecimentos")
+        }
+        assert not conn.execute("SELECT * FROM duckdb_tables() WHERE table_name LIKE '%_shard_%'").fetchall()
+        conn.close()
+        relatorios[workers] = sorted(
+            (shard["table"], shard["file"], shard["bytes"], shard["rows"])
+            for shard in etl.report.details["shard_timings"]
+        )
+        merges = {"merge_empresas", "merge_estabelecimentos"} & set(etl.report.query_profiles)
+        assert merges == (set() if workers == 1 else {"merge_empresas", "merge_estabelecimentos"})
+        assert parquet(pasta)
+
+    # Serial insere shard a shard; o merge paralelo ordena estabelecimentos por UF
+    ufs = [linha[19] for linha in tabelas[4]["estabelecimentos"]]
+    assert ufs == sorted(ufs)
+    for tabela in ("empresas", "estabelecimentos"):
+        assert sorted(tabelas[4][tabela]) == sorted(tabelas[1][tabela])
+    assert len(tabelas[1]["empresas"]) == 400
+    assert {linha[3] for linha in tabelas[1]["estabelecimentos"]} == {"1"}
+    assert {linha[19] for linha in tabelas[1]["estabelecimentos"]} == {"MG", "RJ", "SP"}
+
+    assert relatorios[4] == relatorios[1]
+    assert [arquivo for _, arquivo, _, _ in relatorios[1]] == (
+        [f"Empresas{i}.zip" for i in range(4)] + [f"Estabelecimentos{i}.zip" for i in range(4)]
+    )
+    linhas_estabelecimentos = sum(linhas for tabela, _, _, linhas in relatorios[1] if tabela == "estabelecimentos")
+    assert linhas_estabelecimentos == len(tabelas[1]["estabelecimentos"])
+    assert parquet(tmp_path / "workers_4") == parquet(tmp_path / "workers_1")
+
+
+def test_zip_e_arquivos_extraidos_dao_o_mesmo_resultado(tmp_path, rodar):
+    """Shards extraídos passam pelo mesmo parse da RFB que os membros dos zips (sem cabeçalho, latin-1, datas)"""
+    empresas, estabelecimentos = shards_rfb(200, 2)
+    tabelas = {}
+    for formato, gravar in (("zip", gravar_zips), ("extraido", gravar_extraidos)):
+        pasta = tmp_path / formato
+        (pasta / "raw").mkdir(parents=True)
+        gravar(pasta / "raw", empresas, estabelecimentos)
+        rodar(pasta, DUCKDB_PATH=str(pasta / "etl.duckdb"))
+
+        conn = duckdb.connect(str(pasta / "etl.duckdb"))
+        tabelas[formato] = {
+            tabela: sorted(conn.execute(f"SELECT * FROM {tabela}").fetchall())
+            for tabela in ("empresas", "estabelecimentos")
+        }
+        conn.close()
+
+    assert tabelas["extraido"] == tabelas["zip"]
+    assert len(tabelas["zip"]["empresas"]) == 200
+    assert any(linha[1] == "Empresa São 0" for linha in tabelas["zip"]["empresas"])
+    assert {linha[10] for linha in tabelas["zip"]["estabelecimentos"]} == {date(2018, 3, 10), None}
+    assert parquet(tmp_path / "extraido") == parquet(tmp_path / "zip")
+    assert banco(tmp_path / "extraido") == banco(tmp_path / "zip")
+
+
+def test_retomada_pelos_checkpoints(tmp_path, rodar, monkeypatch):
+    """Falha depois de process_green_companies: a nova execução retoma sem recarregar a RFB e limpa os checkpoints"""
+    empresas, estabelecimentos = shards_rfb(200, 2)
+    for nome in ("direto", "retomado"):
+        (tmp_path / nome / "raw").mkdir(parents=True)
+        gravar_zips(tmp_path / nome / "raw", empresas, estabelecimentos)
+    rodar(tmp_path / "direto")
+
+    pasta = tmp_path / "retomado"
+    duckdb_path = str(pasta / "etl.duckdb")
+    carregar_rfb = GreenJobsETL.load_rfb_data
+    chamadas = []
+
+    def load_rfb_data(self):
+        chamadas.append("load_rfb_data")
+        carregar_rfb(self)
+
+    def save_to_parquet(self, df):
+        raise RuntimeError("disco cheio")
+
+    monkeypatch.setattr(GreenJobsETL, "load_rfb_data", load_rfb_data)
+    with monkeypatch.context() as falha:
+        falha.setattr(GreenJobsETL, "save_to_parquet", save_to_parquet)
+        with pytest.raises(RuntimeError):
+            rodar(pasta, DUCKDB_PATH=duckdb_path)
+
+    conn = duckdb.connect(duckdb_path)
+    assert sorted(linha[0] for linha in conn.execute("SELECT stage FROM etl_checkpoints").fetchall()) == [
+        "load_rfb_data", "process_green_companies"]
+    conn.close()
+
+    etl = rodar(pasta, DUCKDB_PATH=duckdb_path)
+    assert chamadas == ["load_rfb_data"]
+    etapas = {etapa["name"]: etapa["status"] for etapa in etl.report.stages}
+    assert etapas == {"load_rfb_data": "skipped", "process_green_companies": "skipped",
+                      "save_to_parquet": "success", "load_to_postgres": "success"}
+
+    assert parquet(pasta) == parquet(tmp_path / "direto")
+    assert banco(pasta) == banco(tmp_path / "direto")
+    conn = duckdb.connect(duckdb_path)
+    assert conn.execute("SELECT COUNT(*) FROM etl_checkpoints").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,139 @@
+"""
+Índice de CNAEs verdes do RealDataProcessor (busca O(1) por CNAE)
+"""
+import random
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+pytest.importorskip("requests")
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "etl"))
+
+from real_data_processor import CLASSIFICATION_SCORES, RealDataProcessor  # noqa: E402
+
+
+@pytest.fixture
+def processor(tmp_path):
+    db_path = tmp_path / "gjb.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript((ROOT_DIR / "db" / "schema_sqlite.sql").read_text())
+    seed = pd.read_csv(ROOT_DIR / "etl" / "cnae_green_seed.csv")
+    seed.to_sql("cnae_green", conn, if_exists="append", index=False)
+    conn.close()
+    return RealDataProcessor(str(db_path))
+
+
+def score_sequencial(processor, cnaes):
+    """Busca linear original, usada como referência"""
+    if not cnaes:
+        return 0
+    total, encontrados = 0, 0
+    for cnae in cnaes:
+        normalizado = processor._normalize_cnae(cnae)
+        for verde, info in processor.green_cnaes.items():
+            if normalizado == processor._normalize_cnae(verde):
+                encontrados += 1
+                total += CLASSIFICATION_SCORES.get(info['classificacao'], 0)
+                break
+    if encontrados == 0:
+        return 0
+    return min(100, int(total / encontrados + encontrados / len(cnaes) * 20))
+
+
+def test_score_igual_a_busca_sequencial(processor):
+    rng = random.Random(7)
+    verdes = list(processor.green_cnaes)
+    formatos = [lambda c: c, lambda c: c.replace("-", "").replace("/", ""), lambda c: c[:4] + "." + c[5:]]
+    nao_verdes = ["4711-3/02", "6201501", "8599-6/04", "", None, "00.00-0-00"]
+
+    for _ in range(2000):
+        cnaes = [
+            rng.choice(formatos)(rng.choice(verdes)) if rng.random() < 0.4 else rng.choice(nao_verdes)
+            for _ in range(rng.randint(0, 8))
+        ]
+        assert processor.calculate_green_score(cnaes) == score_sequencial(processor, cnaes), cnaes
+
+
+def test_classe_de_quatro_digitos_usa_indice_por_classe(processor):
+    """Códigos só com a classe casam com o CNAE verde de maior pontuação da classe"""
+    assert processor.match_green_cnae("3511")["cnae"].startswith("3511")
+    assert processor.match_green_cnae("35.11-5")["classificacao"] == "Core"
+    assert processor.match_green_cnae("4711") is None
+    # Subclasse completa não verde não cai no índice por classe
+    assert processor.match_green_cnae("3511-5/99") is None
+
+
+def escrever_csv(processor, caminho, total, seed=3):
+    """CSV no formato da Receita com cabeçalho, misturando CNAEs verdes e não verdes"""
+    rng = random.Random(seed)
+    verdes = list(processor.green_cnaes)
+    nao_verdes = ["4711-3/02", "6201-5/01", "8599-6/04"]
+
+    def sortear():
+        return rng.choice(verdes if rng.random() < 0.3 else nao_verdes)
+
+    linhas = []
+    for i in range(total):
+        secundarias = [sortear() for _ in range(rng.randint(0, 5))]
+        linhas.append({
+            "cnpj": f"{i:014d}",
+            "razao_social": f"Empresa {i}",
+            "nome_fantasia": None,
+            "situacao_cadastral": "02",
+            "municipio": "Niterói",
+            "uf": "RJ",
+            "cep": "24000000",
+            "cnae_fiscal_principal": None if rng.random() < 0.05 else sortear(),
+            "cnae_fiscal_secundaria": ", ".join(secundarias) or None,
+        })
+    pd.DataFrame(linhas).to_csv(caminho, sep=";", index=False, encoding="latin-1")
+    return linhas
+
+
+def test_classificacao_vetorizada_igual_ao_score_por_empresa(processor, tmp_path):
+    csv = tmp_path / "estabelecimentos.csv"
+    linhas = escrever_csv(processor, csv, 3000)
+
+    esperado = {}
+    for linha in linhas:
+        cnaes = [linha["cnae_fiscal_principal"]] if linha["cnae_fiscal_principal"] else []
+        cnaes += [c.strip() for c in (linha["cnae_fiscal_secundaria"] or "").split(",") if c.strip()]
+        score = processor.calculate_green_score(cnaes)
+        if score > 0:
+            esperado[linha["cnpj"]] = (score, [c for c in cnaes if processor.match_green_cnae(c)])
+
+    amostra = processor.process_receita_federal_csv(str(csv), sample_size=len(linhas))
+    assert {e["cnpj"]: (e["green_score"], e["green_cnaes"]) for e in amostra} == esperado
+
+    saida = tmp_path / "verdes.parquet"
+    total = processor.classify_receita_federal_csv(str(csv), str(saida), workers=2, chunk_size=500)
+    completo = pd.read_parquet(saida)
+    assert total == len(esperado)
+    assert completo["cnpj"].tolist() == [e["cnpj"] for e in amostra]
+    assert {
+        cnpj: (score, list(cnaes))
+        for cnpj, score, cnaes in zip(completo["cnpj"], completo["green_score"], completo["green_cnaes"])
+    } == esperado
+
+
+def test_salvar_empresas_em_lote(processor):
+    def empresa(cnpj, score, cnaes):
+        return {"cnpj": cnpj, "nome": f"Empresa {cnpj}", "green_score": score, "situacao": "ATIVA",
+                "uf": "MG", "atividade_principal": cnaes[0], "green_cnaes": cnaes}
+
+    primeira = [empresa(f"{i:014d}", 80, ["3511-5/01", "3831-9/00"]) for i in range(25)]
+    assert processor.save_green_companies(primeira, batch_size=10) == {"inserted": 25, "updated": 0, "skipped": 0}
+
+    segunda = [empresa(f"{i:014d}", 60, ["3511-5/02"]) for i in range(20, 30)] + [{"cnpj": "1", "nome": None}]
+    assert processor.save_green_companies(segunda, batch_size=4) == {"inserted": 5, "updated": 5, "skipped": 1}
+
+    conn = sqlite3.connect(processor.db_path)
+    assert conn.execute("SELECT COUNT(*), SUM(score_verde) FROM empresas_verdes").fetchone() == (30, 20 * 80 + 10 * 60)
+    assert conn.execute("SELECT COUNT(*) FROM empresa_cnae").fetchone()[0] == 25 * 2 + 10
+    conn.close()
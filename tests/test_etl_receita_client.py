@@ -0,0 +1,140 @@
+"""
+Cliente ReceitaWS: rate limit, retries e cache em disco contra um servidor HTTP local
+"""
+import asyncio
+import json
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+
+ETL_DIR = Path(__file__).resolve().parent.parent / "etl"
+sys.path.insert(0, str(ETL_DIR))
+
+from receita_client import ReceitaWSClient, ReceitaWSError  # noqa: E402
+
+
+class ReceitaStub(BaseHTTPRequestHandler):
+    """Responde como a ReceitaWS; CNPJs terminados em 99 não existem, em 98 falham duas vezes e em 97 devolvem HTML"""
+
+    def do_GET(self):
+        server = self.server
+        cnpj = self.path.rstrip("/").split("/")[-1]
+        with server.lock:
+            server.hits.append(cnpj)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            falhas = server.hits.count(cnpj) <= 2 and cnpj.endswith("98")
+        time.sleep(server.delay)
+
+        if falhas:
+            status, corpo = 503, {}
+        elif cnpj.endswith("99"):
+            status, corpo = 200, {"status": "ERROR", "message": "CNPJ inválido"}
+        else:
+            status, corpo = 200, {"status": "OK", "cnpj": cnpj, "nome": f"Empresa {cnpj}", "situacao": "ATIVA"}
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b"<html>Manuten\xc3\xa7\xc3\xa3o</html>" if cnpj.endswith("97") else json.dumps(corpo).encode())
+        with server.lock:
+            server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ReceitaStub)
+    server.lock = threading.Lock()
+    server.hits, server.active, server.max_active, server.delay = [], 0, 0, 0.0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def cliente(stub, tmp_path, **kwargs):
+    opcoes = {"rate_per_minute": 60000, "burst": 50, "backoff_seconds": 0.01}
+    opcoes.update(kwargs)
+    return ReceitaWSClient(
+        base_url=f"http://127.0.0.1:{stub.server_address[1]}/v1/cnpj",
+        cache_path=tmp_path / "cache.sqlite", cache_ttl_days=30, **opcoes
+    )
+
+
+def test_consultas_repetidas_usam_o_cache(stub, tmp_path):
+    cnpjs = [f"{i:014d}" for i in range(20)]
+    client = cliente(stub, tmp_path)
+
+    primeira = asyncio.run(client.fetch_many(cnpjs * 3))
+    assert len(stub.hits) == 20
+    assert all(primeira[cnpj]["nome"] == f"Empresa {cnpj}" for cnpj in cnpjs)
+
+    asyncio.run(client.fetch_many(cnpjs))
+    assert len(stub.hits) == 20
+    assert client.stats["cache_hits"] == 20
+    client.close()
+
+    # O cache sobrevive a um novo cliente, até o TTL expirar
+    client = cliente(stub, tmp_path)
+    asyncio.run(client.fetch(cnpjs[0]))
+    assert len(stub.hits) == 20
+    conn = sqlite3.connect(tmp_path / "cache.sqlite")
+    conn.execute("UPDATE receita_ws_cache SET fetched_at = fetched_at - 31 * 86400")
+    conn.commit()
+    asyncio.run(client.fetch(cnpjs[0]))
+    assert len(stub.hits) == 21
+    client.close()
+
+
+def test_nao_encontrado_e_retry(stub, tmp_path):
+    client = cliente(stub, tmp_path)
+    assert asyncio.run(client.fetch("11.222.333/0001-99")) is None
+    assert asyncio.run(client.fetch("11222333000199")) is None
+    assert stub.hits == ["11222333000199"]
+
+    assert asyncio.run(client.fetch("11222333000198"))["status"] == "OK"
+    assert client.stats["retries"] == 2
+    client.close()
+
+
+def test_json_invalido_vira_erro_sem_derrubar_o_lote(stub, tmp_path):
+    """Corpo que não é JSON é repetido e, esgotadas as tentativas, vira ReceitaWSError"""
+    client = cliente(stub, tmp_path, max_retries=2)
+    with pytest.raises(ReceitaWSError):
+        asyncio.run(client.fetch("11222333000197"))
+    assert stub.hits == ["11222333000197"] * 3
+
+    resultados = asyncio.run(client.fetch_many(["11222333000197", "11222333000100"]))
+    assert resultados["11222333000197"] is None
+    assert resultados["11222333000100"]["status"] == "OK"
+    client.close()
+
+
+def test_concorrencia_e_limite_de_taxa(stub, tmp_path):
+    stub.delay = 0.2
+    cnpjs = [f"{i:014d}" for i in range(10)]
+
+    client = cliente(stub, tmp_path)
+    inicio = time.perf_counter()
+    asyncio.run(client.fetch_many(cnpjs, concurrency=10))
+    assert time.perf_counter() - inicio < 1.5
+    assert stub.max_active > 1
+    client.close()
+
+    # 10 req/s sem rajada: 6 consultas novas levam pelo menos 0,5s
+    stub.delay = 0.0
+    client = cliente(stub, tmp_path / "lento", rate_per_minute=600, burst=1)
+    inicio = time.perf_counter()
+    asyncio.run(client.fetch_many([f"{i:014d}" for i in range(100, 106)]))
+    assert time.perf_counter() - inicio >= 0.45
+    client.close()
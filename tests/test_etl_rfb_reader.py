@@ -0,0 +1,48 @@
+"""
+Leitura direta dos arquivos zip da RFB (latin-1, ';', sem cabeçalho)
+"""
+import sys
+import zipfile
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+ETL_DIR = Path(__file__).resolve().parent.parent / "etl"
+sys.path.insert(0, str(ETL_DIR))
+
+import rfb_reader  # noqa: E402
+
+COLUNAS = [
+    ("cnpj", "VARCHAR"),
+    ("razao_social", "VARCHAR"),
+    ("capital_social", "DECIMAL(18,3)"),
+    ("data_inicio_atividade", "DATE"),
+]
+
+
+def test_zip_rfb_tipado(tmp_path):
+    """Membros do zip são lidos sem extração e convertidos para os tipos da tabela"""
+    conteudo = (
+        '"12345678";"Energia Solar São João";"1000,50";"20200115"\n'
+        '"87654321";"Reciclagem Ação";"";"00000000"\n'
+    )
+    arquivo = tmp_path / "Empresas0.zip"
+    with zipfile.ZipFile(arquivo, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("K3241.K03200Y0.D40511.EMPRECSV", conteudo.encode("latin-1"))
+
+    conn = duckdb.connect(":memory:")
+    conn.register("empresas_raw", rfb_reader.open_zip_csv(arquivo, [nome for nome, _ in COLUNAS]))
+    linhas = conn.execute(
+        f"SELECT * FROM {rfb_reader.typed_select('empresas_raw', COLUNAS)} ORDER BY cnpj"
+    ).fetchall()
+    conn.close()
+
+    assert linhas == [
+        ("12345678", "Energia Solar São João", Decimal("1000.500"), date(2020, 1, 15)),
+        ("87654321", "Reciclagem Ação", None, None),
+    ]
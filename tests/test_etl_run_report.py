@@ -0,0 +1,70 @@
+"""
+Relatório de execução do ETL (tempo, linhas e memória por etapa)
+"""
+import json
+import sys
+from pathlib import Path
+
+ETL_DIR = Path(__file__).resolve().parent.parent / "etl"
+sys.path.insert(0, str(ETL_DIR))
+
+from run_report import RunReport, compare_reports, load_report  # noqa: E402
+
+
+def executar(diretorio, linhas):
+    relatorio = RunReport()
+    with relatorio.stage("load_rfb_data") as etapa:
+        etapa.rows_out = linhas
+        etapa.bytes_read = 1024
+    with relatorio.stage("save_to_parquet") as etapa:
+        etapa.skipped = True
+    relatorio.finish("success")
+    return relatorio.write(diretorio)
+
+
+def test_relatorio_e_comparacao(tmp_path):
+    """O relatório anterior é preservado e a comparação lista cada etapa"""
+    executar(tmp_path, 100)
+    caminho = executar(tmp_path, 150)
+
+    atual = load_report(caminho)
+    anterior = load_report(tmp_path / "run_report.previous.json")
+
+    assert atual["status"] == "success"
+    assert [etapa["name"] for etapa in atual["stages"]] == ["load_rfb_data", "save_to_parquet"]
+    assert atual["stages"][0]["rows_out"] == 150
+    assert atual["stages"][0]["bytes_read"] == 1024
+    assert atual["stages"][1]["status"] == "skipped"
+    assert anterior["stages"][0]["rows_out"] == 100
+    json.dumps(atual)
+
+    tabela = compare_reports(anterior, atual)
+    linha = next(linha for linha in tabela.splitlines() if linha.startswith("load_rfb_data"))
+    assert "150" in linha and "100" in linha
+    assert any(linha.startswith("total") for linha in tabela.splitlines())
+
+
+def test_etapa_com_falha_e_registrada():
+    """Uma etapa que lança exceção fica com status failed"""
+    relatorio = RunReport()
+    try:
+        with relatorio.stage("load_to_postgres"):
+            raise RuntimeError("falha")
+    except RuntimeError:
+        pass
+    assert relatorio.stages[0]["status"] == "failed"
+
+
+def test_pico_de_memoria_e_por_etapa():
+    """Uma etapa leve depois de uma pesada registra o próprio pico, não o do processo"""
+    relatorio = RunReport()
+    with relatorio.stage("process_green_companies"):
+        bloco = b"x" * (200 << 20)
+    del bloco
+    with relatorio.stage("save_to_parquet"):
+        pass
+
+    pesada, leve = (etapa["peak_rss_mb"] for etapa in relatorio.stages)
+    if pesada is None:
+        return  # plataforma sem medida de RSS
+    assert pesada - leve > 150
@@ -0,0 +1,95 @@
+"""
+Paridade do score verde e das tags ODS calculados no DuckDB
+com a implementação Python (ScoringRules.calculate_score / _calculate_ods_tags)
+"""
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+pa = pytest.importorskip("pyarrow")
+pytest.importorskip("pandas")
+pytest.importorskip("dotenv")
+
+ETL_DIR = Path(__file__).resolve().parent.parent / "etl"
+sys.path.insert(0, str(ETL_DIR))
+
+from config import config, ScoringRules  # noqa: E402
+from main import GreenJobsETL  # noqa: E402
+
+
+@pytest.fixture
+def etl(monkeypatch):
+    monkeypatch.setattr(config, "CNAE_GREEN_SEED", ETL_DIR / "cnae_green_seed.csv")
+    pipeline = GreenJobsETL()
+    pipeline.duckdb_conn = duckdb.connect(":memory:")
+    pipeline.load_cnae_green_mapping()
+    pipeline.register_cnae_green_table()
+    yield pipeline
+    pipeline.duckdb_conn.close()
+
+
+def gerar_empresas(etl, total, seed=42):
+    """Gera empresas sintéticas misturando CNAEs verdes, não verdes e casos de borda"""
+    rng = random.Random(seed)
+    verdes = list(etl.cnae_green_mapping.keys())
+    nao_verdes = ["4711-3/02", "6201-5/01", "8599-6/04", "4930-2/02", "1011-2/01"]
+    situacoes = ["ATIVA", "02", "BAIXADA", None]
+
+    def sortear_cnae():
+        cnae = rng.choice(verdes if rng.random() < 0.5 else nao_verdes)
+        return f" {cnae}" if rng.random() < 0.05 else cnae
+
+    empresas = []
+    for i in range(total):
+        empresas.append({
+            "cnpj": f"{i:014d}",
+            "cnae_principal": None if rng.random() < 0.02 else sortear_cnae(),
+            "cnaes_secundarias": [sortear_cnae() for _ in range(rng.randint(0, 9))],
+            "situacao_cadastral": rng.choice(situacoes),
+        })
+    return empresas
+
+
+def test_score_e_ods_sql_iguais_ao_python(etl):
+    empresas = gerar_empresas(etl, 5000)
+    etl.duckdb_conn.register("empresas_arrow", pa.Table.from_pylist(empresas))
+    etl.duckdb_conn.execute("CREATE TABLE green_companies AS SELECT * FROM empresas_arrow")
+    etl._create_scored_view()
+
+    cursor = etl.duckdb_conn.execute("SELECT * FROM green_companies_scored")
+    colunas = [coluna[0] for coluna in cursor.description]
+    resultado = {row[0]: dict(zip(colunas, row)) for row in cursor.fetchall()}
+
+    assert len(resultado) == len(empresas)
+    for empresa in empresas:
+        esperado_score = ScoringRules.calculate_score(
+            empresa["cnae_principal"],
+            empresa["cnaes_secundarias"],
+            empresa["situacao_cadastral"],
+            etl.cnae_priorities,
+        )
+        esperado_ods = etl._calculate_ods_tags(empresa)
+
+        obtido = resultado[empresa["cnpj"]]
+        assert obtido["score_verde"] == esperado_score, empresa
+        assert obtido["ods_tags"] == esperado_ods, empresa
+
+
+def test_limite_de_cnaes_secundarios(etl):
+    core = [cnae for cnae, prioridade in etl.cnae_priorities.items() if prioridade == "Core"]
+    empresa = {
+        "cnpj": "00000000000001",
+        "cnae_principal": "4711-3/02",
+        # Apenas os 5 primeiros secundários pontuam, e o total é limitado
+        "cnaes_secundarias": ["4711-3/02"] * 4 + core[:3],
+        "situacao_cadastral": "ATIVA",
+    }
+    etl.duckdb_conn.register("empresa_arrow", pa.Table.from_pylist([empresa]))
+    etl.duckdb_conn.execute("CREATE TABLE green_companies AS SELECT * FROM empresa_arrow")
+    etl._create_scored_view()
+
+    score = etl.duckdb_conn.execute("SELECT score_verde FROM green_companies_scored").fetchone()[0]
+    assert score == ScoringRules.SECONDARY_CNAE_SCORE